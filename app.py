@@ -19,7 +19,10 @@ from update_manager import UpdateManager
 from proxbalance.config_manager import (
     BASE_PATH, CACHE_FILE, GIT_REPO_PATH, SESSIONS_DIR, load_config,
 )
+from proxbalance.constants import COMPRESS_BR_LEVEL, COMPRESS_LEVEL
 from proxbalance.cache import CacheManager
+from proxbalance.response_cache import ResponseCache
+from proxbalance.snapshot import SnapshotReader
 from proxbalance.db import init_db
 from proxbalance.routes import register_blueprints
 from proxbalance.error_handlers import register_error_handlers
@@ -34,6 +37,9 @@ app = Flask(__name__, static_folder='.', static_url_path='')
 _startup_cfg = load_config()
 _cors_origins = _startup_cfg.get('cors_origins', []) if not _startup_cfg.get('error') else []
 CORS(app, origins=_cors_origins)
+# Same levels as the payloads the collector pre-compresses into the snapshot
+app.config['COMPRESS_LEVEL'] = COMPRESS_LEVEL
+app.config['COMPRESS_BR_LEVEL'] = COMPRESS_BR_LEVEL
 Compress(app)
 
 
@@ -70,10 +76,20 @@ GIT_CMD = '/usr/bin/git'
 update_manager = UpdateManager(GIT_REPO_PATH, GIT_CMD)
 app.config['update_manager'] = update_manager
 
-# In-memory cache with 60-second TTL (used by all data-reading blueprints)
-cache_manager = CacheManager(cache_file=CACHE_FILE, ttl_seconds=60)
+# In-memory cache reloaded once per collection (used by all data-reading blueprints)
+cache_manager = CacheManager(cache_file=CACHE_FILE)
 app.config['cache_manager'] = cache_manager
 
+# Pre-serialized, pre-compressed payloads for the polled read endpoints,
+# rebuilt once per cache generation at the flask-compress levels
+app.config['response_cache'] = ResponseCache(
+    gzip_level=app.config['COMPRESS_LEVEL'], brotli_level=app.config['COMPRESS_BR_LEVEL'],
+)
+
+# Read-only mapping of the collector's shared snapshot; the polled payloads
+# are served from it so workers do not each hold a copy
+app.config['snapshot_reader'] = SnapshotReader(CACHE_FILE)
+
 # Ensure evacuation sessions directory exists
 if not os.path.exists(SESSIONS_DIR):
     os.makedirs(SESSIONS_DIR, exist_ok=True)
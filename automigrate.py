@@ -33,10 +33,13 @@ CONFIG_FILE = BASE_DIR / "config.json"
 CACHE_FILE = BASE_DIR / "cluster_cache.json"
 LOCK_FILE = BASE_DIR / "automigrate.lock"
 
+from proxbalance.cluster_cache import CORE_SECTIONS, read_cluster_cache
+
 # SQLite modules
 from proxbalance.db import init_db, close_all as db_close_all
 from proxbalance import migration_db
 from proxbalance.forecasting import get_score_history
+from proxbalance.tag_index import TagIndex, index_guests
 
 # Logging
 logging.basicConfig(
@@ -133,13 +136,12 @@ def load_config() -> Dict[str, Any]:
 
 
 def read_cache() -> Dict[str, Any]:
-    """Read data from cache.json."""
-    if not CACHE_FILE.exists():
+    """Read the cluster cache sections needed for migration decisions (no chart data)."""
+    data = read_cluster_cache(str(CACHE_FILE), CORE_SECTIONS)
+    if data is None:
         logger.error(f"Cache file not found: {CACHE_FILE}")
         sys.exit(1)
-
-    with open(CACHE_FILE, 'r') as f:
-        return json.load(f)
+    return data
 
 
 def load_history() -> Dict[str, Any]:
@@ -326,11 +328,21 @@ def can_auto_migrate(guest: Dict[str, Any], rules: Dict[str, Any]) -> Tuple[bool
     return True, "OK"
 
 
+def build_exclude_group_index(cache_data: Dict[str, Any]) -> TagIndex:
+    """Index cached guests by exclude group and node, keyed by vmid."""
+    return index_guests(
+        cache_data.get('guests', {}),
+        lambda g: _extract_exclude_groups(g.get('tags', '')),
+        key_of=lambda _key, g: g.get('vmid'),
+    )
+
+
 def check_exclude_group_affinity(
     guest: Dict[str, Any],
     target_node: str,
     cache_data: Dict[str, Any],
-    rules: Dict[str, Any]
+    rules: Dict[str, Any],
+    tag_index: Optional[TagIndex] = None
 ) -> Tuple[bool, str]:
     """
     Prevent VMs with same exclude_* tag from clustering on same node.
@@ -341,6 +353,8 @@ def check_exclude_group_affinity(
         target_node: Target node name
         cache_data: Current cluster data
         rules: Automation rules
+        tag_index: build_exclude_group_index(cache_data), shared across
+            calls that check the same cache_data (built here if omitted)
 
     Returns:
         Tuple of (ok, reason)
@@ -354,25 +368,13 @@ def check_exclude_group_affinity(
     if not exclude_groups:
         return True, "No exclude groups"
 
-    # Count VMs per node per exclude group
-    for exclude_group in exclude_groups:
-        target_count = 0
-        other_nodes_counts = {}
-
-        for vmid, other_guest in cache_data.get('guests', {}).items():
-            if other_guest.get('vmid') == guest.get('vmid'):
-                continue
+    if tag_index is None:
+        tag_index = build_exclude_group_index(cache_data)
 
-            # Extract other guest's exclude groups - handle both dict and string formats
-            other_exclude_groups = _extract_exclude_groups(other_guest.get('tags', ''))
-            if exclude_group not in other_exclude_groups:
-                continue
-
-            node = other_guest.get('node')
-            if node == target_node:
-                target_count += 1
-            else:
-                other_nodes_counts[node] = other_nodes_counts.get(node, 0) + 1
+    # Count other VMs per node per exclude group
+    for exclude_group in exclude_groups:
+        other_nodes_counts = tag_index.node_counts(exclude_group, exclude=guest.get('vmid'))
+        target_count = other_nodes_counts.pop(target_node, 0)
 
         # Don't migrate if it would create or worsen clustering
         min_other_count = min(other_nodes_counts.values()) if other_nodes_counts else 0
@@ -555,12 +557,18 @@ def validates_resource_improvement(recommendation: Dict[str, Any]) -> Tuple[bool
     return True, f"{prefix}Would improve load: {resource_type} source ({src_pct:.1f}%) > target ({target_pct:.1f}%)"
 
 
-def get_recommendations(config: Dict[str, Any]) -> Dict[str, Any]:
+def get_recommendations(config: Dict[str, Any],
+                        pending_target_guests: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                        moves: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
     """
     Get migration recommendations from the API.
 
     Args:
         config: Configuration dictionary
+        pending_target_guests: Guests migrated earlier in this batch, by target node
+        moves: Migrations since the previous call in this batch. When given,
+            the API reuses the previous call's scoring work; the moves reach
+            scoring through pending_target_guests.
 
     Returns:
         Recommendations data
@@ -574,6 +582,10 @@ def get_recommendations(config: Dict[str, Any]) -> Dict[str, Any]:
             'iowait_threshold': thresholds.get('iowait_threshold', 30),
             'maintenance_nodes': automigrate_config.get('maintenance_nodes', [])
         }
+        if pending_target_guests:
+            payload['pending_target_guests'] = pending_target_guests
+        if moves is not None:
+            payload['delta'] = {'moves': moves}
 
         # Call local API (POST request)
         response = requests.post(
@@ -1393,15 +1405,22 @@ def main():
         success_count = 0
         migrations_attempted = 0
         batch_migrated_guests = {}  # Phase 2f: Track in-flight migrations for this batch
+        batch_moves = None  # Migrations since the last regeneration (None before the first)
 
         # Migrate one at a time, regenerating recommendations after each
         for _ in range(max_new_migrations):
-            # Regenerate recommendations to reflect current cluster state
+            # Regenerate recommendations to reflect current cluster state;
+            # after the first pass the API reuses the previous pass's scoring work
             logger.info(f"Regenerating recommendations (migration {migrations_attempted + 1}/{max_new_migrations})")
-            rec_data = get_recommendations(config)
+            rec_data = get_recommendations(config, batch_migrated_guests, batch_moves)
+            batch_moves = []
             if not rec_data.get('success', False):
                 logger.error("Failed to get recommendations")
                 break
+            incremental = rec_data.get('incremental') or {}
+            if incremental.get('mode') == 'incremental':
+                logger.info(f"Incremental regeneration: {incremental.get('work_avoided_pct', 0)}% of scoring work reused "
+                            f"(changed nodes: {', '.join(incremental.get('changed_nodes', [])) or 'none'})")
 
             recommendations = rec_data.get('recommendations', [])
             if not recommendations:
@@ -1543,6 +1562,7 @@ def main():
             # Re-filter recommendations with current cooldown/confidence/tag rules
             filtered = []
             filtered_reasons = []  # Track why VMs were filtered out
+            exclude_index = build_exclude_group_index(cache_data)
             for r in recommendations:
                 vmid = r.get('vmid')
                 source_node = r.get('source_node')
@@ -1653,7 +1673,7 @@ def main():
 
                     # Check exclude group affinity
                     ok, affinity_reason = check_exclude_group_affinity(
-                        guest, r['target_node'], cache_data, rules
+                        guest, r['target_node'], cache_data, rules, tag_index=exclude_index
                     )
                     if not ok:
                         filtered_reasons.append(f"{vm_name} ({vmid}): {affinity_reason}")
@@ -1978,6 +1998,7 @@ def main():
                 if target not in batch_migrated_guests:
                     batch_migrated_guests[target] = []
                 batch_migrated_guests[target].append(guest_for_tracking)
+                batch_moves.append({'vmid': vmid, 'source_node': source, 'target_node': target})
 
                 # Affinity companion migrations: if this VM has affinity groups,
                 # migrate companions to the same target node
@@ -2039,6 +2060,7 @@ def main():
                                 success_count += 1
                                 last_run_summary['migrations_successful'] = success_count
                                 logger.info(f"Affinity companion {comp_vmid} migrated successfully")
+                                batch_moves.append({'vmid': comp_vmid, 'source_node': comp_source, 'target_node': target})
 
                                 # Record companion migration
                                 record_migration({
@@ -82,12 +82,12 @@ echo -e "${BL}━━━━━━━━━━━━━━━━━━━━━━
 echo -e "${BL}Data Collection Status${CL}"
 echo -e "${BL}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━${CL}"
 
-# Check if cache file exists
-if pct exec "$CTID" -- test -f /opt/proxmox-balance-manager/cluster_cache.json; then
+# Check if cache exists (sections under cluster_cache/, meta.json holds the summary)
+if pct exec "$CTID" -- test -f /opt/proxmox-balance-manager/cluster_cache/meta.json; then
     echo -e "${CM} Cache File: ${GN}exists${CL}"
     
     # Get cache timestamp
-    CACHE_TIME=$(pct exec "$CTID" -- jq -r '.collected_at // "unknown"' /opt/proxmox-balance-manager/cluster_cache.json 2>/dev/null)
+    CACHE_TIME=$(pct exec "$CTID" -- jq -r '.data.collected_at // "unknown"' /opt/proxmox-balance-manager/cluster_cache/meta.json 2>/dev/null)
     if [ "$CACHE_TIME" != "unknown" ] && [ -n "$CACHE_TIME" ]; then
         echo -e "   ${BL}Last collection: ${YW}${CACHE_TIME}${CL}"
         
@@ -108,8 +108,8 @@ if pct exec "$CTID" -- test -f /opt/proxmox-balance-manager/cluster_cache.json;
     fi
     
     # Get cluster summary
-    NODE_COUNT=$(pct exec "$CTID" -- jq -r '.summary.total_nodes // 0' /opt/proxmox-balance-manager/cluster_cache.json 2>/dev/null)
-    GUEST_COUNT=$(pct exec "$CTID" -- jq -r '.summary.total_guests // 0' /opt/proxmox-balance-manager/cluster_cache.json 2>/dev/null)
+    NODE_COUNT=$(pct exec "$CTID" -- jq -r '.data.summary.total_nodes // 0' /opt/proxmox-balance-manager/cluster_cache/meta.json 2>/dev/null)
+    GUEST_COUNT=$(pct exec "$CTID" -- jq -r '.data.summary.total_guests // 0' /opt/proxmox-balance-manager/cluster_cache/meta.json 2>/dev/null)
     
     if [ "$NODE_COUNT" != "0" ]; then
         echo -e "   ${BL}Nodes: ${GN}${NODE_COUNT}${CL}"
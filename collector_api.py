@@ -10,9 +10,33 @@ import os
 from datetime import datetime
 from typing import Dict, List, Optional
 import urllib3
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+import threading
 import time
 
+from proxbalance.guest_config_cache import (
+    build_cache_entry,
+    detect_local_disks,
+    detect_mount_points,
+    parse_guest_config,
+    parse_tags,
+)
+from proxbalance.adaptive_workers import load_adaptive_concurrency, save_adaptive_concurrency
+from proxbalance.api_metrics import ApiLatencyRecorder
+from proxbalance.collector_state import COUNTERS_PROFILE_INTERVAL_MINUTES
+from proxbalance.cluster_cache import SECTION_META, SECTION_NODES, read_cluster_cache, write_cluster_cache
+from proxbalance.constants import COLLECTOR_SOCKET
+from proxbalance.rrd_columns import RrdColumns, detect_trend, last, seq_mean, vmax
+from proxbalance.rrd_cache import (
+    NODE_RRD_TIMEFRAMES,
+    build_trend_series,
+    get_rrd_refresh_policy,
+    is_series_fresh,
+)
+from proxbalance.snapshot import write_cluster_snapshot
+from proxbalance.storage import storage_topology_entry
+
 # Disable SSL warnings for self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -63,7 +87,13 @@ def load_config():
 class ProxmoxAPICollector:
     """Collect cluster data using Proxmox API"""
 
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, proxmox=None):
+        """
+        Args:
+            config: Loaded config.json.
+            proxmox: Already-connected ProxmoxAPI client to reuse (daemon
+                     mode); a new connection is opened when None.
+        """
         self.config = config
         self.proxmox_host = config['proxmox_host']
         self.proxmox_port = config.get('proxmox_port', 8006)
@@ -71,19 +101,55 @@ class ProxmoxAPICollector:
         self.auth_method = config.get('proxmox_auth_method', 'api_token')
         self.nodes = {}
         self.guests = {}
+        # node -> storage ID -> flags, persisted for compatibility checks
+        self.storage_topology = {}
         self.proxmox = None
+        # Per-endpoint timing of every Proxmox API call made by this collector
+        self.api_latency = ApiLatencyRecorder()
 
         # Collection optimization settings
         opt_config = config.get('collection_optimization', {})
         self.parallel_enabled = opt_config.get('parallel_collection_enabled', True)
         self.max_workers = opt_config.get('max_parallel_workers', 5)
+        self.max_workers_per_node = opt_config.get('max_parallel_workers_per_node', 2)
+        # Tune in-flight API calls from observed latency; max_workers is the ceiling
+        self.adaptive_workers = opt_config.get('adaptive_workers_enabled', True)
+        self._concurrency = None
         self.skip_stopped_rrd = opt_config.get('skip_stopped_guest_rrd', True)
         self.node_rrd_timeframe = opt_config.get('node_rrd_timeframe', 'day')
         self.guest_rrd_timeframe = opt_config.get('guest_rrd_timeframe', 'hour')
-
-        print(f"Collection optimization: parallel={self.parallel_enabled}, workers={self.max_workers}, skip_stopped={self.skip_stopped_rrd}")
-
-        self._connect()
+        # 'rrd': latest guest RRD point; 'counters': deltas of /cluster/resources counters
+        self.guest_io_mode = opt_config.get('guest_io_mode', 'rrd')
+        # Counters mode only skips guest RRD fetches between profiling passes,
+        # so it profiles on an interval unless one is configured
+        self.guest_profile_interval = opt_config.get(
+            'guest_profile_interval_minutes',
+            COUNTERS_PROFILE_INTERVAL_MINUTES if self.guest_io_mode == 'counters' else 0,
+        )
+        # Carry forward guests whose /cluster/resources entry is unchanged
+        self.delta_enabled = opt_config.get('delta_collection_enabled', True)
+        self.guest_full_refresh = opt_config.get('guest_full_refresh_minutes', 60)
+        self._guest_snapshots = {}
+        self._reused_guests = {}
+        self._profile_updates = {}
+        self._counter_io_rates = {}
+        self._profile_due = True
+        self._config_cache = {}
+        self._config_cache_updates = {}
+        self._config_cache_hits = 0
+        # Chart-only node RRD timeframes are refreshed on their own cadence
+        self.node_rrd_refresh, self.node_rrd_lazy = get_rrd_refresh_policy(config)
+        self._rrd_cache = {}
+        self._rrd_cache_updates = []
+        self._rrd_stats = {"reused": 0, "fetched": 0, "lazy": 0}
+        self._rrd_lock = threading.Lock()
+
+        print(f"Collection optimization: parallel={self.parallel_enabled}, workers={self.max_workers}, per_node={self.max_workers_per_node}, skip_stopped={self.skip_stopped_rrd}, io_mode={self.guest_io_mode}")
+
+        if proxmox is not None:
+            self.proxmox = proxmox
+        else:
+            self._connect()
     
     def _connect(self):
         """Establish connection to Proxmox API"""
@@ -144,23 +210,57 @@ class ProxmoxAPICollector:
                     verify_ssl=self.verify_ssl
                 )
             
+            self._size_connection_pool()
+
             # Test connection
-            self.proxmox.version.get()
+            with self.api_latency.track("version"):
+                self.proxmox.version.get()
             
         except Exception as e:
             raise Exception(f"Failed to connect to Proxmox API at {self.proxmox_host}:{self.proxmox_port}: {str(e)}")
     
+    def _size_connection_pool(self) -> None:
+        """Size the HTTPS keep-alive pool to the worker count.
+
+        requests keeps at most 10 idle connections per host; with more
+        workers than that, surplus connections are closed after each call
+        and later calls pay a fresh TLS handshake.
+
+        proxmoxer (2.1) builds its requests session internally and takes no
+        session argument, so the session is looked up in its private
+        resource store. Anything unexpected there leaves the default pool
+        in place with a warning instead of failing the connection.
+        """
+        import proxmoxer
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        pool_size = max(10, self.max_workers)
+        store = getattr(self.proxmox, "_store", None)
+        session = store.get("session") if isinstance(store, dict) else None
+        if not isinstance(session, requests.Session):
+            print(f"Warning: Could not size Proxmox connection pool to {pool_size}: "
+                  f"proxmoxer {getattr(proxmoxer, '__version__', 'unknown')} exposes no requests session; "
+                  f"keeping the default pool of 10 connections", file=sys.stderr)
+            return
+        try:
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        except Exception as e:
+            print(f"Warning: Could not size Proxmox connection pool: {e}", file=sys.stderr)
+
     def get_cluster_resources(self) -> List[Dict]:
         """Fetch cluster resources"""
         try:
-            return self.proxmox.cluster.resources.get()
+            with self.api_latency.track("cluster/resources"):
+                return self.proxmox.cluster.resources.get()
         except Exception as e:
             raise Exception(f"Failed to fetch cluster resources: {str(e)}")
 
     def get_ha_resources(self) -> List[Dict]:
         """Fetch HA managed resources"""
         try:
-            return self.proxmox.cluster.ha.resources.get()
+            with self.api_latency.track("cluster/ha/resources"):
+                return self.proxmox.cluster.ha.resources.get()
         except Exception as e:
             print(f"Warning: Failed to fetch HA resources: {str(e)}", file=sys.stderr)
             return []
@@ -168,7 +268,8 @@ class ProxmoxAPICollector:
     def get_ha_status(self) -> Dict:
         """Fetch HA manager status"""
         try:
-            return self.proxmox.cluster.ha.status.manager_status.get()
+            with self.api_latency.track("cluster/ha/status"):
+                return self.proxmox.cluster.ha.status.manager_status.get()
         except Exception as e:
             print(f"Warning: Failed to fetch HA status: {str(e)}", file=sys.stderr)
             return {}
@@ -176,7 +277,8 @@ class ProxmoxAPICollector:
     def get_cluster_status(self) -> List[Dict]:
         """Fetch cluster/corosync status"""
         try:
-            return self.proxmox.cluster.status.get()
+            with self.api_latency.track("cluster/status"):
+                return self.proxmox.cluster.status.get()
         except Exception as e:
             print(f"Warning: Failed to fetch cluster status: {str(e)}", file=sys.stderr)
             return []
@@ -184,7 +286,8 @@ class ProxmoxAPICollector:
     def get_cluster_options(self) -> Dict:
         """Fetch datacenter/cluster options (CRS, HA defaults, migration network, ...)."""
         try:
-            return self.proxmox.cluster.options.get() or {}
+            with self.api_latency.track("cluster/options"):
+                return self.proxmox.cluster.options.get() or {}
         except Exception as e:
             print(f"Warning: Failed to fetch cluster options: {str(e)}", file=sys.stderr)
             return {}
@@ -241,7 +344,8 @@ class ProxmoxAPICollector:
     def get_storage_status(self, node: str) -> List[Dict]:
         """Fetch storage status for a node"""
         try:
-            return self.proxmox.nodes(node).storage.get()
+            with self.api_latency.track("node/storage"):
+                return self.proxmox.nodes(node).storage.get()
         except Exception as e:
             print(f"Warning: Failed to fetch storage for {node}: {str(e)}", file=sys.stderr)
             return []
@@ -250,7 +354,8 @@ class ProxmoxAPICollector:
         """Fetch backup information"""
         try:
             # Get guests not backed up
-            not_backed_up = self.proxmox.cluster('backup-info')('not-backed-up').get()
+            with self.api_latency.track("cluster/backup-info"):
+                not_backed_up = self.proxmox.cluster('backup-info')('not-backed-up').get()
             return not_backed_up
         except Exception as e:
             print(f"Warning: Failed to fetch backup info: {str(e)}", file=sys.stderr)
@@ -259,7 +364,8 @@ class ProxmoxAPICollector:
     def get_resource_pools(self) -> List[Dict]:
         """Fetch resource pools"""
         try:
-            return self.proxmox.pools.get()
+            with self.api_latency.track("pools"):
+                return self.proxmox.pools.get()
         except Exception as e:
             print(f"Warning: Failed to fetch resource pools: {str(e)}", file=sys.stderr)
             return []
@@ -267,7 +373,8 @@ class ProxmoxAPICollector:
     def get_guest_agent_info(self, node: str, vmid: int) -> Dict:
         """Fetch guest agent information (VMs only)"""
         try:
-            return self.proxmox.nodes(node).qemu(vmid).agent.info.get()
+            with self.api_latency.track("guest/agent/info"):
+                return self.proxmox.nodes(node).qemu(vmid).agent.info.get()
         except Exception as e:
             # Guest agent not available or not installed - this is normal
             return {}
@@ -275,7 +382,8 @@ class ProxmoxAPICollector:
     def get_node_rrd_data(self, node: str, timeframe: str = "day") -> List[Dict]:
         """Fetch RRD performance data for a node"""
         try:
-            data = self.proxmox.nodes(node).rrddata.get(timeframe=timeframe)
+            with self.api_latency.track("node/rrddata"):
+                data = self.proxmox.nodes(node).rrddata.get(timeframe=timeframe)
             print(f"Fetched {len(data)} RRD data points for {node} (timeframe: {timeframe})")
             return data
         except Exception as e:
@@ -285,10 +393,11 @@ class ProxmoxAPICollector:
     def get_guest_config(self, node: str, vmid: int, guest_type: str) -> Dict:
         """Fetch guest configuration including tags"""
         try:
-            if guest_type == 'qemu':
-                return self.proxmox.nodes(node).qemu(vmid).config.get()
-            else:  # lxc
-                return self.proxmox.nodes(node).lxc(vmid).config.get()
+            with self.api_latency.track("guest/config"):
+                if guest_type == 'qemu':
+                    return self.proxmox.nodes(node).qemu(vmid).config.get()
+                else:  # lxc
+                    return self.proxmox.nodes(node).lxc(vmid).config.get()
         except Exception as e:
             print(f"Warning: Failed to fetch config for {guest_type} {vmid} on {node}: {str(e)}", file=sys.stderr)
             return {}
@@ -296,10 +405,11 @@ class ProxmoxAPICollector:
     def get_guest_rrd_data(self, node: str, vmid: int, guest_type: str, timeframe: str = "hour") -> List[Dict]:
         """Fetch RRD performance data for a guest (VM or CT)"""
         try:
-            if guest_type == 'qemu':
-                data = self.proxmox.nodes(node).qemu(vmid).rrddata.get(timeframe=timeframe)
-            else:  # lxc
-                data = self.proxmox.nodes(node).lxc(vmid).rrddata.get(timeframe=timeframe)
+            with self.api_latency.track("guest/rrddata"):
+                if guest_type == 'qemu':
+                    data = self.proxmox.nodes(node).qemu(vmid).rrddata.get(timeframe=timeframe)
+                else:  # lxc
+                    data = self.proxmox.nodes(node).lxc(vmid).rrddata.get(timeframe=timeframe)
             return data
         except Exception as e:
             # Silently fail - some guests may not have RRD data
@@ -345,163 +455,17 @@ class ProxmoxAPICollector:
 
     def parse_tags(self, tags_str: str) -> Dict:
         """Parse tags and extract ignore/exclude/affinity rules"""
-        if not tags_str:
-            return {"has_ignore": False, "exclude_groups": [], "affinity_groups": [], "all_tags": []}
-
-        tags = [t.strip() for t in tags_str.replace(";", " ").split()]
-        has_ignore = "ignore" in tags
-        exclude_groups = [t for t in tags if t.startswith("exclude_")]
-        affinity_groups = [t for t in tags if t.startswith("affinity_")]
-        has_bindmount_tag = "has-bindmount" in tags
-        # io_exempt: this guest's disk I/O lives on dedicated/passthrough storage,
-        # so the host iowait it generates is not relievable by migration. Used to
-        # exempt the node from iowait scoring (see scoring.py / recommendations.py).
-        has_io_exempt = "io_exempt" in tags or "proxbalance_io_exempt" in tags
-
-        return {
-            "has_ignore": has_ignore,
-            "exclude_groups": exclude_groups,
-            "affinity_groups": affinity_groups,
-            "has_bindmount": has_bindmount_tag,
-            "has_io_exempt": has_io_exempt,
-            "all_tags": tags
-        }
+        return parse_tags(tags_str)
 
     def detect_mount_points(self, config: Dict) -> Dict:
-        """
-        Detect mount points in LXC container configuration.
-        Returns info about bind mounts and storage-backed mount points.
-
-        Mount point types:
-        - Bind mounts: /host/path,mp=/container/path
-        - Storage-backed: volume:storage-volume,mp=/container/path
-        - Shared bind mounts: /host/path,mp=/container/path,shared=1 (can be migrated if path exists on target)
-
-        The 'shared=1' flag indicates the mount point is available on all nodes,
-        allowing migration with 'pct migrate --force' or automatic migration.
-        """
-        mount_points = []
-        has_bind_mount = False
-        has_storage_mount = False
-        has_shared_mount = False
-        has_unshared_bind_mount = False
-
-        # Check for mount point keys (mp0, mp1, mp2, etc.)
-        for key in config.keys():
-            if key.startswith('mp') and key[2:].isdigit():
-                mp_config = config[key]
-
-                # Bind mounts start with / (absolute paths on host)
-                # Storage-backed mounts start with storage:volume format
-                if isinstance(mp_config, str):
-                    # Parse mount point: "source,mp=target,options" format
-                    parts = mp_config.split(',')
-                    source = parts[0] if parts else ""
-
-                    # Check for shared=1 flag in options
-                    is_shared = any('shared=1' in part for part in parts)
-
-                    # Extract mount target path
-                    mp_path = ""
-                    for part in parts:
-                        if part.startswith('mp='):
-                            mp_path = part[3:]
-                            break
-
-                    is_bind = source.startswith('/')
-                    mount_info = {
-                        "key": key,
-                        "config": mp_config,
-                        "is_bind_mount": is_bind,
-                        "source": source,
-                        "mount_path": mp_path,
-                        "is_shared": is_shared
-                    }
-
-                    mount_points.append(mount_info)
-
-                    if is_bind:
-                        has_bind_mount = True
-                        if is_shared:
-                            has_shared_mount = True
-                        else:
-                            has_unshared_bind_mount = True
-                    else:
-                        has_storage_mount = True
-
-        return {
-            "mount_points": mount_points,
-            "has_mount_points": len(mount_points) > 0,
-            "has_bind_mount": has_bind_mount,
-            "has_storage_mount": has_storage_mount,
-            "has_shared_mount": has_shared_mount,
-            "has_unshared_bind_mount": has_unshared_bind_mount,
-            "mount_count": len(mount_points)
-        }
+        """Detect mount points in LXC container configuration."""
+        return detect_mount_points(config)
 
     DISK_PREFIXES = ('scsi', 'ide', 'virtio', 'sata', 'rootfs', 'mp')
 
     def detect_local_disks(self, config: Dict) -> Dict:
-        """
-        Detect passthrough disks in VM/CT configuration that prevent migration.
-
-        Disk types that prevent migration:
-        - Passthrough disks: /dev/disk/by-id/*, /dev/sd* (direct hardware access)
-
-        Note: local-lvm, local-zfs, and other storage types CAN be migrated
-        as Proxmox handles storage replication during migration.
-        """
-        passthrough_disks = []
-
-        # Check for disk keys (scsi0-N, ide0-N, virtio0-N, sata0-N, rootfs, mp*)
-        for key, disk_config in config.items():
-            # Check if key is a disk/storage key
-            if key.startswith(self.DISK_PREFIXES):
-                if isinstance(disk_config, str):
-                    # Parse disk config
-                    parts = disk_config.split(',')
-                    source = parts[0] if parts else ""
-
-                    # Check for passthrough disks (direct device paths)
-                    if source.startswith('/dev/'):
-                        passthrough_disks.append({
-                            "key": key,
-                            "device": source,
-                            "type": "passthrough"
-                        })
-
-        has_passthrough = bool(passthrough_disks)
-        passthrough_count = len(passthrough_disks)
-        return {
-            "passthrough_disks": passthrough_disks,
-            "has_passthrough": has_passthrough,
-            "is_pinned": has_passthrough,
-            "pinned_reason": "Hardware passthrough disks" if has_passthrough else None,
-            "passthrough_count": passthrough_count,
-            "total_pinned_disks": passthrough_count
-        }
-
-    @staticmethod
-    def _extract_rrd_values(rrd_data, key, scale=100, filter_fn=None):
-        """Extract and scale values from RRD data points."""
-        if filter_fn:
-            return [filter_fn(d) for d in rrd_data if filter_fn(d) is not None]
-        return [d[key] * scale for d in rrd_data if key in d and d[key] is not None]
-
-    @staticmethod
-    def _detect_trend(values, threshold=10):
-        """Detect trend from a list of values: 'rising', 'falling', or 'stable'."""
-        if not values:
-            return "stable"
-        recent_size = max(1, len(values) // 5)
-        recent_avg = sum(values[-recent_size:]) / recent_size
-        older_avg = sum(values[:recent_size]) / recent_size
-        diff = recent_avg - older_avg
-        if diff > threshold:
-            return "rising"
-        elif diff < -threshold:
-            return "falling"
-        return "stable"
+        """Detect passthrough disks in VM/CT configuration that prevent migration."""
+        return detect_local_disks(config)
 
     def _process_single_node(self, node: Dict) -> Dict:
         """Process a single node's data (called in parallel or sequential)"""
@@ -509,13 +473,13 @@ class ProxmoxAPICollector:
         print(f"Processing node: {node_name}")
 
         # Get RRD data for multiple timeframes
-        # This allows UI to show different time ranges without re-fetching
+        # This allows UI to show different time ranges without re-fetching.
+        # day (~1440 points) and week (~1680 points) feed the metrics below and
+        # are always fetched; hour/month/year are chart-only and may be served
+        # from the RRD cache (see _node_chart_series).
         timeframes = {
-            'hour': self.get_node_rrd_data(node_name, 'hour'),    # ~60 points, 1-min intervals
-            'day': self.get_node_rrd_data(node_name, 'day'),      # ~1440 points, 1-min intervals
-            'week': self.get_node_rrd_data(node_name, 'week'),    # ~1680 points, 5-min intervals
-            'month': self.get_node_rrd_data(node_name, 'month'),  # ~2000 points, 30-min intervals
-            'year': self.get_node_rrd_data(node_name, 'year')     # ~2000 points, 6-hour intervals
+            'day': self.get_node_rrd_data(node_name, 'day'),
+            'week': self.get_node_rrd_data(node_name, 'week'),
         }
 
         # Calculate metrics from multiple timeframes for better trend analysis
@@ -543,75 +507,75 @@ class ProxmoxAPICollector:
             "has_historical": False
         }
 
+        # Convert each timeframe's points to typed columns once; metrics and
+        # chart series below are all derived from these columns
+        columns = {name: RrdColumns(points) for name, points in timeframes.items()}
+
         # Calculate 24-hour metrics (detailed)
-        rrd_day = timeframes['day']
-        if rrd_day:
-            mem_filter = lambda d: (d["memused"] / d["memtotal"] * 100) if "memused" in d and "memtotal" in d and d["memtotal"] > 0 else None
-            cpu_values_day = self._extract_rrd_values(rrd_day, "cpu")
-            mem_values_day = self._extract_rrd_values(rrd_day, None, filter_fn=mem_filter)
-            iowait_values_day = self._extract_rrd_values(rrd_day, "iowait")
-            load_values_day = self._extract_rrd_values(rrd_day, "loadavg", scale=1)
-
-            if cpu_values_day:
-                metrics["avg_cpu"] = sum(cpu_values_day) / len(cpu_values_day)
-                metrics["max_cpu"] = max(cpu_values_day)
+        if timeframes['day']:
+            cols_day = columns['day']
+            cpu_values_day = cols_day.values("cpu")
+            mem_values_day = cols_day.mem_percent_values()
+            iowait_values_day = cols_day.values("iowait")
+            load_values_day = cols_day.values("loadavg", scale=1)
+
+            if len(cpu_values_day):
+                metrics["avg_cpu"] = seq_mean(cpu_values_day)
+                metrics["max_cpu"] = vmax(cpu_values_day)
                 metrics["has_historical"] = True
 
-            if mem_values_day:
-                metrics["avg_mem"] = sum(mem_values_day) / len(mem_values_day)
-                metrics["max_mem"] = max(mem_values_day)
+            if len(mem_values_day):
+                metrics["avg_mem"] = seq_mean(mem_values_day)
+                metrics["max_mem"] = vmax(mem_values_day)
 
-            if iowait_values_day:
-                metrics["avg_iowait"] = sum(iowait_values_day) / len(iowait_values_day)
-                metrics["max_iowait"] = max(iowait_values_day)
-                metrics["current_iowait"] = iowait_values_day[-1] if iowait_values_day else 0
+            if len(iowait_values_day):
+                metrics["avg_iowait"] = seq_mean(iowait_values_day)
+                metrics["max_iowait"] = vmax(iowait_values_day)
+                metrics["current_iowait"] = last(iowait_values_day)
 
-            if load_values_day:
-                metrics["avg_load"] = sum(load_values_day) / len(load_values_day)
+            if len(load_values_day):
+                metrics["avg_load"] = seq_mean(load_values_day)
 
         # Calculate 7-day metrics (longer-term patterns)
-        rrd_week = timeframes['week']
-        if rrd_week:
-            mem_filter = lambda d: (d["memused"] / d["memtotal"] * 100) if "memused" in d and "memtotal" in d and d["memtotal"] > 0 else None
-            cpu_values_week = self._extract_rrd_values(rrd_week, "cpu")
-            mem_values_week = self._extract_rrd_values(rrd_week, None, filter_fn=mem_filter)
-            iowait_values_week = self._extract_rrd_values(rrd_week, "iowait")
-
-            if cpu_values_week:
-                metrics["avg_cpu_week"] = sum(cpu_values_week) / len(cpu_values_week)
-                metrics["max_cpu_week"] = max(cpu_values_week)
-                metrics["cpu_trend"] = self._detect_trend(cpu_values_week)
-
-            if mem_values_week:
-                metrics["avg_mem_week"] = sum(mem_values_week) / len(mem_values_week)
-                metrics["max_mem_week"] = max(mem_values_week)
-                metrics["mem_trend"] = self._detect_trend(mem_values_week)
-
-            if iowait_values_week:
-                metrics["avg_iowait_week"] = sum(iowait_values_week) / len(iowait_values_week)
+        if timeframes['week']:
+            cols_week = columns['week']
+            cpu_values_week = cols_week.values("cpu")
+            mem_values_week = cols_week.mem_percent_values()
+            iowait_values_week = cols_week.values("iowait")
+
+            if len(cpu_values_week):
+                metrics["avg_cpu_week"] = seq_mean(cpu_values_week)
+                metrics["max_cpu_week"] = vmax(cpu_values_week)
+                metrics["cpu_trend"] = detect_trend(cpu_values_week)
+
+            if len(mem_values_week):
+                metrics["avg_mem_week"] = seq_mean(mem_values_week)
+                metrics["max_mem_week"] = vmax(mem_values_week)
+                metrics["mem_trend"] = detect_trend(mem_values_week)
+
+            if len(iowait_values_week):
+                metrics["avg_iowait_week"] = seq_mean(iowait_values_week)
 
         # Process RRD data for all timeframes (for charting at different time ranges)
         trend_data = {}
         total_points = 0
 
-        for timeframe_name, timeframe_rrd in timeframes.items():
-            trend_data[timeframe_name] = []
-            if timeframe_rrd:
-                for point in timeframe_rrd:
-                    if "time" in point and "cpu" in point and "memused" in point and "memtotal" in point:
-                        trend_data[timeframe_name].append({
-                            "time": point["time"],
-                            "cpu": round(point["cpu"] * 100, 2) if point["cpu"] is not None else 0,
-                            "mem": round((point["memused"] / point["memtotal"] * 100), 2) if point["memused"] and point["memtotal"] else 0,
-                            "iowait": round(point["iowait"] * 100, 2) if "iowait" in point and point["iowait"] is not None else 0
-                        })
-                total_points += len(trend_data[timeframe_name])
+        for timeframe_name in NODE_RRD_TIMEFRAMES:
+            if timeframe_name in columns:
+                trend_data[timeframe_name] = columns[timeframe_name].trend_series()
+            else:
+                trend_data[timeframe_name] = self._node_chart_series(node_name, timeframe_name)
+            total_points += len(trend_data[timeframe_name])
 
-        print(f"Processed {total_points} trend data points across {len(timeframes)} timeframes for {node_name}")
+        print(f"Processed {total_points} trend data points across {len(trend_data)} timeframes for {node_name}")
 
         # Get storage status
         storage_info = []
         storage_status = self.get_storage_status(node_name)
+        # An empty list means the fetch failed; leave the node out rather
+        # than record it as having no storage
+        if storage_status:
+            self.storage_topology[node_name] = storage_topology_entry(storage_status)
         for storage in storage_status:
             if storage.get("enabled", 1):  # Only enabled storage
                 total_gb = storage.get("total", 0) / (1024**3)
@@ -644,11 +608,495 @@ class ProxmoxAPICollector:
             "guests": []
         }
     
+    def _node_chart_series(self, node_name: str, timeframe: str) -> List[Dict]:
+        """Return a chart-only timeframe's series, reusing the RRD cache when fresh.
+
+        Lazy timeframes are never fetched here (the chart endpoint fills them
+        on demand) and come back empty. Fresh fetches are queued in
+        _rrd_cache_updates for a single write once all nodes are processed.
+        """
+        if timeframe in self.node_rrd_lazy:
+            self._count_rrd("lazy")
+            return []
+
+        cached = self._rrd_cache.get((node_name, timeframe))
+        if is_series_fresh(cached, self.node_rrd_refresh.get(timeframe, 0)):
+            self._count_rrd("reused")
+            return cached["points"]
+
+        series = build_trend_series(self.get_node_rrd_data(node_name, timeframe))
+        self._count_rrd("fetched")
+        if self.node_rrd_refresh.get(timeframe, 0) > 0:
+            with self._rrd_lock:
+                self._rrd_cache_updates.append((node_name, timeframe, series, time.time()))
+        return series
+
+    def _count_rrd(self, outcome: str) -> None:
+        # Nodes are processed on worker threads
+        with self._rrd_lock:
+            self._rrd_stats[outcome] += 1
+
+    def _load_rrd_cache(self) -> None:
+        """Load cached node chart series for this run."""
+        self._rrd_cache_updates = []
+        self._rrd_stats = {"reused": 0, "fetched": 0, "lazy": 0}
+        if not any(self.node_rrd_refresh.values()):
+            self._rrd_cache = {}
+            return
+        try:
+            from proxbalance.rrd_cache import load_node_rrd_cache
+            self._rrd_cache = load_node_rrd_cache()
+        except Exception as e:
+            print(f"Warning: Failed to load node RRD cache: {e}", file=sys.stderr)
+            self._rrd_cache = {}
+
+    def _save_rrd_cache(self, live_nodes) -> None:
+        """Persist refreshed node chart series and drop departed nodes."""
+        try:
+            from proxbalance.rrd_cache import prune_node_rrd_cache, save_node_rrd_series
+            written = save_node_rrd_series(self._rrd_cache_updates)
+            pruned = prune_node_rrd_cache(live_nodes)
+            print(f"Node RRD cache: {self._rrd_stats['reused']} reused, {written} updated, "
+                  f"{self._rrd_stats['lazy']} lazy, {pruned} pruned")
+        except Exception as e:
+            print(f"Warning: Failed to save node RRD cache: {e}", file=sys.stderr)
+
+    def _needs_guest_rrd(self, vmid) -> bool:
+        """Whether a guest's RRD must be fetched this run (I/O fallback or profiling)."""
+        return self._profile_due or str(vmid) not in self._counter_io_rates
+
+    def _derive_counter_io_rates(self, guests_raw: List[Dict], sampled_at: float) -> Dict[str, Dict]:
+        """Compute guest I/O rates from /cluster/resources counter deltas.
+
+        Only active when guest_io_mode is 'counters'. Diffs each running guest's
+        cumulative diskread/diskwrite/netin/netout against the previous run's
+        snapshot and stores this run's counters as the next baseline. Guests
+        with no valid delta (first sighting, migration, restart) are left out
+        so their I/O falls back to the RRD fetch.
+        """
+        if self.guest_io_mode != 'counters':
+            return {}
+
+        try:
+            from proxbalance.collector_state import (
+                IO_COUNTER_FIELDS, compute_io_rates, load_guest_io_counters, save_guest_io_counters,
+            )
+            previous = load_guest_io_counters()
+        except Exception as e:
+            print(f"Warning: Failed to load guest I/O counters: {e}", file=sys.stderr)
+            return {}
+
+        snapshot = {}
+        rates = {}
+        for guest in guests_raw:
+            if guest.get("status") != "running":
+                continue
+            if any(guest.get(field) is None for field in IO_COUNTER_FIELDS):
+                continue
+            vmid_key = str(guest["vmid"])
+            current = {
+                "node": guest["node"],
+                "ts": sampled_at,
+                "uptime": guest.get("uptime"),
+                **{field: guest[field] for field in IO_COUNTER_FIELDS},
+            }
+            snapshot[vmid_key] = current
+            guest_rates = compute_io_rates(previous.get(vmid_key), current)
+            if guest_rates is not None:
+                rates[vmid_key] = guest_rates
+
+        try:
+            save_guest_io_counters(snapshot)
+        except Exception as e:
+            print(f"Warning: Failed to save guest I/O counters: {e}", file=sys.stderr)
+
+        print(f"Derived I/O rates from counters for {len(rates)}/{len(snapshot)} running guests")
+        return rates
+
+    def _is_profiling_due(self, now: float) -> bool:
+        """Whether the guest RRD profiling pass should run this collection."""
+        if not self.guest_profile_interval or self.guest_profile_interval <= 0:
+            return True
+        try:
+            from proxbalance.collector_state import get_collector_state
+            last_run = get_collector_state('last_guest_profile_ts', 0) or 0
+        except Exception as e:
+            print(f"Warning: Failed to read guest profiling state: {e}", file=sys.stderr)
+            return True
+        return now - last_run >= self.guest_profile_interval * 60
+
+    def _parse_guest_config_cached(self, guest: Dict, config: Dict) -> Dict:
+        """Return the parsed config for a guest, reusing the cache on a digest match.
+
+        Changed or new configs are parsed and queued in _config_cache_updates
+        for a single bulk write at the end of the run.
+        """
+        vmid_key = str(guest["vmid"])
+        node_name = guest["node"]
+        guest_type_raw = guest["type"]
+        digest = config.get("digest")
+
+        cached = self._config_cache.get(vmid_key)
+        if digest and cached and cached.get("digest") == digest and cached.get("guest_type") == guest_type_raw:
+            self._config_cache_hits += 1
+            if cached.get("node") != node_name:
+                self._config_cache_updates[vmid_key] = {**cached, "node": node_name}
+            return cached["parsed"]
+
+        parsed = parse_guest_config(config, guest_type_raw)
+        if digest:
+            self._config_cache_updates[vmid_key] = build_cache_entry(
+                vmid_key, node_name, guest_type_raw, config, parsed
+            )
+        return parsed
+
+    def _load_config_cache(self) -> None:
+        """Load the persisted guest config cache for this run."""
+        self._config_cache_updates = {}
+        self._config_cache_hits = 0
+        try:
+            from proxbalance.guest_config_cache import load_guest_config_cache
+            self._config_cache = load_guest_config_cache()
+        except Exception as e:
+            print(f"Warning: Failed to load guest config cache: {e}", file=sys.stderr)
+            self._config_cache = {}
+
+    def _save_config_cache(self, live_vmids) -> None:
+        """Persist changed config cache entries and drop deleted guests."""
+        try:
+            from proxbalance.guest_config_cache import prune_guest_config_cache, save_guest_config_entries
+            written = save_guest_config_entries(self._config_cache_updates.values())
+            pruned = prune_guest_config_cache(live_vmids)
+            print(f"Guest config cache: {self._config_cache_hits} reused, {written} updated, {pruned} pruned")
+        except Exception as e:
+            print(f"Warning: Failed to save guest config cache: {e}", file=sys.stderr)
+
+    def _save_api_latency(self, run_ts: float) -> None:
+        """Log and persist this run's per-endpoint API latency summary."""
+        summary = self.perf_metrics.get("api_latency", {})
+        for endpoint, stats in sorted(summary.items(), key=lambda kv: -kv[1]["total_ms"]):
+            print(f"API {endpoint}: {stats['calls']} calls, {stats['errors']} errors, "
+                  f"p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms max={stats['max_ms']}ms")
+        try:
+            from proxbalance.api_metrics import save_api_latency
+            save_api_latency(run_ts, summary)
+        except Exception as e:
+            print(f"Warning: Failed to save API latency metrics: {e}", file=sys.stderr)
+
+    def _save_guest_profiles(self) -> None:
+        """Write this run's queued guest profile observations in one transaction."""
+        if not self._profile_updates:
+            return
+        try:
+            from proxbalance.guest_profiles import update_guest_profiles
+            update_guest_profiles(self._profile_updates)
+        except Exception as e:
+            print(f"Warning: Guest profile update failed: {e}", file=sys.stderr)
+
+    def _select_reusable_guests(self, guests_raw: List[Dict], now: float) -> Dict[str, Dict]:
+        """Pick guests whose config and agent info can be carried forward.
+
+        A guest is reused when its /cluster/resources fingerprint (node,
+        status, name, tags, sizes, lock) matches the previous run, its parsed
+        config is still cached for the same node, and its last full fetch is
+        younger than guest_full_refresh_minutes. Everything else is re-fetched.
+        Requires the config cache to be loaded.
+
+        Returns:
+            Dict mapping vmid string to the previous run's snapshot.
+        """
+        self._guest_snapshots = {}
+        if not self.delta_enabled:
+            return {}
+        try:
+            from proxbalance.collector_state import load_guest_snapshots
+            self._guest_snapshots = load_guest_snapshots()
+        except Exception as e:
+            print(f"Warning: Failed to load guest snapshots: {e}", file=sys.stderr)
+            return {}
+
+        max_age = max(0, self.guest_full_refresh or 0) * 60
+        from proxbalance.collector_state import guest_fingerprint
+        reusable = {}
+        for guest in guests_raw:
+            vmid_key = str(guest["vmid"])
+            snap = self._guest_snapshots.get(vmid_key)
+            cached = self._config_cache.get(vmid_key)
+            if (snap and cached
+                    and snap["fingerprint"] == guest_fingerprint(guest)
+                    and cached.get("node") == guest["node"]
+                    and cached.get("guest_type") == guest["type"]
+                    and now - snap["refreshed_at"] < max_age):
+                reusable[vmid_key] = snap
+        return reusable
+
+    def _save_guest_snapshots(self, guests_raw: List[Dict], guest_details: List[Dict], now: float) -> None:
+        """Record this run's fingerprints for the next run's delta check.
+
+        Guests whose config fetch failed get no snapshot, so they are
+        re-fetched next run.
+        """
+        if not self.delta_enabled:
+            return
+        try:
+            from proxbalance.collector_state import guest_fingerprint, save_guest_snapshots
+            snapshots = {}
+            for guest, details in zip(guests_raw, guest_details):
+                vmid_key = str(guest["vmid"])
+                if vmid_key in self._reused_guests:
+                    snapshots[vmid_key] = self._reused_guests[vmid_key]
+                elif (details.get("config") or {}).get("digest"):
+                    snapshots[vmid_key] = {
+                        "node": guest["node"],
+                        "fingerprint": guest_fingerprint(guest),
+                        "refreshed_at": now,
+                        "agent_data": details.get("agent_data") or {},
+                    }
+            save_guest_snapshots(snapshots)
+        except Exception as e:
+            print(f"Warning: Failed to save guest snapshots: {e}", file=sys.stderr)
+
+    def _fetch_guest_details(self, guest: Dict) -> Dict:
+        """Fetch the per-guest API data (config, RRD, agent info) for one guest.
+
+        Only performs API calls, so it is safe to run on the guest worker pool.
+        The results are turned into a guest record by _build_guest_info.
+        """
+        vmid = guest["vmid"]
+        node_name = guest["node"]
+        guest_type_raw = guest["type"]
+        guest_status = guest.get("status", "unknown")
+
+        # Unchanged guests carry their parsed config and agent info forward
+        reused = self._reused_guests.get(str(vmid))
+
+        # Get config for tags and mount points
+        config = None if reused else self.get_guest_config(node_name, vmid, guest_type_raw)
+
+        # Get RRD data for I/O metrics and profiling - skip if guest is stopped and
+        # optimization enabled, or if counters already supplied the I/O rates and
+        # no profiling pass is due this run
+        rrd_data = []
+        if not (self.skip_stopped_rrd and guest_status != "running") and self._needs_guest_rrd(vmid):
+            rrd_data = self.get_guest_rrd_data(node_name, vmid, guest_type_raw, self.guest_rrd_timeframe)
+
+        # Get guest agent info (VMs only, and only if running)
+        agent_data = {}
+        if guest_type_raw == "qemu" and guest_status == "running":
+            agent_data = reused["agent_data"] if reused else self.get_guest_agent_info(node_name, vmid)
+
+        return {"config": config, "rrd_data": rrd_data, "agent_data": agent_data}
+
+    def _fetch_all_guest_details(self, guests_raw: List[Dict]) -> List[Dict]:
+        """Fetch per-guest API data for all guests with bounded concurrency.
+
+        Concurrency is capped cluster-wide by max_parallel_workers and per node
+        by max_parallel_workers_per_node, so a single node's pveproxy is never
+        hit by more than its share of requests. With adaptive sizing the
+        cluster-wide cap follows the AdaptiveConcurrency limit, which sees
+        every API call made in this phase. Work is dispatched round-robin
+        across nodes. Returns details in the same order as guests_raw.
+        """
+        results: List[Optional[Dict]] = [None] * len(guests_raw)
+        queue_waits: List[float] = []
+        phase_start = time.time()
+
+        cluster_limit = max(1, self.max_workers) if self.parallel_enabled else 1
+        node_limit = max(1, min(self.max_workers_per_node, cluster_limit))
+        peak_in_flight = 0
+        # With adaptive sizing the pool is sized at the ceiling and dispatch
+        # follows the controller's current limit, which moves as calls complete
+        concurrency = self._concurrency if cluster_limit > 1 else None
+        in_flight_limit = (lambda: concurrency.limit) if concurrency else (lambda: cluster_limit)
+
+        if cluster_limit == 1 or len(guests_raw) < 2:
+            for idx, guest in enumerate(guests_raw):
+                queue_waits.append(time.time() - phase_start)
+                results[idx] = self._fetch_guest_details(guest)
+            peak_in_flight = 1 if guests_raw else 0
+        else:
+            if concurrency:
+                print(f"Fetching guest details with {concurrency.limit} of up to {cluster_limit} workers ({node_limit} per node)")
+            else:
+                print(f"Fetching guest details with {cluster_limit} workers ({node_limit} per node)")
+            pending: Dict[str, deque] = {}
+            for idx, guest in enumerate(guests_raw):
+                pending.setdefault(guest["node"], deque()).append(idx)
+            in_flight_per_node: Dict[str, int] = {name: 0 for name in pending}
+
+            def _run(idx):
+                waited = time.time() - phase_start
+                return waited, self._fetch_guest_details(guests_raw[idx])
+
+            with ThreadPoolExecutor(max_workers=cluster_limit) as executor:
+                futures = {}
+
+                def _dispatch():
+                    limit = in_flight_limit()
+                    progress = True
+                    while progress and len(futures) < limit:
+                        progress = False
+                        for node_name, queue in pending.items():
+                            if len(futures) >= limit:
+                                break
+                            if queue and in_flight_per_node[node_name] < node_limit:
+                                idx = queue.popleft()
+                                futures[executor.submit(_run, idx)] = (idx, node_name)
+                                in_flight_per_node[node_name] += 1
+                                progress = True
+
+                if concurrency:
+                    self.api_latency.observer = concurrency.observe
+                try:
+                    _dispatch()
+                    while futures:
+                        peak_in_flight = max(peak_in_flight, len(futures))
+                        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            idx, node_name = futures.pop(future)
+                            in_flight_per_node[node_name] -= 1
+                            try:
+                                waited, results[idx] = future.result()
+                                queue_waits.append(waited)
+                            except Exception as e:
+                                print(f"Error fetching details for guest {guests_raw[idx].get('vmid')}: {e}", file=sys.stderr)
+                        _dispatch()
+                finally:
+                    self.api_latency.observer = None
+
+        # A failed fetch degrades to the same empty data the API getters return on error
+        for idx, details in enumerate(results):
+            if details is None:
+                results[idx] = {"config": {}, "rrd_data": [], "agent_data": {}}
+
+        fetch_duration = time.time() - phase_start
+        perf = getattr(self, 'perf_metrics', None)
+        if perf is not None:
+            perf["guest_fetch_time"] = round(fetch_duration, 2)
+            perf["guest_workers"] = cluster_limit
+            perf["guest_workers_per_node"] = node_limit
+            perf["guest_peak_in_flight"] = peak_in_flight
+            perf["guest_queue_wait_avg"] = round(sum(queue_waits) / len(queue_waits), 3) if queue_waits else 0
+            perf["guest_queue_wait_max"] = round(max(queue_waits), 3) if queue_waits else 0
+            if concurrency:
+                perf["adaptive_workers"] = concurrency.summary()
+        print(f"Fetched details for {len(guests_raw)} guests in {fetch_duration:.2f}s (peak in-flight: {peak_in_flight})")
+
+        return results
+
+    def _build_guest_info(self, guest: Dict, details: Dict, ha_managed: Dict,
+                          not_backed_up_ids: set, pool_membership: Dict) -> Dict:
+        """Assemble a guest record from cluster resources and fetched details."""
+        vmid = guest["vmid"]
+        node_name = guest["node"]
+        guest_type_raw = guest["type"]
+        guest_type = "VM" if guest_type_raw == "qemu" else "CT"
+        guest_status = guest.get("status", "unknown")
+
+        # Tags, mount points (CTs only) and local/passthrough disks, reused
+        # from the config cache when the config digest is unchanged (or, for
+        # carried-forward guests, when the config was not fetched at all)
+        if details.get("config") is None and str(vmid) in self._reused_guests:
+            parsed_config = self._config_cache[str(vmid)]["parsed"]
+            config_known = True
+        else:
+            parsed_config = self._parse_guest_config_cached(guest, details.get("config") or {})
+            config_known = bool(details.get("config"))
+        tags_data = parsed_config["tags"]
+        mount_point_info = parsed_config["mount_points"]
+        local_disk_info = parsed_config["local_disks"]
+
+        disk_read_bps = 0
+        disk_write_bps = 0
+        net_in_bps = 0
+        net_out_bps = 0
+
+        rrd_data = details.get("rrd_data") or []
+        counter_rates = self._counter_io_rates.get(str(vmid))
+        if counter_rates:
+            disk_read_bps = counter_rates["disk_read_bps"]
+            disk_write_bps = counter_rates["disk_write_bps"]
+            net_in_bps = counter_rates["net_in_bps"]
+            net_out_bps = counter_rates["net_out_bps"]
+        elif rrd_data:
+            # Get the most recent data point with valid I/O data
+            for point in reversed(rrd_data):
+                if "diskread" in point and "diskwrite" in point and "netin" in point and "netout" in point:
+                    disk_read_bps = point.get("diskread", 0) or 0
+                    disk_write_bps = point.get("diskwrite", 0) or 0
+                    net_in_bps = point.get("netin", 0) or 0
+                    net_out_bps = point.get("netout", 0) or 0
+                    break
+
+        if rrd_data and self._profile_due:
+            # Phase 3a: Summarize guest RRD for behavioral profiling
+            # (queued and written in one batch by _save_guest_profiles)
+            guest_rrd_summary = self._summarize_guest_rrd(rrd_data)
+            if guest_rrd_summary:
+                self._profile_updates[str(vmid)] = (guest_rrd_summary, node_name)
+
+        # Check HA status
+        ha_sid = f"{'vm' if guest_type == 'VM' else 'ct'}:{vmid}"
+        ha_info = ha_managed.get(ha_sid, None)
+
+        # Check backup status
+        has_backup = str(vmid) not in not_backed_up_ids
+
+        # Check pool membership
+        pool_name = pool_membership.get(str(vmid), None)
+
+        agent_info = {}
+        agent_data = details.get("agent_data") or {}
+        if guest_type == "VM" and guest_status == "running" and agent_data:
+            agent_info = {
+                "version": agent_data.get("version", "unknown"),
+                "supported_commands": len(agent_data.get("supported_commands", []))
+            }
+
+        return {
+            "vmid": vmid,
+            "name": guest.get("name") or parsed_config.get("name") or f"{guest_type}-{vmid}",
+            "type": guest_type,
+            "node": node_name,
+            "status": guest.get("status", "unknown"),
+            "cpu_current": guest.get("cpu", 0) * 100 if guest.get("cpu") else 0,
+            "cpu_cores": parsed_config.get("cpu_cores") or guest.get("maxcpu", 0),
+            "mem_used_gb": guest.get("mem", 0) / (1024**3),
+            "mem_max_gb": guest.get("maxmem", 0) / (1024**3),
+            "disk_gb": guest.get("disk", 0) / (1024**3),
+            "disk_read_bps": disk_read_bps,
+            "disk_write_bps": disk_write_bps,
+            "net_in_bps": net_in_bps,
+            "net_out_bps": net_out_bps,
+            "tags": tags_data,
+            # io_exempt: discount this guest's node from iowait scoring. True when the
+            # guest is tagged io_exempt, OR has raw-device passthrough disks (dedicated
+            # storage whose iowait migration can't relieve — e.g. a NAS VM).
+            "io_exempt": bool(tags_data.get("has_io_exempt") or local_disk_info.get("has_passthrough")),
+            "io_exempt_reason": (
+                "tag" if tags_data.get("has_io_exempt")
+                else ("passthrough" if local_disk_info.get("has_passthrough") else None)
+            ),
+            "ha_managed": ha_info is not None,
+            "ha_state": ha_info.get("state") if ha_info else None,
+            "ha_group": ha_info.get("group") if ha_info else None,
+            "has_backup": has_backup,
+            "pool": pool_name,
+            "agent_running": len(agent_info) > 0,
+            "agent_info": agent_info if agent_info else None,
+            "mount_points": mount_point_info,
+            "local_disks": local_disk_info,
+            # Storage IDs the guest's disks live on (None when the config
+            # could not be read); see StorageCompatibilityMatrix
+            "storage_ids": parsed_config.get("storage_ids") if config_known else None,
+        }
+
     def analyze_cluster(self) -> Dict:
         """Perform full cluster analysis"""
         start_time = time.time()
         print(f"Fetching cluster resources from {self.proxmox_host}...")
         resources = self.get_cluster_resources()
+        resources_fetched_at = time.time()
 
         nodes_raw = [r for r in resources if r["type"] == "node"]
         vms_raw = [r for r in resources if r["type"] == "qemu"]
@@ -716,12 +1164,20 @@ class ProxmoxAPICollector:
             "cluster_quorate": cluster_health["quorate"]
         }
 
+        # Adaptive sizing starts from the limit the previous run settled on
+        self._concurrency = None
+        if self.parallel_enabled and self.adaptive_workers and self.max_workers > 1:
+            self._concurrency = load_adaptive_concurrency(self.max_workers)
+        worker_limit = self._concurrency.limit if self._concurrency else self.max_workers
+        self.perf_metrics["worker_limit"] = worker_limit if self.parallel_enabled else 1
+
         # Process nodes - parallel or sequential based on config
+        self._load_rrd_cache()
         if self.parallel_enabled and len(nodes_raw) > 1:
-            print(f"Using parallel collection with {self.max_workers} workers")
+            print(f"Using parallel collection with {worker_limit} workers")
             node_start = time.time()
 
-            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(nodes_raw))) as executor:
+            with ThreadPoolExecutor(max_workers=max(1, min(worker_limit, len(nodes_raw)))) as executor:
                 future_to_node = {
                     executor.submit(self._process_single_node, node): node["node"]
                     for node in nodes_raw
@@ -753,124 +1209,66 @@ class ProxmoxAPICollector:
             node_duration = time.time() - node_start
             self.perf_metrics["node_processing_time"] = round(node_duration, 2)
             print(f"Sequential node processing completed in {node_duration:.2f}s")
+
+        self._save_rrd_cache(n["node"] for n in nodes_raw)
+        self.perf_metrics["node_rrd_reused"] = self._rrd_stats["reused"]
+        self.perf_metrics["node_rrd_fetched"] = self._rrd_stats["fetched"]
+        self.perf_metrics["node_rrd_lazy"] = self._rrd_stats["lazy"]
         
-        # Process guests (VMs and containers)
+        # Process guests (VMs and containers). The per-guest API calls fan out
+        # over a bounded worker pool; records are then assembled sequentially in
+        # resource order so the output matches the sequential path exactly.
         guest_start = time.time()
-        for guest in vms_raw + cts_raw:
+        guests_raw = vms_raw + cts_raw
+        self._counter_io_rates = self._derive_counter_io_rates(guests_raw, resources_fetched_at)
+        self._profile_due = self._is_profiling_due(resources_fetched_at)
+        self.perf_metrics["guest_io_mode"] = self.guest_io_mode
+        self.perf_metrics["guest_io_from_counters"] = len(self._counter_io_rates)
+        self.perf_metrics["guest_profiling_run"] = self._profile_due
+        self._load_config_cache()
+        self._reused_guests = self._select_reusable_guests(guests_raw, resources_fetched_at)
+        self.perf_metrics["guests_reused"] = len(self._reused_guests)
+        self.perf_metrics["guests_refreshed"] = len(guests_raw) - len(self._reused_guests)
+        print(f"Guest delta: {len(self._reused_guests)} reused, "
+              f"{len(guests_raw) - len(self._reused_guests)} refreshed")
+        guest_details = self._fetch_all_guest_details(guests_raw)
+        if self._concurrency:
+            self.perf_metrics["worker_limit"] = self._concurrency.limit
+            save_adaptive_concurrency(self._concurrency)
+        self._profile_updates = {}
+
+        for guest, details in zip(guests_raw, guest_details):
             vmid = guest["vmid"]
             node_name = guest["node"]
-            guest_type_raw = guest["type"]
-            guest_type = "VM" if guest_type_raw == "qemu" else "CT"
-            guest_status = guest.get("status", "unknown")
-
-            # Get config for tags and mount points
-            config = self.get_guest_config(node_name, vmid, guest_type_raw)
-            tags_data = self.parse_tags(config.get("tags", ""))
-
-            # Detect mount points for containers only
-            mount_point_info = {}
-            if guest_type == "CT":
-                mount_point_info = self.detect_mount_points(config)
-
-            # Detect local/passthrough disks for both VMs and CTs
-            local_disk_info = self.detect_local_disks(config)
-
-            # Get RRD data for I/O metrics - skip if guest is stopped and optimization enabled
-            disk_read_bps = 0
-            disk_write_bps = 0
-            net_in_bps = 0
-            net_out_bps = 0
-
-            if not (self.skip_stopped_rrd and guest_status != "running"):
-                # Get RRD data for I/O metrics using configured timeframe
-                rrd_data = self.get_guest_rrd_data(node_name, vmid, guest_type_raw, self.guest_rrd_timeframe)
-
-                if rrd_data and len(rrd_data) > 0:
-                    # Get the most recent data point with valid I/O data
-                    for point in reversed(rrd_data):
-                        if "diskread" in point and "diskwrite" in point and "netin" in point and "netout" in point:
-                            disk_read_bps = point.get("diskread", 0) or 0
-                            disk_write_bps = point.get("diskwrite", 0) or 0
-                            net_in_bps = point.get("netin", 0) or 0
-                            net_out_bps = point.get("netout", 0) or 0
-                            break
-
-                    # Phase 3a: Summarize guest RRD for behavioral profiling
-                    guest_rrd_summary = self._summarize_guest_rrd(rrd_data)
-                    if guest_rrd_summary:
-                        try:
-                            from proxbalance.guest_profiles import update_guest_profile
-                            update_guest_profile(str(vmid), guest_rrd_summary, node_name)
-                        except Exception as e:
-                            print(f"Warning: Guest profile update failed for {vmid}: {e}", file=sys.stderr)
-
-            # Check HA status
-            ha_sid = f"{'vm' if guest_type == 'VM' else 'ct'}:{vmid}"
-            ha_info = ha_managed.get(ha_sid, None)
-
-            # Check backup status
-            has_backup = str(vmid) not in not_backed_up_ids
-
-            # Check pool membership
-            pool_name = pool_membership.get(str(vmid), None)
-
-            # Get guest agent info (VMs only, and only if running)
-            agent_info = {}
-            if guest_type == "VM" and guest_status == "running":
-                agent_data = self.get_guest_agent_info(node_name, vmid)
-                if agent_data:
-                    agent_info = {
-                        "version": agent_data.get("version", "unknown"),
-                        "supported_commands": len(agent_data.get("supported_commands", []))
-                    }
-
-            guest_info = {
-                "vmid": vmid,
-                "name": guest.get("name") or config.get("name") or f"{guest_type}-{vmid}",
-                "type": guest_type,
-                "node": node_name,
-                "status": guest.get("status", "unknown"),
-                "cpu_current": guest.get("cpu", 0) * 100 if guest.get("cpu") else 0,
-                "cpu_cores": config.get("cores") or config.get("cpus") or config.get("cpulimit") or guest.get("maxcpu", 0),
-                "mem_used_gb": guest.get("mem", 0) / (1024**3),
-                "mem_max_gb": guest.get("maxmem", 0) / (1024**3),
-                "disk_gb": guest.get("disk", 0) / (1024**3),
-                "disk_read_bps": disk_read_bps,
-                "disk_write_bps": disk_write_bps,
-                "net_in_bps": net_in_bps,
-                "net_out_bps": net_out_bps,
-                "tags": tags_data,
-                # io_exempt: discount this guest's node from iowait scoring. True when the
-                # guest is tagged io_exempt, OR has raw-device passthrough disks (dedicated
-                # storage whose iowait migration can't relieve — e.g. a NAS VM).
-                "io_exempt": bool(tags_data.get("has_io_exempt") or local_disk_info.get("has_passthrough")),
-                "io_exempt_reason": (
-                    "tag" if tags_data.get("has_io_exempt")
-                    else ("passthrough" if local_disk_info.get("has_passthrough") else None)
-                ),
-                "ha_managed": ha_info is not None,
-                "ha_state": ha_info.get("state") if ha_info else None,
-                "ha_group": ha_info.get("group") if ha_info else None,
-                "has_backup": has_backup,
-                "pool": pool_name,
-                "agent_running": len(agent_info) > 0,
-                "agent_info": agent_info if agent_info else None,
-                "mount_points": mount_point_info,
-                "local_disks": local_disk_info
-            }
-            
-            self.guests[str(vmid)] = guest_info
+            self.guests[str(vmid)] = self._build_guest_info(
+                guest, details, ha_managed, not_backed_up_ids, pool_membership
+            )
             if node_name in self.nodes:
                 self.nodes[node_name]["guests"].append(vmid)
 
+        self._save_config_cache(str(g["vmid"]) for g in guests_raw)
+        self._save_guest_snapshots(guests_raw, guest_details, resources_fetched_at)
+        self._save_guest_profiles()
+        self.perf_metrics["config_cache_hits"] = self._config_cache_hits
+        self.perf_metrics["config_cache_updates"] = len(self._config_cache_updates)
+
+        if self._profile_due and self.guest_profile_interval and self.guest_profile_interval > 0:
+            try:
+                from proxbalance.collector_state import set_collector_state
+                set_collector_state('last_guest_profile_ts', resources_fetched_at)
+            except Exception as e:
+                print(f"Warning: Failed to save guest profiling state: {e}", file=sys.stderr)
+
         guest_duration = time.time() - guest_start
         total_duration = time.time() - start_time
 
         self.perf_metrics["guest_processing_time"] = round(guest_duration, 2)
         self.perf_metrics["total_time"] = round(total_duration, 2)
+        self.perf_metrics["api_latency"] = self.api_latency.summary()
 
         print(f"Guest processing completed in {guest_duration:.2f}s")
         print(f"Total collection time: {total_duration:.2f}s")
+        self._save_api_latency(start_time)
 
         # Store cluster-level data for summary
         self.cluster_health = cluster_health
@@ -932,17 +1330,25 @@ class ProxmoxAPICollector:
             "cluster_health": getattr(self, 'cluster_health', {}),
             "ha_status": getattr(self, 'ha_status', {}),
             "pve_crs": getattr(self, 'crs_config', {}),
+            "storage_topology": self.storage_topology,
             "performance": getattr(self, 'perf_metrics', {})
         }
 
 
+def _write_snapshot(data, generation):
+    """Write the shared web-worker snapshot; the API falls back to the cache without it."""
+    try:
+        write_cluster_snapshot(data, CACHE_FILE, generation)
+    except Exception as e:
+        print(f"Warning: Could not write cluster snapshot: {e}", file=sys.stderr)
+
+
 def _load_previous_node_statuses():
     """Load previous node statuses from cache for change detection."""
     try:
-        if not os.path.exists(CACHE_FILE):
+        old_data = read_cluster_cache(CACHE_FILE, (SECTION_NODES,))
+        if not old_data:
             return {}
-        with open(CACHE_FILE, 'r') as f:
-            old_data = json.load(f)
         return {
             name: node.get("status", "unknown")
             for name, node in old_data.get("nodes", {}).items()
@@ -1014,8 +1420,14 @@ def _check_resource_thresholds(config, new_data):
         print(f"Warning: Failed to check resource thresholds: {e}", file=sys.stderr)
 
 
-def collect_data():
-    """Collect cluster data and save to cache"""
+def collect_data(collector_factory=None):
+    """Collect cluster data and save to cache
+
+    Args:
+        collector_factory: Callable taking the loaded config and returning a
+            ProxmoxAPICollector. The daemon passes one that reuses its
+            persistent Proxmox session; defaults to a fresh connection.
+    """
     try:
         print(f"[{datetime.utcnow()}] Starting cluster data collection...")
         config = load_config()
@@ -1026,36 +1438,32 @@ def collect_data():
         # Capture previous node statuses before collecting new data
         old_statuses = _load_previous_node_statuses()
 
-        collector = ProxmoxAPICollector(config)
+        collector = (collector_factory or ProxmoxAPICollector)(config)
         data = collector.analyze_cluster()
 
         # Preserve first_collected_at from existing cache
         try:
-            if os.path.exists(CACHE_FILE):
-                with open(CACHE_FILE, 'r') as f:
-                    existing = json.load(f)
-                if existing.get('first_collected_at'):
-                    data['first_collected_at'] = existing['first_collected_at']
+            existing = read_cluster_cache(CACHE_FILE, (SECTION_META,))
+            if existing and existing.get('first_collected_at'):
+                data['first_collected_at'] = existing['first_collected_at']
         except Exception:
             pass
         if 'first_collected_at' not in data:
             data['first_collected_at'] = data['collected_at']
 
-        # Write to cache file atomically
-        temp_file = CACHE_FILE + '.tmp'
-        with open(temp_file, 'w') as f:
-            json.dump(data, f, indent=2)
-
-        # Atomic rename
-        os.rename(temp_file, CACHE_FILE)
+        # Write the cache sections atomically (manifest last), with the
+        # shared snapshot the web workers map in place of parsing them
+        write_cluster_cache(data, CACHE_FILE, before_publish=lambda generation: _write_snapshot(data, generation))
 
         print(f"[{datetime.utcnow()}] Data collection complete. Cache updated.")
         print(f"[{datetime.utcnow()}] Collected data for {data['summary']['total_nodes']} nodes and {data['summary']['total_guests']} guests")
 
         # --- Persistent Metrics Store (trend-based migration data) ---
         try:
-            from proxbalance.metrics_store import append_node_sample, append_guest_sample, compress_old_samples
+            from proxbalance.metrics_store import append_samples, compress_old_samples
 
+            node_samples = {}
+            guest_samples = {}
             for node_name, node_data in data.get("nodes", {}).items():
                 if node_data.get("status") != "online":
                     continue
@@ -1066,19 +1474,19 @@ def collect_data():
                     usage_vals = [s.get("usage_pct", 0) for s in storage_list if s.get("usage_pct") is not None]
                     avg_storage = sum(usage_vals) / len(usage_vals) if usage_vals else 0.0
 
-                append_node_sample(node_name, {
+                node_samples[node_name] = {
                     "cpu": metrics.get("current_cpu", node_data.get("cpu_percent", 0)),
                     "memory": metrics.get("current_mem", node_data.get("mem_percent", 0)),
                     "iowait": metrics.get("current_iowait", 0),
                     "load_avg": metrics.get("avg_load", 0),
                     "guest_count": len(node_data.get("guests", [])),
                     "storage_usage_pct": round(avg_storage, 2),
-                })
+                }
 
             for vmid_str, guest_data in data.get("guests", {}).items():
                 if guest_data.get("status") != "running":
                     continue
-                append_guest_sample(vmid_str, {
+                guest_samples[vmid_str] = {
                     "cpu": guest_data.get("cpu_current", 0),
                     "memory": round(guest_data.get("mem_used_gb", 0) / max(guest_data.get("mem_max_gb", 1), 0.01) * 100, 2),
                     "disk_read_bps": guest_data.get("disk_read_bps", 0),
@@ -1086,7 +1494,9 @@ def collect_data():
                     "net_in_bps": guest_data.get("net_in_bps", 0),
                     "net_out_bps": guest_data.get("net_out_bps", 0),
                     "node": guest_data.get("node", ""),
-                })
+                }
+
+            append_samples(node_samples, guest_samples)
 
             comp_summary = compress_old_samples()
             if comp_summary.get("nodes_compressed", 0) > 0 or comp_summary.get("guests_compressed", 0) > 0:
@@ -1158,7 +1568,146 @@ def collect_data():
         return False
 
 
+class CollectorDaemon:
+    """Long-running collector that keeps one Proxmox session between runs.
+
+    Replaces the one-shot process started by proxmox-collector.timer: the
+    ProxmoxAPI client (and its keep-alive HTTPS pool) and the thread-local
+    SQLite connection are reused across collections, which run every
+    collection_interval_minutes. config.json is re-read when its mtime
+    changes; a change to the connection settings opens a new session.
+    A local Unix socket (COLLECTOR_SOCKET) accepts "collect" requests so
+    trigger_collection() can start a run without spawning a process.
+    """
+
+    # How often the loop wakes to check config.json for changes
+    CONFIG_POLL_SECONDS = 30
+
+    # Settings that require a new Proxmox session when they change
+    CONNECTION_KEYS = (
+        'proxmox_host', 'proxmox_port', 'proxmox_verify_ssl', 'proxmox_auth_method',
+        'proxmox_api_token_id', 'proxmox_api_token_secret', 'proxmox_username', 'proxmox_password',
+    )
+
+    def __init__(self, socket_path: str = COLLECTOR_SOCKET):
+        self.socket_path = socket_path
+        self.trigger = threading.Event()
+        self.stopping = threading.Event()
+        self.interval_minutes = 60
+        self._config_mtime = None
+        self._proxmox = None
+        self._connection_key = None
+        self._server = None
+
+    def _connection_key_for(self, config: Dict) -> tuple:
+        opt_config = config.get('collection_optimization', {})
+        return tuple(config.get(k) for k in self.CONNECTION_KEYS) + (opt_config.get('max_parallel_workers', 5),)
+
+    def _collector_for(self, config: Dict) -> 'ProxmoxAPICollector':
+        """Build this run's collector, reusing the Proxmox session when possible."""
+        key = self._connection_key_for(config)
+        if self._proxmox is not None and key == self._connection_key:
+            return ProxmoxAPICollector(config, proxmox=self._proxmox)
+        if self._proxmox is not None:
+            print(f"[{datetime.utcnow()}] Connection settings changed, opening a new Proxmox session")
+        collector = ProxmoxAPICollector(config)
+        self._proxmox, self._connection_key = collector.proxmox, key
+        return collector
+
+    def _reload_config_if_changed(self) -> None:
+        """Pick up a new collection interval when config.json changes."""
+        try:
+            mtime = os.path.getmtime(CONFIG_FILE)
+        except OSError:
+            return
+        if mtime == self._config_mtime:
+            return
+        self._config_mtime = mtime
+        try:
+            config = load_config()
+        except Exception as e:
+            print(f"Warning: Failed to reload config: {e}", file=sys.stderr)
+            return
+        interval = config.get('collection_interval_minutes', 60)
+        if interval != self.interval_minutes:
+            print(f"[{datetime.utcnow()}] Collection interval set to {interval} minutes")
+        self.interval_minutes = interval
+
+    def _serve_trigger_socket(self) -> None:
+        """Accept "collect" requests on the local trigger socket."""
+        import socket
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self._server.listen(8)
+
+        def serve():
+            while not self.stopping.is_set():
+                try:
+                    conn, _ = self._server.accept()
+                except OSError:
+                    break
+                with conn:
+                    try:
+                        conn.settimeout(2)
+                        if conn.recv(64).strip() == b"collect":
+                            self.trigger.set()
+                            conn.sendall(b"ok\n")
+                        else:
+                            conn.sendall(b"error\n")
+                    except OSError:
+                        pass
+
+        threading.Thread(target=serve, name="collector-trigger", daemon=True).start()
+        print(f"[{datetime.utcnow()}] Listening for collection triggers on {self.socket_path}")
+
+    def stop(self, *_args) -> None:
+        self.stopping.set()
+        self.trigger.set()
+
+    def run(self) -> None:
+        """Run collections until stopped (SIGTERM/SIGINT)."""
+        import signal
+        from proxbalance.db import init_db
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        init_db()
+        self._serve_trigger_socket()
+
+        next_due = time.time()
+        try:
+            while not self.stopping.is_set():
+                self._reload_config_if_changed()
+                now = time.time()
+                if self.trigger.is_set() or now >= next_due:
+                    # Triggers arriving during the run queue exactly one follow-up run
+                    self.trigger.clear()
+                    started = time.time()
+                    if not collect_data(collector_factory=self._collector_for):
+                        # Reconnect next time in case the session went bad
+                        self._proxmox = None
+                    next_due = started + max(1, self.interval_minutes) * 60
+                    continue
+                self.trigger.wait(timeout=min(next_due - now, self.CONFIG_POLL_SECONDS))
+        finally:
+            if self._server is not None:
+                self._server.close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+            print(f"[{datetime.utcnow()}] Collector daemon stopped")
+
+
 if __name__ == '__main__':
+    if '--daemon' in sys.argv[1:]:
+        CollectorDaemon().run()
+        sys.exit(0)
     from proxbalance.db import init_db
     init_db()
     success = collect_data()
@@ -46,14 +46,15 @@ def load_config():
 def get_cluster_size():
     """Get current cluster size from cache."""
     try:
-        if not CLUSTER_CACHE.exists():
-            return 0, 0
+        from proxbalance.cluster_cache import SECTION_META, read_cluster_cache
 
-        with open(CLUSTER_CACHE, 'r') as f:
-            data = json.load(f)
-            num_nodes = len(data.get('nodes', {}))
-            num_guests = len(data.get('guests', {}))
-            return num_nodes, num_guests
+        # The summary in the meta section carries the counts; nodes and
+        # guests do not need to be parsed
+        data = read_cluster_cache(str(CLUSTER_CACHE), (SECTION_META,))
+        if data is None:
+            return 0, 0
+        summary = data.get('summary', {})
+        return summary.get('total_nodes', 0), summary.get('total_guests', 0)
     except Exception as e:
         logger.warning(f"Could not read cluster size: {e}")
         return 0, 0
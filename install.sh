@@ -1686,7 +1686,7 @@ cat > /etc/motd <<'MOTD'
      systemctl start proxmox-collector.service
 
   📊 View cluster cache:
-     jq '.' /opt/proxmox-balance-manager/cluster_cache.json | less
+     jq '.' /opt/proxmox-balance-manager/cluster_cache/meta.json | less
 
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
@@ -1816,7 +1816,7 @@ pct exec ${CTID} -- nano /opt/proxmox-balance-manager/config.json
 | Purpose | Path |
 |---------|------|
 | Config | \`/opt/proxmox-balance-manager/config.json\` |
-| Cache | \`/opt/proxmox-balance-manager/cluster_cache.json\` |
+| Cache | \`/opt/proxmox-balance-manager/cluster_cache/\` |
 | API App | \`/opt/proxmox-balance-manager/app.py\` |
 | Collector | \`/opt/proxmox-balance-manager/collector_api.py\` |
 | Web UI | \`/var/www/html/index.html\` |
@@ -1907,8 +1907,8 @@ initial_collection() {
         exit 0
       fi
       # Check if cache file was created/updated recently
-      if pct exec "$CTID" -- test -f /opt/proxmox-balance-manager/cluster_cache.json 2>/dev/null; then
-        local cache_age=$(pct exec "$CTID" -- stat -c %Y /opt/proxmox-balance-manager/cluster_cache.json 2>/dev/null || echo "0")
+      if pct exec "$CTID" -- test -f /opt/proxmox-balance-manager/cluster_cache/manifest.json 2>/dev/null; then
+        local cache_age=$(pct exec "$CTID" -- stat -c %Y /opt/proxmox-balance-manager/cluster_cache/manifest.json 2>/dev/null || echo "0")
         local now=$(date +%s)
         local age=$((now - cache_age))
         if [ $age -lt 30 ]; then
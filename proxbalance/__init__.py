@@ -17,17 +17,26 @@ from proxbalance.config_manager import (
     get_proxmox_client,
     load_penalty_config,
     save_penalty_config,
+    get_config_cache_stats,
     validate_config_structure,
     read_cache,
     trigger_collection,
 )
 from proxbalance.cache import CacheManager
+from proxbalance.cluster_cache import (
+    ALL_SECTIONS,
+    CORE_SECTIONS,
+    read_cluster_cache,
+    write_cluster_cache,
+    cluster_cache_mtime,
+)
 from proxbalance.scoring import (
     DEFAULT_PENALTY_CONFIG,
     calculate_node_health_score,
     predict_post_migration_load,
     calculate_target_node_score,
     calculate_migration_risk,
+    NodeScoringContext,
 )
 from proxbalance.db import init_db, close_all
 from proxbalance.forecasting import (
@@ -43,13 +52,23 @@ from proxbalance.guest_profiles import (
     load_guest_profiles,
     save_guest_profiles,
     update_guest_profile,
+    update_guest_profiles,
     classify_guest_behavior,
     get_guest_profile,
+    load_guest_classifications,
+    refresh_guest_behavior,
+)
+from proxbalance.guest_config_cache import (
+    parse_guest_config,
+    get_guest_config_summary,
+    load_guest_config_cache,
+    invalidate_guest_config,
 )
 from proxbalance.recommendations import (
     select_guests_to_migrate,
-    build_storage_cache,
     check_storage_compatibility,
+    storage_index_from_topology,
+    StorageCompatibilityMatrix,
     calculate_node_guest_counts,
     find_distribution_candidates,
     generate_recommendations,
@@ -67,14 +86,19 @@ from proxbalance.reporting import build_summary, generate_capacity_advisories
 from proxbalance.metrics_store import (
     append_node_sample,
     append_guest_sample,
+    append_samples,
     compress_old_samples,
     get_node_history,
     get_guest_history,
     get_data_quality,
+    get_metrics_generation,
 )
 from proxbalance.trend_analysis import (
     analyze_node_trends,
     analyze_guest_trends,
+    cached_node_trends,
+    cached_guest_trends,
+    get_trend_cache_stats,
     compare_node_stability,
     get_cluster_trend_summary,
 )
@@ -0,0 +1,198 @@
+"""
+ProxBalance Adaptive Collector Concurrency
+
+Tunes how many Proxmox API calls the collector keeps in flight, AIMD style:
+the limit grows by one worker after each window of calls whose p95 latency
+stays close to its baseline, and is halved as soon as pveproxy answers
+with a 5xx or a call times out. The configured ``max_parallel_workers``
+is the ceiling.
+
+Endpoint classes differ by an order of magnitude (cluster/resources is a
+few milliseconds, rrddata and config reads tens), so each class keeps its
+own baseline and a window is judged on every call's latency relative to
+its class baseline. Baselines follow latency both ways with an EWMA over
+non-overloaded windows, so a cluster that gets slower for good is
+re-learned instead of pinning the limit. The chosen limit and the
+baselines are kept in collector state so the next run starts where this
+one left off; baselines older than BASELINE_MAX_AGE_SECONDS are dropped
+and learned again.
+"""
+
+import math
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from proxbalance.api_metrics import _percentile
+
+# collector_state key holding the persisted limit and latency baseline
+ADAPTIVE_STATE_KEY = "adaptive_worker_limit"
+
+# Limit used on the first run when no state has been persisted yet
+DEFAULT_INITIAL_WORKERS = 5
+
+# A window's p95 within this factor of the baseline counts as "flat"
+LATENCY_TOLERANCE = 1.25
+
+# Minimum calls per evaluation window
+MIN_WINDOW_CALLS = 8
+
+# Calls of one endpoint class needed to learn or update its baseline
+MIN_CLASS_CALLS = 3
+
+# Weight of a window's per-class p95 when folding it into the baseline
+BASELINE_WEIGHT = 0.2
+
+# Persisted baselines older than this are discarded and learned again
+BASELINE_MAX_AGE_SECONDS = 3600
+
+# Endpoints whose errors are expected and never signal overload; Proxmox
+# answers agent/info with a 500 whenever the guest agent is not running
+OVERLOAD_EXEMPT_ENDPOINTS = ("guest/agent/info",)
+
+
+def is_overload_error(error: Optional[BaseException]) -> bool:
+    """Whether an API error means pveproxy is overloaded (5xx or timeout)."""
+    if error is None:
+        return False
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status >= 500
+    if isinstance(error, TimeoutError):
+        return True
+    return "timeout" in type(error).__name__.lower() or "timed out" in str(error).lower()
+
+
+class AdaptiveConcurrency:
+    """Thread-safe AIMD controller for the collector's in-flight API calls.
+
+    Feed every API call to :meth:`observe` (it has the signature of an
+    :class:`~proxbalance.api_metrics.ApiLatencyRecorder` observer) and read
+    :attr:`limit` before dispatching more work.
+    """
+
+    def __init__(self, ceiling: int, initial: Optional[int] = None,
+                 baselines: Optional[Dict[str, float]] = None, floor: int = 1):
+        self.ceiling = max(1, int(ceiling))
+        self.floor = max(1, min(int(floor), self.ceiling))
+        start = DEFAULT_INITIAL_WORKERS if initial is None else int(initial)
+        self._limit = max(self.floor, min(start, self.ceiling))
+        self.initial = self._limit
+        # Per endpoint class p95 latency (seconds) a window is compared against
+        self.baselines: Dict[str, float] = {
+            endpoint: float(p95) for endpoint, p95 in (baselines or {}).items()
+            if isinstance(p95, (int, float)) and p95 > 0
+        }
+        self.increases = 0
+        self.decreases = 0
+        self.overload_errors = 0
+        self._window: Dict[str, List[float]] = {}
+        self._learning: Dict[str, List[float]] = {}
+        self._window_calls = 0
+        self._window_overloaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def observe(self, endpoint: str, seconds: float, error: Optional[BaseException] = None) -> None:
+        """Record one API call and adjust the limit at window boundaries."""
+        overload = endpoint not in OVERLOAD_EXEMPT_ENDPOINTS and is_overload_error(error)
+        with self._lock:
+            self._window_calls += 1
+            if overload:
+                self.overload_errors += 1
+                # Multiplicative decrease, at most once per window so a burst
+                # of failures from the same saturated node is not compounded
+                if not self._window_overloaded:
+                    self._window_overloaded = True
+                    new_limit = max(self.floor, math.ceil(self._limit / 2))
+                    if new_limit < self._limit:
+                        self._limit = new_limit
+                        self.decreases += 1
+            elif error is None:
+                self._window.setdefault(endpoint, []).append(seconds)
+            if self._window_calls >= max(MIN_WINDOW_CALLS, 2 * self._limit):
+                self._close_window()
+
+    def _close_window(self) -> None:
+        """Evaluate a full window (lock held): additive increase on flat latency."""
+        window, overloaded = self._window, self._window_overloaded
+        self._window, self._window_calls, self._window_overloaded = {}, 0, False
+        if overloaded:
+            return
+        ratios: List[float] = []
+        for endpoint, samples in window.items():
+            baseline = self.baselines.get(endpoint)
+            if baseline is None:
+                # Learn a new class's baseline once it has enough calls,
+                # possibly gathered over several windows
+                learning = self._learning.setdefault(endpoint, [])
+                learning.extend(samples)
+                if len(learning) >= MIN_CLASS_CALLS:
+                    self.baselines[endpoint] = _percentile(learning, 95)
+                    del self._learning[endpoint]
+                continue
+            ratios.extend(seconds / baseline for seconds in samples)
+            if len(samples) >= MIN_CLASS_CALLS:
+                p95 = _percentile(samples, 95)
+                self.baselines[endpoint] = (1 - BASELINE_WEIGHT) * baseline + BASELINE_WEIGHT * p95
+        if ratios and _percentile(ratios, 95) <= LATENCY_TOLERANCE and self._limit < self.ceiling:
+            self._limit += 1
+            self.increases += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Limit and adjustment counters for the cache's ``performance`` block."""
+        with self._lock:
+            return {
+                "limit": self._limit,
+                "initial": self.initial,
+                "ceiling": self.ceiling,
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "overload_errors": self.overload_errors,
+                "baseline_p95_ms": {endpoint: round(p95 * 1000, 1)
+                                    for endpoint, p95 in sorted(self.baselines.items())},
+            }
+
+
+def load_adaptive_concurrency(ceiling: int, now: Optional[float] = None) -> AdaptiveConcurrency:
+    """Build a controller starting from the persisted limit, clamped to ``ceiling``.
+
+    Baselines saved more than BASELINE_MAX_AGE_SECONDS ago (or in the old
+    single-baseline format) are ignored and learned again during the run.
+    """
+    state = {}
+    try:
+        from proxbalance.collector_state import get_collector_state
+        state = get_collector_state(ADAPTIVE_STATE_KEY, {}) or {}
+    except Exception as e:
+        print(f"Warning: Could not load adaptive worker state: {e}", file=sys.stderr)
+    now = time.time() if now is None else now
+    baselines_ms = state.get("baselines_p95_ms")
+    updated_at = state.get("updated_at")
+    if (not isinstance(baselines_ms, dict) or not isinstance(updated_at, (int, float))
+            or now - updated_at > BASELINE_MAX_AGE_SECONDS):
+        baselines_ms = {}
+    return AdaptiveConcurrency(
+        ceiling,
+        initial=state.get("limit"),
+        baselines={endpoint: ms / 1000 for endpoint, ms in baselines_ms.items()
+                   if isinstance(ms, (int, float))},
+    )
+
+
+def save_adaptive_concurrency(controller: AdaptiveConcurrency) -> None:
+    """Persist the controller's limit and latency baselines for the next run."""
+    summary = controller.summary()
+    try:
+        from proxbalance.collector_state import set_collector_state
+        set_collector_state(ADAPTIVE_STATE_KEY, {
+            "limit": summary["limit"],
+            "baselines_p95_ms": summary["baseline_p95_ms"],
+            "updated_at": time.time(),
+        })
+    except Exception as e:
+        print(f"Warning: Could not save adaptive worker state: {e}", file=sys.stderr)
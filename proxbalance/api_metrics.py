@@ -0,0 +1,143 @@
+"""
+ProxBalance Collector API Latency Metrics (SQLite backend)
+
+Times every Proxmox API call the collector makes, grouped by endpoint
+class (``node/rrddata``, ``guest/config``, ``guest/agent/info``, ...).
+Each run's per-endpoint call counts, error counts and p50/p95/max
+latencies are written to the cache's ``performance`` block and appended
+to the ``collector_api_latency`` table so collection-cost regressions can
+be charted over time.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from proxbalance.db import get_connection
+
+# Runs of history kept in collector_api_latency
+API_LATENCY_MAX_RUNS = 2000
+
+
+def _percentile(values: List[float], pct: int) -> float:
+    """Linear-interpolated percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    sv = sorted(values)
+    k = (len(sv) - 1) * pct / 100
+    f = int(k)
+    c = f + 1
+    if c >= len(sv):
+        return float(sv[-1])
+    return sv[f] + (k - f) * (sv[c] - sv[f])
+
+
+class ApiLatencyRecorder:
+    """Thread-safe per-endpoint latency recorder for one collection run.
+
+    ``observer``, when set, is called as ``observer(endpoint, seconds, error)``
+    after every tracked call (``error`` is None on success).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, List[float]] = {}
+        self._errors: Dict[str, int] = {}
+        self.observer: Optional[Callable[[str, float, Optional[BaseException]], None]] = None
+
+    @contextmanager
+    def track(self, endpoint: str):
+        """Time the enclosed API call; an exception counts as an error and is re-raised."""
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.record(endpoint, elapsed, error is None)
+            observer = self.observer
+            if observer is not None:
+                observer(endpoint, elapsed, error)
+
+    def record(self, endpoint: str, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            self._latencies.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latencies = {}
+            self._errors = {}
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-endpoint stats: calls, errors, p50/p95/max and total in milliseconds."""
+        with self._lock:
+            latencies = {k: list(v) for k, v in self._latencies.items()}
+            errors = dict(self._errors)
+        return {
+            endpoint: {
+                "calls": len(values),
+                "errors": errors.get(endpoint, 0),
+                "p50_ms": round(_percentile(values, 50) * 1000, 1),
+                "p95_ms": round(_percentile(values, 95) * 1000, 1),
+                "max_ms": round(max(values) * 1000, 1),
+                "total_ms": round(sum(values) * 1000, 1),
+            }
+            for endpoint, values in sorted(latencies.items())
+        }
+
+
+def save_api_latency(run_ts: float, summary: Dict[str, Dict[str, Any]]) -> int:
+    """Append one run's per-endpoint summary and trim old runs.
+
+    Args:
+        run_ts: Collection run timestamp (epoch seconds).
+        summary: Output of :meth:`ApiLatencyRecorder.summary`.
+
+    Returns:
+        Number of endpoint rows written.
+    """
+    rows = [
+        (run_ts, endpoint, s["calls"], s["errors"], s["p50_ms"], s["p95_ms"], s["max_ms"], s["total_ms"])
+        for endpoint, s in summary.items()
+    ]
+    if not rows:
+        return 0
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO collector_api_latency (run_ts, endpoint, calls, errors, p50_ms, p95_ms, max_ms, total_ms) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute(
+            "DELETE FROM collector_api_latency WHERE run_ts < ("
+            "  SELECT MIN(run_ts) FROM (SELECT DISTINCT run_ts FROM collector_api_latency ORDER BY run_ts DESC LIMIT ?)"
+            ")",
+            (API_LATENCY_MAX_RUNS,),
+        )
+    return len(rows)
+
+
+def get_api_latency_history(endpoint: Optional[str] = None, hours: int = 168) -> List[Dict[str, Any]]:
+    """Return per-run latency rows, oldest first.
+
+    Args:
+        endpoint: Restrict to one endpoint class, or None for all.
+        hours: Lookback window.
+    """
+    cutoff = time.time() - hours * 3600
+    sql = ("SELECT run_ts, endpoint, calls, errors, p50_ms, p95_ms, max_ms, total_ms "
+           "FROM collector_api_latency WHERE run_ts >= ?")
+    params: list = [cutoff]
+    if endpoint:
+        sql += " AND endpoint = ?"
+        params.append(endpoint)
+    sql += " ORDER BY run_ts, endpoint"
+    conn = get_connection()
+    return [dict(r) for r in conn.execute(sql, params).fetchall()]
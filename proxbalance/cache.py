@@ -1,53 +1,146 @@
 """
-In-memory cache with TTL for cluster data.
-Reads from the JSON cache file on disk and keeps results in memory
-to avoid repeated disk I/O within the TTL window.
+In-memory cache for cluster data, invalidated by collection generation.
+Reads sections of the sharded cluster cache on disk and keeps them in
+memory until the collector writes a new generation. Each request costs one
+stat of the cache manifest; a new collection is detected from the
+manifest's mtime/inode and reloaded once, re-parsing only the sections
+whose version changed. A caller asking for the core sections never pays
+for parsing chart data.
 """
 
-import json
-import os
 import sys
-import time
 import threading
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Tuple
+
+from proxbalance.cluster_cache import (
+    ALL_SECTIONS, cache_signature, current_manifest, merge_sections, read_sections,
+)
 
 
 class CacheManager:
-    """In-memory cache with TTL for cluster data"""
+    """In-memory cache for cluster data, reloaded once per collection"""
 
-    def __init__(self, cache_file: str, ttl_seconds: int = 60):
+    def __init__(self, cache_file: str):
         self.cache_file = cache_file
-        self.ttl_seconds = ttl_seconds
-        self._cache = None
-        self._cached_at = None
+        # Signature (stat identity) and manifest of the newest write seen
+        self._signature = None
+        self._manifest = None
+        # section name -> (version, data, generation it was read from)
+        self._sections = {}
+        # (sections, versions) -> merged dict, so repeated calls share one object
+        self._merged = {}
+        self._reloads = 0
+        self._hits = 0
         self._lock = threading.Lock()
 
-    def get(self) -> Optional[Dict]:
-        """Get cached data or read from disk if expired"""
+    def _refresh_manifest(self) -> Optional[Dict]:
+        """Re-read the manifest if the cache was written since the last call."""
+        signature = cache_signature(self.cache_file)
+        if signature is None:
+            self._signature = self._manifest = None
+            return None
+        if signature != self._signature:
+            manifest = current_manifest(self.cache_file)
+            if manifest is None:
+                return None
+            self._signature, self._manifest = signature, manifest
+        return self._manifest
+
+    def generation(self) -> Optional[int]:
+        """Generation of the newest collection on disk, or None without a cache.
+
+        The collector increments it on every write, so downstream caches can
+        key derived data on it. Compare for equality only: a legacy
+        single-file cache reports its mtime in nanoseconds instead.
+        """
         with self._lock:
-            now = time.time()
+            manifest = self._refresh_manifest()
+            return manifest["generation"] if manifest else None
 
-            # Return cached data if still valid
-            if self._cache is not None and self._cached_at is not None:
-                age = now - self._cached_at
-                if age < self.ttl_seconds:
-                    return self._cache
+    def get(self, sections: Iterable[str] = ALL_SECTIONS) -> Optional[Dict]:
+        """Get cached data, reading from disk only after a new collection.
 
-            # Cache expired or doesn't exist - read from disk
-            try:
-                if not os.path.exists(self.cache_file):
-                    return None
+        Args:
+            sections: Cache sections to include (see proxbalance.cluster_cache).
+                Defaults to all of them, which matches the legacy cache file.
+        """
+        return self.get_with_generation(sections)[0]
+
+    def get_with_generation(self, sections: Iterable[str] = ALL_SECTIONS) -> Tuple[Optional[Dict], Optional[int]]:
+        """Like get(), but also return the generation the data was read from.
+
+        Use this rather than get() followed by generation() when keying
+        derived data, since a collection can land between the two calls.
+        """
+        sections = tuple(sections)
+        with self._lock:
+            manifest = self._refresh_manifest()
+            if manifest is None:
+                return None, None
+
+            # Serve from memory if every requested section is from this generation
+            generation = manifest["generation"]
+            cached = [self._sections.get(name) for name in sections]
+            if all(c is not None and c[2] == generation for c in cached):
+                self._hits += 1
+                return self._merge(sections, cached), generation
 
-                with open(self.cache_file, 'r') as f:
-                    self._cache = json.load(f)
-                    self._cached_at = now
-                    return self._cache
+            # New collection - read the requested sections, reusing any whose
+            # version has not changed
+            try:
+                loaded = read_sections(
+                    self.cache_file, sections,
+                    loaded={name: (c[0], c[1]) for name, c in self._sections.items()},
+                )
             except Exception as e:
                 print(f"Error reading cache: {str(e)}", file=sys.stderr)
-                return None
+                return None, None
+            if loaded is None:
+                return None, None
+
+            data, manifest = loaded
+            # read_sections may have seen a newer manifest than the stat above;
+            # keep the signature so the next call re-checks it
+            self._manifest = manifest
+            self._reloads += 1
+            for name in sections:
+                version = manifest["sections"].get(name, {}).get("version")
+                self._sections[name] = (version, data[name], manifest["generation"])
+            merged = self._merge(sections, [self._sections[name] for name in sections])
+            return merged, manifest["generation"]
+
+    def _merge(self, sections, cached) -> Dict:
+        key = (sections, tuple(c[0] for c in cached))
+        merged = self._merged.get(key)
+        if merged is None:
+            if len(self._merged) > 16:
+                self._merged.clear()
+            merged = merge_sections({name: c[1] for name, c in zip(sections, cached)})
+            self._merged[key] = merged
+        return merged
+
+    def stats(self) -> Dict:
+        """Generation currently held, reload count and in-memory hits."""
+        with self._lock:
+            return {
+                "generation": self._manifest["generation"] if self._manifest else None,
+                "reloads": self._reloads,
+                "hits": self._hits,
+                "sections": {name: c[0] for name, c in self._sections.items()},
+            }
+
+    def discard(self, sections: Iterable[str]) -> None:
+        """Drop sections from memory until a caller asks for them again."""
+        with self._lock:
+            for name in sections:
+                self._sections.pop(name, None)
+            self._merged = {key: merged for key, merged in self._merged.items()
+                            if not set(key[0]) & set(sections)}
 
     def invalidate(self):
         """Force cache refresh on next request"""
         with self._lock:
-            self._cache = None
-            self._cached_at = None
+            self._signature = None
+            self._manifest = None
+            self._sections = {}
+            self._merged = {}
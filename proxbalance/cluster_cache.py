@@ -0,0 +1,320 @@
+"""
+ProxBalance Sharded Cluster Cache
+
+The collector's output is stored as separately versioned sections next to
+the legacy ``cluster_cache.json`` path, in a ``cluster_cache/`` directory:
+
+- ``meta``   -- collected_at, summary, cluster_health, ha_status, pve_crs,
+                performance (every top-level key except nodes/guests)
+- ``nodes``  -- node records without ``trend_data``
+- ``guests`` -- guest records
+- ``trends`` -- per-node chart series (``trend_data``), keyed by node
+
+``manifest.json`` lists each section's file, version, digest and size and
+carries a generation number that increments on every write. A section's
+version only moves when its content changes, and unchanged sections are
+not rewritten. Readers load only the sections they need, so a
+recommendation run never parses chart data.
+
+Section files are written first and the manifest last. Each section file
+records its version, and readers retry when it does not match the manifest
+(a collection finished mid-read). When no manifest exists yet, readers fall
+back to the legacy single-file cache.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# On-disk layout version of the manifest
+CACHE_FORMAT = 1
+
+SECTION_META = "meta"
+SECTION_NODES = "nodes"
+SECTION_GUESTS = "guests"
+SECTION_TRENDS = "trends"
+
+ALL_SECTIONS = (SECTION_META, SECTION_NODES, SECTION_GUESTS, SECTION_TRENDS)
+
+# Everything except chart series: what scoring, recommendations,
+# evacuation and automigrate need
+CORE_SECTIONS = (SECTION_META, SECTION_NODES, SECTION_GUESTS)
+
+MANIFEST_NAME = "manifest.json"
+
+# Attempts to read a consistent set of sections while a write is in progress
+_READ_ATTEMPTS = 3
+
+
+def shard_dir_for(cache_file: str) -> str:
+    """Directory holding the sections for a legacy cache path (``x.json`` -> ``x/``)."""
+    root, ext = os.path.splitext(str(cache_file))
+    return root if ext else root + ".d"
+
+
+# ---------------------------------------------------------------------------
+# Splitting and merging
+# ---------------------------------------------------------------------------
+
+def split_cluster_data(data: Dict) -> Dict[str, Any]:
+    """Split collector output into its sections."""
+    nodes, trends = {}, {}
+    for name, node in (data.get("nodes") or {}).items():
+        node = dict(node)
+        trends[name] = node.pop("trend_data", {})
+        nodes[name] = node
+    meta = {k: v for k, v in data.items() if k not in ("nodes", "guests")}
+    return {
+        SECTION_META: meta,
+        SECTION_NODES: nodes,
+        SECTION_GUESTS: data.get("guests") or {},
+        SECTION_TRENDS: trends,
+    }
+
+
+def merge_sections(sections: Dict[str, Any]) -> Dict:
+    """Reassemble loaded sections into the legacy cache shape.
+
+    Only the loaded sections appear: without ``trends`` the node records
+    have no ``trend_data``; without ``nodes`` there is no ``nodes`` key.
+    """
+    data = dict(sections.get(SECTION_META) or {})
+    if SECTION_NODES in sections:
+        nodes = sections[SECTION_NODES] or {}
+        trends = sections.get(SECTION_TRENDS)
+        if trends is not None:
+            nodes = {name: {**node, "trend_data": trends.get(name, {})} for name, node in nodes.items()}
+        data["nodes"] = nodes
+    if SECTION_GUESTS in sections:
+        data["guests"] = sections[SECTION_GUESTS] or {}
+    return data
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def _atomic_write(path: str, payload: str) -> None:
+    temp_file = path + ".tmp"
+    with open(temp_file, "w") as f:
+        f.write(payload)
+    os.replace(temp_file, path)
+
+
+def write_cluster_cache(data: Dict, cache_file: str,
+                        before_publish: Optional[Callable[[int], None]] = None) -> Dict:
+    """Write collector output as sections plus manifest.
+
+    Sections whose content is unchanged since the last write keep their
+    version and are not rewritten. A leftover legacy single-file cache is
+    removed once the manifest is in place.
+
+    Args:
+        data: Full collector output (the legacy cache dict).
+        cache_file: Legacy cache path; sections go to ``shard_dir_for(cache_file)``.
+        before_publish: Called with the new generation after the sections
+            are written and before the manifest makes them visible, for
+            files derived from the same collection (see proxbalance.snapshot).
+
+    Returns:
+        The new manifest.
+    """
+    shard_dir = shard_dir_for(cache_file)
+    os.makedirs(shard_dir, exist_ok=True)
+    previous = read_manifest(cache_file) or {}
+    previous_sections = previous.get("sections", {})
+    generation = int(previous.get("generation", 0)) + 1
+
+    manifest_sections = {}
+    for name, content in split_cluster_data(data).items():
+        body = json.dumps(content, separators=(",", ":"))
+        digest = hashlib.sha1(body.encode()).hexdigest()
+        prev = previous_sections.get(name, {})
+        filename = f"{name}.json"
+        if prev.get("digest") == digest and os.path.exists(os.path.join(shard_dir, filename)):
+            manifest_sections[name] = prev
+            continue
+        version = int(prev.get("version", 0)) + 1
+        # The wrapper is written by hand so the section body is serialized once
+        _atomic_write(os.path.join(shard_dir, filename),
+                      f'{{"section":"{name}","version":{version},"data":{body}}}')
+        manifest_sections[name] = {"file": filename, "version": version, "digest": digest, "bytes": len(body)}
+
+    if before_publish is not None:
+        before_publish(generation)
+
+    manifest = {
+        "format": CACHE_FORMAT,
+        "generation": generation,
+        "collected_at": data.get("collected_at"),
+        "written_at": time.time(),
+        "sections": manifest_sections,
+    }
+    _atomic_write(os.path.join(shard_dir, MANIFEST_NAME), json.dumps(manifest, indent=2))
+
+    if os.path.exists(cache_file):
+        try:
+            os.remove(cache_file)
+        except OSError as e:
+            print(f"Warning: Could not remove legacy cache file {cache_file}: {e}", file=sys.stderr)
+    return manifest
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def read_manifest(cache_file: str) -> Optional[Dict]:
+    """Return the manifest for a cache path, or None if there is none."""
+    path = os.path.join(shard_dir_for(cache_file), MANIFEST_NAME)
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error reading cache manifest: {e}", file=sys.stderr)
+        return None
+    if manifest.get("format") != CACHE_FORMAT:
+        print(f"Warning: Unsupported cache manifest format {manifest.get('format')}", file=sys.stderr)
+        return None
+    return manifest
+
+
+def _read_section(shard_dir: str, entry: Dict) -> Tuple[Optional[int], Any]:
+    with open(os.path.join(shard_dir, entry["file"]), "r") as f:
+        wrapper = json.load(f)
+    return wrapper.get("version"), wrapper.get("data")
+
+
+def _legacy_manifest(cache_file: str) -> Optional[Dict]:
+    """Stand-in manifest for a legacy single-file cache, or None if there is none.
+
+    Every section shares the file's modification time as its version, and
+    the generation is the modification time in nanoseconds.
+    """
+    try:
+        st = os.stat(cache_file)
+    except OSError:
+        return None
+    version = f"legacy:{st.st_mtime_ns}"
+    return {
+        "format": CACHE_FORMAT,
+        "generation": st.st_mtime_ns,
+        "written_at": st.st_mtime,
+        "legacy": True,
+        "sections": {name: {"version": version} for name in ALL_SECTIONS},
+    }
+
+
+def _read_legacy(cache_file: str, sections: Iterable[str]) -> Optional[Tuple[Dict[str, Any], Dict]]:
+    manifest = _legacy_manifest(cache_file)
+    if manifest is None:
+        return None
+    with open(cache_file, "r") as f:
+        split = split_cluster_data(json.load(f))
+    return {name: split[name] for name in sections}, manifest
+
+
+def current_manifest(cache_file: str) -> Optional[Dict]:
+    """The manifest, or the legacy stand-in when only the single file exists."""
+    return read_manifest(cache_file) or _legacy_manifest(cache_file)
+
+
+def cache_signature(cache_file: str) -> Optional[Tuple[str, int, int, int]]:
+    """Cheap identity of the newest cache write, from one or two stat calls.
+
+    Each write replaces the manifest (or legacy file) with a new inode, so
+    the signature changes once per collection even when two writes land
+    within the filesystem's mtime resolution.
+    """
+    for kind, path in (("manifest", os.path.join(shard_dir_for(cache_file), MANIFEST_NAME)),
+                       ("legacy", cache_file)):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        return kind, st.st_mtime_ns, st.st_ino, st.st_size
+    return None
+
+
+def read_sections(cache_file: str, sections: Iterable[str] = ALL_SECTIONS,
+                  loaded: Optional[Dict[str, Tuple[int, Any]]] = None) -> Optional[Tuple[Dict[str, Any], Dict]]:
+    """Load the named sections from a consistent generation.
+
+    Args:
+        cache_file: Legacy cache path.
+        sections: Section names to load.
+        loaded: Already-loaded sections as ``{name: (version, data)}``;
+            any whose version still matches the manifest is reused
+            instead of being parsed again.
+
+    Returns:
+        ``(sections_by_name, manifest)``, or None when there is no cache
+        or no consistent set of sections could be read.
+    """
+    sections = tuple(sections)
+    unknown = [s for s in sections if s not in ALL_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown cache section(s): {', '.join(unknown)}")
+
+    shard_dir = shard_dir_for(cache_file)
+    for attempt in range(_READ_ATTEMPTS):
+        manifest = read_manifest(cache_file)
+        if manifest is None:
+            return _read_legacy(cache_file, sections)
+
+        result, consistent = {}, True
+        for name in sections:
+            entry = manifest["sections"].get(name)
+            if entry is None:
+                result[name] = {}
+                continue
+            cached = (loaded or {}).get(name)
+            if cached is not None and cached[0] == entry["version"]:
+                result[name] = cached[1]
+                continue
+            try:
+                version, content = _read_section(shard_dir, entry)
+            except (OSError, json.JSONDecodeError):
+                consistent = False
+                break
+            if version != entry["version"]:
+                consistent = False
+                break
+            result[name] = content
+        if consistent:
+            return result, manifest
+        # A collection rewrote the sections between the manifest read and
+        # ours; the manifest it writes next describes what is on disk
+        time.sleep(0.05 * (attempt + 1))
+
+    print("Error reading cache: sections kept changing during read", file=sys.stderr)
+    return None
+
+
+def read_cluster_cache(cache_file: str, sections: Iterable[str] = ALL_SECTIONS) -> Optional[Dict]:
+    """Read the named sections merged into the legacy cache shape, or None."""
+    try:
+        loaded = read_sections(cache_file, sections)
+    except ValueError:
+        raise
+    except Exception as e:
+        print(f"Error reading cache: {e}", file=sys.stderr)
+        return None
+    if loaded is None:
+        return None
+    return merge_sections(loaded[0])
+
+
+def cluster_cache_mtime(cache_file: str) -> Optional[float]:
+    """Modification time of the newest cache write (manifest or legacy file)."""
+    for path in (os.path.join(shard_dir_for(cache_file), MANIFEST_NAME), cache_file):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            continue
+    return None
@@ -0,0 +1,201 @@
+"""
+ProxBalance Collector State (SQLite backend)
+
+Persists the small amount of state the collector carries from one run to
+the next: a JSON key-value store, the per-guest cumulative I/O counters
+used to derive I/O rates from ``/cluster/resources`` without per-guest RRD
+fetches, and the per-guest snapshots that let unchanged guests be carried
+forward without re-fetching their config and agent info.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+from proxbalance.db import get_connection
+
+# Cumulative byte counters reported by /cluster/resources for each guest
+IO_COUNTER_FIELDS = ("diskread", "diskwrite", "netin", "netout")
+
+# Rate keys written to the guest record, in IO_COUNTER_FIELDS order
+IO_RATE_KEYS = ("disk_read_bps", "disk_write_bps", "net_in_bps", "net_out_bps")
+
+# Guest profiling interval used in counters mode when none is configured;
+# guest RRD is only skipped between profiling passes
+COUNTERS_PROFILE_INTERVAL_MINUTES = 30
+
+# /cluster/resources fields whose change means a guest must be re-fetched
+GUEST_FINGERPRINT_FIELDS = ("node", "type", "status", "name", "tags", "maxcpu", "maxmem", "maxdisk", "template", "lock")
+
+
+# ---------------------------------------------------------------------------
+# Key-value state
+# ---------------------------------------------------------------------------
+
+def get_collector_state(key: str, default: Any = None) -> Any:
+    """Get a single collector state value.
+
+    Args:
+        key: State key (e.g. 'last_profile_ts').
+        default: Value to return if key not found.
+
+    Returns:
+        The JSON-decoded value, or default.
+    """
+    conn = get_connection()
+    row = conn.execute("SELECT value FROM collector_state WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return default
+    try:
+        return json.loads(row["value"])
+    except (json.JSONDecodeError, TypeError):
+        return default
+
+
+def set_collector_state(key: str, value: Any) -> None:
+    """Set a single collector state value.
+
+    Args:
+        key: State key.
+        value: Value to store (will be JSON-encoded).
+    """
+    conn = get_connection()
+    conn.execute(
+        "INSERT OR REPLACE INTO collector_state (key, value) VALUES (?, ?)",
+        (key, json.dumps(value)),
+    )
+    conn.commit()
+
+
+# ---------------------------------------------------------------------------
+# Guest I/O counters
+# ---------------------------------------------------------------------------
+
+def load_guest_io_counters() -> Dict[str, Dict]:
+    """Load the counter snapshot saved by the previous collection run.
+
+    Returns:
+        Dict mapping vmid string to ``{node, ts, uptime, diskread, ...}``.
+    """
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT vmid, node, ts, uptime, diskread, diskwrite, netin, netout FROM guest_io_counters"
+    ).fetchall()
+    return {r["vmid"]: dict(r) for r in rows}
+
+
+def save_guest_io_counters(snapshot: Dict[str, Dict]) -> None:
+    """Replace the stored counter snapshot with this run's counters.
+
+    Guests missing from ``snapshot`` (deleted, or stopped and not sampled)
+    lose their baseline, so a stale counter is never diffed against.
+
+    Args:
+        snapshot: Dict mapping vmid string to ``{node, ts, uptime, diskread, ...}``.
+    """
+    conn = get_connection()
+    with conn:
+        conn.execute("DELETE FROM guest_io_counters")
+        conn.executemany(
+            "INSERT INTO guest_io_counters (vmid, node, ts, uptime, diskread, diskwrite, netin, netout) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (str(vmid), c.get("node"), c["ts"], c.get("uptime"),
+                 c.get("diskread"), c.get("diskwrite"), c.get("netin"), c.get("netout"))
+                for vmid, c in snapshot.items()
+            ],
+        )
+
+
+def compute_io_rates(previous: Optional[Dict], current: Dict) -> Optional[Dict[str, float]]:
+    """Derive bytes/sec I/O rates from two cumulative counter samples.
+
+    Returns None when no valid delta exists: no previous sample, the guest
+    moved to another node, it restarted (uptime went backwards), a counter
+    went backwards, or the samples are not strictly ordered in time. The
+    caller should fall back to another source for that run; the current
+    sample becomes the new baseline either way.
+
+    Args:
+        previous: Stored sample from the previous run (or None).
+        current: Sample from this run with ``node``, ``ts``, ``uptime`` and
+            the IO_COUNTER_FIELDS.
+    """
+    if not previous:
+        return None
+    if previous.get("node") != current.get("node"):
+        return None
+    elapsed = current["ts"] - (previous.get("ts") or 0)
+    if elapsed <= 0:
+        return None
+    prev_uptime = previous.get("uptime")
+    cur_uptime = current.get("uptime")
+    if prev_uptime is not None and cur_uptime is not None and cur_uptime < prev_uptime:
+        return None
+
+    rates = {}
+    for field, rate_key in zip(IO_COUNTER_FIELDS, IO_RATE_KEYS):
+        prev_val = previous.get(field)
+        cur_val = current.get(field)
+        if prev_val is None or cur_val is None or cur_val < prev_val:
+            return None
+        rates[rate_key] = (cur_val - prev_val) / elapsed
+    return rates
+
+
+# ---------------------------------------------------------------------------
+# Guest snapshots (delta-aware collection)
+# ---------------------------------------------------------------------------
+
+def guest_fingerprint(resource: Dict) -> str:
+    """Fingerprint a guest's /cluster/resources entry.
+
+    Covers placement, power state and the config fields PVE mirrors into
+    the resource list (name, tags, CPU/memory/disk sizes, template, lock),
+    so an unchanged fingerprint means the guest's config is very likely
+    unchanged too.
+    """
+    return json.dumps([resource.get(f) for f in GUEST_FINGERPRINT_FIELDS])
+
+
+def load_guest_snapshots() -> Dict[str, Dict]:
+    """Load the guest snapshots saved by the previous collection run.
+
+    Returns:
+        Dict mapping vmid string to ``{node, fingerprint, refreshed_at, agent_data}``.
+    """
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT vmid, node, fingerprint, refreshed_at, agent_json FROM guest_snapshots"
+    ).fetchall()
+    snapshots = {}
+    for r in rows:
+        try:
+            agent_data = json.loads(r["agent_json"]) if r["agent_json"] else {}
+        except (json.JSONDecodeError, TypeError):
+            continue
+        snapshots[r["vmid"]] = {
+            "node": r["node"],
+            "fingerprint": r["fingerprint"],
+            "refreshed_at": r["refreshed_at"],
+            "agent_data": agent_data,
+        }
+    return snapshots
+
+
+def save_guest_snapshots(snapshots: Dict[str, Dict]) -> None:
+    """Replace the stored guest snapshots with this run's.
+
+    Args:
+        snapshots: Dict mapping vmid string to ``{node, fingerprint, refreshed_at, agent_data}``.
+    """
+    conn = get_connection()
+    with conn:
+        conn.execute("DELETE FROM guest_snapshots")
+        conn.executemany(
+            "INSERT INTO guest_snapshots (vmid, node, fingerprint, refreshed_at, agent_json) VALUES (?, ?, ?, ?, ?)",
+            [
+                (str(vmid), snap.get("node"), snap["fingerprint"], snap["refreshed_at"],
+                 json.dumps(snap.get("agent_data") or {}))
+                for vmid, snap in snapshots.items()
+            ],
+        )
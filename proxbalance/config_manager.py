@@ -9,31 +9,128 @@ import json
 import os
 import subprocess
 import sys
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from proxbalance.cluster_cache import ALL_SECTIONS, read_cluster_cache
 from proxbalance.constants import (
-    BASE_PATH, GIT_REPO_PATH, CACHE_FILE, CONFIG_FILE, SESSIONS_DIR, DISK_PREFIXES
+    BASE_PATH, GIT_REPO_PATH, CACHE_FILE, CONFIG_FILE, SESSIONS_DIR, DISK_PREFIXES,
+    COLLECTOR_SOCKET,
 )
 
 
-def load_config(config_file: Optional[str] = None) -> Dict:
-    """Load configuration from config.json
+# ---------------------------------------------------------------------------
+# Process-wide config cache
+# ---------------------------------------------------------------------------
+#
+# config.json is read on every API request (the API key check alone does
+# it), so parsed results are kept per path and revalidated with one stat:
+# a save replaces the file with a new inode, and a hand edit changes its
+# mtime or size. Cached configs are shared between callers and returned as
+# read-only views; code that edits a config asks for load_config(mutable=True).
 
-    Args:
-        config_file: Path to config file. Defaults to CONFIG_FILE.
+_READ_ONLY_MESSAGE = ("configuration returned by load_config() is read-only; "
+                      "use load_config(mutable=True) for a copy to edit")
 
-    Returns:
-        dict: Configuration dictionary, or dict with 'error' key on failure.
+
+def _read_only(*args, **kwargs):
+    raise TypeError(_READ_ONLY_MESSAGE)
+
+
+class _ReadOnlyDict(dict):
+    """dict that refuses in-place changes. Copies are plain dicts."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class _ReadOnlyList(list):
+    """list that refuses in-place changes. Copies are plain lists."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return _ReadOnlyDict((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return _ReadOnlyList(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_thaw(v) for v in value]
+    return value
+
+
+# path -> {"signature": stat identity, "config": frozen result,
+#          "penalty": frozen load_penalty_config() result or None}
+_config_cache: Dict[str, Dict[str, Any]] = {}
+_config_cache_lock = threading.Lock()
+_config_cache_counts = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_ino, st.st_size
+
+
+def _cached_entry(config_file: str) -> Optional[Dict[str, Any]]:
+    """Cache entry for the file as it is on disk now, parsing it if needed.
+
+    Returns None when the file does not exist; that is not cached.
     """
+    signature = _file_signature(config_file)
+    if signature is None:
+        return None
+    with _config_cache_lock:
+        entry = _config_cache.get(config_file)
+        if entry is not None and entry["signature"] == signature:
+            _config_cache_counts["hits"] += 1
+            return entry
+    # Parse outside the lock; two threads racing here both store the same result
+    entry = {"signature": signature, "config": _freeze(_parse_config(config_file)), "penalty": None}
+    with _config_cache_lock:
+        _config_cache_counts["misses"] += 1
+        _config_cache[config_file] = entry
+    return entry
+
+
+def invalidate_config_cache(config_file: Optional[str] = None) -> None:
+    """Drop the cached config for one file (default CONFIG_FILE)."""
     if config_file is None:
         config_file = CONFIG_FILE
+    with _config_cache_lock:
+        if _config_cache.pop(config_file, None) is not None:
+            _config_cache_counts["invalidations"] += 1
 
-    if not os.path.exists(config_file):
-        return {
-            "error": True,
-            "message": f"Configuration file not found: {config_file}"
-        }
 
+def get_config_cache_stats() -> Dict[str, Any]:
+    """Hit, miss (file parsed) and invalidation counts of the config cache."""
+    with _config_cache_lock:
+        stats = dict(_config_cache_counts)
+        stats["entries"] = len(_config_cache)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else None
+    return stats
+
+
+def _parse_config(config_file: str) -> Dict:
     try:
         with open(config_file, 'r') as f:
             config = json.load(f)
@@ -63,6 +160,33 @@ def load_config(config_file: Optional[str] = None) -> Dict:
     return config
 
 
+def load_config(config_file: Optional[str] = None, mutable: bool = False) -> Dict:
+    """Load configuration from config.json
+
+    The parsed file is cached per process and re-read only when the file
+    changes on disk.
+
+    Args:
+        config_file: Path to config file. Defaults to CONFIG_FILE.
+        mutable: Return a private deep copy that may be edited (e.g. before
+            save_config()). By default the shared cached config is returned
+            as a read-only view, and changing it raises TypeError.
+
+    Returns:
+        dict: Configuration dictionary, or dict with 'error' key on failure.
+    """
+    if config_file is None:
+        config_file = CONFIG_FILE
+
+    entry = _cached_entry(config_file)
+    if entry is None:
+        return {
+            "error": True,
+            "message": f"Configuration file not found: {config_file}"
+        }
+    return _thaw(entry["config"]) if mutable else entry["config"]
+
+
 def save_config(config: Dict, config_file: Optional[str] = None) -> bool:
     """Save configuration to config.json
 
@@ -84,6 +208,7 @@ def save_config(config: Dict, config_file: Optional[str] = None) -> bool:
         with open(temp_file, 'w') as f:
             json.dump(config, f, indent=2)
         os.rename(temp_file, config_file)
+        invalidate_config_cache(config_file)
         return True
     except Exception as e:
         print(f"Error saving config: {e}", file=sys.stderr)
@@ -100,6 +225,9 @@ def save_config(config: Dict, config_file: Optional[str] = None) -> bool:
 def load_penalty_config(default_penalty_config: Optional[Dict] = None, config_file: Optional[str] = None) -> Dict:
     """Load penalty configuration from config.json, merging with defaults
 
+    Like load_config(), the result is a read-only view; with the built-in
+    defaults it is cached together with the config it was merged from.
+
     Args:
         default_penalty_config: Dictionary of default penalty values.
             If None, uses DEFAULT_PENALTY_CONFIG from proxbalance.scoring.
@@ -108,22 +236,30 @@ def load_penalty_config(default_penalty_config: Optional[Dict] = None, config_fi
     Returns:
         dict: Merged penalty configuration (saved values override defaults).
     """
-    if default_penalty_config is None:
+    use_defaults = default_penalty_config is None
+    if use_defaults:
         from proxbalance.scoring import DEFAULT_PENALTY_CONFIG
         default_penalty_config = DEFAULT_PENALTY_CONFIG
+    if config_file is None:
+        config_file = CONFIG_FILE
+
+    entry = _cached_entry(config_file)
+    if use_defaults and entry is not None and entry["penalty"] is not None:
+        return entry["penalty"]
 
-    config = load_config(config_file)
+    config = entry["config"] if entry is not None else {"error": True}
     if config.get('error'):
         # If config has error, return defaults
-        return default_penalty_config.copy()
-
-    # Get penalty config from main config, or use empty dict
-    saved_penalties = config.get('penalty_scoring', {})
+        penalty_config = _freeze(default_penalty_config)
+    else:
+        # Get penalty config from main config, or use empty dict
+        saved_penalties = config.get('penalty_scoring', {})
 
-    # Merge with defaults (saved values override defaults)
-    penalty_config = default_penalty_config.copy()
-    penalty_config.update(saved_penalties)
+        # Merge with defaults (saved values override defaults)
+        penalty_config = _freeze({**default_penalty_config, **saved_penalties})
 
+    if use_defaults and entry is not None:
+        entry["penalty"] = penalty_config
     return penalty_config
 
 
@@ -141,7 +277,7 @@ def save_penalty_config(penalty_config: Dict, config_file: Optional[str] = None)
         config_file = CONFIG_FILE
 
     try:
-        config = load_config(config_file)
+        config = load_config(config_file, mutable=True)
         if config.get('error'):
             return False
 
@@ -153,6 +289,7 @@ def save_penalty_config(penalty_config: Dict, config_file: Optional[str] = None)
         with open(temp_file, 'w') as f:
             json.dump(config, f, indent=2)
         os.rename(temp_file, config_file)
+        invalidate_config_cache(config_file)
 
         return True
     except Exception as e:
@@ -167,49 +304,39 @@ def save_penalty_config(penalty_config: Dict, config_file: Optional[str] = None)
         return False
 
 
-def read_cache(cache_file: str) -> Optional[Dict]:
-    """Read cluster data from cache file on disk
+def read_cache(cache_file: str, sections: Iterable[str] = ALL_SECTIONS) -> Optional[Dict]:
+    """Read cluster data from the cache on disk
 
-    This is the raw file reader. It reads JSON directly from disk
-    without any in-memory caching or TTL logic (that is CacheManager's job).
+    This is the raw reader. It reads the requested cache sections directly
+    from disk without any in-memory caching or TTL logic (that is
+    CacheManager's job).
 
     Args:
-        cache_file: Path to the JSON cache file.
+        cache_file: Path to the cache file (sections live in the directory
+            next to it, see proxbalance.cluster_cache).
+        sections: Cache sections to load. Defaults to all of them.
 
     Returns:
-        dict or None: Parsed cache data, or None if the file does not
+        dict or None: Parsed cache data, or None if the cache does not
             exist or cannot be read.
     """
-    try:
-        if not os.path.exists(cache_file):
-            return None
-
-        with open(cache_file, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Error reading cache: {str(e)}", file=sys.stderr)
-        return None
+    return read_cluster_cache(cache_file, sections)
 
 
-def read_cache_file() -> Optional[Dict]:
+def read_cache_file(sections: Iterable[str] = ALL_SECTIONS) -> Optional[Dict]:
     """Read cluster data from the default CACHE_FILE on disk
 
-    A simple JSON file reader that reads CACHE_FILE directly from disk
+    Reads the requested sections of CACHE_FILE directly from disk
     without any in-memory caching or TTL logic.
 
+    Args:
+        sections: Cache sections to load. Defaults to all of them.
+
     Returns:
-        dict or None: Parsed cache data, or None if the file does not
+        dict or None: Parsed cache data, or None if the cache does not
             exist or cannot be read.
     """
-    try:
-        if not os.path.exists(CACHE_FILE):
-            return None
-
-        with open(CACHE_FILE, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Error reading cache file: {str(e)}", file=sys.stderr)
-        return None
+    return read_cluster_cache(CACHE_FILE, sections)
 
 
 def get_proxmox_client(config: Optional[Dict] = None, **kwargs: Any) -> Any:
@@ -301,16 +428,42 @@ def validate_config_structure(config_data: Dict) -> Dict:
     }
 
 
+def _trigger_collector_daemon() -> bool:
+    """Ask a running collector daemon to collect now.
+
+    Returns:
+        bool: True if the daemon acknowledged the request, False if no
+        daemon is listening on COLLECTOR_SOCKET.
+    """
+    import socket
+
+    if not os.path.exists(COLLECTOR_SOCKET):
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(2)
+            sock.connect(COLLECTOR_SOCKET)
+            sock.sendall(b"collect\n")
+            return sock.recv(16).startswith(b"ok")
+    except OSError:
+        return False
+
+
 def trigger_collection() -> bool:
     """Trigger background collection process
 
-    Spawns the collector_api.py script as a detached subprocess.
-    Automatically selects the correct Python interpreter and collector
-    path based on the detected environment (production vs Docker dev).
+    Signals the collector daemon over its local socket when one is running
+    (collector_api.py --daemon). Otherwise spawns the collector_api.py
+    script as a detached subprocess, automatically selecting the correct
+    Python interpreter and collector path based on the detected environment
+    (production vs Docker dev).
 
     Returns:
-        bool: True if the collection process was started, False on failure.
+        bool: True if the collection was requested, False on failure.
     """
+    if _trigger_collector_daemon():
+        return True
+
     try:
         # Determine paths based on environment
         if os.path.exists('/opt/proxmox-balance-manager/collector_api.py'):
@@ -41,6 +41,19 @@ GUEST_METRICS_FILE = os.path.join(BASE_PATH, 'guest_metrics_history.json')
 # SQLite database
 DB_FILE = os.path.join(BASE_PATH, 'proxbalance.db')
 
+# Local trigger socket of the long-running collector (collector_api.py --daemon)
+COLLECTOR_SOCKET = os.path.join(BASE_PATH, 'collector.sock')
+
+
+# ---------------------------------------------------------------------------
+# Response compression
+# ---------------------------------------------------------------------------
+
+# gzip and brotli levels for API responses: flask-compress (COMPRESS_LEVEL /
+# COMPRESS_BR_LEVEL) and the pre-compressed payloads in the cluster snapshot
+COMPRESS_LEVEL = 6
+COMPRESS_BR_LEVEL = 4
+
 
 # ---------------------------------------------------------------------------
 # Disk / storage constants
@@ -153,6 +153,20 @@ CREATE TABLE IF NOT EXISTS guest_profiles (
 );
 CREATE INDEX IF NOT EXISTS idx_guest_profiles_vmid ON guest_profiles(vmid);
 
+-- Behavior classification per guest, refreshed whenever its profile gains
+-- an observation (see guest_profiles.refresh_guest_behavior)
+CREATE TABLE IF NOT EXISTS guest_behavior (
+    vmid                TEXT PRIMARY KEY,
+    node                TEXT,
+    behavior            TEXT    NOT NULL,  -- steady|bursty|growing|cyclical|unknown
+    confidence          TEXT,
+    cpu_volatility      REAL,
+    peak_multiplier     REAL,
+    growth_rate_per_day REAL,
+    data_points         INTEGER,
+    classified_at       TEXT
+);
+
 -- Score history (replaces score_history.json)
 CREATE TABLE IF NOT EXISTS score_history (
     id          INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -230,6 +244,66 @@ CREATE TABLE IF NOT EXISTS recommendation_tracking (
     data_json   TEXT    NOT NULL  -- JSON: full tracking entry
 );
 
+-- Collector state (key-value store for state carried between collector runs)
+CREATE TABLE IF NOT EXISTS collector_state (
+    key   TEXT PRIMARY KEY,
+    value TEXT  -- JSON-encoded value
+);
+
+-- Guest I/O counters from /cluster/resources (baseline for counter-delta rates)
+CREATE TABLE IF NOT EXISTS guest_io_counters (
+    vmid        TEXT PRIMARY KEY,
+    node        TEXT,
+    ts          REAL    NOT NULL,
+    uptime      INTEGER,
+    diskread    INTEGER,
+    diskwrite   INTEGER,
+    netin       INTEGER,
+    netout      INTEGER
+);
+
+-- Parsed guest configs keyed by vmid + PVE config digest
+CREATE TABLE IF NOT EXISTS guest_config_cache (
+    vmid        TEXT PRIMARY KEY,
+    node        TEXT,
+    guest_type  TEXT,   -- 'qemu' or 'lxc'
+    digest      TEXT    NOT NULL,
+    updated_at  REAL,
+    parsed_json TEXT    -- JSON: tags, mount_points, local_disks, storage_ids, ...
+);
+
+-- Per-guest resource fingerprints for delta-aware collection
+CREATE TABLE IF NOT EXISTS guest_snapshots (
+    vmid         TEXT PRIMARY KEY,
+    node         TEXT,
+    fingerprint  TEXT    NOT NULL,  -- JSON of the GUEST_FINGERPRINT_FIELDS
+    refreshed_at REAL    NOT NULL,  -- last full per-guest fetch
+    agent_json   TEXT               -- JSON: guest agent info carried forward
+);
+
+-- Collector Proxmox API latency per endpoint class, one row set per run
+CREATE TABLE IF NOT EXISTS collector_api_latency (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_ts      REAL    NOT NULL,
+    endpoint    TEXT    NOT NULL,  -- e.g. 'node/rrddata', 'guest/config'
+    calls       INTEGER,
+    errors      INTEGER,
+    p50_ms      REAL,
+    p95_ms      REAL,
+    max_ms      REAL,
+    total_ms    REAL
+);
+CREATE INDEX IF NOT EXISTS idx_api_latency_run ON collector_api_latency(run_ts);
+
+-- Node chart series per RRD timeframe (refreshed on a per-timeframe cadence)
+CREATE TABLE IF NOT EXISTS node_rrd_cache (
+    node        TEXT    NOT NULL,
+    timeframe   TEXT    NOT NULL,  -- 'hour', 'month', 'year', ...
+    fetched_at  REAL    NOT NULL,
+    points_json TEXT    NOT NULL,  -- JSON: [{time, cpu, mem, iowait}, ...]
+    PRIMARY KEY (node, timeframe)
+);
+
 -- Schema version tracking
 CREATE TABLE IF NOT EXISTS schema_version (
     version     INTEGER PRIMARY KEY,
@@ -265,6 +339,19 @@ def init_db() -> None:
     else:
         print("ProxBalance: SQLite database already initialized", file=sys.stderr)
 
+    # Classify profiles recorded before classifications were stored
+    cur = conn.execute("SELECT version FROM schema_version WHERE version = 2")
+    if cur.fetchone() is None:
+        from proxbalance.guest_profiles import refresh_guest_behavior
+        classified = refresh_guest_behavior()
+        # OR IGNORE: the web app and the collector may both get here at startup
+        conn.execute(
+            "INSERT OR IGNORE INTO schema_version (version, applied_at, description) VALUES (?, ?, ?)",
+            (2, datetime.now(timezone.utc).isoformat(), "Stored guest behavior classifications"),
+        )
+        conn.commit()
+        print(f"ProxBalance: Classified {classified} guest profile(s)", file=sys.stderr)
+
 
 # ---------------------------------------------------------------------------
 # One-time JSON migration
@@ -16,14 +16,17 @@ import traceback
 import uuid
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+from proxbalance.cluster_cache import CORE_SECTIONS
 from proxbalance.config_manager import (
     SESSIONS_DIR,
     CACHE_FILE,
-    DISK_PREFIXES,
+    read_cache,
     trigger_collection,
 )
+from proxbalance.guest_config_cache import get_guest_config_summary
 from proxbalance.storage import (
     get_node_storage,
+    storage_index_from_topology,
     verify_storage_availability,
 )
 
@@ -101,6 +104,12 @@ def get_evacuation_status(session_id: str) -> Tuple[Dict[str, Any], int]:
     }, 200
 
 
+def _target_storage_map(cluster_data: Dict[str, Any], available_nodes: List[Dict[str, Any]]) -> Dict[str, Set[str]]:
+    """Available storage IDs for each target node, from the collector's storage topology."""
+    index = storage_index_from_topology(cluster_data.get('storage_topology'), cluster_data.get('nodes', {}))
+    return {n['node']: index.get(n['node'], set()) for n in available_nodes}
+
+
 # ---------------------------------------------------------------------------
 # Main evacuation orchestration
 # ---------------------------------------------------------------------------
@@ -139,12 +148,10 @@ def evacuate_node(proxmox: Any, source_node: str, maintenance_nodes: Optional[Li
             return {"success": False, "error": "Missing node parameter"}, 400
 
         # Load cluster data to find guests on the node
-        if not os.path.exists(CACHE_FILE):
+        cluster_data = read_cache(CACHE_FILE, CORE_SECTIONS)
+        if cluster_data is None:
             return {"success": False, "error": "No cluster data available"}, 500
 
-        with open(CACHE_FILE, 'r') as f:
-            cluster_data = json.load(f)
-
         # Access nodes as dictionary
         nodes = cluster_data.get('nodes', {})
 
@@ -192,72 +199,43 @@ def evacuate_node(proxmox: Any, source_node: str, maintenance_nodes: Optional[Li
         pending_counts = {n['node']: 0 for n in available_nodes}
 
         # Get storage info for all available target nodes
-        target_storage_map = {}
-        for node_info in available_nodes:
-            node = node_info['node']
-            try:
-                storage_list = proxmox.nodes(node).storage.get()
-                # Create set of available storage IDs
-                available_storage = set()
-                for storage in storage_list:
-                    if storage.get('enabled', 1) and storage.get('active', 0):
-                        available_storage.add(storage.get('storage'))
-                target_storage_map[node] = available_storage
-            except Exception as e:
-                print(f"Warning: Could not get storage for {node}: {e}", file=sys.stderr)
-                target_storage_map[node] = set()
+        target_storage_map = _target_storage_map(cluster_data, available_nodes)
 
         for idx, vmid in enumerate(guest_vmids):
             try:
-                # Determine guest type and get config
+                # Determine guest type and get parsed config (config cache, API on a miss)
                 guest_type = None
-                guest_config = None
+                guest_parsed = None
                 guest_status = None
 
                 try:
-                    guest_config = proxmox.nodes(source_node).qemu(vmid).config.get()
-                    guest_status = proxmox.nodes(source_node).qemu(vmid).status.current.get()
-                    guest_type = "qemu"
-                except Exception:
-                    try:
-                        guest_config = proxmox.nodes(source_node).lxc(vmid).config.get()
+                    config_entry = get_guest_config_summary(proxmox, source_node, vmid)
+                    guest_type = config_entry["guest_type"]
+                    guest_parsed = config_entry["parsed"]
+                    if guest_type == "qemu":
+                        guest_status = proxmox.nodes(source_node).qemu(vmid).status.current.get()
+                    else:
                         guest_status = proxmox.nodes(source_node).lxc(vmid).status.current.get()
-                        guest_type = "lxc"
-                    except Exception as e:
-                        migration_plan.append({
-                            "vmid": vmid,
-                            "name": f"Unknown-{vmid}",
-                            "type": "unknown",
-                            "status": "unknown",
-                            "target": None,
-                            "will_restart": False,
-                            "skipped": True,
-                            "skip_reason": f"Cannot determine type: {str(e)}"
-                        })
-                        continue
+                except Exception as e:
+                    migration_plan.append({
+                        "vmid": vmid,
+                        "name": f"Unknown-{vmid}",
+                        "type": "unknown",
+                        "status": "unknown",
+                        "target": None,
+                        "will_restart": False,
+                        "skipped": True,
+                        "skip_reason": f"Cannot determine type: {str(e)}"
+                    })
+                    continue
 
                 # Get guest details - for LXC prefer hostname, for QEMU prefer name
-                if guest_type == "lxc":
-                    guest_name = (
-                        guest_config.get('hostname') or
-                        guest_config.get('name') or
-                        guest_config.get('description') or
-                        f'CT-{vmid}'
-                    )
-                else:  # qemu
-                    guest_name = (
-                        guest_config.get('name') or
-                        guest_config.get('description') or
-                        f'VM-{vmid}'
-                    )
-
-                # Clean up description if it has newlines (use first line only)
-                if '\n' in str(guest_name):
-                    guest_name = str(guest_name).split('\n')[0].strip()
+                # (descriptions are already trimmed to their first line)
+                guest_name = guest_parsed.get('display_name') or (f'CT-{vmid}' if guest_type == "lxc" else f'VM-{vmid}')
                 current_status = guest_status.get('status', 'unknown')
 
                 # Check for 'ignore' tag
-                tags = guest_config.get('tags', '').split(',') if guest_config.get('tags') else []
+                tags = guest_parsed.get('raw_tags', '').split(',') if guest_parsed.get('raw_tags') else []
                 if 'ignore' in [t.strip().lower() for t in tags]:
                     migration_plan.append({
                         "vmid": vmid,
@@ -273,15 +251,8 @@ def evacuate_node(proxmox: Any, source_node: str, maintenance_nodes: Optional[Li
                     })
                     continue
 
-                # Extract storage requirements for this guest
-                storage_volumes = set()
-                for key, value in guest_config.items():
-                    # Disk keys like scsi0, ide0, virtio0, mp0, rootfs
-                    if key.startswith(DISK_PREFIXES):
-                        # Value format is typically "storage:vm-disk-id" or "storage:subvol-id"
-                        if isinstance(value, str) and ':' in value:
-                            storage_id = value.split(':')[0]
-                            storage_volumes.add(storage_id)
+                # Storage requirements for this guest (parsed from its config)
+                storage_volumes = set(guest_parsed.get('storage_ids', []))
 
                 # Filter available nodes to only those with compatible storage
                 compatible_nodes = []
@@ -428,7 +399,8 @@ def evacuate_node(proxmox: Any, source_node: str, maintenance_nodes: Optional[Li
 
         # Start evacuation in background thread
         def run_evacuation():
-            _execute_evacuation(session_id, source_node, guest_vmids, available_nodes, guest_actions, proxmox)
+            _execute_evacuation(session_id, source_node, guest_vmids, available_nodes, guest_actions, proxmox,
+                                target_storage_map=target_storage_map)
 
         thread = threading.Thread(target=run_evacuation, daemon=True)
         thread.start()
@@ -450,7 +422,8 @@ def evacuate_node(proxmox: Any, source_node: str, maintenance_nodes: Optional[Li
 # Background evacuation execution
 # ---------------------------------------------------------------------------
 
-def _execute_evacuation(session_id: str, source_node: str, guest_vmids: List[int], available_nodes: List[Dict[str, Any]], guest_actions: Dict[str, str], proxmox: Any) -> None:
+def _execute_evacuation(session_id: str, source_node: str, guest_vmids: List[int], available_nodes: List[Dict[str, Any]], guest_actions: Dict[str, str], proxmox: Any,
+                        target_storage_map: Optional[Dict[str, Set[str]]] = None) -> None:
     """Execute evacuation in background thread.
 
     Iterates over all guests on the source node, determines their type and
@@ -465,6 +438,8 @@ def _execute_evacuation(session_id: str, source_node: str, guest_vmids: List[int
         available_nodes: List of dicts with 'node', 'cpu', 'mem' keys.
         guest_actions: Dict mapping vmid (str) to action string.
         proxmox: ProxmoxAPI client instance.
+        target_storage_map: Available storage IDs per target node, as built
+            for the plan; read from the cluster cache when omitted.
     """
     try:
         print(f"[{session_id}] Executing evacuation of {len(guest_vmids)} guests from {source_node}", file=sys.stderr)
@@ -496,20 +471,9 @@ def _execute_evacuation(session_id: str, source_node: str, guest_vmids: List[int
         execution_pending_counts = {n['node']: 0 for n in available_nodes}
 
         # Get storage info for all available target nodes
-        target_storage_map = {}
-        for node_info in available_nodes:
-            node = node_info['node']
-            try:
-                storage_list = proxmox.nodes(node).storage.get()
-                # Create set of available storage IDs
-                available_storage = set()
-                for storage in storage_list:
-                    if storage.get('enabled', 1) and storage.get('active', 0):
-                        available_storage.add(storage.get('storage'))
-                target_storage_map[node] = available_storage
-            except Exception as e:
-                print(f"Warning: Could not get storage for {node}: {e}", file=sys.stderr)
-                target_storage_map[node] = set()
+        if target_storage_map is None:
+            cluster_data = read_cache(CACHE_FILE, CORE_SECTIONS) or {}
+            target_storage_map = _target_storage_map(cluster_data, available_nodes)
 
         for idx, vmid in enumerate(guest_vmids):
             # Update current guest in progress
@@ -525,31 +489,28 @@ def _execute_evacuation(session_id: str, source_node: str, guest_vmids: List[int
             try:
                 print(f"[{idx+1}/{len(guest_vmids)}] Processing VM/CT {vmid}", file=sys.stderr)
 
-                # Determine guest type by trying to fetch from qemu first, then lxc
+                # Determine guest type and get parsed config (config cache, API on a miss)
                 guest_type = None
-                guest_config = None
+                guest_parsed = None
 
                 try:
-                    guest_config = proxmox.nodes(source_node).qemu(vmid).config.get()
-                    guest_type = "qemu"
-                except Exception:
-                    try:
-                        guest_config = proxmox.nodes(source_node).lxc(vmid).config.get()
-                        guest_type = "lxc"
-                    except Exception as e:
-                        print(f"  \u2717 Cannot determine type for {vmid}: {str(e)}", file=sys.stderr)
-                        result = {
-                            "vmid": vmid,
-                            "success": False,
-                            "error": f"Cannot determine guest type: {str(e)}"
-                        }
-                        results.append(result)
-                        failed += 1
-                        _update_evacuation_progress(session_id, idx + 1, successful, failed, result)
-                        continue
+                    config_entry = get_guest_config_summary(proxmox, source_node, vmid)
+                    guest_type = config_entry["guest_type"]
+                    guest_parsed = config_entry["parsed"]
+                except Exception as e:
+                    print(f"  \u2717 Cannot determine type for {vmid}: {str(e)}", file=sys.stderr)
+                    result = {
+                        "vmid": vmid,
+                        "success": False,
+                        "error": f"Cannot determine guest type: {str(e)}"
+                    }
+                    results.append(result)
+                    failed += 1
+                    _update_evacuation_progress(session_id, idx + 1, successful, failed, result)
+                    continue
 
                 # Check for 'ignore' tag
-                tags = guest_config.get('tags', '').split(',') if guest_config.get('tags') else []
+                tags = guest_parsed.get('raw_tags', '').split(',') if guest_parsed.get('raw_tags') else []
                 if 'ignore' in [t.strip().lower() for t in tags]:
                     print(f"  \u2298 Skipping {guest_type} {vmid} (has 'ignore' tag)", file=sys.stderr)
                     result = {
@@ -606,15 +567,8 @@ def _execute_evacuation(session_id: str, source_node: str, guest_vmids: List[int
                         _update_evacuation_progress(session_id, idx + 1, successful, failed, result)
                     continue
 
-                # Extract storage requirements for this guest
-                storage_volumes = set()
-                for key, value in guest_config.items():
-                    # Disk keys like scsi0, ide0, virtio0, mp0, rootfs
-                    if key.startswith(DISK_PREFIXES):
-                        # Value format is typically "storage:vm-disk-id" or "storage:subvol-id"
-                        if isinstance(value, str) and ':' in value:
-                            storage_id = value.split(':')[0]
-                            storage_volumes.add(storage_id)
+                # Storage requirements for this guest (parsed from its config)
+                storage_volumes = set(guest_parsed.get('storage_ids', []))
 
                 # Filter available nodes to only those with compatible storage
                 compatible_nodes = []
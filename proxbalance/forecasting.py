@@ -8,7 +8,7 @@ manages score history snapshots for time-series analysis.
 
 import json
 import sys
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timezone, timedelta
 
 from proxbalance.constants import (
@@ -16,7 +16,7 @@ from proxbalance.constants import (
     SCORE_HISTORY_MAX_ENTRIES,
     SCORE_HISTORY_RETENTION_DAYS,
 )
-from proxbalance.scoring import calculate_node_health_score
+from proxbalance.scoring import NodeScoringContext, calculate_node_health_score
 from proxbalance.db import get_connection
 
 
@@ -270,13 +270,14 @@ def generate_forecast_recommendations(nodes: Dict[str, Any], score_history_data:
     return forecasts
 
 
-def save_score_snapshot(nodes: Dict[str, Any], recommendations: List[Dict[str, Any]], penalty_cfg: Dict[str, Any]) -> None:
+def save_score_snapshot(nodes: Dict[str, Any], recommendations: List[Dict[str, Any]], penalty_cfg: Dict[str, Any], scoring_context: Optional[NodeScoringContext] = None) -> None:
     """
     Save a point-in-time snapshot of per-node scores to the score_history table.
 
     Each snapshot records score, suitability, CPU%, and memory% for every
     online node, plus the cluster health and recommendation count.
     Keeps at most SCORE_HISTORY_MAX_ENTRIES entries (oldest trimmed first).
+    Pass the run's NodeScoringContext to reuse its node health scores.
     """
     try:
         node_snapshots = {}
@@ -286,7 +287,10 @@ def save_score_snapshot(nodes: Dict[str, Any], recommendations: List[Dict[str, A
             if node.get("status") != "online":
                 continue
             metrics = node.get("metrics", {})
-            score = calculate_node_health_score(node, metrics, penalty_config=penalty_cfg)
+            if scoring_context is not None:
+                score = scoring_context.health_score(node)
+            else:
+                score = calculate_node_health_score(node, metrics, penalty_config=penalty_cfg)
             suitability = round(max(0, 100 - min(score, 100)), 1)
             cpu = round(metrics.get("current_cpu", 0), 1)
             mem = round(metrics.get("current_mem", 0), 1)
@@ -0,0 +1,387 @@
+"""
+ProxBalance Guest Config Cache (SQLite backend)
+
+Keeps the parsed form of each guest's Proxmox config, keyed by vmid and
+the config ``digest`` PVE returns with every config response. The
+collector revalidates entries by digest on each run and only re-parses
+configs that changed. The recommendation engine, evacuation planning and
+migration validation read the parsed data (tags, mount points, local
+disks, required storage IDs) from here instead of fetching the config
+from the API for every guest/target pair.
+"""
+
+import json
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from proxbalance.constants import DISK_PREFIXES
+from proxbalance.db import get_connection
+
+# Guest type aliases used across the codebase, normalized to PVE's API names
+_GUEST_TYPE_ALIASES = {"VM": "qemu", "CT": "lxc", "vm": "qemu", "ct": "lxc", "qemu": "qemu", "lxc": "lxc"}
+
+
+# ---------------------------------------------------------------------------
+# Config parsing
+# ---------------------------------------------------------------------------
+
+def parse_tags(tags_str: str) -> Dict:
+    """Parse tags and extract ignore/exclude/affinity rules"""
+    if not tags_str:
+        return {"has_ignore": False, "exclude_groups": [], "affinity_groups": [], "all_tags": []}
+
+    tags = [t.strip() for t in tags_str.replace(";", " ").split()]
+    has_ignore = "ignore" in tags
+    exclude_groups = [t for t in tags if t.startswith("exclude_")]
+    affinity_groups = [t for t in tags if t.startswith("affinity_")]
+    has_bindmount_tag = "has-bindmount" in tags
+    # io_exempt: this guest's disk I/O lives on dedicated/passthrough storage,
+    # so the host iowait it generates is not relievable by migration. Used to
+    # exempt the node from iowait scoring (see scoring.py / recommendations.py).
+    has_io_exempt = "io_exempt" in tags or "proxbalance_io_exempt" in tags
+
+    return {
+        "has_ignore": has_ignore,
+        "exclude_groups": exclude_groups,
+        "affinity_groups": affinity_groups,
+        "has_bindmount": has_bindmount_tag,
+        "has_io_exempt": has_io_exempt,
+        "all_tags": tags
+    }
+
+def detect_mount_points(config: Dict) -> Dict:
+    """
+    Detect mount points in LXC container configuration.
+    Returns info about bind mounts and storage-backed mount points.
+
+    Mount point types:
+    - Bind mounts: /host/path,mp=/container/path
+    - Storage-backed: volume:storage-volume,mp=/container/path
+    - Shared bind mounts: /host/path,mp=/container/path,shared=1 (can be migrated if path exists on target)
+
+    The 'shared=1' flag indicates the mount point is available on all nodes,
+    allowing migration with 'pct migrate --force' or automatic migration.
+    """
+    mount_points = []
+    has_bind_mount = False
+    has_storage_mount = False
+    has_shared_mount = False
+    has_unshared_bind_mount = False
+
+    # Check for mount point keys (mp0, mp1, mp2, etc.)
+    for key in config.keys():
+        if key.startswith('mp') and key[2:].isdigit():
+            mp_config = config[key]
+
+            # Bind mounts start with / (absolute paths on host)
+            # Storage-backed mounts start with storage:volume format
+            if isinstance(mp_config, str):
+                # Parse mount point: "source,mp=target,options" format
+                parts = mp_config.split(',')
+                source = parts[0] if parts else ""
+
+                # Check for shared=1 flag in options
+                is_shared = any('shared=1' in part for part in parts)
+
+                # Extract mount target path
+                mp_path = ""
+                for part in parts:
+                    if part.startswith('mp='):
+                        mp_path = part[3:]
+                        break
+
+                is_bind = source.startswith('/')
+                mount_info = {
+                    "key": key,
+                    "config": mp_config,
+                    "is_bind_mount": is_bind,
+                    "source": source,
+                    "mount_path": mp_path,
+                    "is_shared": is_shared
+                }
+
+                mount_points.append(mount_info)
+
+                if is_bind:
+                    has_bind_mount = True
+                    if is_shared:
+                        has_shared_mount = True
+                    else:
+                        has_unshared_bind_mount = True
+                else:
+                    has_storage_mount = True
+
+    return {
+        "mount_points": mount_points,
+        "has_mount_points": len(mount_points) > 0,
+        "has_bind_mount": has_bind_mount,
+        "has_storage_mount": has_storage_mount,
+        "has_shared_mount": has_shared_mount,
+        "has_unshared_bind_mount": has_unshared_bind_mount,
+        "mount_count": len(mount_points)
+    }
+
+def detect_local_disks(config: Dict) -> Dict:
+    """
+    Detect passthrough disks in VM/CT configuration that prevent migration.
+
+    Disk types that prevent migration:
+    - Passthrough disks: /dev/disk/by-id/*, /dev/sd* (direct hardware access)
+
+    Note: local-lvm, local-zfs, and other storage types CAN be migrated
+    as Proxmox handles storage replication during migration.
+    """
+    passthrough_disks = []
+
+    # Check for disk keys (scsi0-N, ide0-N, virtio0-N, sata0-N, rootfs, mp*)
+    for key, disk_config in config.items():
+        # Check if key is a disk/storage key
+        if key.startswith(DISK_PREFIXES):
+            if isinstance(disk_config, str):
+                # Parse disk config
+                parts = disk_config.split(',')
+                source = parts[0] if parts else ""
+
+                # Check for passthrough disks (direct device paths)
+                if source.startswith('/dev/'):
+                    passthrough_disks.append({
+                        "key": key,
+                        "device": source,
+                        "type": "passthrough"
+                    })
+
+    has_passthrough = bool(passthrough_disks)
+    passthrough_count = len(passthrough_disks)
+    return {
+        "passthrough_disks": passthrough_disks,
+        "has_passthrough": has_passthrough,
+        "is_pinned": has_passthrough,
+        "pinned_reason": "Hardware passthrough disks" if has_passthrough else None,
+        "passthrough_count": passthrough_count,
+        "total_pinned_disks": passthrough_count
+    }
+
+
+def extract_storage_ids(config: Dict) -> List[str]:
+    """Return the sorted storage IDs referenced by a guest's disk keys.
+
+    Disk values look like ``storage:vm-100-disk-0,size=32G``; the storage ID
+    is the part before the first colon. Bind mounts and passthrough devices
+    (absolute paths) have no colon and are ignored.
+    """
+    storage_ids = set()
+    for key, value in config.items():
+        # Disk keys like scsi0, ide0, virtio0, mp0, rootfs
+        if key.startswith(DISK_PREFIXES):
+            if isinstance(value, str) and ':' in value:
+                storage_ids.add(value.split(':')[0])
+    return sorted(storage_ids)
+
+
+def normalize_guest_type(guest_type: Optional[str]) -> Optional[str]:
+    """Map 'VM'/'CT'/'qemu'/'lxc' to the PVE API type ('qemu' or 'lxc')."""
+    if guest_type is None:
+        return None
+    return _GUEST_TYPE_ALIASES.get(guest_type, guest_type)
+
+
+def parse_guest_config(config: Dict, guest_type: str) -> Dict:
+    """Parse a raw guest config into the fields ProxBalance consumes.
+
+    Args:
+        config: Raw config dict from ``nodes/{node}/{type}/{vmid}/config``.
+        guest_type: 'qemu' or 'lxc' (aliases accepted).
+
+    Returns:
+        Dict with name, display_name, cpu_cores, raw_tags, tags,
+        mount_points, local_disks and storage_ids.
+    """
+    guest_type = normalize_guest_type(guest_type)
+
+    # For LXC prefer hostname, for QEMU prefer name; descriptions are
+    # trimmed to their first line
+    if guest_type == "lxc":
+        display_name = config.get('hostname') or config.get('name') or config.get('description')
+    else:
+        display_name = config.get('name') or config.get('description')
+    if display_name and '\n' in str(display_name):
+        display_name = str(display_name).split('\n')[0].strip()
+
+    return {
+        "name": config.get("name"),
+        "display_name": display_name,
+        "cpu_cores": config.get("cores") or config.get("cpus") or config.get("cpulimit"),
+        "raw_tags": config.get("tags", ""),
+        "tags": parse_tags(config.get("tags", "")),
+        "mount_points": detect_mount_points(config) if guest_type == "lxc" else {},
+        "local_disks": detect_local_disks(config),
+        "storage_ids": extract_storage_ids(config),
+    }
+
+
+def build_cache_entry(vmid: Any, node: str, guest_type: str, config: Dict,
+                      parsed: Optional[Dict] = None) -> Dict:
+    """Build a cache entry from a freshly fetched config."""
+    guest_type = normalize_guest_type(guest_type)
+    return {
+        "vmid": str(vmid),
+        "node": node,
+        "guest_type": guest_type,
+        "digest": config.get("digest"),
+        "updated_at": time.time(),
+        "parsed": parsed if parsed is not None else parse_guest_config(config, guest_type),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Persistence
+# ---------------------------------------------------------------------------
+
+def _row_to_entry(row) -> Dict:
+    try:
+        parsed = json.loads(row["parsed_json"]) if row["parsed_json"] else {}
+    except (json.JSONDecodeError, TypeError):
+        parsed = {}
+    return {
+        "vmid": row["vmid"],
+        "node": row["node"],
+        "guest_type": row["guest_type"],
+        "digest": row["digest"],
+        "updated_at": row["updated_at"],
+        "parsed": parsed,
+    }
+
+
+def load_guest_config_cache() -> Dict[str, Dict]:
+    """Load every cached entry, keyed by vmid string."""
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT vmid, node, guest_type, digest, updated_at, parsed_json FROM guest_config_cache"
+    ).fetchall()
+    return {r["vmid"]: _row_to_entry(r) for r in rows}
+
+
+def save_guest_config_entries(entries: Iterable[Dict]) -> int:
+    """Insert or replace cache entries in a single transaction.
+
+    Entries without a digest (failed or partial config fetches) are
+    skipped so they can never shadow a real config.
+
+    Returns:
+        Number of entries written.
+    """
+    rows = [
+        (e["vmid"], e.get("node"), e.get("guest_type"), e["digest"],
+         e.get("updated_at") or time.time(), json.dumps(e.get("parsed", {})))
+        for e in entries if e.get("digest")
+    ]
+    if not rows:
+        return 0
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO guest_config_cache (vmid, node, guest_type, digest, updated_at, parsed_json) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    return len(rows)
+
+
+def prune_guest_config_cache(keep_vmids: Iterable[Any]) -> int:
+    """Delete entries for guests that no longer exist in the cluster.
+
+    Returns:
+        Number of entries deleted.
+    """
+    keep = {str(v) for v in keep_vmids}
+    conn = get_connection()
+    existing = [r["vmid"] for r in conn.execute("SELECT vmid FROM guest_config_cache").fetchall()]
+    stale = [(v,) for v in existing if v not in keep]
+    if stale:
+        with conn:
+            conn.executemany("DELETE FROM guest_config_cache WHERE vmid = ?", stale)
+    return len(stale)
+
+
+def invalidate_guest_config(vmid: Any) -> None:
+    """Drop a guest's entry, e.g. after ProxBalance itself edits its config."""
+    conn = get_connection()
+    with conn:
+        conn.execute("DELETE FROM guest_config_cache WHERE vmid = ?", (str(vmid),))
+
+
+# ---------------------------------------------------------------------------
+# Lookups for API-side consumers
+# ---------------------------------------------------------------------------
+
+def get_cached_guest_config(vmid: Any, node: Optional[str] = None) -> Optional[Dict]:
+    """Return the cached entry for a guest, or None.
+
+    When ``node`` is given, an entry recorded on a different node is
+    treated as a miss (the guest has moved since it was cached).
+    """
+    try:
+        conn = get_connection()
+        row = conn.execute(
+            "SELECT vmid, node, guest_type, digest, updated_at, parsed_json FROM guest_config_cache WHERE vmid = ?",
+            (str(vmid),),
+        ).fetchone()
+    except Exception as e:
+        print(f"Warning: Guest config cache lookup failed for {vmid}: {e}", file=sys.stderr)
+        return None
+    if row is None:
+        return None
+    if node is not None and row["node"] != node:
+        return None
+    return _row_to_entry(row)
+
+
+def get_guest_config_summary(proxmox: Optional[Any], node: str, vmid: Any,
+                             guest_type: Optional[str] = None) -> Optional[Dict]:
+    """Return a guest's parsed config, preferring the cache over the API.
+
+    On a cache miss the config is fetched live (trying qemu then lxc when
+    ``guest_type`` is unknown), parsed, and written back to the cache.
+
+    Args:
+        proxmox: ProxmoxAPI client, or None to consult the cache only.
+        node: Node currently hosting the guest.
+        vmid: Guest VMID.
+        guest_type: 'qemu'/'lxc'/'VM'/'CT', or None if unknown.
+
+    Returns:
+        Cache entry dict (``guest_type``, ``digest``, ``parsed``, ...), or
+        None if the guest is not cached and no client was given.
+
+    Raises:
+        Exception: The API error from the last attempted live fetch.
+    """
+    guest_type = normalize_guest_type(guest_type)
+
+    entry = get_cached_guest_config(vmid, node)
+    if entry and (guest_type is None or entry["guest_type"] == guest_type):
+        return entry
+
+    if proxmox is None:
+        return None
+
+    last_error: Optional[Exception] = None
+    for candidate in ([guest_type] if guest_type else ["qemu", "lxc"]):
+        try:
+            if candidate == "qemu":
+                config = proxmox.nodes(node).qemu(vmid).config.get()
+            else:
+                config = proxmox.nodes(node).lxc(vmid).config.get()
+        except Exception as e:
+            last_error = e
+            continue
+
+        entry = build_cache_entry(vmid, node, candidate, config or {})
+        try:
+            save_guest_config_entries([entry])
+        except Exception as e:
+            print(f"Warning: Could not cache config for guest {vmid}: {e}", file=sys.stderr)
+        return entry
+
+    raise last_error if last_error else ValueError(f"Could not fetch config for guest {vmid}")
@@ -6,12 +6,16 @@ behavior (steady, bursty, growing, cyclical) and provide better
 migration load predictions.
 
 Profiles are stored in the guest_profiles table and updated by the
-collector after each data collection run.
+collector after each data collection run. Each write also reclassifies
+the guests it touched and stores the result in the guest_behavior table,
+so a recommendation run loads every classification with one query
+(load_guest_classifications) instead of reading and classifying each
+guest's history.
 """
 
 import json
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from proxbalance.constants import MAX_GUEST_PROFILE_SAMPLES
 from proxbalance.db import get_connection
@@ -89,9 +93,56 @@ def update_guest_profile(vmid: str, rrd_summary: Dict[str, Any], node: str) -> N
         "(SELECT id FROM guest_profiles WHERE vmid = ? ORDER BY timestamp DESC LIMIT ?)",
         (vmid_str, vmid_str, MAX_GUEST_PROFILE_SAMPLES),
     )
+    _store_guest_behavior(conn, [vmid_str])
     conn.commit()
 
 
+def update_guest_profiles(summaries: Dict[str, Tuple[Dict[str, Any], str]]) -> int:
+    """
+    Append RRD summary observations for many guests in one transaction.
+
+    Bulk form of :func:`update_guest_profile` used by the collector: all
+    observations are inserted with one ``executemany`` and the per-guest
+    sample cap is enforced by a single set-based DELETE over the updated
+    guests.
+
+    Args:
+        summaries: Dict mapping vmid to ``(rrd_summary, node)``.
+
+    Returns:
+        Number of observations written.
+    """
+    timestamp = datetime.now(timezone.utc).isoformat()
+    rows = [
+        (str(vmid), node, timestamp,
+         json.dumps(summary.get("cpu", {})),
+         json.dumps(summary.get("mem", {})))
+        for vmid, (summary, node) in summaries.items()
+        if summary and summary.get("cpu")
+    ]
+    if not rows:
+        return 0
+
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO guest_profiles (vmid, node, timestamp, cpu_json, mem_json) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        # Keep only the most recent MAX_GUEST_PROFILE_SAMPLES per updated guest
+        conn.execute(
+            "DELETE FROM guest_profiles WHERE id IN ("
+            "  SELECT id FROM ("
+            "    SELECT id, ROW_NUMBER() OVER (PARTITION BY vmid ORDER BY timestamp DESC, id DESC) AS rn"
+            "    FROM guest_profiles WHERE vmid IN (SELECT value FROM json_each(?))"
+            "  ) WHERE rn > ?"
+            ")",
+            (json.dumps([r[0] for r in rows]), MAX_GUEST_PROFILE_SAMPLES),
+        )
+        _store_guest_behavior(conn, [r[0] for r in rows])
+    return len(rows)
+
+
 def classify_guest_behavior(profile: Dict[str, Any]) -> Dict[str, Any]:
     """
     Classify a guest's workload behavior based on stored history.
@@ -223,3 +274,97 @@ def get_guest_profile(vmid: str) -> Optional[Dict[str, Any]]:
     profile = {"vmid": vmid_str, "node": node, "observations": observations}
     classification = classify_guest_behavior(profile)
     return {**profile, **classification}
+
+
+# ---------------------------------------------------------------------------
+# Stored classifications
+# ---------------------------------------------------------------------------
+
+_BEHAVIOR_FIELDS = ("behavior", "confidence", "cpu_volatility", "peak_multiplier",
+                    "growth_rate_per_day", "data_points")
+
+
+def _store_guest_behavior(conn, vmids: Optional[List[str]] = None) -> int:
+    """Classify guests from their latest observations and upsert guest_behavior.
+
+    Reads the same window as :func:`get_guest_profile` (the most recent
+    MAX_GUEST_PROFILE_SAMPLES observations). Runs inside the caller's
+    transaction and does not commit.
+
+    Args:
+        conn: Database connection.
+        vmids: Guests to reclassify, or None for every guest with a profile.
+
+    Returns:
+        Number of guests classified.
+    """
+    where = "WHERE vmid IN (SELECT value FROM json_each(?))" if vmids is not None else ""
+    params = (json.dumps(vmids), MAX_GUEST_PROFILE_SAMPLES) if vmids is not None else (MAX_GUEST_PROFILE_SAMPLES,)
+    rows = conn.execute(
+        "SELECT vmid, node, timestamp, cpu_json FROM ("
+        "  SELECT vmid, node, timestamp, cpu_json, id,"
+        "         ROW_NUMBER() OVER (PARTITION BY vmid ORDER BY timestamp DESC, id DESC) AS rn"
+        f"  FROM guest_profiles {where}"
+        ") WHERE rn <= ? ORDER BY vmid, timestamp, id",
+        params,
+    ).fetchall()
+
+    profiles: Dict[str, Dict[str, Any]] = {}
+    for r in rows:
+        profile = profiles.setdefault(r["vmid"], {"vmid": r["vmid"], "node": "", "observations": []})
+        obs = {"timestamp": r["timestamp"]}
+        try:
+            obs["cpu"] = json.loads(r["cpu_json"]) if r["cpu_json"] else {}
+        except (json.JSONDecodeError, TypeError):
+            obs["cpu"] = {}
+        profile["observations"].append(obs)
+        # Rows are chronological, so this ends on the latest node
+        profile["node"] = r["node"] or ""
+
+    classified_at = datetime.now(timezone.utc).isoformat()
+    records = []
+    for vmid, profile in profiles.items():
+        classification = classify_guest_behavior(profile)
+        records.append((vmid, profile["node"], *(classification[f] for f in _BEHAVIOR_FIELDS), classified_at))
+    conn.executemany(
+        "INSERT OR REPLACE INTO guest_behavior (vmid, node, behavior, confidence, cpu_volatility, "
+        "peak_multiplier, growth_rate_per_day, data_points, classified_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        records,
+    )
+    return len(records)
+
+
+def refresh_guest_behavior(vmids: Optional[Iterable[str]] = None) -> int:
+    """Recompute stored classifications from the observations on record.
+
+    Profile writes keep guest_behavior current on their own; this is for
+    backfilling (see ``init_db``) and repair.
+
+    Args:
+        vmids: Guests to reclassify, or None for all of them.
+
+    Returns:
+        Number of guests classified.
+    """
+    conn = get_connection()
+    with conn:
+        return _store_guest_behavior(conn, [str(v) for v in vmids] if vmids is not None else None)
+
+
+def load_guest_classifications() -> Dict[str, Dict[str, Any]]:
+    """Load every guest's stored behavior classification in one query.
+
+    Returns:
+        Dict mapping vmid (as string) to the classification fields of
+        :func:`get_guest_profile` (behavior, confidence, cpu_volatility,
+        peak_multiplier, growth_rate_per_day, data_points) plus vmid and
+        node -- everything scoring reads from a profile, without the
+        observation history.
+    """
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT vmid, node, behavior, confidence, cpu_volatility, peak_multiplier, "
+        "growth_rate_per_day, data_points FROM guest_behavior"
+    ).fetchall()
+    return {r["vmid"]: {"vmid": r["vmid"], "node": r["node"] or "", **{f: r[f] for f in _BEHAVIOR_FIELDS}}
+            for r in rows}
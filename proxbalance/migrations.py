@@ -6,20 +6,20 @@ via the Proxmox API, as well as migration task cancellation and
 pre-migration validation checks.
 """
 
-import os
 import sys
 import json
 import traceback
 from datetime import datetime, timedelta, timezone
-from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 import requests
 
+from proxbalance.cluster_cache import SECTION_NODES, cluster_cache_mtime
 from proxbalance.config_manager import (
-    trigger_collection, BASE_PATH, CACHE_FILE, DISK_PREFIXES,
+    trigger_collection, CACHE_FILE,
     load_config, read_cache_file,
 )
+from proxbalance.guest_config_cache import get_guest_config_summary
 
 # Re-exports for backwards compatibility (moved to proxbalance.outcomes)
 from proxbalance.outcomes import (  # noqa: E402, F401
@@ -235,10 +235,9 @@ def validate_migration(proxmox: Any, vmid: int, source_node: str, target_node: s
 
     # 1. Staleness check — is cache data recent?
     try:
-        cache_file = Path(BASE_PATH) / "cluster_cache.json"
-        if cache_file.exists():
-            import os
-            cache_age_seconds = (datetime.now(timezone.utc) - datetime.fromtimestamp(os.path.getmtime(cache_file), tz=timezone.utc)).total_seconds()
+        cache_mtime = cluster_cache_mtime(CACHE_FILE)
+        if cache_mtime is not None:
+            cache_age_seconds = (datetime.now(timezone.utc) - datetime.fromtimestamp(cache_mtime, tz=timezone.utc)).total_seconds()
             cache_age_minutes = cache_age_seconds / 60
 
             if cache_age_minutes > 30:
@@ -353,17 +352,9 @@ def validate_migration(proxmox: Any, vmid: int, source_node: str, target_node: s
     # 4. Storage re-verification
     try:
         if proxmox:
-            # Get guest config to find required storage
-            if guest_type == "VM":
-                guest_config = proxmox.nodes(source_node).qemu(vmid).config.get()
-            else:
-                guest_config = proxmox.nodes(source_node).lxc(vmid).config.get()
-
-            required_storage = set()
-            for key, value in guest_config.items():
-                if key.startswith(DISK_PREFIXES):
-                    if isinstance(value, str) and ':' in value:
-                        required_storage.add(value.split(':')[0])
+            # Required storage from the guest config cache (API on a miss)
+            config_entry = get_guest_config_summary(proxmox, source_node, vmid, guest_type)
+            required_storage = set(config_entry["parsed"].get("storage_ids", []))
 
             if required_storage:
                 target_storage_list = proxmox.nodes(target_node).storage.get()
@@ -613,7 +604,7 @@ def get_rollback_info(vmid: int, config: Optional[Dict[str, Any]] = None) -> Dic
     info["time_since_migration_minutes"] = round(elapsed_minutes, 1)
 
     # --- check that the original node is online ---------------------------
-    cache_data = read_cache_file()
+    cache_data = read_cache_file((SECTION_NODES,))
     if cache_data is None:
         info["detail"] = "Cluster cache unavailable — cannot verify original node"
         return info
@@ -15,6 +15,7 @@ import sys
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
 
+from proxbalance.cluster_cache import SECTION_NODES
 from proxbalance.config_manager import read_cache_file
 from proxbalance.constants import (
     BASE_PATH,
@@ -104,7 +105,7 @@ def _save_migration_outcomes(outcomes: List[Dict[str, Any]]) -> bool:
 def capture_pre_migration_snapshot(vmid: Union[int, str], source_node: str, target_node: str) -> Optional[Dict[str, Any]]:
     """Capture pre-migration node metrics from the cluster cache.
 
-    Reads cluster_cache.json and extracts current CPU, memory, IOWait,
+    Reads the cached node records and extracts current CPU, memory, IOWait,
     and guest count for the source and target nodes.
 
     Args:
@@ -115,7 +116,7 @@ def capture_pre_migration_snapshot(vmid: Union[int, str], source_node: str, targ
     Returns:
         A snapshot dict, or None if cache data is unavailable.
     """
-    cache_data = read_cache_file()
+    cache_data = read_cache_file((SECTION_NODES,))
     if cache_data is None:
         print("Cannot capture pre-migration snapshot: no cache data", file=sys.stderr)
         return None
@@ -204,7 +205,7 @@ def update_post_migration_metrics(vmid: Optional[Union[int, str]] = None) -> Dic
         A summary dict with counts of updated and skipped entries.
     """
     conn = get_connection()
-    cache_data = read_cache_file()
+    cache_data = read_cache_file((SECTION_NODES,))
 
     if cache_data is None:
         return {"updated": 0, "skipped": 0, "error": "No cache data available"}
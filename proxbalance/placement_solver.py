@@ -0,0 +1,296 @@
+"""
+ProxBalance Placement Solver
+
+generate_recommendations picks each guest's best target in guest order,
+committing it before looking at the next guest. That greedy plan depends
+on the order and can take several automigrate cycles to converge. The
+"anneal" solver searches for a better multi-move plan with simulated
+annealing. It works under a wall-clock budget, starts from the greedy
+plan and always keeps the best plan found so far, so stopping it early
+still returns a plan at least as good as the greedy one.
+
+A plan is an ordered list of moves, read the way the greedy loop commits
+them: a guest's target score counts the in-flight pending guests and the
+guests moved to the same target earlier in the plan. The objective is
+the sum over moves of target score minus current score (lower is
+better). The greedy plan's objective is therefore exactly what the greedy
+loop computed. A plan is feasible when every move satisfies the greedy
+loop's gates at its position:
+
+- the score improves by at least min_score_improvement;
+- the target's memory fits the guest, the pending guests and the earlier
+  arrivals, with 5% headroom;
+- no anti-affinity conflict with guests on the target, pending guests or
+  earlier arrivals;
+- the target is online, not in maintenance and has the guest's storage
+  (fixed per guest and checked by the caller);
+- the plan has at most max_moves moves (0 = unlimited).
+"""
+
+import math
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from proxbalance.scoring import NodeScoringContext, calculate_target_node_score
+from proxbalance.tag_index import TagIndex, guest_tag_list
+
+SOLVER_MODES = ("greedy", "anneal")
+
+# Accepted range of the solver settings, in config.json and per request
+SOLVER_TIME_BUDGET_RANGE_MS = (50, 10000)
+SOLVER_MAX_MOVES_RANGE = (0, 1000)
+
+# Cached target scores before the cache is cleared
+_MAX_CACHED_SCORES = 200000
+
+
+class PlacementProblem:
+    """Candidate moves, their fixed targets and the gates a plan must pass.
+
+    Each candidate is a dict with ``key`` (guest id), ``guest``,
+    ``source``, ``current_score`` (including maintenance/IOWait boosts),
+    ``guest_profile`` and ``targets`` (nodes that pass the fixed checks).
+    """
+
+    def __init__(self, nodes: Dict[str, Any], candidates: List[Dict[str, Any]],
+                 pending_target_guests: Dict[str, List[Dict[str, Any]]], placed_tags: TagIndex,
+                 scoring_context: NodeScoringContext, min_improvement: float):
+        self.nodes = nodes
+        self.candidates = candidates
+        self.pending = {name: list(pending) for name, pending in pending_target_guests.items()}
+        self.placed_tags = placed_tags
+        self.context = scoring_context
+        self.min_improvement = min_improvement
+        self.pending_tags = TagIndex()
+        for name, pending in self.pending.items():
+            for pending_guest in pending:
+                self.pending_tags.add(pending_guest.get("vmid"), name, guest_tag_list(pending_guest, "all_tags"))
+        self._pending_mem = {name: sum(pg.get("mem_max_gb", 0) for pg in pending)
+                             for name, pending in self.pending.items()}
+        self._scores: Dict[Tuple, float] = {}
+
+    def pending_before(self, target: str, earlier: List[int]) -> Dict[str, List[Dict[str, Any]]]:
+        """Pending guests a move to ``target`` sees after the candidates ``earlier``."""
+        return {target: self.pending.get(target, []) + [self.candidates[j]["guest"] for j in earlier]}
+
+    def target_score(self, i: int, target: str, earlier: List[int]) -> float:
+        key = (i, target, tuple(earlier))
+        score = self._scores.get(key)
+        if score is None:
+            candidate, ctx = self.candidates[i], self.context
+            score = calculate_target_node_score(
+                self.nodes[target], candidate["guest"], self.pending_before(target, earlier),
+                ctx.cpu_threshold, ctx.mem_threshold, penalty_config=ctx.penalty_config,
+                guest_profile=candidate["guest_profile"], context=ctx,
+            )
+            if len(self._scores) >= _MAX_CACHED_SCORES:
+                self._scores.clear()
+            self._scores[key] = score
+        return score
+
+    def evaluate_target(self, target: str, arrivals: List[int]) -> Optional[Dict[int, float]]:
+        """Scores of ``arrivals`` (in plan order) on ``target``, or None if any gate fails."""
+        node = self.nodes[target]
+        total_mem_gb = node.get("total_mem_gb", 1)
+        used_mem_gb = (node.get("mem_percent", 0) / 100.0) * total_mem_gb
+        arrived_mem_gb = self._pending_mem.get(target, 0.0)
+        arrived_tags = TagIndex()
+        scores = {}
+        for position, i in enumerate(arrivals):
+            guest = self.candidates[i]["guest"]
+            exclude_groups = guest_tag_list(guest, "exclude_groups")
+            if exclude_groups and (self.placed_tags.has_any(exclude_groups, target)
+                                   or self.pending_tags.has_any(exclude_groups, target)
+                                   or arrived_tags.has_any(exclude_groups, target)):
+                return None
+            guest_mem_max_gb = guest.get("mem_max_gb", guest.get("mem_used_gb", 0))
+            if guest_mem_max_gb > 0 and used_mem_gb + arrived_mem_gb + guest_mem_max_gb > total_mem_gb * 0.95:
+                return None
+            score = self.target_score(i, target, arrivals[:position])
+            if self.candidates[i]["current_score"] - score < self.min_improvement:
+                return None
+            scores[i] = score
+            arrived_mem_gb += guest.get("mem_max_gb", 0)
+            arrived_tags.add(guest.get("vmid"), target, guest_tag_list(guest, "all_tags"))
+        return scores
+
+
+class _Plan:
+    """Assignment of candidates to targets, with a rank giving the plan order."""
+
+    def __init__(self, problem: PlacementProblem):
+        self.problem = problem
+        self.target: Dict[int, str] = {}
+        self.rank: Dict[int, float] = {}
+        self.score: Dict[int, float] = {}
+        self.arrivals: Dict[str, List[int]] = {}
+
+    def objective(self) -> float:
+        candidates = self.problem.candidates
+        return sum(score - candidates[i]["current_score"] for i, score in self.score.items())
+
+    def copy(self) -> "_Plan":
+        plan = _Plan(self.problem)
+        plan.target, plan.rank, plan.score = dict(self.target), dict(self.rank), dict(self.score)
+        plan.arrivals = {t: list(a) for t, a in self.arrivals.items()}
+        return plan
+
+    def arrivals_with(self, target: str, i: int, rank: Optional[float]) -> List[int]:
+        """Arrivals at ``target`` with ``i`` removed, then inserted at ``rank`` (None: left out)."""
+        arrivals = [j for j in self.arrivals.get(target, []) if j != i]
+        if rank is not None:
+            arrivals.append(i)
+            arrivals.sort(key=lambda j: rank if j == i else self.rank[j])
+        return arrivals
+
+    def apply(self, i: int, target: Optional[str], rank: Optional[float],
+              evaluated: Dict[str, Tuple[List[int], Dict[int, float]]]) -> None:
+        old_target = self.target.pop(i, None)
+        self.rank.pop(i, None)
+        self.score.pop(i, None)
+        if target is not None:
+            self.target[i], self.rank[i] = target, rank
+        for t, (arrivals, scores) in evaluated.items():
+            self.arrivals[t] = arrivals
+            self.score.update(scores)
+        if old_target is not None and not self.arrivals.get(old_target):
+            self.arrivals.pop(old_target, None)
+
+
+def _propose(plan: _Plan, rng: random.Random, max_moves: int) -> List[Tuple[int, Optional[str], Optional[float]]]:
+    """One or two candidate changes: (candidate, new target or None to drop, new rank)."""
+    candidates = plan.problem.candidates
+    i = rng.randrange(len(candidates))
+    targets = candidates[i]["targets"]
+    top_rank = max(plan.rank.values(), default=0.0) + 1.0
+    if i not in plan.target:
+        if not targets:
+            return []
+        change = (i, rng.choice(targets), rng.uniform(0.0, top_rank))
+        if max_moves and len(plan.target) >= max_moves:
+            # Swap: drop a planned move to make room
+            return [(rng.choice(list(plan.target)), None, None), change]
+        return [change]
+    roll = rng.random()
+    if roll < 0.5 and len(targets) > 1:
+        return [(i, rng.choice([t for t in targets if t != plan.target[i]]), plan.rank[i])]
+    if roll < 0.75:
+        return [(i, None, None)]
+    return [(i, plan.target[i], rng.uniform(0.0, top_rank))]
+
+
+def _try(plan: _Plan, changes: List[Tuple[int, Optional[str], Optional[float]]]) -> Optional[_Plan]:
+    """The plan after ``changes``, or None if it breaks a gate."""
+    if not changes:
+        return None
+    new_plan = plan.copy()
+    for i, target, rank in changes:
+        evaluated = {}
+        old_target = new_plan.target.get(i)
+        if old_target is not None and old_target != target:
+            arrivals = new_plan.arrivals_with(old_target, i, None)
+            scores = plan.problem.evaluate_target(old_target, arrivals)
+            if scores is None:
+                return None
+            evaluated[old_target] = (arrivals, scores)
+        if target is not None:
+            arrivals = new_plan.arrivals_with(target, i, rank)
+            scores = plan.problem.evaluate_target(target, arrivals)
+            if scores is None:
+                return None
+            evaluated[target] = (arrivals, scores)
+        new_plan.apply(i, target, rank, evaluated)
+    return new_plan
+
+
+def solve_placement(problem: PlacementProblem, initial_moves: List[Tuple[int, str]], max_moves: int = 0,
+                    time_budget_ms: float = 500, seed: int = 0, max_iterations: Optional[int] = None,
+                    clock: Callable[[], float] = time.monotonic) -> Dict[str, Any]:
+    """Search for a better plan than ``initial_moves`` within ``time_budget_ms``.
+
+    Args:
+        problem: Candidates, gates and scoring.
+        initial_moves: (candidate index, target) in plan order; normally the
+            greedy plan, which passes every gate.
+        max_moves: Maximum number of moves in a plan (0 = unlimited).
+        time_budget_ms: Wall-clock budget for the search.
+        seed: Random seed, for reproducible searches.
+        max_iterations: Optional cap on proposals, in addition to the budget.
+
+    Returns:
+        Dict with ``moves`` (candidate, target, target score, earlier
+        arrivals at that target; in plan order), ``objective``,
+        ``initial_objective``, ``iterations``, ``accepted``,
+        ``elapsed_ms`` and ``curve``: best objective found over time.
+    """
+    start = clock()
+    rng = random.Random(seed)
+
+    # Initial plan, trimmed to max_moves (keeping the largest improvements)
+    plan = _Plan(problem)
+    moves = list(initial_moves)
+    if max_moves and len(moves) > max_moves:
+        keep = set(sorted(range(len(moves)), key=lambda m: problem.candidates[moves[m][0]]["current_score"]
+                          - problem.target_score(moves[m][0], moves[m][1], []), reverse=True)[:max_moves])
+        moves = [move for m, move in enumerate(moves) if m in keep]
+    for rank, (i, target) in enumerate(moves):
+        plan.target[i], plan.rank[i] = target, float(rank)
+        plan.arrivals.setdefault(target, []).append(i)
+    for target in list(plan.arrivals):
+        # Dropping moves only relieves the targets; drop any that still fail
+        while True:
+            scores = problem.evaluate_target(target, plan.arrivals[target])
+            if scores is not None:
+                plan.score.update(scores)
+                break
+            worst = min(plan.arrivals[target], key=lambda j: problem.candidates[j]["current_score"]
+                        - problem.target_score(j, target, []))
+            plan.arrivals[target].remove(worst)
+            del plan.target[worst], plan.rank[worst]
+        if not plan.arrivals[target]:
+            del plan.arrivals[target]
+
+    current = plan.objective()
+    initial_objective = best_objective = current
+    best = plan.copy()
+    curve = [{"elapsed_ms": 0.0, "objective": round(current, 2), "moves": len(plan.target)}]
+
+    # Temperature falls geometrically over the budget, in score points
+    t_start = max(1.0, problem.min_improvement / 2)
+    t_end = t_start / 100
+    budget = max(0.0, time_budget_ms) / 1000.0
+    iterations = accepted = 0
+    while problem.candidates:
+        elapsed = clock() - start
+        if elapsed >= budget or (max_iterations is not None and iterations >= max_iterations):
+            break
+        iterations += 1
+        temperature = t_start * (t_end / t_start) ** (elapsed / budget if budget else 1.0)
+        new_plan = _try(plan, _propose(plan, rng, max_moves))
+        if new_plan is None:
+            continue
+        new_objective = new_plan.objective()
+        delta = new_objective - current
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            plan, current = new_plan, new_objective
+            accepted += 1
+            if current < best_objective - 1e-9:
+                best, best_objective = plan.copy(), current
+                curve.append({"elapsed_ms": round((clock() - start) * 1000, 1),
+                              "objective": round(current, 2), "moves": len(plan.target)})
+
+    elapsed_ms = round((clock() - start) * 1000, 1)
+    curve.append({"elapsed_ms": elapsed_ms, "objective": round(best_objective, 2), "moves": len(best.target)})
+    ordered = sorted(best.target, key=best.rank.__getitem__)
+    return {
+        "moves": [(i, best.target[i], best.score[i],
+                   best.arrivals[best.target[i]][:best.arrivals[best.target[i]].index(i)])
+                  for i in ordered],
+        "objective": best_objective,
+        "initial_objective": initial_objective,
+        "iterations": iterations,
+        "accepted": accepted,
+        "elapsed_ms": elapsed_ms,
+        "curve": curve,
+    }
@@ -10,17 +10,18 @@ maintenance mode evacuation, and distribution balancing.
 import os
 import sys
 import json
+import threading
 import time
 import traceback
-from typing import Any, Dict, List, Optional, Set, Union
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
 from datetime import datetime, timezone
 
 from proxbalance.scoring import (
-    calculate_node_health_score,
     predict_post_migration_load,
     calculate_target_node_score,
     calculate_migration_risk,
     DEFAULT_PENALTY_CONFIG,
+    NodeScoringContext,
 )
 from proxbalance.config_manager import (
     load_penalty_config,
@@ -41,8 +42,9 @@ from proxbalance.reporting import (
     generate_capacity_advisories as _generate_capacity_advisories,
 )
 from proxbalance.storage import (
-    build_storage_cache,
     check_storage_compatibility,
+    storage_index_from_topology,
+    StorageCompatibilityMatrix,
 )
 from proxbalance.distribution import (
     calculate_node_guest_counts,
@@ -54,14 +56,11 @@ from proxbalance.recommendation_analysis import (
     detect_migration_conflicts as _detect_migration_conflicts,
 )
 from proxbalance.patterns import get_node_seasonal_baseline
-
-# ---------------------------------------------------------------------------
-# Module-level storage cache — avoid rebuilding on every recommendation run
-# ---------------------------------------------------------------------------
-
-_storage_cache: Dict[str, Any] = {"data": None, "expires": 0}
-_STORAGE_CACHE_TTL = 300  # 5 minutes
-from proxbalance.guest_profiles import get_guest_profile
+from proxbalance.scoring_matrix import build_target_score_matrix
+from proxbalance.tag_index import TagIndex, guest_tag_list, index_guests, index_node_guests
+from proxbalance.guest_profiles import load_guest_classifications
+from proxbalance.metrics_store import get_metrics_generation
+from proxbalance.placement_solver import SOLVER_MODES, PlacementProblem, solve_placement
 
 # Lazy import for trend analysis (may not have data yet)
 _trend_module = None
@@ -208,7 +207,8 @@ def select_guests_to_migrate(node: Dict[str, Any], guests: Dict[str, Any], cpu_t
 
 def _check_cluster_convergence(nodes: Dict[str, Any], penalty_cfg: Dict[str, Any],
                                 cpu_threshold: float, mem_threshold: float,
-                                convergence_threshold: float) -> Optional[str]:
+                                convergence_threshold: float,
+                                scoring_context: Optional[NodeScoringContext] = None) -> Optional[str]:
     """
     Check if the cluster is already well-balanced enough that migrations
     would provide negligible benefit. Returns a message if converged, None otherwise.
@@ -217,24 +217,16 @@ def _check_cluster_convergence(nodes: Dict[str, Any], penalty_cfg: Dict[str, Any
     if len(online_nodes) < 2:
         return None
 
-    weight_current = penalty_cfg.get('weight_current', 0.5)
-    weight_24h = penalty_cfg.get('weight_24h', 0.3)
-    weight_7d = penalty_cfg.get('weight_7d', 0.2)
+    if scoring_context is None:
+        scoring_context = NodeScoringContext(cpu_threshold, mem_threshold, penalty_cfg)
 
     cpus = []
     mems = []
     for node in online_nodes.values():
-        metrics = node.get('metrics', {})
-        if metrics.get('has_historical'):
-            cpu = (metrics.get('current_cpu', 0) * weight_current +
-                   metrics.get('avg_cpu', 0) * weight_24h +
-                   metrics.get('avg_cpu_week', 0) * weight_7d)
-        else:
-            cpu = metrics.get('current_cpu', 0)
-        # Memory uses current value directly — it's a step-function resource
-        # that only changes with migrations, so blending with historical
-        # averages would misrepresent the actual spread.
-        mem = metrics.get('current_mem', 0)
+        # Time-weighted CPU; memory uses the current value directly — it's a
+        # step-function resource that only changes with migrations, so
+        # blending with historical averages would misrepresent the spread.
+        cpu, mem, _iowait = scoring_context.weighted_load(node)
         cpus.append(cpu)
         mems.append(mem)
 
@@ -289,12 +281,105 @@ def _calculate_cost_benefit(recommendation: Dict[str, Any], guest: Dict[str, Any
     }
 
 
+# ---------------------------------------------------------------------------
+# Incremental regeneration
+# ---------------------------------------------------------------------------
+
+# Scoring state of the last run, carried into the next incremental run.
+# A run takes it out while in use, so concurrent runs never share it.
+_scoring_state: Optional[Dict[str, Any]] = None
+_scoring_state_lock = threading.Lock()
+
+
+def _trend_inputs() -> tuple:
+    """Metrics generation and hour the node trend terms were computed for."""
+    try:
+        generation = get_metrics_generation()
+    except Exception:
+        generation = None  # no metrics stored yet: trend lookups fail the same way
+    return generation, int(time.time() // 3600)
+
+
+def _begin_scoring(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_threshold: float, mem_threshold: float,
+                   penalty_cfg: Dict[str, Any], pending_target_guests: Dict[str, List[Dict[str, Any]]],
+                   changed_nodes: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """Scoring context and target score matrix for a run.
+
+    With ``changed_nodes`` (incremental mode) the previous run's context
+    and matrix are carried over when that run scored the same node and
+    guest dicts with the same thresholds, penalty config, metrics
+    generation and hour. Otherwise both are built fresh and the report
+    says why.
+
+    Nothing carried over is dropped for the changed nodes. A migration
+    does not touch the cached node dicts (they only change with the next
+    collection, which fails the identity check above); it shows up as
+    pending load, and target columns are keyed by their pending load while
+    current-node scores ignore it. ``changed_nodes`` therefore only opts
+    in to reuse and is echoed in the report.
+    """
+    global _scoring_state
+    with _scoring_state_lock:
+        state, _scoring_state = _scoring_state, None
+    inputs = _trend_inputs()
+
+    report: Dict[str, Any] = {"mode": "full"}
+    reason = None
+    if changed_nodes is not None:
+        changed_nodes = sorted(set(changed_nodes))
+        report["changed_nodes"] = changed_nodes
+        if state is None:
+            reason = "no previous run to reuse"
+        elif state["nodes"] is not nodes or state["guests"] is not guests:
+            reason = "cluster data changed"
+        elif (state["context"].cpu_threshold, state["context"].mem_threshold) != (cpu_threshold, mem_threshold) \
+                or state["context"].penalty_config != penalty_cfg:
+            reason = "scoring parameters changed"
+        elif state["inputs"] != inputs:
+            reason = "trend data changed"
+
+    if changed_nodes is not None and reason is None:
+        scoring_ctx, score_matrix = state["context"], state["matrix"]
+        # Equal config, possibly reloaded: adopt this run's object so it applies
+        scoring_ctx.penalty_config = penalty_cfg
+        scoring_ctx.begin_run()
+        if score_matrix is not None:
+            score_matrix.begin_run(pending_target_guests)
+        report["mode"] = "incremental"
+    else:
+        scoring_ctx = NodeScoringContext(cpu_threshold, mem_threshold, penalty_cfg)
+        score_matrix = build_target_score_matrix(scoring_ctx, guests, pending_target_guests)
+        if reason:
+            report["reason"] = reason
+
+    return {"nodes": nodes, "guests": guests, "inputs": inputs,
+            "context": scoring_ctx, "matrix": score_matrix, "report": report}
+
+
+def _finish_scoring(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep a run's scoring state for the next incremental run and report the work it reused."""
+    global _scoring_state
+    counts = state["context"].counts
+    matrix = state["matrix"]
+    report = state["report"]
+    report["node_terms"] = {"computed": counts["terms_computed"], "reused": counts["terms_reused"]}
+    report["current_scores"] = {"computed": counts["current_computed"], "reused": counts["current_reused"]}
+    report["target_columns"] = {"built": matrix.columns_built if matrix is not None else 0,
+                                "reused": matrix.columns_reused if matrix is not None else 0}
+    reused = sum(part["reused"] for part in (report["node_terms"], report["current_scores"], report["target_columns"]))
+    done = reused + report["node_terms"]["computed"] + report["current_scores"]["computed"] + report["target_columns"]["built"]
+    report["work_avoided_pct"] = round(reused / done * 100, 1) if done else 0.0
+    with _scoring_state_lock:
+        _scoring_state = state
+    return report
+
+
 # ---------------------------------------------------------------------------
 # Main recommendation engine
 # ---------------------------------------------------------------------------
 
 
-def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_threshold: float = 60.0, mem_threshold: float = 70.0, iowait_threshold: float = 30.0, maintenance_nodes: Optional[Set[str]] = None, initial_pending_guests: Optional[Dict[str, List[Dict[str, Any]]]] = None, pve_crs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_threshold: float = 60.0, mem_threshold: float = 70.0, iowait_threshold: float = 30.0, maintenance_nodes: Optional[Set[str]] = None, initial_pending_guests: Optional[Dict[str, List[Dict[str, Any]]]] = None, pve_crs: Optional[Dict[str, Any]] = None, storage_topology: Optional[Dict[str, Any]] = None, storage_matrix: Optional[StorageCompatibilityMatrix] = None, changed_nodes: Optional[Iterable[str]] = None, solver: str = "greedy", solver_time_budget_ms: float = 500, solver_max_moves: int = 0) -> Dict[str, Any]:
     """
     Generate intelligent migration recommendations using pure score-based analysis.
 
@@ -319,43 +404,89 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
     - Maintenance mode (priority evacuation)
 
     Thresholds are only used internally by calculate_target_node_score for reference
+
+    Incremental mode: pass ``changed_nodes`` (the sources and targets of
+    the migrations since the previous call) to reuse that call's scoring
+    work while the node and guest dicts are the same objects; the
+    migrations themselves reach scoring through the pending guests. The
+    result is the same as a full run; its ``incremental`` entry reports
+    the mode and how much work was reused.
+
+    Placement solver: ``solver="anneal"`` improves on the greedy plan with
+    a simulated-annealing search (see proxbalance.placement_solver) for up
+    to ``solver_time_budget_ms``, with at most ``solver_max_moves`` moves
+    (0 = unlimited). The ``solver`` entry of the result reports the
+    objective of both plans and the best objective over time.
     """
     if maintenance_nodes is None:
         maintenance_nodes = set()
+    if solver not in SOLVER_MODES:
+        print(f"Warning: Unknown placement solver '{solver}', using greedy", file=sys.stderr)
+        solver = "greedy"
 
     recommendations = []
     skipped_guests = []
     pending_target_guests = dict(initial_pending_guests) if initial_pending_guests else {}
 
-    # Get Proxmox client for storage compatibility checks (with time-based cache)
+    # Get Proxmox client for storage compatibility checks (guest config lookups)
     proxmox = None
-    storage_cache = {}
     try:
-        now = time.monotonic()
-        if _storage_cache["data"] is not None and now < _storage_cache["expires"]:
-            storage_cache = _storage_cache["data"]
-            print(f"Using cached storage data for {len(storage_cache)} nodes", file=sys.stderr)
-        else:
-            config = load_config()
-            try:
-                proxmox = get_proxmox_client(config)
-            except ValueError:
-                pass  # proxmox remains None, storage compatibility checks will be skipped
-
-            if proxmox:
-                # Build storage cache once for all compatibility checks (major performance boost!)
-                print(f"Building storage cache for {len(nodes)} nodes...", file=sys.stderr)
-                storage_cache = build_storage_cache(nodes, proxmox)
-                print(f"\u2713 Storage cache built for {len(storage_cache)} nodes", file=sys.stderr)
-                # Cache the result for 5 minutes
-                _storage_cache["data"] = storage_cache
-                _storage_cache["expires"] = now + _STORAGE_CACHE_TTL
+        config = load_config()
+        try:
+            proxmox = get_proxmox_client(config)
+        except ValueError:
+            pass  # proxmox remains None, storage compatibility checks will be skipped
     except Exception as e:
         print(f"Warning: Could not initialize Proxmox client for storage checks: {e}", file=sys.stderr)
 
+    # Storage available on each node, from the topology the collector recorded
+    storage_cache = storage_index_from_topology(storage_topology, nodes)
+    # Guest x node compatibility from the storage IDs the collector recorded
+    if storage_matrix is None:
+        storage_matrix = StorageCompatibilityMatrix(guests, storage_cache)
+
+    def storage_compatible(guest: Dict[str, Any], src_node: str, tgt_node: str) -> bool:
+        verdict = storage_matrix.is_compatible(guest.get("vmid"), tgt_node)
+        if verdict is not None:
+            return verdict
+        # No recorded storage_ids: read the guest's config (config cache, API on a miss)
+        return not (proxmox and storage_cache) or check_storage_compatibility(guest, src_node, tgt_node, proxmox, storage_cache)
+
     # Load penalty configuration
     penalty_cfg = load_penalty_config()
 
+    # Node-level scoring terms, computed once per node and shared by every
+    # guest/target evaluation below. With NumPy, target scores for all
+    # guests are computed a node column at a time; None means score each
+    # guest/target pair individually. Incremental runs carry both over
+    # from the previous run.
+    scoring_state = _begin_scoring(nodes, guests, cpu_threshold, mem_threshold, penalty_cfg,
+                                   pending_target_guests, changed_nodes)
+    scoring_ctx, score_matrix = scoring_state["context"], scoring_state["matrix"]
+
+    # Tag placement for anti-affinity checks: guests already on each node,
+    # and guests committed to each node by this run (kept in step with
+    # pending_target_guests)
+    placed_tags = index_node_guests(nodes, guests)
+    pending_tags = TagIndex()
+    for pending_node, pending_list in pending_target_guests.items():
+        for pending_guest in pending_list:
+            pending_tags.add(pending_guest.get("vmid"), pending_node, guest_tag_list(pending_guest, "all_tags"))
+    # Committed memory of the pending guests per target, for the capacity
+    # gate (kept in step with pending_target_guests by the main loop)
+    pending_mem_by_node = {
+        pending_node: sum(pg.get("mem_max_gb", 0) for pg in pending_list)
+        for pending_node, pending_list in pending_target_guests.items()
+    }
+
+    # Behavior classifications for profile-aware scoring, stored by the
+    # collector and loaded with one query per run
+    try:
+        guest_behavior = load_guest_classifications()
+    except Exception as e:
+        print(f"Warning: Could not load guest behavior profiles: {e}", file=sys.stderr)
+        guest_behavior = {}
+
     # Minimum score improvement required to recommend migration (in points)
     MIN_SCORE_IMPROVEMENT = penalty_cfg.get("min_score_improvement", 15)
 
@@ -364,7 +495,8 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
 
     # Phase 4a: Cluster convergence check - suppress if all nodes are balanced
     convergence_threshold = penalty_cfg.get("cluster_convergence_threshold", 8.0)
-    convergence_message = _check_cluster_convergence(nodes, penalty_cfg, cpu_threshold, mem_threshold, convergence_threshold)
+    convergence_message = _check_cluster_convergence(nodes, penalty_cfg, cpu_threshold, mem_threshold, convergence_threshold,
+                                                     scoring_context=scoring_ctx)
 
     # Pre-scan for IOWait-stressed nodes (needed to decide if convergence should be overridden)
     iowait_stressed_nodes = set()
@@ -390,7 +522,7 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
     # Only suppress if no maintenance nodes AND no IOWait-stressed nodes need relief
     if convergence_message and not maintenance_nodes and not iowait_stressed_nodes:
         print(f"Cluster convergence: {convergence_message}", file=sys.stderr)
-        summary = _build_summary([], [], nodes, penalty_cfg)
+        summary = _build_summary([], [], nodes, penalty_cfg, scoring_context=scoring_ctx)
         summary["convergence_message"] = convergence_message
         return {
             "recommendations": [],
@@ -400,6 +532,8 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
             "capacity_advisories": [],
             "forecasts": [],
             "execution_plan": {},
+            "incremental": _finish_scoring(scoring_state),
+            "solver": {"mode": solver},
         }
 
     # Phase 4d: Load score history for seasonal baseline (once, outside loop)
@@ -426,6 +560,13 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
     # Create list of all migration candidates sorted by potential benefit
     migration_candidates = []
 
+    # For the placement solver: every guest the greedy pass evaluates, the
+    # greedy plan (candidate index, target) and the pending guests it started from
+    solver_candidates: Optional[List[Dict[str, Any]]] = [] if solver != "greedy" else None
+    greedy_moves = []
+    solver_pending = ({name: list(pending) for name, pending in pending_target_guests.items()}
+                      if solver_candidates is not None else {})
+
     for vmid_key, guest in guests.items():
         try:
             src_node_name = guest.get("node")
@@ -568,11 +709,11 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
                 })
                 continue
 
-            # Load guest behavioral profile for profile-aware scoring (Phase 3c)
-            guest_profile = get_guest_profile(vmid_key)
+            # Guest behavioral profile for profile-aware scoring (Phase 3c)
+            guest_profile = guest_behavior.get(str(vmid_key))
 
             # Calculate current score (how well current node suits this guest)
-            current_score, src_details = calculate_target_node_score(src_node, guest, {}, cpu_threshold, mem_threshold, penalty_config=penalty_cfg, return_details=True, guest_profile=guest_profile, adding=False)
+            current_score, src_details = scoring_ctx.current_score(src_node, guest, guest_profile)
 
             # For maintenance nodes, artificially inflate current score to prioritize evacuation
             if src_node_name in maintenance_nodes:
@@ -582,6 +723,13 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
             if src_node_name in iowait_stressed_nodes:
                 current_score += IOWAIT_SCORE_BOOST
 
+            if solver_candidates is not None:
+                solver_candidates.append({
+                    "key": vmid_key, "guest": guest, "source": src_node_name,
+                    "current_score": current_score, "guest_profile": guest_profile,
+                    "source_details": src_details,
+                })
+
             # Find best alternative target
             best_target = None
             best_target_score = 999999
@@ -595,29 +743,12 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
                         continue
 
                     # Check for anti-affinity conflicts
-                    conflict = False
-                    if guest.get("tags", {}).get("exclude_groups", []):
-                        for other_vmid in tgt_node.get("guests", []):
-                            other_key = str(other_vmid) if str(other_vmid) in guests else other_vmid
-                            if other_key not in guests:
-                                continue
-                            other = guests[other_key]
-                            for excl_group in guest["tags"]["exclude_groups"]:
-                                if excl_group in other.get("tags", {}).get("all_tags", []):
-                                    conflict = True
-                                    break
-                            if conflict:
-                                break
-
+                    exclude_groups = guest.get("tags", {}).get("exclude_groups", [])
+                    conflict = bool(exclude_groups) and (
+                        placed_tags.has_any(exclude_groups, tgt_name)
                         # Check conflicts with pending migrations
-                        if not conflict and tgt_name in pending_target_guests:
-                            for pending_guest in pending_target_guests[tgt_name]:
-                                for excl_group in guest["tags"]["exclude_groups"]:
-                                    if excl_group in pending_guest.get("tags", {}).get("all_tags", []):
-                                        conflict = True
-                                        break
-                                if conflict:
-                                    break
+                        or pending_tags.has_any(exclude_groups, tgt_name)
+                    )
 
                     if conflict:
                         skip_reasons_per_target.append(f"{tgt_name}: anti-affinity conflict")
@@ -636,24 +767,23 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
                         target_used_mem_gb = (tgt_node.get("mem_percent", 0) / 100.0) * target_total_mem_gb
                         # Also account for guests already pending migration to this target
                         # (not yet reflected in actual node memory usage)
-                        pending_mem_gb = 0.0
-                        if tgt_name in pending_target_guests:
-                            pending_mem_gb = sum(
-                                pg.get("mem_max_gb", 0)
-                                for pg in pending_target_guests[tgt_name]
-                            )
+                        pending_mem_gb = pending_mem_by_node.get(tgt_name, 0.0)
                         # Leave 5% headroom for host OS overhead
                         if (target_used_mem_gb + pending_mem_gb + guest_mem_max_gb) > (target_total_mem_gb * 0.95):
                             skip_reasons_per_target.append(f"{tgt_name}: insufficient memory capacity ({target_used_mem_gb:.1f}+{guest_mem_max_gb:.1f} > {target_total_mem_gb:.1f}GB)")
                             continue
 
                     # Check storage compatibility (skip target if storage is incompatible)
-                    if proxmox and not check_storage_compatibility(guest, src_node_name, tgt_name, proxmox, storage_cache):
+                    if not storage_compatible(guest, src_node_name, tgt_name):
                         skip_reasons_per_target.append(f"{tgt_name}: storage incompatible")
                         continue
 
                     # Calculate target suitability score with details
-                    score, tgt_details = calculate_target_node_score(tgt_node, guest, pending_target_guests, cpu_threshold, mem_threshold, penalty_config=penalty_cfg, return_details=True, guest_profile=guest_profile)
+                    if score_matrix is not None:
+                        # Details are only built for the winning target, below
+                        score, tgt_details = score_matrix.score(vmid_key, guest, tgt_node, guest_profile), None
+                    else:
+                        score, tgt_details = calculate_target_node_score(tgt_node, guest, pending_target_guests, cpu_threshold, mem_threshold, penalty_config=penalty_cfg, return_details=True, guest_profile=guest_profile, context=scoring_ctx)
 
                     if score < best_target_score:
                         best_target_score = score
@@ -665,6 +795,9 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
                     traceback.print_exc()
                     continue
 
+            if score_matrix is not None and best_target:
+                best_target_details = calculate_target_node_score(nodes[best_target], guest, pending_target_guests, cpu_threshold, mem_threshold, penalty_config=penalty_cfg, return_details=True, guest_profile=guest_profile, context=scoring_ctx)[1]
+
             # Calculate score improvement
             score_improvement = current_score - best_target_score if best_target else 0
 
@@ -688,6 +821,10 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
                 if best_target not in pending_target_guests:
                     pending_target_guests[best_target] = []
                 pending_target_guests[best_target].append(guest)
+                pending_tags.add(guest.get("vmid"), best_target, guest_tag_list(guest, "all_tags"))
+                pending_mem_by_node[best_target] = pending_mem_by_node.get(best_target, 0) + guest.get("mem_max_gb", 0)
+                if solver_candidates is not None:
+                    greedy_moves.append((len(solver_candidates) - 1, best_target))
 
             elif best_target:
                 # Tracked as skipped — insufficient improvement
@@ -715,6 +852,93 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
             traceback.print_exc()
             continue
 
+    # Placement solver: search for a better plan than the greedy one, then
+    # let the passes below see its moves as the pending migrations
+    solver_report: Dict[str, Any] = {"mode": solver}
+    if solver_candidates:
+        try:
+            for candidate in solver_candidates:
+                candidate["targets"] = [
+                    tgt_name for tgt_name, tgt_node in nodes.items()
+                    if tgt_name != candidate["source"] and tgt_node.get("status") == "online"
+                    and tgt_name not in maintenance_nodes
+                    and storage_compatible(candidate["guest"], candidate["source"], tgt_name)
+                ]
+            problem = PlacementProblem(nodes, solver_candidates, solver_pending, placed_tags,
+                                       scoring_ctx, MIN_SCORE_IMPROVEMENT)
+            solution = solve_placement(problem, greedy_moves, max_moves=solver_max_moves,
+                                       time_budget_ms=solver_time_budget_ms)
+
+            planned_candidates = []
+            planned_pending = dict(solver_pending)
+            for i, target, score, earlier in solution["moves"]:
+                candidate = solver_candidates[i]
+                guest = candidate["guest"]
+                target_details = calculate_target_node_score(
+                    nodes[target], guest, problem.pending_before(target, earlier), cpu_threshold, mem_threshold,
+                    penalty_config=penalty_cfg, return_details=True, guest_profile=candidate["guest_profile"],
+                    context=scoring_ctx)[1]
+                planned_candidates.append({
+                    "vmid": candidate["key"],
+                    "guest": guest,
+                    "source_node": candidate["source"],
+                    "target_node": target,
+                    "current_score": candidate["current_score"],
+                    "target_score": score,
+                    "improvement": candidate["current_score"] - score,
+                    "is_maintenance": candidate["source"] in maintenance_nodes,
+                    "is_iowait_triggered": candidate["source"] in iowait_stressed_nodes,
+                    "source_details": candidate["source_details"],
+                    "target_details": target_details,
+                })
+                planned_pending[target] = planned_pending.get(target, []) + [guest]
+
+            # Skip entries follow the solver's plan, not the greedy one
+            planned = {str(c["vmid"]) for c in planned_candidates}
+            planned_skipped = [s for s in skipped_guests if str(s.get("vmid")) not in planned]
+            for i, greedy_target in greedy_moves:
+                candidate = solver_candidates[i]
+                if str(candidate["key"]) not in planned:
+                    vmid_key = candidate["key"]
+                    planned_skipped.append({
+                        "vmid": int(vmid_key) if isinstance(vmid_key, str) and vmid_key.isdigit() else vmid_key,
+                        "name": candidate["guest"].get("name", str(vmid_key)),
+                        "type": candidate["guest"].get("type", "VM"),
+                        "node": candidate["source"],
+                        "reason": "not_in_plan",
+                        "detail": f"The placement solver found a better plan without moving this guest (greedy target: {greedy_target}).",
+                        "best_target": greedy_target,
+                    })
+
+            migration_candidates, skipped_guests = planned_candidates, planned_skipped
+            pending_target_guests.clear()
+            pending_target_guests.update(planned_pending)
+            pending_tags = TagIndex()
+            for pending_node, pending_list in pending_target_guests.items():
+                for pending_guest in pending_list:
+                    pending_tags.add(pending_guest.get("vmid"), pending_node, guest_tag_list(pending_guest, "all_tags"))
+
+            solver_report.update({
+                "time_budget_ms": solver_time_budget_ms,
+                "max_moves": solver_max_moves,
+                "candidates": len(solver_candidates),
+                "greedy_moves": len(greedy_moves),
+                "greedy_objective": round(solution["initial_objective"], 2),
+                "moves": len(solution["moves"]),
+                "objective": round(solution["objective"], 2),
+                "iterations": solution["iterations"],
+                "accepted": solution["accepted"],
+                "elapsed_ms": solution["elapsed_ms"],
+                "curve": solution["curve"],
+            })
+            print(f"Placement solver: objective {solver_report['greedy_objective']} -> {solver_report['objective']} "
+                  f"({len(greedy_moves)} -> {len(solution['moves'])} moves, {solution['iterations']} iterations "
+                  f"in {solution['elapsed_ms']:.0f} ms)", file=sys.stderr)
+        except Exception as e:
+            print(f"Warning: Placement solver failed, keeping the greedy plan: {e}", file=sys.stderr)
+            traceback.print_exc()
+            solver_report["error"] = str(e)
+
     # Sort candidates by improvement (best first), prioritizing maintenance evacuations,
     # then IOWait-triggered migrations, then normal recommendations
     migration_candidates.sort(key=lambda x: (
@@ -723,6 +947,12 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
         -x["improvement"],
     ))
 
+    # Cluster health for migration risk scoring (the same for every candidate)
+    cluster_health_for_risk = 100 - (sum(
+        scoring_ctx.health_score(n)
+        for n in nodes.values() if n.get("status") == "online"
+    ) / max(1, sum(1 for n in nodes.values() if n.get("status") == "online")))
+
     # Build final recommendations from candidates
     for candidate in migration_candidates:
         try:
@@ -759,10 +989,6 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
             confidence = _calculate_confidence(score_improvement, tgt_details, guest, penalty_cfg)
 
             # Calculate migration risk score
-            cluster_health_for_risk = 100 - (sum(
-                calculate_node_health_score(n, n.get("metrics", {}), penalty_config=penalty_cfg)
-                for n in nodes.values() if n.get("status") == "online"
-            ) / max(1, sum(1 for n in nodes.values() if n.get("status") == "online")))
             risk_info = calculate_migration_risk(
                 guest, nodes[src_node_name], nodes[best_target],
                 cluster_health=max(0, cluster_health_for_risk)
@@ -893,10 +1119,9 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
                     continue
 
                 # Check storage compatibility
-                if proxmox and storage_cache:
-                    if not check_storage_compatibility(guest, candidate['source_node'], candidate['target_node'], proxmox, storage_cache):
-                        print(f"Skipping {guest_id}: storage incompatible with {candidate['target_node']}", file=sys.stderr)
-                        continue
+                if not storage_compatible(guest, candidate['source_node'], candidate['target_node']):
+                    print(f"Skipping {guest_id}: storage incompatible with {candidate['target_node']}", file=sys.stderr)
+                    continue
 
                 # Create recommendation
                 vmid_int = int(guest_id) if isinstance(guest_id, str) and guest_id.isdigit() else guest_id
@@ -957,6 +1182,7 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
             # For each affinity group with a recommended move, find group members not yet recommended
             already_recommended = {str(r.get('vmid')) for r in recommendations}
             companion_recs = []
+            affinity_members = index_guests(guests, lambda g: guest_tag_list(g, 'affinity_groups'))
 
             for ag, moves in affinity_moves.items():
                 # Determine the target node for this group (use the target of the highest-improvement move)
@@ -964,12 +1190,10 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
                 group_target = best_move[1]
 
                 # Find all guests with this affinity group
-                for vmid_key, guest in guests.items():
+                for vmid_key in affinity_members.members(ag):
                     if vmid_key in already_recommended:
                         continue
-                    guest_affinity = guest.get('tags', {}).get('affinity_groups', [])
-                    if ag not in guest_affinity:
-                        continue
+                    guest = guests[vmid_key]
                     # Guest is in this affinity group but not yet recommended
                     src_node = guest.get('node')
                     if src_node == group_target:
@@ -990,26 +1214,13 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
                             continue
 
                     # Check storage compatibility
-                    if proxmox and storage_cache:
-                        if not check_storage_compatibility(guest, src_node, group_target, proxmox, storage_cache):
-                            print(f"Affinity companion {vmid_key}: storage incompatible with {group_target}", file=sys.stderr)
-                            continue
+                    if not storage_compatible(guest, src_node, group_target):
+                        print(f"Affinity companion {vmid_key}: storage incompatible with {group_target}", file=sys.stderr)
+                        continue
 
                     # Check anti-affinity conflicts on target
-                    conflict = False
-                    if guest.get('tags', {}).get('exclude_groups', []):
-                        for other_vmid in nodes.get(group_target, {}).get('guests', []):
-                            other_key = str(other_vmid) if str(other_vmid) in guests else other_vmid
-                            if other_key not in guests or other_key == vmid_key:
-                                continue
-                            other = guests[other_key]
-                            for excl_group in guest['tags']['exclude_groups']:
-                                if excl_group in other.get('tags', {}).get('all_tags', []):
-                                    conflict = True
-                                    break
-                            if conflict:
-                                break
-                    if conflict:
+                    exclude_groups = guest.get('tags', {}).get('exclude_groups', [])
+                    if exclude_groups and placed_tags.has_any(exclude_groups, group_target, exclude=vmid_key):
                         print(f"Affinity companion {vmid_key}: anti-affinity conflict on {group_target}", file=sys.stderr)
                         continue
 
@@ -1064,6 +1275,7 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
                     if group_target not in pending_target_guests:
                         pending_target_guests[group_target] = []
                     pending_target_guests[group_target].append(guest)
+                    pending_tags.add(guest.get('vmid'), group_target, guest_tag_list(guest, 'all_tags'))
 
                     print(f"Added affinity companion: {guest.get('name')} ({vmid_key}) -> {group_target} (group: {ag})", file=sys.stderr)
 
@@ -1115,10 +1327,10 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
     advisories = _generate_capacity_advisories(nodes, recommendations, penalty_cfg)
 
     # Build recommendation summary / digest
-    summary = _build_summary(recommendations, skipped_guests, nodes, penalty_cfg)
+    summary = _build_summary(recommendations, skipped_guests, nodes, penalty_cfg, scoring_context=scoring_ctx)
 
     # Save score history snapshot
-    _save_score_snapshot(nodes, recommendations, penalty_cfg)
+    _save_score_snapshot(nodes, recommendations, penalty_cfg, scoring_context=scoring_ctx)
 
     # F1: Proactive forecast recommendations based on trend projection
     forecasts = []
@@ -1155,6 +1367,8 @@ def generate_recommendations(nodes: Dict[str, Any], guests: Dict[str, Any], cpu_
         "capacity_advisories": advisories,
         "forecasts": forecasts,
         "execution_plan": execution_plan,
+        "incremental": _finish_scoring(scoring_state),
+        "solver": solver_report,
     }
 
 
@@ -1183,9 +1397,11 @@ def _build_trend_evidence(
     try:
         lookback = penalty_cfg.get("_lookback_hours", 168)  # default 7 days
 
-        src_trend = ta.analyze_node_trends(src_node_name, lookback, cpu_threshold, mem_threshold)
-        tgt_trend = ta.analyze_node_trends(tgt_node_name, lookback, cpu_threshold, mem_threshold)
-        guest_trend = ta.analyze_guest_trends(str(vmid_key), lookback)
+        # Memoized per metrics generation: scoring already analyzed every
+        # node, and many recommendations share a source or target
+        src_trend = ta.cached_node_trends(src_node_name, lookback, cpu_threshold, mem_threshold)
+        tgt_trend = ta.cached_node_trends(tgt_node_name, lookback, cpu_threshold, mem_threshold)
+        guest_trend = ta.cached_guest_trends(str(vmid_key), lookback)
 
         # Check data quality
         src_quality = src_trend.get("data_quality", {})
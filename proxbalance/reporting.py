@@ -6,14 +6,15 @@ urgency classifications, and capacity planning advisories.
 """
 
 import statistics
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from proxbalance.scoring import calculate_node_health_score
+from proxbalance.scoring import NodeScoringContext, calculate_node_health_score
 
 
-def build_summary(recommendations: List[Dict[str, Any]], skipped_guests: List[Dict[str, Any]], nodes: Dict[str, Any], penalty_cfg: Dict[str, Any]) -> Dict[str, Any]:
+def build_summary(recommendations: List[Dict[str, Any]], skipped_guests: List[Dict[str, Any]], nodes: Dict[str, Any], penalty_cfg: Dict[str, Any], scoring_context: Optional[NodeScoringContext] = None) -> Dict[str, Any]:
     """
     Build a recommendation digest / summary for the UI.
+    Pass the run's NodeScoringContext to reuse its node health scores.
     """
     total_improvement = sum(r.get("score_improvement", 0) for r in recommendations)
     maintenance_count = sum(1 for r in recommendations if r.get("structured_reason", {}).get("primary_reason") == "maintenance_evacuation")
@@ -27,10 +28,12 @@ def build_summary(recommendations: List[Dict[str, Any]], skipped_guests: List[Di
     if online_nodes:
         avg_cpu = sum(n.get("metrics", {}).get("current_cpu", 0) for n in online_nodes) / len(online_nodes)
         avg_mem = sum(n.get("metrics", {}).get("current_mem", 0) for n in online_nodes) / len(online_nodes)
-        avg_score = sum(
-            calculate_node_health_score(n, n.get("metrics", {}), penalty_config=penalty_cfg)
-            for n in online_nodes
-        ) / len(online_nodes)
+        if scoring_context is not None:
+            node_scores = [scoring_context.health_score(n) for n in online_nodes]
+        else:
+            node_scores = [calculate_node_health_score(n, n.get("metrics", {}), penalty_config=penalty_cfg)
+                           for n in online_nodes]
+        avg_score = sum(node_scores) / len(online_nodes)
         cluster_health = round(max(0, 100 - avg_score), 1)
     else:
         avg_cpu = 0
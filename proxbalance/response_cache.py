@@ -0,0 +1,225 @@
+"""
+ProxBalance Pre-serialized Response Cache
+
+The dashboard polls /api/analyze, /api/nodes-only, /api/guests-only and
+/api/cluster-summary, and between collections every poll used to
+re-serialize the same dict and gzip it again. Here each endpoint's payload
+is serialized once per cache generation, compressed once per encoding
+(gzip, and brotli when the module is installed) and served as bytes with
+a strong ETag. A client that sends a matching ``If-None-Match`` gets a
+``304`` without a body.
+
+Payloads come from the collector's shared snapshot (proxbalance.snapshot)
+when it matches the current generation and compression levels, so a
+worker neither parses the cache sections nor keeps its own copy of the
+bodies. Otherwise, e.g. right after an upgrade before the next
+collection, the worker builds the payload itself and keeps it until the
+generation changes.
+
+ETags follow the flask-compress convention: ``"<digest>"`` for the plain
+body and ``"<digest>:gzip"`` / ``"<digest>:br"`` for the encoded variants.
+Responses carry ``Content-Encoding`` themselves, so flask-compress leaves
+them alone.
+
+Usage (in a route):
+    response = cached_read_response("analyze")
+    if response is None:
+        return jsonify({"success": False, "error": "No cached data available"}), 503
+    return response
+"""
+
+import threading
+from typing import Callable, Dict, Optional
+
+from flask import Response, current_app, request
+
+from proxbalance.cluster_cache import SECTION_TRENDS
+from proxbalance.constants import COMPRESS_BR_LEVEL, COMPRESS_LEVEL
+from proxbalance.snapshot import (
+    ENCODINGS, READ_PAYLOADS, Snapshot,
+    compress_payload, compression_levels, payload_digest, serialize_payload,
+)
+
+
+class PreparedPayload:
+    """One serialized response body and its lazily built encodings."""
+
+    __slots__ = ("generation", "digest", "body", "_encoded", "_lock")
+
+    def __init__(self, generation: Optional[int], body: bytes):
+        self.generation = generation
+        self.body = body
+        self.digest = payload_digest(body)
+        self._encoded = {"identity": body}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding: str, gzip_level: int, brotli_level: int) -> bytes:
+        """Body in the given encoding, compressed on first use only."""
+        data = self._encoded.get(encoding)
+        if data is not None:
+            return data
+        with self._lock:
+            data = self._encoded.get(encoding)
+            if data is None:
+                data = compress_payload(self.body, encoding, gzip_level, brotli_level)
+                self._encoded[encoding] = data
+        return data
+
+
+class SnapshotPayload:
+    """A payload served straight from the shared snapshot mapping."""
+
+    __slots__ = ("snapshot", "key", "digest")
+
+    def __init__(self, snapshot: Snapshot, key: str):
+        self.snapshot = snapshot
+        self.key = key
+        self.digest = snapshot.digests[key]
+
+    def encoded(self, encoding: str, gzip_level: int, brotli_level: int) -> memoryview:
+        name = f"payload:{self.key}" if encoding == "identity" else f"payload:{self.key}:{encoding}"
+        return self.snapshot.raw(name)
+
+
+class ResponseCache:
+    """Per-process cache of prepared payloads, one per key and generation."""
+
+    def __init__(self, gzip_level: int = COMPRESS_LEVEL, brotli_level: int = COMPRESS_BR_LEVEL):
+        self.gzip_level = gzip_level
+        self.brotli_level = brotli_level
+        # A snapshot compressed at other levels is not served
+        self.compression = compression_levels(gzip_level, brotli_level)
+        self._entries: Dict[str, PreparedPayload] = {}
+        self._lock = threading.Lock()
+        self._builds = 0
+        self._snapshot_hits = 0
+        self._not_modified = 0
+        self._served = 0
+
+    def lookup(self, key: str, generation: Optional[int], snapshot: Optional[Snapshot] = None):
+        """Payload for ``key`` at ``generation`` without building anything, or None."""
+        if generation is None:
+            return None
+        if (snapshot is not None and snapshot.generation == generation and key in snapshot.digests
+                and snapshot.compression == self.compression):
+            with self._lock:
+                self._snapshot_hits += 1
+                # A worker that has moved to the snapshot no longer needs its own copy
+                self._entries.pop(key, None)
+            return SnapshotPayload(snapshot, key)
+        entry = self._entries.get(key)
+        if entry is not None and entry.generation == generation:
+            return entry
+        return None
+
+    def payload(self, key: str, generation: Optional[int], build: Callable[[], Dict]) -> PreparedPayload:
+        """Prepared payload for ``key`` at ``generation``, building it if needed.
+
+        Without a generation (no cluster cache yet) nothing is kept.
+        """
+        entry = self.lookup(key, generation)
+        if entry is not None:
+            return entry
+        entry = PreparedPayload(generation, serialize_payload(build()))
+        with self._lock:
+            self._builds += 1
+            if generation is not None:
+                self._entries[key] = entry
+        return entry
+
+    def respond(self, payload) -> Response:
+        """Build the 200 or 304 response for the current request."""
+        encoding = _choose_encoding(request.headers.get("Accept-Encoding", ""))
+        etag = payload.digest if encoding == "identity" else f"{payload.digest}:{encoding}"
+        headers = {"ETag": f'"{etag}"', "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+
+        if _matches(request.if_none_match, payload.digest):
+            with self._lock:
+                self._not_modified += 1
+            return Response(status=304, headers=headers)
+
+        body = payload.encoded(encoding, self.gzip_level, self.brotli_level)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        with self._lock:
+            self._served += 1
+        if isinstance(body, memoryview):
+            # WSGI servers want bytes; copy the mapping out a chunk at a time
+            # so no full-size copy of the body is ever held
+            headers["Content-Length"] = str(len(body))
+            return Response(_chunks(body), status=200, mimetype="application/json", headers=headers)
+        return Response(body, status=200, mimetype="application/json", headers=headers)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": {key: e.generation for key, e in self._entries.items()},
+                "builds": self._builds,
+                "snapshot_hits": self._snapshot_hits,
+                "served": self._served,
+                "not_modified": self._not_modified,
+            }
+
+
+def _chunks(view: memoryview, size: int = 256 * 1024):
+    for start in range(0, len(view), size):
+        yield view[start:start + size].tobytes()
+
+
+def _choose_encoding(accept_encoding: str) -> str:
+    """Best encoding we have that the client accepts (q=0 excludes)."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name] = q
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return "identity"
+
+
+def _matches(if_none_match, digest: str) -> bool:
+    """True when the client already has this body in any encoding."""
+    if not if_none_match:
+        return False
+    if if_none_match.star_tag:
+        return True
+    for tag in if_none_match.as_set(include_weak=True):
+        if tag.split(":", 1)[0] == digest:
+            return True
+    return False
+
+
+def cached_read_response(key: str) -> Optional[Response]:
+    """Serve one of the READ_PAYLOADS, prepared once per cache generation.
+
+    Args:
+        key: Payload key in proxbalance.snapshot.READ_PAYLOADS.
+
+    Returns:
+        The 200/304 response, or None when there is no cluster cache.
+    """
+    sections, build = READ_PAYLOADS[key]
+    cache = current_app.config['response_cache']
+    cache_manager = current_app.config['cache_manager']
+    snapshot = current_app.config['snapshot_reader'].current()
+
+    payload = cache.lookup(key, cache_manager.generation(), snapshot)
+    if isinstance(payload, SnapshotPayload):
+        # Chart series are only needed to build these payloads; once the
+        # snapshot serves them, a copy parsed for an earlier fallback can go
+        cache_manager.discard((SECTION_TRENDS,))
+    elif payload is None:
+        data, generation = cache_manager.get_with_generation(sections)
+        if data is None:
+            return None
+        payload = cache.payload(key, generation, lambda: build(data))
+    return cache.respond(payload)
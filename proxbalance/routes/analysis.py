@@ -2,16 +2,19 @@ from flask import Blueprint, jsonify, request, current_app
 from datetime import datetime
 import json, os
 from proxbalance.config_manager import (
-    load_config, CONFIG_FILE, trigger_collection, get_proxmox_client,
+    load_config, CONFIG_FILE, trigger_collection, get_proxmox_client, get_config_cache_stats,
 )
+from proxbalance.cluster_cache import ALL_SECTIONS, SECTION_META
+from proxbalance.trend_analysis import get_trend_cache_stats
 from proxbalance.error_handlers import api_route
+from proxbalance.response_cache import cached_read_response
 
 analysis_bp = Blueprint("analysis", __name__)
 
 
-def read_cache():
+def read_cache(sections=ALL_SECTIONS):
     """Read cluster data using the app's cache manager"""
-    return current_app.config['cache_manager'].get()
+    return current_app.config['cache_manager'].get(sections)
 
 
 def get_version_info():
@@ -28,7 +31,7 @@ def index():
 @analysis_bp.route("/api/health", methods=["GET"])
 def health_check():
     """Health check endpoint"""
-    cache_data = read_cache()
+    cache_data = read_cache((SECTION_META,))
     config = load_config()
     version_info = get_version_info()
 
@@ -37,6 +40,9 @@ def health_check():
         "timestamp": datetime.now().isoformat(),
         "cache_available": cache_data is not None,
         "cache_age": cache_data.get('collected_at') if cache_data else None,
+        "cache_generation": current_app.config['cache_manager'].generation(),
+        "config_cache": get_config_cache_stats(),
+        "trend_cache": get_trend_cache_stats(),
         "version": version_info
     }
 
@@ -61,16 +67,16 @@ def analyze_cluster():
                     f"Please edit {CONFIG_FILE} and set the proxmox_host value."
         }), 500
 
-    data = read_cache()
+    response = cached_read_response("analyze")
 
-    if data is None:
+    if response is None:
         trigger_collection()
         return jsonify({
             "success": False,
             "error": "No cached data available. Collection in progress, please wait 30-60 seconds and refresh."
         }), 503
 
-    return jsonify({"success": True, "data": data})
+    return response
 
 
 # Progressive Loading Endpoints - Return subsets of cached data for faster initial page load
@@ -86,25 +92,15 @@ def get_cluster_summary():
             "error": f"Configuration Error: {config.get('message')}"
         }), 500
 
-    data = read_cache()
-    if data is None:
+    response = cached_read_response("cluster-summary")
+    if response is None:
         trigger_collection()
         return jsonify({
             "success": False,
             "error": "No cached data available"
         }), 503
 
-    # Return minimal data for instant header/title rendering
-    summary_data = {
-        "collected_at": data.get("collected_at"),
-        "summary": data.get("summary", {}),
-        "cluster_health": data.get("cluster_health", {}),
-        "pve_crs": data.get("pve_crs", {}),
-        "node_count": len(data.get("nodes", {})),
-        "guest_count": len(data.get("guests", {}))
-    }
-
-    return jsonify({"success": True, "data": summary_data})
+    return response
 
 
 def _build_crs_property(data):
@@ -181,7 +177,7 @@ def update_pve_crs():
             }), 403
         return jsonify({"success": False, "error": f"Failed to update CRS: {msg}"}), 502
 
-    # Re-collect so cluster_cache.json (and the dashboard banner) reflect the change.
+    # Re-collect so the cluster cache (and the dashboard banner) reflect the change.
     try:
         trigger_collection()
     except Exception:
@@ -194,47 +190,59 @@ def update_pve_crs():
 @api_route
 def get_nodes_only():
     """Return only node data for cluster map rendering"""
-    data = read_cache()
-    if data is None:
+    response = cached_read_response("nodes-only")
+    if response is None:
         return jsonify({
             "success": False,
             "error": "No cached data available"
         }), 503
 
-    # Return nodes data with minimal guest info (just IDs for count)
-    nodes_data = {}
-    for node_name, node in data.get("nodes", {}).items():
-        nodes_data[node_name] = {
-            **node,
-            "guests": node.get("guests", [])  # Just keep guest IDs list
-        }
-
-    return jsonify({
-        "success": True,
-        "data": {
-            "nodes": nodes_data,
-            "collected_at": data.get("collected_at")
-        }
-    })
+    return response
 
 
 @analysis_bp.route("/api/guests-only", methods=["GET"])
 @api_route
 def get_guests_only():
     """Return only guest data for populating cluster map details"""
-    data = read_cache()
-    if data is None:
+    response = cached_read_response("guests-only")
+    if response is None:
         return jsonify({
             "success": False,
             "error": "No cached data available"
         }), 503
 
+    return response
+
+
+@analysis_bp.route("/api/nodes/<node>/rrd/<timeframe>", methods=["GET"])
+@api_route
+def get_node_rrd(node, timeframe):
+    """Return one node's chart series for an RRD timeframe.
+
+    Serves lazily-loaded and slow-changing timeframes (month/year) from the
+    node RRD cache, fetching from Proxmox and filling the cache on a miss.
+    """
+    from proxbalance.rrd_cache import NODE_RRD_TIMEFRAMES, fetch_node_rrd_series
+
+    if timeframe not in NODE_RRD_TIMEFRAMES:
+        return jsonify({
+            "success": False,
+            "error": f"Invalid timeframe '{timeframe}'. Must be one of: {', '.join(NODE_RRD_TIMEFRAMES)}"
+        }), 400
+
+    config = load_config()
+    if config.get('error'):
+        return jsonify({"success": False, "error": config.get('message')}), 500
+
+    proxmox = get_proxmox_client(config)
+    series = fetch_node_rrd_series(proxmox, node, timeframe, config)
     return jsonify({
         "success": True,
-        "data": {
-            "guests": data.get("guests", {}),
-            "collected_at": data.get("collected_at")
-        }
+        "node": node,
+        "timeframe": timeframe,
+        "points": series["points"],
+        "fetched_at": series["fetched_at"],
+        "cached": series["cached"]
     })
 
 
@@ -272,6 +280,21 @@ def get_score_history():
     return jsonify({"success": True, "history": slim, "bucket_minutes": bucket})
 
 
+@analysis_bp.route("/api/collector/api-latency", methods=["GET"])
+@api_route
+def get_collector_api_latency():
+    """Return per-run Proxmox API latency recorded by the collector.
+
+    Query params:
+      endpoint — restrict to one endpoint class (e.g. node/rrddata)
+      hours    — lookback window (default 168)
+    """
+    from proxbalance.api_metrics import get_api_latency_history
+    endpoint = request.args.get('endpoint')
+    hours = request.args.get('hours', 168, type=int)
+    return jsonify({"success": True, "history": get_api_latency_history(endpoint=endpoint, hours=hours)})
+
+
 @analysis_bp.route("/api/refresh", methods=["POST"])
 @api_route
 def refresh_data():
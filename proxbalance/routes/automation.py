@@ -1,15 +1,16 @@
 from flask import Blueprint, jsonify, request, current_app
-import json, os, sys, subprocess, re, time
+import os, sys, subprocess, re, time
 from datetime import datetime, timedelta
 from pathlib import Path
+from proxbalance.cluster_cache import CORE_SECTIONS, SECTION_META
 from proxbalance.config_manager import load_config, save_config, CONFIG_FILE, BASE_PATH
 from proxbalance.error_handlers import api_route
 
 automation_bp = Blueprint("automation", __name__)
 
 
-def read_cache():
-    return current_app.config['cache_manager'].get()
+def read_cache(sections=CORE_SECTIONS):
+    return current_app.config['cache_manager'].get(sections)
 
 
 @automation_bp.route("/api/automigrate/status", methods=["GET"])
@@ -489,14 +490,12 @@ def get_automigrate_status():
                         data_collection_hours = round((dt.now(timezone.utc).replace(tzinfo=None) - first_dt).total_seconds() / 3600, 1)
                 except Exception:
                     pass
-            # Fallback to cluster_cache.json first_collected_at / collected_at
+            # Fallback to the cluster cache first_collected_at / collected_at
             if data_collection_hours == 0:
                 try:
-                    cache_file = os.path.join(BASE_PATH, 'cluster_cache.json')
-                    if os.path.exists(cache_file):
+                    cache_data = read_cache((SECTION_META,))
+                    if cache_data:
                         from datetime import datetime as dt, timezone
-                        with open(cache_file, 'r') as f:
-                            cache_data = json.load(f)
                         first_collected = cache_data.get('first_collected_at') or cache_data.get('collected_at', '')
                         if first_collected:
                             first_dt = dt.fromisoformat(first_collected.rstrip('Z').split('+')[0])
@@ -779,7 +778,7 @@ def automigrate_config():
 
     elif request.method == "POST":
         try:
-            config = load_config()
+            config = load_config(mutable=True)
             if config.get('error'):
                 return jsonify({"success": False, "error": config.get('message')}), 500
 
@@ -189,7 +189,7 @@ def update_config():
 
     data = request.json
 
-    config = load_config()
+    config = load_config(mutable=True)
     if config.get('error'):
         return jsonify({
             "success": False,
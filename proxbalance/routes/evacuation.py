@@ -1,10 +1,12 @@
 from flask import Blueprint, jsonify, request, current_app
-import json, os, sys, uuid, threading
-from proxbalance.config_manager import load_config, get_proxmox_client, BASE_PATH, CACHE_FILE, SESSIONS_DIR, DISK_PREFIXES
+import sys, uuid, threading
+from proxbalance.cluster_cache import CORE_SECTIONS
+from proxbalance.config_manager import load_config, get_proxmox_client, read_cache, BASE_PATH, CACHE_FILE, SESSIONS_DIR
 from proxbalance.error_handlers import api_route
-from proxbalance.evacuation import _get_session_file, _read_session, _write_session, _update_evacuation_progress, _execute_evacuation
+from proxbalance.guest_config_cache import get_guest_config_summary
+from proxbalance.evacuation import _get_session_file, _read_session, _write_session, _update_evacuation_progress, _execute_evacuation, _target_storage_map
 from proxbalance.scoring import calculate_target_node_score, DEFAULT_PENALTY_CONFIG
-from proxbalance.recommendations import check_storage_compatibility, build_storage_cache
+from proxbalance.recommendations import check_storage_compatibility
 
 evacuation_bp = Blueprint("evacuation", __name__)
 
@@ -116,38 +118,26 @@ def verify_storage_availability():
     guest_storage_info = []
     for vmid in guest_vmids:
         try:
-            # Try to get guest config (qemu or lxc)
-            guest_config = None
+            # Get guest config (qemu or lxc) from the config cache or the API
+            guest_parsed = None
             guest_type = None
             try:
-                guest_config = proxmox.nodes(source_node).qemu(vmid).config.get()
-                guest_type = "qemu"
+                config_entry = get_guest_config_summary(proxmox, source_node, vmid)
+                guest_type = config_entry["guest_type"]
+                guest_parsed = config_entry["parsed"]
             except Exception:
-                try:
-                    guest_config = proxmox.nodes(source_node).lxc(vmid).config.get()
-                    guest_type = "lxc"
-                except Exception:
-                    guest_storage_info.append({
-                        "vmid": vmid,
-                        "type": "unknown",
-                        "storage_volumes": [],
-                        "compatible_targets": [],
-                        "incompatible_targets": target_nodes,
-                        "error": "Cannot determine guest type"
-                    })
-                    continue
-
-            # Extract storage from config
-            storage_volumes = set()
+                guest_storage_info.append({
+                    "vmid": vmid,
+                    "type": "unknown",
+                    "storage_volumes": [],
+                    "compatible_targets": [],
+                    "incompatible_targets": target_nodes,
+                    "error": "Cannot determine guest type"
+                })
+                continue
 
-            # Check all config keys for storage references
-            for key, value in guest_config.items():
-                # Disk keys like scsi0, ide0, virtio0, mp0, rootfs
-                if key.startswith(DISK_PREFIXES):
-                    # Value format is typically "storage:vm-disk-id" or "storage:subvol-id"
-                    if isinstance(value, str) and ':' in value:
-                        storage_id = value.split(':')[0]
-                        storage_volumes.add(storage_id)
+            # Storage referenced by the guest's disks
+            storage_volumes = set(guest_parsed.get('storage_ids', []))
 
             # Find which targets have all required storage
             compatible_targets = []
@@ -206,12 +196,10 @@ def evacuate_node():
         return jsonify({"success": False, "error": "Missing node parameter"}), 400
 
     # Load cluster data to find guests on the node
-    if not os.path.exists(CACHE_FILE):
+    cluster_data = read_cache(CACHE_FILE, CORE_SECTIONS)
+    if cluster_data is None:
         return jsonify({"success": False, "error": "No cluster data available"}), 500
 
-    with open(CACHE_FILE, 'r') as f:
-        cluster_data = json.load(f)
-
     # Access nodes as dictionary
     nodes = cluster_data.get('nodes', {})
 
@@ -266,72 +254,43 @@ def evacuate_node():
     pending_counts = {n['node']: 0 for n in available_nodes}
 
     # Get storage info for all available target nodes
-    target_storage_map = {}
-    for node_info in available_nodes:
-        node = node_info['node']
-        try:
-            storage_list = proxmox.nodes(node).storage.get()
-            # Create set of available storage IDs
-            available_storage = set()
-            for storage in storage_list:
-                if storage.get('enabled', 1) and storage.get('active', 0):
-                    available_storage.add(storage.get('storage'))
-            target_storage_map[node] = available_storage
-        except Exception as e:
-            print(f"Warning: Could not get storage for {node}: {e}", file=sys.stderr)
-            target_storage_map[node] = set()
+    target_storage_map = _target_storage_map(cluster_data, available_nodes)
 
     for idx, vmid in enumerate(guest_vmids):
         try:
-            # Determine guest type and get config
+            # Determine guest type and get parsed config (config cache, API on a miss)
             guest_type = None
-            guest_config = None
+            guest_parsed = None
             guest_status = None
 
             try:
-                guest_config = proxmox.nodes(source_node).qemu(vmid).config.get()
-                guest_status = proxmox.nodes(source_node).qemu(vmid).status.current.get()
-                guest_type = "qemu"
-            except Exception:
-                try:
-                    guest_config = proxmox.nodes(source_node).lxc(vmid).config.get()
+                config_entry = get_guest_config_summary(proxmox, source_node, vmid)
+                guest_type = config_entry["guest_type"]
+                guest_parsed = config_entry["parsed"]
+                if guest_type == "qemu":
+                    guest_status = proxmox.nodes(source_node).qemu(vmid).status.current.get()
+                else:
                     guest_status = proxmox.nodes(source_node).lxc(vmid).status.current.get()
-                    guest_type = "lxc"
-                except Exception as e:
-                    migration_plan.append({
-                        "vmid": vmid,
-                        "name": f"Unknown-{vmid}",
-                        "type": "unknown",
-                        "status": "unknown",
-                        "target": None,
-                        "will_restart": False,
-                        "skipped": True,
-                        "skip_reason": f"Cannot determine type: {str(e)}"
-                    })
-                    continue
+            except Exception as e:
+                migration_plan.append({
+                    "vmid": vmid,
+                    "name": f"Unknown-{vmid}",
+                    "type": "unknown",
+                    "status": "unknown",
+                    "target": None,
+                    "will_restart": False,
+                    "skipped": True,
+                    "skip_reason": f"Cannot determine type: {str(e)}"
+                })
+                continue
 
             # Get guest details - for LXC prefer hostname, for QEMU prefer name
-            if guest_type == "lxc":
-                guest_name = (
-                    guest_config.get('hostname') or
-                    guest_config.get('name') or
-                    guest_config.get('description') or
-                    f'CT-{vmid}'
-                )
-            else:  # qemu
-                guest_name = (
-                    guest_config.get('name') or
-                    guest_config.get('description') or
-                    f'VM-{vmid}'
-                )
-
-            # Clean up description if it has newlines (use first line only)
-            if '\n' in str(guest_name):
-                guest_name = str(guest_name).split('\n')[0].strip()
+            # (descriptions are already trimmed to their first line)
+            guest_name = guest_parsed.get('display_name') or (f'CT-{vmid}' if guest_type == "lxc" else f'VM-{vmid}')
             current_status = guest_status.get('status', 'unknown')
 
             # Check for 'ignore' tag
-            tags = guest_config.get('tags', '').split(',') if guest_config.get('tags') else []
+            tags = guest_parsed.get('raw_tags', '').split(',') if guest_parsed.get('raw_tags') else []
             if 'ignore' in [t.strip().lower() for t in tags]:
                 migration_plan.append({
                     "vmid": vmid,
@@ -347,15 +306,8 @@ def evacuate_node():
                 })
                 continue
 
-            # Extract storage requirements for this guest
-            storage_volumes = set()
-            for key, value in guest_config.items():
-                # Disk keys like scsi0, ide0, virtio0, mp0, rootfs
-                if key.startswith(DISK_PREFIXES):
-                    # Value format is typically "storage:vm-disk-id" or "storage:subvol-id"
-                    if isinstance(value, str) and ':' in value:
-                        storage_id = value.split(':')[0]
-                        storage_volumes.add(storage_id)
+            # Storage requirements for this guest (parsed from its config)
+            storage_volumes = set(guest_parsed.get('storage_ids', []))
 
             # Filter available nodes to only those with compatible storage
             compatible_nodes = []
@@ -502,7 +454,8 @@ def evacuate_node():
 
     # Start evacuation in background thread
     def run_evacuation():
-        _execute_evacuation(session_id, source_node, guest_vmids, available_nodes, guest_actions, proxmox)
+        _execute_evacuation(session_id, source_node, guest_vmids, available_nodes, guest_actions, proxmox,
+                            target_storage_map=target_storage_map)
 
     thread = threading.Thread(target=run_evacuation, daemon=True)
     thread.start()
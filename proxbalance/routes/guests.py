@@ -1,14 +1,17 @@
 from flask import Blueprint, jsonify, request, current_app
 import json, os, sys, re
 import requests
+from proxbalance.cluster_cache import CORE_SECTIONS
 from proxbalance.config_manager import load_config, get_proxmox_client, trigger_collection, BASE_PATH, CACHE_FILE
 from proxbalance.error_handlers import api_route
+from proxbalance.guest_config_cache import invalidate_guest_config
+from proxbalance.tag_index import index_guests
 
 guests_bp = Blueprint("guests", __name__)
 
 
 def read_cache():
-    return current_app.config['cache_manager'].get()
+    return current_app.config['cache_manager'].get(CORE_SECTIONS)
 
 
 @guests_bp.route("/api/guests/<int:vmid>/location", methods=["GET"])
@@ -457,7 +460,8 @@ def add_guest_tag(vmid):
     else:  # CT
         proxmox.nodes(node).lxc(vmid).config.put(tags=new_tags_str)
 
-    # Trigger collection to update cache
+    # Drop the stale parsed config and trigger collection to update cache
+    invalidate_guest_config(vmid)
     trigger_collection()
 
     return jsonify({
@@ -521,7 +525,8 @@ def remove_guest_tag(vmid, tag):
     else:  # CT
         proxmox.nodes(node).lxc(vmid).config.put(tags=new_tags_str)
 
-    # Trigger collection to update cache
+    # Drop the stale parsed config and trigger collection to update cache
+    invalidate_guest_config(vmid)
     trigger_collection()
 
     return jsonify({
@@ -582,21 +587,25 @@ def get_affinity_groups():
         return jsonify({"success": False, "error": "No cluster data available"}), 500
 
     guests = cache_data.get("guests", {})
-    affinity_groups = {}  # {group_name: [{vmid, name, type, node}, ...]}
 
-    for vmid_key, guest in guests.items():
+    def guest_affinity(guest):
         tags = guest.get("tags", {})
-        guest_affinity = tags.get("affinity_groups", [])
+        groups = tags.get("affinity_groups", [])
         # Also handle raw string tags for backwards compatibility
-        if not guest_affinity and isinstance(tags, dict):
-            all_tags = tags.get("all_tags", [])
-            guest_affinity = [t for t in all_tags if t.startswith("affinity_")]
+        if not groups and isinstance(tags, dict):
+            groups = [t for t in tags.get("all_tags", []) if t.startswith("affinity_")]
+        return groups
 
-        for ag in guest_affinity:
-            if ag not in affinity_groups:
-                affinity_groups[ag] = []
+    group_index = index_guests(guests, guest_affinity)
+
+    # Add violation detection - groups split across multiple nodes
+    groups_with_status = []
+    for group_name in group_index.tags():
+        members = []
+        for vmid_key in group_index.members(group_name):
+            guest = guests[vmid_key]
             vmid_int = int(vmid_key) if isinstance(vmid_key, str) and vmid_key.isdigit() else vmid_key
-            affinity_groups[ag].append({
+            members.append({
                 "vmid": vmid_int,
                 "name": guest.get("name", "unknown"),
                 "type": guest.get("type", "unknown"),
@@ -605,11 +614,7 @@ def get_affinity_groups():
                 "mem_gb": guest.get("mem_max_gb", 0),
                 "cpu": guest.get("cpu", 0)
             })
-
-    # Add violation detection - groups split across multiple nodes
-    groups_with_status = []
-    for group_name, members in affinity_groups.items():
-        nodes_used = list(set(m["node"] for m in members))
+        nodes_used = list(group_index.node_counts(group_name))
         is_split = len(nodes_used) > 1
         groups_with_status.append({
             "name": group_name,
@@ -1,11 +1,10 @@
-import json
 import sys
 import uuid
 from datetime import datetime, timezone
-from pathlib import Path
 
 from flask import Blueprint, jsonify, request
-from proxbalance.config_manager import load_config, get_proxmox_client, BASE_PATH
+from proxbalance.cluster_cache import SECTION_GUESTS, SECTION_NODES
+from proxbalance.config_manager import load_config, get_proxmox_client, read_cache, CACHE_FILE
 from proxbalance.error_handlers import api_route
 from proxbalance.migrations import (
     execute_migration as _execute_migration,
@@ -97,14 +96,7 @@ def validate_migration():
         pass
 
     # Load cache data for affinity checks
-    cache_data = None
-    try:
-        cache_file = Path(BASE_PATH) / "cluster_cache.json"
-        if cache_file.exists():
-            with open(cache_file, 'r') as f:
-                cache_data = json.load(f)
-    except Exception:
-        pass
+    cache_data = read_cache(CACHE_FILE, (SECTION_NODES, SECTION_GUESTS))
 
     result = _validate_migration(
         proxmox, vmid, source_node, target_node,
@@ -170,16 +162,11 @@ def execute_rollback():
         current_node = info["current_node"]
 
         # Determine guest type from cache data
-        cache_file = Path(BASE_PATH) / "cluster_cache.json"
         guest_type = "VM"
-        if cache_file.exists():
-            try:
-                with open(cache_file, "r") as f:
-                    cache_data = json.load(f)
-                guest_data = cache_data.get("guests", {}).get(str(vmid), {})
-                guest_type = guest_data.get("type", "VM")
-            except Exception:
-                pass
+        cache_data = read_cache(CACHE_FILE, (SECTION_GUESTS,))
+        if cache_data:
+            guest_data = cache_data.get("guests", {}).get(str(vmid), {})
+            guest_type = guest_data.get("type", "VM")
 
         # Execute the migration via Proxmox
         proxmox = get_proxmox_client(config)
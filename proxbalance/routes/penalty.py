@@ -288,7 +288,7 @@ def update_migration_settings_endpoint():
 
     # Save to config
     try:
-        config = load_config()
+        config = load_config(mutable=True)
     except Exception:
         config = {}
 
@@ -314,7 +314,7 @@ def update_migration_settings_endpoint():
 def reset_migration_settings_endpoint():
     """Reset migration settings to defaults."""
     try:
-        config = load_config()
+        config = load_config(mutable=True)
     except Exception:
         config = {}
 
@@ -360,13 +360,13 @@ def get_trends_nodes():
 @api_route
 def get_trends_node(node_name):
     """Get detailed trend analysis for a single node."""
-    from proxbalance.trend_analysis import analyze_node_trends
+    from proxbalance.trend_analysis import cached_node_trends
 
     lookback = request.args.get("lookback_days", 7, type=int)
     cpu_threshold = request.args.get("cpu_threshold", 60.0, type=float)
     mem_threshold = request.args.get("mem_threshold", 70.0, type=float)
 
-    trends = analyze_node_trends(
+    trends = cached_node_trends(
         node_name,
         lookback_hours=lookback * 24,
         cpu_threshold=cpu_threshold,
@@ -380,10 +380,10 @@ def get_trends_node(node_name):
 @api_route
 def get_trends_guest(vmid):
     """Get detailed trend analysis for a single guest."""
-    from proxbalance.trend_analysis import analyze_guest_trends
+    from proxbalance.trend_analysis import cached_guest_trends
 
     lookback = request.args.get("lookback_days", 7, type=int)
 
-    trends = analyze_guest_trends(str(vmid), lookback_hours=lookback * 24)
+    trends = cached_guest_trends(str(vmid), lookback_hours=lookback * 24)
 
     return jsonify({"success": True, **trends})
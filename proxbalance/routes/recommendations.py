@@ -8,16 +8,23 @@ node suitability scoring, per-guest migration options, and recommendation feedba
 from flask import Blueprint, jsonify, request, current_app
 import json, os, sys, time
 from datetime import datetime
-from proxbalance.config_manager import load_config, load_penalty_config, BASE_PATH
-from proxbalance.scoring import calculate_target_node_score, DEFAULT_PENALTY_CONFIG, analyze_workload_patterns
-from proxbalance.recommendations import generate_recommendations, check_storage_compatibility, build_storage_cache
+from proxbalance.cluster_cache import CORE_SECTIONS, cluster_cache_mtime
+from proxbalance.config_manager import load_config, load_penalty_config, BASE_PATH, CACHE_FILE
+from proxbalance.scoring import calculate_target_node_score, DEFAULT_PENALTY_CONFIG, NodeScoringContext, analyze_workload_patterns
+from proxbalance.recommendations import generate_recommendations, check_storage_compatibility, storage_index_from_topology
+from proxbalance.storage import get_storage_compatibility
+from proxbalance.placement_solver import SOLVER_MAX_MOVES_RANGE, SOLVER_MODES, SOLVER_TIME_BUDGET_RANGE_MS
 from proxbalance.error_handlers import api_route
 
 recommendations_bp = Blueprint('recommendations', __name__)
 
 
 def read_cache():
-    return current_app.config['cache_manager'].get()
+    return current_app.config['cache_manager'].get(CORE_SECTIONS)
+
+
+def read_cache_with_generation():
+    return current_app.config['cache_manager'].get_with_generation(CORE_SECTIONS)
 
 
 @recommendations_bp.route("/api/recommendations", methods=["POST"])
@@ -31,13 +38,41 @@ def get_recommendations():
     iowait_threshold = float(data.get("iowait_threshold", 30.0))
     maintenance_nodes = set(data.get("maintenance_nodes", []))
 
-    cache_data = read_cache()
+    # Placement solver: the request overrides the configured mode and budget
+    config = load_config()
+    solver_settings = config.get('recommendation_thresholds', {})
+    solver = data.get("solver", solver_settings.get("placement_solver", "greedy"))
+    if solver not in SOLVER_MODES:
+        return jsonify({"success": False, "error": f"solver must be one of: {', '.join(SOLVER_MODES)}"}), 400
+    try:
+        solver_time_budget_ms = float(data.get("solver_time_budget_ms", solver_settings.get("solver_time_budget_ms", 500)))
+        solver_max_moves = int(data.get("solver_max_moves", solver_settings.get("solver_max_moves", 0)))
+    except (TypeError, ValueError, OverflowError):
+        return jsonify({"success": False, "error": "solver_time_budget_ms and solver_max_moves must be numbers"}), 400
+    # Same bounds as the saved setting; an unbounded budget would hold the worker
+    for name, val, (low, high) in [('solver_time_budget_ms', solver_time_budget_ms, SOLVER_TIME_BUDGET_RANGE_MS),
+                                   ('solver_max_moves', solver_max_moves, SOLVER_MAX_MOVES_RANGE)]:
+        if not low <= val <= high:
+            return jsonify({"success": False, "error": f"{name} must be between {low} and {high}"}), 400
+
+    cache_data, generation = read_cache_with_generation()
     if not cache_data:
         return jsonify({"success": False, "error": "No data available"}), 503
 
     # Phase 2f: Accept in-flight migration data from automigrate batch runs
     initial_pending = data.get("pending_target_guests")
 
+    # Incremental mode: migrations since the caller's previous request.
+    # The previous request's scoring work is reused; the moves themselves
+    # reach scoring through the pending guests
+    changed_nodes = None
+    delta = data.get("delta")
+    if isinstance(delta, dict):
+        changed_nodes = set()
+        for move in delta.get("moves") or []:
+            if isinstance(move, dict):
+                changed_nodes.update(str(move[k]) for k in ("source_node", "target_node") if move.get(k))
+
     try:
         result = generate_recommendations(
             cache_data.get('nodes', {}),
@@ -48,6 +83,12 @@ def get_recommendations():
             maintenance_nodes,
             initial_pending_guests=initial_pending,
             pve_crs=cache_data.get('pve_crs') or {},
+            storage_topology=cache_data.get('storage_topology'),
+            storage_matrix=get_storage_compatibility(cache_data, generation),
+            changed_nodes=changed_nodes,
+            solver=solver,
+            solver_time_budget_ms=solver_time_budget_ms,
+            solver_max_moves=solver_max_moves,
         )
         recommendations = result.get("recommendations", [])
         skipped_guests = result.get("skipped_guests", [])
@@ -60,7 +101,6 @@ def get_recommendations():
 
     # AI Enhancement: If enabled, enhance recommendations with AI insights
     ai_enhanced = False
-    config = load_config()
     if config.get('ai_recommendations_enabled', False):
         try:
             from ai_provider import get_ai_provider
@@ -118,6 +158,8 @@ def get_recommendations():
         "capacity_advisories": capacity_advisories,
         "forecasts": forecasts,
         "execution_plan": execution_plan,
+        "incremental": result.get("incremental", {}),
+        "solver": result.get("solver", {}),
         "count": len(recommendations),
         "ai_enhanced": ai_enhanced,
         "generation_time_ms": round((time.time() - start_time) * 1000),
@@ -126,7 +168,8 @@ def get_recommendations():
             "cpu_threshold": cpu_threshold,
             "mem_threshold": mem_threshold,
             "iowait_threshold": iowait_threshold,
-            "maintenance_nodes": list(maintenance_nodes)
+            "maintenance_nodes": list(maintenance_nodes),
+            "solver": solver,
         }
     }
 
@@ -469,7 +512,6 @@ def get_forecasts():
 def get_recommendations_diagnostics():
     """Get diagnostic summary of the recommendation engine's state"""
     recommendations_cache_file = os.path.join(BASE_PATH, 'recommendations_cache.json')
-    cluster_cache_file = os.path.join(BASE_PATH, 'cluster_cache.json')
 
     diagnostics = {}
 
@@ -523,8 +565,8 @@ def get_recommendations_diagnostics():
     # Cache file ages
     now = time.time()
     cache_status = {}
-    if os.path.exists(cluster_cache_file):
-        cluster_mtime = os.path.getmtime(cluster_cache_file)
+    cluster_mtime = cluster_cache_mtime(CACHE_FILE)
+    if cluster_mtime is not None:
         cache_status["cluster_cache_age_minutes"] = round((now - cluster_mtime) / 60, 1)
     else:
         cache_status["cluster_cache_age_minutes"] = None
@@ -709,7 +751,7 @@ def node_scores():
 @api_route
 def guest_migration_options(vmid):
     """Calculate migration suitability scores for a specific guest across all nodes"""
-    cache_data = read_cache()
+    cache_data, generation = read_cache_with_generation()
     if not cache_data:
         return jsonify({"success": False, "error": "No data available"}), 503
 
@@ -742,7 +784,6 @@ def guest_migration_options(vmid):
 
     # Check storage compatibility
     proxmox = None
-    storage_cache = {}
     try:
         config = load_config()
         from proxbalance.config_manager import get_proxmox_client
@@ -750,10 +791,10 @@ def guest_migration_options(vmid):
             proxmox = get_proxmox_client(config)
         except ValueError:
             pass
-        if proxmox:
-            storage_cache = build_storage_cache(nodes, proxmox)
     except Exception:
         pass
+    storage_cache = storage_index_from_topology(cache_data.get('storage_topology'), nodes)
+    storage_matrix = get_storage_compatibility(cache_data, generation)
 
     # Calculate scores on all other nodes
     target_options = []
@@ -796,9 +837,16 @@ def guest_migration_options(vmid):
             continue
 
         # Check storage compatibility
-        if proxmox and not node_name == src_node_name:
-            if not check_storage_compatibility(guest, src_node_name, node_name, proxmox, storage_cache):
-                entry.update({"score": 999999, "suitability_rating": 0, "suitable": False, "reason": "Storage incompatible", "disqualified": True})
+        if not node_name == src_node_name:
+            missing_storage = storage_matrix.missing(vmid, node_name)
+            if missing_storage is not None:
+                entry["missing_storage"] = missing_storage
+                compatible = not missing_storage
+            else:
+                compatible = not proxmox or check_storage_compatibility(guest, src_node_name, node_name, proxmox, storage_cache)
+            if not compatible:
+                reason = f"Storage incompatible (missing: {', '.join(missing_storage)})" if missing_storage else "Storage incompatible"
+                entry.update({"score": 999999, "suitability_rating": 0, "suitable": False, "reason": reason, "disqualified": True})
                 target_options.append(entry)
                 continue
 
@@ -872,6 +920,8 @@ def guest_migration_options(vmid):
         "guest_type": guest.get("type", "unknown"),
         "current_node": src_node_name,
         "current_score": round(current_score, 2) if current_score is not None else None,
+        "storage_requirements": storage_matrix.requirements(vmid),
+        "compatible_nodes": storage_matrix.compatible_nodes(vmid),
         "options": target_options,
     })
 
@@ -906,6 +956,7 @@ def simulate_penalty_config():
     # so we simulate by generating node scores with proposed config directly
 
     # Calculate node scores with proposed config
+    proposed_ctx = NodeScoringContext(cpu_threshold, mem_threshold, proposed_config)
     dummy_guest = {'cores': 1, 'maxmem': 1073741824}
     proposed_scores = {}
     for node_name, node in nodes.items():
@@ -913,19 +964,20 @@ def simulate_penalty_config():
             continue
         score = calculate_target_node_score(
             node, dummy_guest, {}, cpu_threshold, mem_threshold,
-            penalty_config=proposed_config
+            penalty_config=proposed_config, context=proposed_ctx
         )
         proposed_scores[node_name] = round(score, 2)
 
     # Calculate with current config for comparison
     current_config = load_penalty_config()
+    current_ctx = NodeScoringContext(cpu_threshold, mem_threshold, current_config)
     current_scores = {}
     for node_name, node in nodes.items():
         if node.get('status') != 'online':
             continue
         score = calculate_target_node_score(
             node, dummy_guest, {}, cpu_threshold, mem_threshold,
-            penalty_config=current_config
+            penalty_config=current_config, context=current_ctx
         )
         current_scores[node_name] = round(score, 2)
 
@@ -950,13 +1002,13 @@ def simulate_penalty_config():
             continue
 
         # Current config scoring
-        current_src_score = calculate_target_node_score(src_node, guest, {}, cpu_threshold, mem_threshold, penalty_config=current_config, adding=False)
+        current_src_score = calculate_target_node_score(src_node, guest, {}, cpu_threshold, mem_threshold, penalty_config=current_config, adding=False, context=current_ctx)
         current_best_improvement = 0
         current_best_target = None
         for tgt_name, tgt_node in nodes.items():
             if tgt_name == src_node_name or tgt_node.get("status") != "online" or tgt_name in maintenance_nodes:
                 continue
-            tgt_score = calculate_target_node_score(tgt_node, guest, {}, cpu_threshold, mem_threshold, penalty_config=current_config)
+            tgt_score = calculate_target_node_score(tgt_node, guest, {}, cpu_threshold, mem_threshold, penalty_config=current_config, context=current_ctx)
             imp = current_src_score - tgt_score
             if imp > current_best_improvement:
                 current_best_improvement = imp
@@ -965,13 +1017,13 @@ def simulate_penalty_config():
             current_recommendations += 1
 
         # Proposed config scoring
-        proposed_src_score = calculate_target_node_score(src_node, guest, {}, cpu_threshold, mem_threshold, penalty_config=proposed_config, adding=False)
+        proposed_src_score = calculate_target_node_score(src_node, guest, {}, cpu_threshold, mem_threshold, penalty_config=proposed_config, adding=False, context=proposed_ctx)
         proposed_best_improvement = 0
         proposed_best_target = None
         for tgt_name, tgt_node in nodes.items():
             if tgt_name == src_node_name or tgt_node.get("status") != "online" or tgt_name in maintenance_nodes:
                 continue
-            tgt_score = calculate_target_node_score(tgt_node, guest, {}, cpu_threshold, mem_threshold, penalty_config=proposed_config)
+            tgt_score = calculate_target_node_score(tgt_node, guest, {}, cpu_threshold, mem_threshold, penalty_config=proposed_config, context=proposed_ctx)
             imp = proposed_src_score - tgt_score
             if imp > proposed_best_improvement:
                 proposed_best_improvement = imp
@@ -1,8 +1,9 @@
 from flask import Blueprint, jsonify, request, send_file, current_app
-import json, os, sys, subprocess
+import sys, subprocess
 from datetime import datetime
 from proxbalance.config_manager import load_config, save_config, get_proxmox_client, CONFIG_FILE, BASE_PATH
 from proxbalance.error_handlers import api_route
+from proxbalance.placement_solver import SOLVER_MAX_MOVES_RANGE, SOLVER_MODES, SOLVER_TIME_BUDGET_RANGE_MS
 
 system_bp = Blueprint("system", __name__)
 
@@ -131,16 +132,15 @@ def get_ai_recommendations():
         }), 400
 
     # Load cluster cache
-    from proxbalance.config_manager import CACHE_FILE
-    if not os.path.exists(CACHE_FILE):
+    from proxbalance.config_manager import CACHE_FILE, read_cache
+    from proxbalance.cluster_cache import CORE_SECTIONS
+    cache_data = read_cache(CACHE_FILE, CORE_SECTIONS)
+    if cache_data is None:
         return jsonify({
             "success": False,
             "error": "No cached data available"
         }), 503
 
-    with open(CACHE_FILE, 'r') as f:
-        cache_data = json.load(f)
-
     # Create AI provider
     try:
         ai_provider = AIProviderFactory.create_provider(config)
@@ -414,7 +414,7 @@ def change_host():
             }), 400
 
     # Load current config
-    config_data = load_config()
+    config_data = load_config(mutable=True)
     if config_data.get('error'):
         return jsonify({
             "success": False,
@@ -524,8 +524,56 @@ def update_collection_settings():
             "error": "Max parallel workers must be between 1 and 10"
         }), 400
 
+    per_node_workers = opt_config.get('max_parallel_workers_per_node')
+    if per_node_workers and (not isinstance(per_node_workers, int) or per_node_workers < 1 or per_node_workers > 10):
+        return jsonify({
+            "success": False,
+            "error": "Max parallel workers per node must be between 1 and 10"
+        }), 400
+
+    adaptive = opt_config.get('adaptive_workers_enabled')
+    if adaptive is not None and not isinstance(adaptive, bool):
+        return jsonify({
+            "success": False,
+            "error": "Adaptive workers setting must be true or false"
+        }), 400
+
+    io_mode = opt_config.get('guest_io_mode')
+    if io_mode is not None and io_mode not in ('rrd', 'counters'):
+        return jsonify({
+            "success": False,
+            "error": "Guest I/O mode must be 'rrd' or 'counters'"
+        }), 400
+
+    rrd_refresh = opt_config.get('node_rrd_refresh_minutes')
+    if rrd_refresh is not None:
+        if not isinstance(rrd_refresh, dict) or any(
+            t not in ('hour', 'month', 'year') or not isinstance(m, int) or m < 0
+            for t, m in rrd_refresh.items()
+        ):
+            return jsonify({
+                "success": False,
+                "error": "Node RRD refresh intervals must map hour/month/year to non-negative minutes"
+            }), 400
+
+    rrd_lazy = opt_config.get('node_rrd_lazy_timeframes')
+    if rrd_lazy is not None and (
+        not isinstance(rrd_lazy, list) or any(t not in ('hour', 'month', 'year') for t in rrd_lazy)
+    ):
+        return jsonify({
+            "success": False,
+            "error": "Lazy node RRD timeframes must be a list of hour, month or year"
+        }), 400
+
+    full_refresh = opt_config.get('guest_full_refresh_minutes')
+    if full_refresh is not None and (not isinstance(full_refresh, int) or full_refresh < 0 or full_refresh > 1440):
+        return jsonify({
+            "success": False,
+            "error": "Guest full refresh interval must be between 0 and 1440 minutes"
+        }), 400
+
     # Load current config
-    config_data = load_config()
+    config_data = load_config(mutable=True)
     if config_data.get('error'):
         return jsonify({
             "success": False,
@@ -584,6 +632,9 @@ def get_recommendation_thresholds():
             "cpu_threshold": thresholds.get('cpu_threshold', 60),
             "mem_threshold": thresholds.get('mem_threshold', 70),
             "iowait_threshold": thresholds.get('iowait_threshold', 30),
+            "placement_solver": thresholds.get('placement_solver', 'greedy'),
+            "solver_time_budget_ms": thresholds.get('solver_time_budget_ms', 500),
+            "solver_max_moves": thresholds.get('solver_max_moves', 0),
         }
     })
 
@@ -597,6 +648,9 @@ def update_recommendation_thresholds():
     cpu = data.get('cpu_threshold')
     mem = data.get('mem_threshold')
     iowait = data.get('iowait_threshold')
+    solver = data.get('placement_solver')
+    solver_budget = data.get('solver_time_budget_ms')
+    solver_max_moves = data.get('solver_max_moves')
 
     # Validate
     for name, val in [('cpu_threshold', cpu), ('mem_threshold', mem), ('iowait_threshold', iowait)]:
@@ -607,8 +661,19 @@ def update_recommendation_thresholds():
                 return jsonify({"success": False, "error": f"{name} must be a number"}), 400
             if val < 1 or val > 100:
                 return jsonify({"success": False, "error": f"{name} must be between 1 and 100"}), 400
+    if solver is not None and solver not in SOLVER_MODES:
+        return jsonify({"success": False, "error": f"placement_solver must be one of: {', '.join(SOLVER_MODES)}"}), 400
+    for name, val, (low, high) in [('solver_time_budget_ms', solver_budget, SOLVER_TIME_BUDGET_RANGE_MS),
+                                   ('solver_max_moves', solver_max_moves, SOLVER_MAX_MOVES_RANGE)]:
+        if val is not None:
+            try:
+                val = int(val)
+            except (TypeError, ValueError):
+                return jsonify({"success": False, "error": f"{name} must be an integer"}), 400
+            if val < low or val > high:
+                return jsonify({"success": False, "error": f"{name} must be between {low} and {high}"}), 400
 
-    config_data = load_config()
+    config_data = load_config(mutable=True)
     if config_data.get('error'):
         return jsonify({
             "success": False,
@@ -624,6 +689,12 @@ def update_recommendation_thresholds():
         config_data['recommendation_thresholds']['mem_threshold'] = float(mem)
     if iowait is not None:
         config_data['recommendation_thresholds']['iowait_threshold'] = float(iowait)
+    if solver is not None:
+        config_data['recommendation_thresholds']['placement_solver'] = solver
+    if solver_budget is not None:
+        config_data['recommendation_thresholds']['solver_time_budget_ms'] = int(solver_budget)
+    if solver_max_moves is not None:
+        config_data['recommendation_thresholds']['solver_max_moves'] = int(solver_max_moves)
 
     if not save_config(config_data):
         return jsonify({
@@ -800,7 +871,7 @@ def recreate_token():
         }), 500
 
     # Update config.json with new token secret
-    config_data = load_config()
+    config_data = load_config(mutable=True)
     if config_data.get('error'):
         return jsonify({
             "success": False,
@@ -859,7 +930,7 @@ def delete_token():
         }), 500
 
     # Clear from config.json
-    config_data = load_config()
+    config_data = load_config(mutable=True)
     if config_data.get('error'):
         return jsonify({
             "success": False,
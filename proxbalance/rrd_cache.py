@@ -0,0 +1,163 @@
+"""
+ProxBalance Node RRD Cache (SQLite backend)
+
+Keeps the chart series built from each node's RRD timeframes so they can
+be refreshed on their own cadence instead of on every collection run.
+Only ``day`` and ``week`` feed scoring and are always fetched; ``month``
+and ``year`` change slowly and are reused until their refresh interval
+elapses. Timeframes configured as lazy are skipped by the collector
+entirely and filled on first request by the chart endpoint.
+"""
+
+import json
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from proxbalance.db import get_connection
+from proxbalance.rrd_columns import RrdColumns
+
+# All node RRD timeframes, in the order they appear in trend_data
+NODE_RRD_TIMEFRAMES = ("hour", "day", "week", "month", "year")
+
+# Timeframes the node metrics are computed from; never cached or lazy
+SCORING_TIMEFRAMES = ("day", "week")
+
+# Default refresh interval per chart-only timeframe, in minutes (0 = every run)
+DEFAULT_RRD_REFRESH_MINUTES = {"hour": 0, "month": 360, "year": 1440}
+
+
+def build_trend_series(rrd_points: Optional[List[Dict]]) -> List[Dict]:
+    """Convert raw node RRD points into chart points (time/cpu/mem/iowait %)."""
+    return RrdColumns(rrd_points).trend_series()
+
+
+def get_rrd_refresh_policy(config: Dict) -> Tuple[Dict[str, int], List[str]]:
+    """Resolve per-timeframe refresh intervals and lazy timeframes from config.
+
+    Reads ``collection_optimization.node_rrd_refresh_minutes`` (overrides
+    for DEFAULT_RRD_REFRESH_MINUTES) and ``node_rrd_lazy_timeframes``.
+    Scoring timeframes are ignored in both settings.
+
+    Returns:
+        (refresh_minutes, lazy_timeframes)
+    """
+    opt = (config or {}).get("collection_optimization", {})
+    refresh = dict(DEFAULT_RRD_REFRESH_MINUTES)
+    for timeframe, minutes in (opt.get("node_rrd_refresh_minutes") or {}).items():
+        if timeframe in refresh:
+            try:
+                refresh[timeframe] = max(0, int(minutes))
+            except (TypeError, ValueError):
+                print(f"Warning: Ignoring invalid RRD refresh interval for {timeframe}: {minutes}", file=sys.stderr)
+    lazy = [t for t in (opt.get("node_rrd_lazy_timeframes") or [])
+            if t in NODE_RRD_TIMEFRAMES and t not in SCORING_TIMEFRAMES]
+    return refresh, lazy
+
+
+def is_series_fresh(entry: Optional[Dict], refresh_minutes: int, now: Optional[float] = None) -> bool:
+    """Whether a cached series is still within its refresh interval."""
+    if not entry or refresh_minutes <= 0:
+        return False
+    now = time.time() if now is None else now
+    return (now - (entry.get("fetched_at") or 0)) < refresh_minutes * 60
+
+
+def load_node_rrd_cache() -> Dict[Tuple[str, str], Dict]:
+    """Load every cached series, keyed by (node, timeframe)."""
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT node, timeframe, fetched_at, points_json FROM node_rrd_cache"
+    ).fetchall()
+    cache = {}
+    for r in rows:
+        try:
+            points = json.loads(r["points_json"]) if r["points_json"] else []
+        except (json.JSONDecodeError, TypeError):
+            continue
+        cache[(r["node"], r["timeframe"])] = {"fetched_at": r["fetched_at"], "points": points}
+    return cache
+
+
+def get_node_rrd_series(node: str, timeframe: str) -> Optional[Dict]:
+    """Return the cached series for one node/timeframe, or None."""
+    conn = get_connection()
+    row = conn.execute(
+        "SELECT fetched_at, points_json FROM node_rrd_cache WHERE node = ? AND timeframe = ?",
+        (node, timeframe),
+    ).fetchone()
+    if row is None:
+        return None
+    try:
+        points = json.loads(row["points_json"]) if row["points_json"] else []
+    except (json.JSONDecodeError, TypeError):
+        return None
+    return {"fetched_at": row["fetched_at"], "points": points}
+
+
+def save_node_rrd_series(entries: Iterable[Tuple[str, str, List[Dict], float]]) -> int:
+    """Insert or replace cached series in a single transaction.
+
+    Args:
+        entries: (node, timeframe, points, fetched_at) tuples. Empty series
+                 are skipped so a failed fetch never replaces good data.
+
+    Returns:
+        Number of series written.
+    """
+    rows = [(node, timeframe, fetched_at, json.dumps(points))
+            for node, timeframe, points, fetched_at in entries if points]
+    if not rows:
+        return 0
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO node_rrd_cache (node, timeframe, fetched_at, points_json) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+    return len(rows)
+
+
+def prune_node_rrd_cache(keep_nodes: Iterable[str]) -> int:
+    """Delete cached series for nodes that have left the cluster."""
+    keep = set(keep_nodes)
+    conn = get_connection()
+    existing = {r["node"] for r in conn.execute("SELECT DISTINCT node FROM node_rrd_cache").fetchall()}
+    stale = [(n,) for n in existing if n not in keep]
+    if stale:
+        with conn:
+            conn.executemany("DELETE FROM node_rrd_cache WHERE node = ?", stale)
+    return len(stale)
+
+
+def fetch_node_rrd_series(proxmox: Any, node: str, timeframe: str, config: Dict) -> Dict:
+    """Return a node's chart series, serving from the cache when fresh.
+
+    Used by the chart endpoint for lazy or stale timeframes: on a miss the
+    RRD data is fetched live, converted and written back to the cache.
+
+    Returns:
+        {"points": [...], "fetched_at": float, "cached": bool}
+
+    Raises:
+        Exception: The API error from the live fetch.
+    """
+    refresh, lazy = get_rrd_refresh_policy(config)
+    entry = get_node_rrd_series(node, timeframe)
+    # Lazy timeframes default to the longest configured cadence when the
+    # collector never refreshes them itself.
+    minutes = refresh.get(timeframe, 0)
+    if timeframe in lazy and minutes <= 0:
+        minutes = max(refresh.values())
+    if is_series_fresh(entry, minutes):
+        return {"points": entry["points"], "fetched_at": entry["fetched_at"], "cached": True}
+
+    raw = proxmox.nodes(node).rrddata.get(timeframe=timeframe)
+    points = build_trend_series(raw)
+    fetched_at = time.time()
+    if timeframe not in SCORING_TIMEFRAMES:
+        try:
+            save_node_rrd_series([(node, timeframe, points, fetched_at)])
+        except Exception as e:
+            print(f"Warning: Could not cache {timeframe} RRD series for {node}: {e}", file=sys.stderr)
+    return {"points": points, "fetched_at": fetched_at, "cached": False}
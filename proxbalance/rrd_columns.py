@@ -0,0 +1,205 @@
+"""
+ProxBalance Columnar RRD Reduction
+
+Converts a node's RRD points into typed columns once and derives the
+collector's node metrics (averages, maxima, trend) and chart series from
+those columns, instead of walking the list of point dicts once per metric.
+
+The columns are NumPy arrays, so this only pays off when NumPy is
+installed. It is an optional dependency and not in requirements.txt;
+without it RrdColumns hands back the per-point lists the collector built
+before (a stdlib ``array`` conversion measured slower than those loops).
+The NumPy path reproduces the per-point arithmetic exactly:
+
+- averages are left-to-right sums (``np.add.accumulate``, not NumPy's
+  pairwise ``sum``), matching Python's ``sum()``;
+- chart values are rounded like Python's ``round(x, 2)``; NumPy's
+  ``rint(x * 100) / 100`` is only trusted away from the .5 boundary,
+  and values near it are rounded with ``round()``.
+
+Missing and ``None`` values are stored as NaN.
+"""
+
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # optional dependency
+    np = None
+    HAS_NUMPY = False
+
+# Numeric RRD fields used for node metrics and chart series
+RRD_COLUMN_FIELDS = ("cpu", "memused", "memtotal", "iowait", "loadavg")
+
+# Keys a point must carry to appear in the chart series
+_SERIES_REQUIRED_KEYS = frozenset(("time", "cpu", "memused", "memtotal"))
+
+
+class RrdColumns:
+    """Typed columns for one RRD timeframe.
+
+    Columns are built on first use, so timeframes that only feed the chart
+    series never convert the fields the node metrics need.
+
+    Attributes:
+        points: The raw RRD points.
+        numpy: Whether columns are NumPy arrays; without NumPy the
+            value methods return plain lists built point by point.
+    """
+
+    __slots__ = ("points", "numpy", "length", "_columns")
+
+    def __init__(self, points: Optional[List[Dict]]):
+        self.points = points or []
+        self.length = len(self.points)
+        self.numpy = HAS_NUMPY
+        self._columns = {}
+
+    def column(self, field: str):
+        """Float column for ``field`` (NaN where missing/None); NumPy only."""
+        col = self._columns.get(field)
+        if col is None:
+            # dtype=float maps None to NaN
+            col = np.array([p.get(field) for p in self.points], dtype=float)
+            self._columns[field] = col
+        return col
+
+    # ------------------------------------------------------------------
+    # Metric value columns (present values only, scaled)
+    # ------------------------------------------------------------------
+
+    def values(self, field: str, scale: float = 100):
+        """Present values of ``field`` multiplied by ``scale``, in point order."""
+        if not self.numpy:
+            return [p[field] * scale for p in self.points if field in p and p[field] is not None]
+        col = self.column(field)
+        return col[~np.isnan(col)] * scale
+
+    def mem_percent_values(self):
+        """memused / memtotal * 100 for points with both values and memtotal > 0."""
+        if not self.numpy:
+            return [p["memused"] / p["memtotal"] * 100 for p in self.points
+                    if "memused" in p and "memtotal" in p and p["memtotal"] > 0]
+        used = self.column("memused")
+        total = self.column("memtotal")
+        mask = ~np.isnan(used) & (total > 0)
+        return used[mask] / total[mask] * 100
+
+    # ------------------------------------------------------------------
+    # Chart series
+    # ------------------------------------------------------------------
+
+    def trend_series(self) -> List[Dict]:
+        """Chart points (time/cpu/mem/iowait %), same as the per-point builder."""
+        if not self.length:
+            return []
+        if not self.numpy:
+            return _trend_series_loop(self.points)
+
+        keep = np.fromiter((_SERIES_REQUIRED_KEYS <= p.keys() for p in self.points),
+                           dtype=bool, count=self.length)
+        if not keep.any():
+            return []
+        cpu = self.column("cpu")[keep]
+        used = self.column("memused")[keep]
+        total = self.column("memtotal")[keep]
+        iowait = self.column("iowait")[keep]
+        times = [p["time"] for p, k in zip(self.points, keep.tolist()) if k]
+
+        cpu_pct = np.where(np.isnan(cpu), 0.0, round2(cpu * 100))
+        mem_ok = ~np.isnan(used) & (used != 0) & ~np.isnan(total) & (total != 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mem_raw = np.where(mem_ok, used / np.where(mem_ok, total, 1.0) * 100, 0.0)
+        mem_pct = np.where(mem_ok, round2(mem_raw), 0.0)
+        io_pct = np.where(np.isnan(iowait), 0.0, round2(iowait * 100))
+
+        return [
+            {"time": t, "cpu": c, "mem": m, "iowait": i}
+            for t, c, m, i in zip(times, cpu_pct.tolist(), mem_pct.tolist(), io_pct.tolist())
+        ]
+
+
+def _trend_series_loop(points: List[Dict]) -> List[Dict]:
+    """Per-point chart series builder used without NumPy."""
+    series = []
+    for point in points:
+        if _SERIES_REQUIRED_KEYS <= point.keys():
+            cpu, used, total, iowait = point["cpu"], point["memused"], point["memtotal"], point.get("iowait")
+            series.append({
+                "time": point["time"],
+                "cpu": round(cpu * 100, 2) if cpu is not None else 0,
+                "mem": round((used / total * 100), 2) if used and total else 0,
+                "iowait": round(iowait * 100, 2) if iowait is not None else 0
+            })
+    return series
+
+
+def round2(values):
+    """Vectorized equivalent of Python's ``round(x, 2)`` for a float array.
+
+    ``np.round`` computes ``rint(x * 100) / 100``, which can disagree with
+    Python's correctly-rounded ``round()`` when ``x * 100`` lies within
+    floating-point error of a .5 boundary. Those few elements are rounded
+    with ``round()``; elsewhere both give the double nearest to n / 100.
+    """
+    scaled = values * 100
+    rounded = np.rint(scaled) / 100
+    frac = np.abs(scaled - np.floor(scaled) - 0.5)
+    near_half = frac < 1e-6 * np.maximum(1.0, np.abs(scaled))
+    if near_half.any():
+        idx = np.nonzero(near_half)[0]
+        flat = values.ravel()
+        for j in idx:
+            rounded[j] = round(float(flat[j]), 2)
+    return rounded
+
+
+# ---------------------------------------------------------------------------
+# Reductions
+# ---------------------------------------------------------------------------
+
+def seq_sum(values) -> float:
+    """Left-to-right sum, bit-identical to ``sum(list(values))``."""
+    if isinstance(values, list) or not _is_ndarray(values):
+        return sum(values)
+    if values.size == 0:
+        return 0
+    return float(np.add.accumulate(values)[-1])
+
+
+def seq_mean(values) -> float:
+    return seq_sum(values) / len(values)
+
+
+def vmax(values) -> float:
+    if _is_ndarray(values):
+        return float(values.max())
+    return max(values)
+
+
+def last(values) -> float:
+    return float(values[-1]) if _is_ndarray(values) else values[-1]
+
+
+def detect_trend(values, threshold=10) -> str:
+    """Trend of a value column: 'rising', 'falling', or 'stable'.
+
+    Same rule as the collector's list-based detector: compare the mean of
+    the newest fifth of the samples with the mean of the oldest fifth.
+    """
+    if not len(values):
+        return "stable"
+    recent_size = max(1, len(values) // 5)
+    recent_avg = seq_sum(values[-recent_size:]) / recent_size
+    older_avg = seq_sum(values[:recent_size]) / recent_size
+    diff = recent_avg - older_avg
+    if diff > threshold:
+        return "rising"
+    elif diff < -threshold:
+        return "falling"
+    return "stable"
+
+
+def _is_ndarray(values) -> bool:
+    return HAS_NUMPY and isinstance(values, np.ndarray)
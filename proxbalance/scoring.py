@@ -15,7 +15,7 @@ Scoring philosophy:
 """
 
 import sys
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 # Lazy import to avoid circular dependency — used only when trend data is available
 _trend_analysis = None
@@ -131,15 +131,8 @@ DEFAULT_PENALTY_CONFIG = {
 # Scoring functions
 # ---------------------------------------------------------------------------
 
-def calculate_node_health_score(node: Dict[str, Any], metrics: Dict[str, Any], penalty_config: Optional[Dict[str, Any]] = None) -> float:
-    """
-    Calculate comprehensive health score for a node (0-100, lower is better/healthier).
-    Considers CPU, Memory, IOWait, Load Average, and Storage pressure.
-    Uses configured time period weights.
-    """
-    if penalty_config is None:
-        penalty_config = DEFAULT_PENALTY_CONFIG
-
+def _weighted_load(metrics: Dict[str, Any], penalty_config: Dict[str, Any]) -> Tuple[float, float, float]:
+    """Time-weighted CPU%, current memory% and time-weighted IOWait% of a node."""
     # Load penalty config to get time period weights
     weight_current = penalty_config.get("weight_current", 0.5)
     weight_24h = penalty_config.get("weight_24h", 0.3)
@@ -151,11 +144,9 @@ def calculate_node_health_score(node: Dict[str, Any], metrics: Dict[str, Any], p
     immediate_iowait = metrics.get("current_iowait", 0)
 
     short_cpu = metrics.get("avg_cpu", 0)
-    short_mem = metrics.get("avg_mem", 0)
     short_iowait = metrics.get("avg_iowait", 0)
 
     long_cpu = metrics.get("avg_cpu_week", 0)
-    long_mem = metrics.get("avg_mem_week", 0)
     long_iowait = metrics.get("avg_iowait_week", 0)
 
     # Calculate weighted metrics using configured weights
@@ -173,92 +164,16 @@ def calculate_node_health_score(node: Dict[str, Any], metrics: Dict[str, Any], p
         cpu = immediate_cpu
         mem = immediate_mem
         iowait = immediate_iowait
+    return cpu, mem, iowait
 
-    # IOWait exemption: if this node's iowait is structurally driven by a guest on
-    # dedicated/passthrough storage (flagged by the collector — e.g. a NAS VM doing a
-    # RAID resync), don't let it inflate the health score. Migration can't relieve it,
-    # so counting it just produces churn-inducing false "unhealthy" readings.
-    if penalty_config.get("iowait_exempt_enabled", True) and node.get("iowait_exempt"):
-        iowait = 0
-
-    load = metrics.get("avg_load", 0)
-    cores = node.get("cpu_cores", 1)
-
-    # Normalize load average by core count (load per core)
-    load_per_core = (load / cores) * 100 if cores > 0 else 0
-
-    # Storage pressure score (average usage across all storage)
-    storage_pressure = 0
-    storage_list = node.get("storage", [])
-    if storage_list:
-        storage_usages = [s.get("usage_pct", 0) for s in storage_list if s.get("active", False)]
-        storage_pressure = sum(storage_usages) / len(storage_usages) if storage_usages else 0
-
-    # Weighted health score
-    # CPU dominates because it fluctuates with workload.
-    # Memory is mostly static in Proxmox (fixed VM/CT allocations) so it
-    # matters mainly for capacity (can-it-fit), not for migration triggers.
-    # CPU: 40%, Memory: 15%, IOWait: 25%, Load: 10%, Storage: 10%
-    health_score = (
-        cpu * 0.40 +
-        mem * 0.15 +
-        iowait * 0.25 +
-        load_per_core * 0.10 +
-        storage_pressure * 0.10
-    )
-
-    return health_score
-
-
-def predict_post_migration_load(node: Dict[str, Any], guest: Dict[str, Any], adding: bool = True, penalty_config: Optional[Dict[str, Any]] = None, guest_profile: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
-    """
-    Predict node load after adding or removing a guest.
-    Returns predicted CPU%, Memory%, and IOWait%.
-    Uses configured time period weights.
-    """
-    if penalty_config is None:
-        penalty_config = DEFAULT_PENALTY_CONFIG
-
-    metrics = node.get("metrics", {})
-
-    # Load penalty config to get time period weights
-    weight_current = penalty_config.get("weight_current", 0.5)
-    weight_24h = penalty_config.get("weight_24h", 0.3)
-    weight_7d = penalty_config.get("weight_7d", 0.2)
-
-    # Get metrics at different time scales
-    immediate_cpu = metrics.get("current_cpu", 0)
-    immediate_mem = metrics.get("current_mem", 0)
-    immediate_iowait = metrics.get("current_iowait", 0)
-
-    short_cpu = metrics.get("avg_cpu", 0)
-    short_mem = metrics.get("avg_mem", 0)
-    short_iowait = metrics.get("avg_iowait", 0)
-
-    long_cpu = metrics.get("avg_cpu_week", 0)
-    long_mem = metrics.get("avg_mem_week", 0)
-    long_iowait = metrics.get("avg_iowait_week", 0)
-
-    # Calculate weighted current state using configured weights
-    # Memory uses immediate value — see note in calculate_node_health_score.
-    if metrics.get("has_historical"):
-        current_cpu = (immediate_cpu * weight_current) + (short_cpu * weight_24h) + (long_cpu * weight_7d)
-        current_mem = immediate_mem
-        current_iowait = (immediate_iowait * weight_current) + (short_iowait * weight_24h) + (long_iowait * weight_7d)
-    else:
-        current_cpu = immediate_cpu
-        current_mem = immediate_mem
-        current_iowait = immediate_iowait
 
+def _guest_load_impact(node_total_mem_gb: float, node_cores: int, guest: Dict[str, Any], guest_profile: Optional[Dict[str, Any]] = None) -> Tuple[float, float, float]:
+    """CPU, memory and IOWait percentage points a guest adds to a node of the given size."""
     # Guest resource usage
     guest_cpu = guest.get("cpu_current", 0)  # Percentage of guest's allocated CPUs
     guest_mem_gb = guest.get("mem_used_gb", 0)
     guest_disk_io = (guest.get("disk_read_bps", 0) + guest.get("disk_write_bps", 0)) / (1024**2)  # MB/s
 
-    # Node capacity
-    node_total_mem_gb = node.get("total_mem_gb", 1)
-    node_cores = node.get("cpu_cores", 1)
-
     # Estimate guest's contribution to node CPU (guest uses X% of its cores)
     guest_cpu_cores = guest.get("cpu_cores", 1)
     guest_cpu_impact = (guest_cpu * guest_cpu_cores / node_cores) if node_cores > 0 else 0
@@ -284,6 +199,12 @@ def predict_post_migration_load(node: Dict[str, Any], guest: Dict[str, Any], add
     # Assume 100 MB/s disk I/O = ~5% IOWait contribution
     guest_iowait_impact = min(guest_disk_io / 100 * 5, 20)  # Cap at 20%
 
+    return guest_cpu_impact, guest_mem_impact, guest_iowait_impact
+
+
+def _apply_guest_impact(current_cpu: float, current_mem: float, current_iowait: float, impact: Tuple[float, float, float], adding: bool) -> Dict[str, float]:
+    guest_cpu_impact, guest_mem_impact, guest_iowait_impact = impact
+
     # Calculate predicted load
     if adding:
         predicted_cpu = current_cpu + guest_cpu_impact
@@ -301,18 +222,80 @@ def predict_post_migration_load(node: Dict[str, Any], guest: Dict[str, Any], add
     }
 
 
-def calculate_target_node_score(target_node: Dict[str, Any], guest: Dict[str, Any], pending_target_guests: Dict[str, List[Dict[str, Any]]], cpu_threshold: float, mem_threshold: float, penalty_config: Optional[Dict[str, Any]] = None, return_details: bool = False, guest_profile: Optional[Dict[str, Any]] = None, adding: bool = True) -> Union[float, Tuple[float, Dict[str, Any]]]:
+def calculate_node_health_score(node: Dict[str, Any], metrics: Dict[str, Any], penalty_config: Optional[Dict[str, Any]] = None) -> float:
     """
-    Calculate weighted score for target node suitability (lower is better).
-    Considers current load, predicted post-migration load, storage availability, and headroom.
+    Calculate comprehensive health score for a node (0-100, lower is better/healthier).
+    Considers CPU, Memory, IOWait, Load Average, and Storage pressure.
+    Uses configured time period weights.
+    """
+    if penalty_config is None:
+        penalty_config = DEFAULT_PENALTY_CONFIG
 
-    When return_details=True, returns (score, details_dict) with full penalty breakdown.
-    When return_details=False (default), returns just the score float for backward compatibility.
+    cpu, mem, iowait = _weighted_load(metrics, penalty_config)
+
+    # IOWait exemption: if this node's iowait is structurally driven by a guest on
+    # dedicated/passthrough storage (flagged by the collector — e.g. a NAS VM doing a
+    # RAID resync), don't let it inflate the health score. Migration can't relieve it,
+    # so counting it just produces churn-inducing false "unhealthy" readings.
+    if penalty_config.get("iowait_exempt_enabled", True) and node.get("iowait_exempt"):
+        iowait = 0
+
+    load = metrics.get("avg_load", 0)
+    cores = node.get("cpu_cores", 1)
+
+    # Normalize load average by core count (load per core)
+    load_per_core = (load / cores) * 100 if cores > 0 else 0
+
+    # Storage pressure score (average usage across all storage)
+    storage_pressure = 0
+    storage_list = node.get("storage", [])
+    if storage_list:
+        storage_usages = [s.get("usage_pct", 0) for s in storage_list if s.get("active", False)]
+        storage_pressure = sum(storage_usages) / len(storage_usages) if storage_usages else 0
+
+    # Weighted health score
+    # CPU dominates because it fluctuates with workload.
+    # Memory is mostly static in Proxmox (fixed VM/CT allocations) so it
+    # matters mainly for capacity (can-it-fit), not for migration triggers.
+    # CPU: 40%, Memory: 15%, IOWait: 25%, Load: 10%, Storage: 10%
+    health_score = (
+        cpu * 0.40 +
+        mem * 0.15 +
+        iowait * 0.25 +
+        load_per_core * 0.10 +
+        storage_pressure * 0.10
+    )
+
+    return health_score
+
+
+def predict_post_migration_load(node: Dict[str, Any], guest: Dict[str, Any], adding: bool = True, penalty_config: Optional[Dict[str, Any]] = None, guest_profile: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+    """
+    Predict node load after adding or removing a guest.
+    Returns predicted CPU%, Memory%, and IOWait%.
+    Uses configured time period weights.
     """
     if penalty_config is None:
         penalty_config = DEFAULT_PENALTY_CONFIG
 
-    target_name = target_node.get("name")
+    current_cpu, current_mem, current_iowait = _weighted_load(node.get("metrics", {}), penalty_config)
+
+    # Node capacity
+    node_total_mem_gb = node.get("total_mem_gb", 1)
+    node_cores = node.get("cpu_cores", 1)
+
+    impact = _guest_load_impact(node_total_mem_gb, node_cores, guest, guest_profile)
+    return _apply_guest_impact(current_cpu, current_mem, current_iowait, impact, adding)
+
+
+def _node_score_terms(target_node: Dict[str, Any], cpu_threshold: float, mem_threshold: float, penalty_config: Dict[str, Any], health_score: Optional[float] = None) -> Dict[str, Any]:
+    """Guest-independent part of calculate_target_node_score for one node.
+
+    Covers the weighted load, the current/sustained/IOWait/trend/spike
+    penalties (already scaled by the CPU stability factor), health,
+    storage and overcommit. calculate_target_node_score adds the
+    guest-dependent predicted-load terms on top.
+    """
     metrics = target_node.get("metrics", {})
 
     # Weighted time-based scoring: configurable weights from penalty config
@@ -321,29 +304,15 @@ def calculate_target_node_score(target_node: Dict[str, Any], guest: Dict[str, An
     immediate_mem = metrics.get("current_mem", 0)
     immediate_iowait = metrics.get("current_iowait", 0)
 
-    short_cpu = metrics.get("avg_cpu", 0)  # 24-hour average
-    short_mem = metrics.get("avg_mem", 0)
-    short_iowait = metrics.get("avg_iowait", 0)
-
     long_cpu = metrics.get("avg_cpu_week", 0)  # 7-day average
     long_mem = metrics.get("avg_mem_week", 0)
     long_iowait = metrics.get("avg_iowait_week", 0)
 
-    # Calculate weighted scores using configurable weights
-    weight_current = penalty_config.get("weight_current", 0.5)
     weight_24h = penalty_config.get("weight_24h", 0.3)
     weight_7d = penalty_config.get("weight_7d", 0.2)
 
-    # Memory uses immediate value — see note in calculate_node_health_score.
-    if metrics.get("has_historical"):
-        current_cpu = (immediate_cpu * weight_current) + (short_cpu * weight_24h) + (long_cpu * weight_7d)
-        current_mem = immediate_mem
-        current_iowait = (immediate_iowait * weight_current) + (short_iowait * weight_24h) + (long_iowait * weight_7d)
-    else:
-        # No historical data, use current only
-        current_cpu = immediate_cpu
-        current_mem = immediate_mem
-        current_iowait = immediate_iowait
+    # Memory uses immediate value — see note in _weighted_load.
+    current_cpu, current_mem, current_iowait = _weighted_load(metrics, penalty_config)
 
     # Get max values over the week to avoid migrating to nodes that spike
     max_cpu_week = metrics.get("max_cpu_week", metrics.get("max_cpu", 0))
@@ -368,7 +337,6 @@ def calculate_target_node_score(target_node: Dict[str, Any], guest: Dict[str, An
         "predicted_cpu": 0,
         "predicted_mem": 0,
     }
-    cpu_stability_factor = 1.0  # Default: no adjustment (overridden by trend analysis)
 
     # Get configurable threshold offsets
     cpu_offset_1 = penalty_config.get("cpu_threshold_offset_1", 10)
@@ -438,8 +406,8 @@ def calculate_target_node_score(target_node: Dict[str, Any], guest: Dict[str, An
     cpu_stability_factor = 1.0  # Default: no adjustment (set inside try block when trend data available)
     if _ta and (weight_24h > 0 or weight_7d > 0):
         try:
-            _node_trend_data = _ta.analyze_node_trends(
-                target_name,
+            _node_trend_data = _ta.cached_node_trends(
+                target_node.get("name"),
                 lookback_hours=168,
                 cpu_threshold=cpu_threshold,
                 mem_threshold=mem_threshold,
@@ -482,8 +450,6 @@ def calculate_target_node_score(target_node: Dict[str, Any], guest: Dict[str, An
             # CPU stability factor: scale CPU-related penalties by node volatility.
             # Stable nodes get CPU penalties *reduced* (the high reading is likely
             # transient); volatile nodes get penalties *inflated* (unpredictable).
-            # NOTE: Stored here but applied AFTER spike/predicted penalties are
-            # calculated below, so that all CPU penalties are scaled consistently.
             if node_stability >= 80:
                 cpu_stability_factor = 0.7   # Excellent — reduce CPU penalties 30%
             elif node_stability >= 60:
@@ -523,19 +489,192 @@ def calculate_target_node_score(target_node: Dict[str, Any], guest: Dict[str, An
         elif max_mem_week > 85:
             penalty_breakdown["mem_spikes"] = penalty_config.get("mem_spike_moderate", 5)
 
+    # Apply the CPU stability factor to the node-level CPU penalties; the
+    # predicted CPU penalty gets the same factor once the guest is known.
+    # Each penalty is scaled on its own, so the split does not change results.
+    if cpu_stability_factor != 1.0:
+        for _cpu_key in _NODE_CPU_PENALTY_KEYS:
+            if penalty_breakdown.get(_cpu_key, 0) != 0:
+                penalty_breakdown[_cpu_key] = int(
+                    round(penalty_breakdown[_cpu_key] * cpu_stability_factor)
+                )
+
+    # Storage availability score
+    storage_score = 0
+    storage_list = target_node.get("storage", [])
+    if storage_list:
+        # Prefer nodes with more available storage (only count active storage)
+        active_storages = [s for s in storage_list if s.get("active", False)]
+        avg_storage_usage = sum(s.get("usage_pct", 0) for s in active_storages) / len(active_storages) if active_storages else 0
+        storage_score = avg_storage_usage  # Lower = more available
+
+    if health_score is None:
+        health_score = calculate_node_health_score(target_node, metrics, penalty_config=penalty_config)
+
+    return {
+        "name": target_node.get("name"),
+        "penalties": penalty_breakdown,
+        "cpu_stability_factor": cpu_stability_factor,
+        "trend_data": _node_trend_data,
+        "current_cpu": current_cpu,
+        "current_mem": current_mem,
+        "current_iowait": current_iowait,
+        "immediate_cpu": immediate_cpu,
+        "immediate_mem": immediate_mem,
+        "immediate_iowait": immediate_iowait,
+        "max_cpu_week": max_cpu_week,
+        "max_mem_week": max_mem_week,
+        "cpu_trend": cpu_trend,
+        "mem_trend": mem_trend,
+        "offsets": (cpu_offset_1, cpu_offset_2, mem_offset_1, mem_offset_2),
+        "total_mem_gb": target_node.get("total_mem_gb", 1),
+        "cpu_cores": target_node.get("cpu_cores", 1),
+        "overcommit_ratio": target_node.get("mem_overcommit_ratio", 0),
+        "health_score": health_score,
+        "storage_score": storage_score,
+    }
+
+
+# CPU penalties scaled by the node's stability factor
+_NODE_CPU_PENALTY_KEYS = ("current_cpu", "sustained_cpu", "cpu_trend", "cpu_spikes")
+
+
+class NodeScoringContext:
+    """Node-level scoring terms for one set of nodes, computed once.
+
+    A recommendation run scores every guest against every node, but most
+    of calculate_target_node_score (weighted load, node penalties, trend
+    analysis, health, storage, overcommit) does not depend on the guest.
+    Build one context per run and pass it as ``context=``: those terms are
+    computed on first use per node and reused, and only the guest's
+    predicted-load deltas are computed per call. Results are identical to
+    scoring without a context.
+
+    The node dicts, thresholds and penalty config must not change while
+    the context is in use. Calls with other thresholds or another penalty
+    config object simply bypass it.
+
+    A context may also be carried into the next run over the same node
+    dicts (incremental regeneration): begin_run() drops the nodes that
+    changed, and ``counts`` tells how much of the run was served from
+    terms computed earlier.
+    """
+
+    def __init__(self, cpu_threshold: float, mem_threshold: float, penalty_config: Optional[Dict[str, Any]] = None):
+        self.cpu_threshold = cpu_threshold
+        self.mem_threshold = mem_threshold
+        self.penalty_config = penalty_config if penalty_config is not None else DEFAULT_PENALTY_CONFIG
+        # id(node) -> (node, value); the node reference keeps the id from being reused
+        self._terms: Dict[int, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        self._health: Dict[int, Tuple[Dict[str, Any], float]] = {}
+        self._load: Dict[int, Tuple[Dict[str, Any], Tuple[float, float, float]]] = {}
+        # (id(node), id(guest)) -> (node, guest, guest profile, (score, details))
+        self._current: Dict[Tuple[int, int], Tuple[Dict[str, Any], Dict[str, Any], Any, Tuple[float, Dict[str, Any]]]] = {}
+        # ids of nodes whose terms were carried over from an earlier run and not yet used
+        self._carried: Set[int] = set()
+        self.counts = {"terms_computed": 0, "terms_reused": 0, "current_computed": 0, "current_reused": 0}
+
+    def begin_run(self) -> None:
+        """Start another run over the same nodes, keeping what earlier runs computed."""
+        self._carried = set(self._terms)
+        self.counts = dict.fromkeys(self.counts, 0)
+
+    def applies_to(self, cpu_threshold: float, mem_threshold: float, penalty_config: Dict[str, Any]) -> bool:
+        return (penalty_config is self.penalty_config
+                and cpu_threshold == self.cpu_threshold and mem_threshold == self.mem_threshold)
+
+    def health_score(self, node: Dict[str, Any]) -> float:
+        """calculate_node_health_score(node, node["metrics"]) under this context's config."""
+        cached = self._health.get(id(node))
+        if cached is not None and cached[0] is node:
+            return cached[1]
+        score = calculate_node_health_score(node, node.get("metrics", {}), penalty_config=self.penalty_config)
+        self._health[id(node)] = (node, score)
+        return score
+
+    def weighted_load(self, node: Dict[str, Any]) -> Tuple[float, float, float]:
+        """Time-weighted CPU%, current memory% and time-weighted IOWait% of a node."""
+        cached = self._load.get(id(node))
+        if cached is not None and cached[0] is node:
+            return cached[1]
+        load = _weighted_load(node.get("metrics", {}), self.penalty_config)
+        self._load[id(node)] = (node, load)
+        return load
+
+    def node_terms(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        cached = self._terms.get(id(node))
+        if cached is not None and cached[0] is node:
+            if self._carried and id(node) in self._carried:
+                self._carried.discard(id(node))
+                self.counts["terms_reused"] += 1
+            return cached[1]
+        terms = _node_score_terms(node, self.cpu_threshold, self.mem_threshold, self.penalty_config,
+                                  health_score=self.health_score(node))
+        self._terms[id(node)] = (node, terms)
+        self.counts["terms_computed"] += 1
+        return terms
+
+    def current_score(self, node: Dict[str, Any], guest: Dict[str, Any],
+                      guest_profile: Optional[Dict[str, Any]] = None) -> Tuple[float, Dict[str, Any]]:
+        """How well ``node`` suits ``guest`` already running on it, with details.
+
+        calculate_target_node_score(node, guest, {}, adding=False,
+        return_details=True) under this context's config, computed once
+        per node and guest. The details dict is shared between calls and
+        must not be modified.
+        """
+        key = (id(node), id(guest))
+        cached = self._current.get(key)
+        if cached is not None and cached[0] is node and cached[1] is guest and cached[2] == guest_profile:
+            self.counts["current_reused"] += 1
+            return cached[3]
+        result = calculate_target_node_score(
+            node, guest, {}, self.cpu_threshold, self.mem_threshold, penalty_config=self.penalty_config,
+            return_details=True, guest_profile=guest_profile, adding=False, context=self,
+        )
+        self._current[key] = (node, guest, guest_profile, result)
+        self.counts["current_computed"] += 1
+        return result
+
+
+def calculate_target_node_score(target_node: Dict[str, Any], guest: Dict[str, Any], pending_target_guests: Dict[str, List[Dict[str, Any]]], cpu_threshold: float, mem_threshold: float, penalty_config: Optional[Dict[str, Any]] = None, return_details: bool = False, guest_profile: Optional[Dict[str, Any]] = None, adding: bool = True, context: Optional[NodeScoringContext] = None) -> Union[float, Tuple[float, Dict[str, Any]]]:
+    """
+    Calculate weighted score for target node suitability (lower is better).
+    Considers current load, predicted post-migration load, storage availability, and headroom.
+
+    When return_details=True, returns (score, details_dict) with full penalty breakdown.
+    When return_details=False (default), returns just the score float for backward compatibility.
+    Pass a NodeScoringContext as ``context`` to reuse node-level terms across calls.
+    """
+    if penalty_config is None:
+        penalty_config = context.penalty_config if context is not None else DEFAULT_PENALTY_CONFIG
+
+    if context is not None and context.applies_to(cpu_threshold, mem_threshold, penalty_config):
+        terms = context.node_terms(target_node)
+    else:
+        terms = _node_score_terms(target_node, cpu_threshold, mem_threshold, penalty_config)
+
+    target_name = terms["name"]
+    penalty_breakdown = dict(terms["penalties"])
+    cpu_stability_factor = terms["cpu_stability_factor"]
+    current_cpu = terms["current_cpu"]
+    current_mem = terms["current_mem"]
+    cpu_offset_1, cpu_offset_2, mem_offset_1, mem_offset_2 = terms["offsets"]
+
     # Predict post-migration load
-    predicted = predict_post_migration_load(target_node, guest, adding=adding, penalty_config=penalty_config, guest_profile=guest_profile)
+    predicted = _apply_guest_impact(
+        current_cpu, current_mem, terms["current_iowait"],
+        _guest_load_impact(terms["total_mem_gb"], terms["cpu_cores"], guest, guest_profile),
+        adding,
+    )
 
     # Account for pending migrations to this target
     if target_name in pending_target_guests:
         for pending_guest in pending_target_guests[target_name]:
-            predicted = predict_post_migration_load(
-                {"metrics": {"current_cpu": predicted["cpu"], "current_mem": predicted["mem"], "current_iowait": predicted["iowait"]},
-                 "total_mem_gb": target_node.get("total_mem_gb", 1),
-                 "cpu_cores": target_node.get("cpu_cores", 1)},
-                pending_guest,
-                adding=True,
-                penalty_config=penalty_config
+            predicted = _apply_guest_impact(
+                predicted["cpu"], predicted["mem"], predicted["iowait"],
+                _guest_load_impact(terms["total_mem_gb"], terms["cpu_cores"], pending_guest),
+                True,
             )
 
     # Penalize if predicted load exceeds thresholds (don't disqualify)
@@ -553,15 +692,12 @@ def calculate_target_node_score(target_node: Dict[str, Any], guest: Dict[str, An
     elif predicted["mem"] > mem_threshold:
         penalty_breakdown["predicted_mem"] = penalty_config.get("predicted_mem_over_penalty", 25)
 
-    # Apply CPU stability factor now that all CPU penalties (including spikes
-    # and predicted) have been calculated.
-    if cpu_stability_factor != 1.0:
-        for _cpu_key in ("current_cpu", "sustained_cpu", "cpu_trend",
-                         "cpu_spikes", "predicted_cpu"):
-            if penalty_breakdown.get(_cpu_key, 0) != 0:
-                penalty_breakdown[_cpu_key] = int(
-                    round(penalty_breakdown[_cpu_key] * cpu_stability_factor)
-                )
+    # Apply CPU stability factor to the predicted CPU penalty (the node-level
+    # CPU penalties were scaled in _node_score_terms)
+    if cpu_stability_factor != 1.0 and penalty_breakdown["predicted_cpu"] != 0:
+        penalty_breakdown["predicted_cpu"] = int(
+            round(penalty_breakdown["predicted_cpu"] * cpu_stability_factor)
+        )
 
     # Memory overcommit penalty — running guests' allocated memory exceeds physical RAM.
     # Proxmox commonly overcommits via ballooning, so use relaxed thresholds:
@@ -571,13 +707,13 @@ def calculate_target_node_score(target_node: Dict[str, Any], guest: Dict[str, An
     # Graduated scaling avoids the old binary jump where 1.21x and 1.99x got
     # wildly different penalties, which caused marginal overcommit to dominate
     # the score and trigger unnecessary migrations.
-    overcommit_ratio = target_node.get("mem_overcommit_ratio", 0)
+    overcommit_ratio = terms["overcommit_ratio"]
     # Adjust overcommit ratio for pending migrations to this target.
     # The base ratio only reflects currently-placed guests; guests already
     # selected for migration in this batch add committed memory that hasn't
     # been accounted for yet.
     if target_name in pending_target_guests and pending_target_guests[target_name]:
-        total_mem_gb = target_node.get("total_mem_gb", 1)
+        total_mem_gb = terms["total_mem_gb"]
         if total_mem_gb > 0:
             pending_committed_gb = sum(
                 pg.get("mem_max_gb", 0) for pg in pending_target_guests[target_name]
@@ -611,7 +747,7 @@ def calculate_target_node_score(target_node: Dict[str, Any], guest: Dict[str, An
     penalties = sum(penalty_breakdown.values())
 
     # Health score (current state)
-    health_score = calculate_node_health_score(target_node, metrics, penalty_config=penalty_config)
+    health_score = terms["health_score"]
 
     # Predicted health after migration
     # CPU-heavy weighting — memory is static, CPU drives actual migration value
@@ -631,13 +767,7 @@ def calculate_target_node_score(target_node: Dict[str, Any], guest: Dict[str, An
     headroom_score = 100 - (cpu_headroom * 0.65 + mem_headroom * 0.35)  # Lower = more headroom
 
     # Storage availability score
-    storage_score = 0
-    storage_list = target_node.get("storage", [])
-    if storage_list:
-        # Prefer nodes with more available storage (only count active storage)
-        active_storages = [s for s in storage_list if s.get("active", False)]
-        avg_storage_usage = sum(s.get("usage_pct", 0) for s in active_storages) / len(active_storages) if active_storages else 0
-        storage_score = avg_storage_usage  # Lower = more available
+    storage_score = terms["storage_score"]
 
     # Combined weighted score (lower is better)
     # Current health: 25%, Predicted health: 40%, Headroom: 20%, Storage: 15%
@@ -672,24 +802,25 @@ def calculate_target_node_score(target_node: Dict[str, Any], guest: Dict[str, An
         "metrics": {
             "weighted_cpu": round(current_cpu, 1),
             "weighted_mem": round(current_mem, 1),
-            "weighted_iowait": round(current_iowait, 1),
-            "immediate_cpu": round(immediate_cpu, 1),
-            "immediate_mem": round(immediate_mem, 1),
-            "immediate_iowait": round(immediate_iowait, 1),
+            "weighted_iowait": round(terms["current_iowait"], 1),
+            "immediate_cpu": round(terms["immediate_cpu"], 1),
+            "immediate_mem": round(terms["immediate_mem"], 1),
+            "immediate_iowait": round(terms["immediate_iowait"], 1),
             "predicted_cpu": round(predicted["cpu"], 1),
             "predicted_mem": round(predicted["mem"], 1),
             "predicted_iowait": round(predicted["iowait"], 1),
             "cpu_headroom": round(cpu_headroom, 1),
             "mem_headroom": round(mem_headroom, 1),
-            "cpu_trend": cpu_trend,
-            "mem_trend": mem_trend,
-            "max_cpu_week": round(max_cpu_week, 1),
-            "max_mem_week": round(max_mem_week, 1),
+            "cpu_trend": terms["cpu_trend"],
+            "mem_trend": terms["mem_trend"],
+            "max_cpu_week": round(terms["max_cpu_week"], 1),
+            "max_mem_week": round(terms["max_mem_week"], 1),
         },
         "total_score": round(total_score, 1),
     }
 
     # Attach trend analysis data when available for UI transparency
+    _node_trend_data = terms["trend_data"]
     if _node_trend_data:
         details["trend_analysis"] = {
             "cpu_rate_per_day": _node_trend_data.get("cpu", {}).get("rate_per_day", 0),
@@ -0,0 +1,269 @@
+"""
+ProxBalance Vectorized Target Scoring
+
+generate_recommendations scores every candidate guest against every
+online node, calling calculate_target_node_score about G x N times. With
+NumPy installed, TargetScoreMatrix computes a target node's scores for
+all guests at once -- one column of the guest x node matrix -- from the
+node terms in a NodeScoringContext and per-guest feature arrays. A
+column is recomputed only when a guest is committed to that target
+(``pending_target_guests`` grows), so the greedy loop in
+generate_recommendations never rescores the other targets.
+
+The column arithmetic follows calculate_target_node_score operation by
+operation: the same evaluation order, ``min(x, 100)`` clamping, and
+round-half-even like ``round()``. The scores therefore equal the scalar
+engine's exactly, which tests/test_scoring_improvements.py checks. A
+guest whose behavioral profile scales its CPU impact, or whose fields are
+not plain numbers, is scored by the scalar engine instead.
+
+A matrix can be carried into the next run over the same guests
+(incremental regeneration). begin_run() binds the new run's pending
+guests and drops the columns of nodes that changed; any other column is
+reused when the node's pending guests carry the same load as when it was
+built.
+
+Without NumPy, build_target_score_matrix() returns None and callers keep
+using calculate_target_node_score.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from proxbalance.scoring import (
+    NodeScoringContext, _guest_load_impact, calculate_target_node_score,
+)
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:  # optional dependency
+    np = None
+    HAS_NUMPY = False
+
+# Penalty keys capped together (see calculate_target_node_score)
+_MEM_PENALTY_KEYS = ("current_mem", "sustained_mem", "mem_spikes",
+                     "mem_trend", "predicted_mem", "mem_overcommit")
+_MEM_PENALTY_CAP = 60
+
+# Pending guest fields a column depends on (load impact and overcommit)
+_PENDING_LOAD_FIELDS = (("cpu_current", 0), ("cpu_cores", 1), ("mem_used_gb", 0),
+                        ("disk_read_bps", 0), ("disk_write_bps", 0), ("mem_max_gb", 0))
+# Columns kept per node for later runs, keyed by pending load
+_MAX_STORED_COLUMNS = 8
+
+
+def _number(value: Any) -> Any:
+    if not isinstance(value, (int, float)):
+        raise TypeError(f"not a number: {value!r}")
+    return value
+
+
+def _profile_is_neutral(guest_profile: Optional[Dict[str, Any]]) -> bool:
+    """True when the profile leaves the guest's CPU impact unscaled (factor 1.0)."""
+    if not guest_profile or guest_profile.get('behavior') == 'unknown':
+        return True
+    try:
+        behavior = guest_profile['behavior']
+        if behavior == 'bursty':
+            return max(1.0, guest_profile.get('peak_multiplier', 1.0) * 0.8) == 1.0
+        if behavior == 'growing':
+            growth_factor = 1.0 + (guest_profile.get('growth_rate_per_day', 0) * 2 / 100)
+            return min(2.0, max(1.0, growth_factor)) == 1.0
+    except Exception:
+        return False
+    return True
+
+
+def _pending_signature(pending: List[Dict[str, Any]]) -> Optional[Tuple]:
+    """The load a node's pending guests add, as a hashable key (None if unhashable)."""
+    signature = tuple(tuple(pg.get(field, default) for field, default in _PENDING_LOAD_FIELDS)
+                      for pg in pending)
+    try:
+        hash(signature)
+    except TypeError:
+        return None
+    return signature
+
+
+def _min100(values):
+    # min(x, 100) keeps x unless 100 < x
+    return np.where(values > 100, 100.0, values)
+
+
+class TargetScoreMatrix:
+    """Target scores for a fixed set of guests, one node column at a time."""
+
+    def __init__(self, context: NodeScoringContext, guests: Dict[str, Any],
+                 pending_target_guests: Dict[str, List[Dict[str, Any]]]):
+        self.context = context
+        self.pending = pending_target_guests
+        # guest key -> (row, guest dict) for guests with plain numeric fields
+        self._rows: Dict[Any, Tuple[int, Dict[str, Any]]] = {}
+        cpu_load, mem_gb, iowait_impact = [], [], []
+        for key, guest in guests.items():
+            try:
+                guest_cpu_load = _number(guest.get("cpu_current", 0)) * _number(guest.get("cpu_cores", 1))
+                guest_mem_gb = _number(guest.get("mem_used_gb", 0))
+                disk_io = (_number(guest.get("disk_read_bps", 0)) + _number(guest.get("disk_write_bps", 0))) / (1024**2)
+            except TypeError:
+                continue
+            self._rows[key] = (len(cpu_load), guest)
+            cpu_load.append(guest_cpu_load)
+            mem_gb.append(guest_mem_gb)
+            iowait_impact.append(min(disk_io / 100 * 5, 20))
+        self._cpu_load = np.array(cpu_load, dtype=np.float64)
+        self._mem_gb = np.array(mem_gb, dtype=np.float64)
+        self._iowait_impact = np.array(iowait_impact, dtype=np.float64)
+        # id(node) -> (node, run, pending count the column was built with, column)
+        self._columns: Dict[int, Tuple[Dict[str, Any], int, int, Any]] = {}
+        # id(node) -> (node, {pending signature: column}) for later runs
+        self._stored: Dict[int, Tuple[Dict[str, Any], Dict[Tuple, Any]]] = {}
+        self._run = 0
+        self.columns_built = 0
+        self.columns_reused = 0
+
+    def begin_run(self, pending_target_guests: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Start another run over the same guests with this run's pending guests."""
+        self.pending = pending_target_guests
+        self._run += 1
+        self.columns_built = 0
+        self.columns_reused = 0
+
+    def score(self, guest_key: Any, guest: Dict[str, Any], target_node: Dict[str, Any],
+              guest_profile: Optional[Dict[str, Any]] = None) -> float:
+        """calculate_target_node_score(target_node, guest, pending, ...) for this run."""
+        entry = self._rows.get(guest_key)
+        if entry is None or entry[1] is not guest or not _profile_is_neutral(guest_profile):
+            ctx = self.context
+            return calculate_target_node_score(
+                target_node, guest, self.pending, ctx.cpu_threshold, ctx.mem_threshold,
+                penalty_config=ctx.penalty_config, guest_profile=guest_profile, context=ctx,
+            )
+        return float(self._column(target_node)[entry[0]])
+
+    def _column(self, node: Dict[str, Any]):
+        terms = self.context.node_terms(node)
+        pending = self.pending.get(terms["name"]) or []
+        cached = self._columns.get(id(node))
+        # Pending lists only grow during a run, so their length identifies them
+        if cached is not None and cached[0] is node and cached[1] == self._run and cached[2] == len(pending):
+            return cached[3]
+        signature = _pending_signature(pending)
+        stored = self._stored.get(id(node))
+        if stored is None or stored[0] is not node:
+            stored = (node, {})
+            self._stored[id(node)] = stored
+        column = stored[1].get(signature) if signature is not None else None
+        if column is not None:
+            self.columns_reused += 1
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                column = self._build_column(terms, pending)
+            self.columns_built += 1
+            if signature is not None:
+                if len(stored[1]) >= _MAX_STORED_COLUMNS:
+                    stored[1].clear()
+                stored[1][signature] = column
+        self._columns[id(node)] = (node, self._run, len(pending), column)
+        return column
+
+    def _build_column(self, terms: Dict[str, Any], pending: List[Dict[str, Any]]):
+        ctx = self.context
+        penalty_config = ctx.penalty_config
+        cpu_threshold, mem_threshold = ctx.cpu_threshold, ctx.mem_threshold
+        cpu_offset_1, cpu_offset_2, mem_offset_1, mem_offset_2 = terms["offsets"]
+        node_total_mem_gb, node_cores = terms["total_mem_gb"], terms["cpu_cores"]
+        current_cpu, current_mem = terms["current_cpu"], terms["current_mem"]
+
+        # Predicted load: the guest first, then each pending guest in order
+        zeros = np.zeros_like(self._cpu_load)
+        cpu_impact = self._cpu_load / node_cores if node_cores > 0 else zeros
+        mem_impact = self._mem_gb / node_total_mem_gb * 100 if node_total_mem_gb > 0 else zeros
+        predicted_cpu = _min100(current_cpu + cpu_impact)
+        predicted_mem = _min100(current_mem + mem_impact)
+        predicted_iowait = _min100(terms["current_iowait"] + self._iowait_impact)
+        for pending_guest in pending:
+            pending_cpu, pending_mem, pending_iowait = _guest_load_impact(node_total_mem_gb, node_cores, pending_guest)
+            predicted_cpu = _min100(predicted_cpu + pending_cpu)
+            predicted_mem = _min100(predicted_mem + pending_mem)
+            predicted_iowait = _min100(predicted_iowait + pending_iowait)
+
+        predicted_cpu_penalty = np.select(
+            [predicted_cpu > (cpu_threshold + cpu_offset_2),
+             predicted_cpu > (cpu_threshold + cpu_offset_1),
+             predicted_cpu > cpu_threshold],
+            [penalty_config.get("predicted_cpu_extreme_penalty", 100),
+             penalty_config.get("predicted_cpu_high_penalty", 50),
+             penalty_config.get("predicted_cpu_over_penalty", 25)],
+            default=0,
+        ).astype(np.float64)
+        predicted_mem_penalty = np.select(
+            [predicted_mem > (mem_threshold + mem_offset_2),
+             predicted_mem > (mem_threshold + mem_offset_1),
+             predicted_mem > mem_threshold],
+            [penalty_config.get("predicted_mem_extreme_penalty", 100),
+             penalty_config.get("predicted_mem_high_penalty", 50),
+             penalty_config.get("predicted_mem_over_penalty", 25)],
+            default=0,
+        ).astype(np.float64)
+        cpu_stability_factor = terms["cpu_stability_factor"]
+        if cpu_stability_factor != 1.0:
+            predicted_cpu_penalty = np.where(predicted_cpu_penalty != 0,
+                                             np.rint(predicted_cpu_penalty * cpu_stability_factor),
+                                             predicted_cpu_penalty)
+
+        # Penalties in calculate_target_node_score's key order; only the
+        # predicted ones vary by guest
+        penalties: Dict[str, Any] = dict(terms["penalties"])
+        penalties["predicted_cpu"] = predicted_cpu_penalty
+        penalties["predicted_mem"] = predicted_mem_penalty
+
+        # Memory overcommit only depends on the node and its pending guests
+        overcommit_ratio = terms["overcommit_ratio"]
+        if pending and node_total_mem_gb > 0:
+            overcommit_ratio += sum(pg.get("mem_max_gb", 0) for pg in pending) / node_total_mem_gb
+        if overcommit_ratio > 1.2:
+            min_oc_penalty = penalty_config.get("mem_overcommit_penalty", 8)
+            max_oc_penalty = penalty_config.get("mem_overcommit_high_penalty", 25)
+            scale = min((overcommit_ratio - 1.2) / 0.8, 1.0)
+            penalties["mem_overcommit"] = int(round(min_oc_penalty + scale * (max_oc_penalty - min_oc_penalty)))
+
+        # Cap total memory penalties, scaling each positive one
+        total_mem_penalties = 0
+        for key in _MEM_PENALTY_KEYS:
+            total_mem_penalties = total_mem_penalties + penalties.get(key, 0)
+        capped = total_mem_penalties > _MEM_PENALTY_CAP
+        if np.any(capped):
+            scale = _MEM_PENALTY_CAP / np.where(capped, total_mem_penalties, 1.0)
+            for key in _MEM_PENALTY_KEYS:
+                if key in penalties:
+                    value = penalties[key]
+                    penalties[key] = np.where(capped & (value > 0), np.rint(value * scale), value)
+
+        total_penalties = 0
+        for value in penalties.values():
+            total_penalties = total_penalties + value
+
+        predicted_health = (
+            predicted_cpu * 0.40 +
+            predicted_mem * 0.15 +
+            predicted_iowait * 0.25 +
+            current_cpu * 0.15 +
+            current_mem * 0.05
+        )
+        headroom_score = 100 - ((100 - predicted_cpu) * 0.65 + (100 - predicted_mem) * 0.35)
+        return (
+            terms["health_score"] * 0.25 +
+            predicted_health * 0.40 +
+            headroom_score * 0.20 +
+            terms["storage_score"] * 0.15 +
+            total_penalties
+        )
+
+
+def build_target_score_matrix(context: NodeScoringContext, guests: Dict[str, Any],
+                              pending_target_guests: Dict[str, List[Dict[str, Any]]]) -> Optional[TargetScoreMatrix]:
+    """TargetScoreMatrix for a recommendation run, or None without NumPy."""
+    if not HAS_NUMPY:
+        return None
+    return TargetScoreMatrix(context, guests, pending_target_guests)
@@ -0,0 +1,255 @@
+"""
+ProxBalance Shared Cluster Snapshot
+
+Every gunicorn worker used to parse and hold its own copy of the cluster
+cache, chart series included, and keep its own serialized response bodies.
+With this module the collector writes ``cluster_cache/snapshot.bin`` once
+per collection, and every worker maps that file read-only. The file holds:
+
+- the read endpoints' JSON payloads (``payload:<key>``), already
+  serialized the way jsonify does it
+- their gzip and brotli encodings (``payload:<key>:gzip``, ``...:br``)
+
+The pages are shared through the OS page cache, so serving a poll only
+touches the mapping, and memory stays flat as workers are added.
+
+File layout::
+
+    b"PBSNAP1\\0"  uint32 little-endian index length  index JSON  blobs...
+
+The index is ``{"generation": int, "entries": {name: [offset, length]},
+"digests": {payload key: digest}, "compression": {encoding: level}}``,
+with offsets counted from the end of the index. The file is replaced
+atomically, so a worker still holding the previous mapping keeps reading
+a complete older file.
+
+The payload builders live here rather than in the routes so the collector
+and the web workers produce byte-identical bodies.
+"""
+
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from proxbalance.cluster_cache import (
+    ALL_SECTIONS, SECTION_GUESTS, SECTION_META, SECTION_NODES, SECTION_TRENDS, shard_dir_for,
+)
+from proxbalance.constants import COMPRESS_BR_LEVEL, COMPRESS_LEVEL
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli ships with flask-compress
+    brotli = None
+
+SNAPSHOT_NAME = "snapshot.bin"
+MAGIC = b"PBSNAP1\0"
+_HEADER = struct.Struct("<8sI")
+
+# Content encodings prepared for every payload, in order of preference
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+# ---------------------------------------------------------------------------
+# Read endpoint payloads
+# ---------------------------------------------------------------------------
+
+def build_analyze_payload(data: Dict) -> Dict:
+    return {"success": True, "data": data}
+
+
+def build_cluster_summary_payload(data: Dict) -> Dict:
+    # Minimal data for instant header/title rendering
+    summary_data = {
+        "collected_at": data.get("collected_at"),
+        "summary": data.get("summary", {}),
+        "cluster_health": data.get("cluster_health", {}),
+        "pve_crs": data.get("pve_crs", {}),
+        "node_count": data.get("summary", {}).get("total_nodes", 0),
+        "guest_count": data.get("summary", {}).get("total_guests", 0)
+    }
+    return {"success": True, "data": summary_data}
+
+
+def build_nodes_only_payload(data: Dict) -> Dict:
+    # Nodes data with minimal guest info (just IDs for count)
+    nodes_data = {}
+    for node_name, node in data.get("nodes", {}).items():
+        nodes_data[node_name] = {
+            **node,
+            "guests": node.get("guests", [])  # Just keep guest IDs list
+        }
+    return {
+        "success": True,
+        "data": {
+            "nodes": nodes_data,
+            "collected_at": data.get("collected_at")
+        }
+    }
+
+
+def build_guests_only_payload(data: Dict) -> Dict:
+    return {
+        "success": True,
+        "data": {
+            "guests": data.get("guests", {}),
+            "collected_at": data.get("collected_at")
+        }
+    }
+
+
+# payload key -> (cache sections it needs, builder)
+READ_PAYLOADS: Dict[str, Tuple[Tuple[str, ...], Callable[[Dict], Dict]]] = {
+    "analyze": (ALL_SECTIONS, build_analyze_payload),
+    "cluster-summary": ((SECTION_META,), build_cluster_summary_payload),
+    "nodes-only": ((SECTION_META, SECTION_NODES, SECTION_TRENDS), build_nodes_only_payload),
+    "guests-only": ((SECTION_META, SECTION_GUESTS), build_guests_only_payload),
+}
+
+
+def serialize_payload(obj: Dict) -> bytes:
+    """Serialize a response dict exactly as jsonify does outside debug mode."""
+    return (json.dumps(obj, ensure_ascii=True, sort_keys=True, separators=(",", ":")) + "\n").encode()
+
+
+def payload_digest(body: bytes) -> str:
+    """Strong ETag value for a serialized body."""
+    return hashlib.sha1(body).hexdigest()[:20]
+
+
+def compression_levels(gzip_level: int = COMPRESS_LEVEL, brotli_level: int = COMPRESS_BR_LEVEL) -> Dict[str, int]:
+    """Level used for each of ENCODINGS, as recorded in the snapshot index."""
+    levels = {"br": brotli_level, "gzip": gzip_level}
+    return {encoding: levels[encoding] for encoding in ENCODINGS}
+
+
+def compress_payload(body: bytes, encoding: str, gzip_level: int = COMPRESS_LEVEL,
+                     brotli_level: int = COMPRESS_BR_LEVEL) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_level)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def snapshot_path_for(cache_file: str) -> str:
+    return os.path.join(shard_dir_for(cache_file), SNAPSHOT_NAME)
+
+
+def write_snapshot(path: str, generation: int, blobs: Dict[str, bytes], digests: Dict[str, str],
+                   compression: Optional[Dict[str, int]] = None) -> None:
+    """Write named blobs and their index atomically."""
+    names = list(blobs)
+    # Offsets count from the end of the index so they do not depend on its length
+    entries, offset = {}, 0
+    for name in names:
+        entries[name] = [offset, len(blobs[name])]
+        offset += len(blobs[name])
+    index = json.dumps({"generation": generation, "entries": entries, "digests": digests,
+                        "compression": compression or {}}, separators=(",", ":")).encode()
+
+    temp_file = path + ".tmp"
+    with open(temp_file, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(index)))
+        f.write(index)
+        for name in names:
+            f.write(blobs[name])
+    os.replace(temp_file, path)
+
+
+def write_cluster_snapshot(data: Dict, cache_file: str, generation: int,
+                           gzip_level: int = COMPRESS_LEVEL, brotli_level: int = COMPRESS_BR_LEVEL) -> Dict[str, int]:
+    """Build and write the shared snapshot for one collection.
+
+    The encoded payloads are compressed at the given levels, which default
+    to the web app's flask-compress levels and are recorded in the index.
+
+    Returns:
+        Byte sizes of the written entries, keyed by name.
+    """
+    blobs, digests = {}, {}
+    for key, (_sections, build) in READ_PAYLOADS.items():
+        body = serialize_payload(build(data))
+        digests[key] = payload_digest(body)
+        blobs[f"payload:{key}"] = body
+        for encoding in ENCODINGS:
+            blobs[f"payload:{key}:{encoding}"] = compress_payload(body, encoding, gzip_level, brotli_level)
+    write_snapshot(snapshot_path_for(cache_file), generation, blobs, digests,
+                   compression_levels(gzip_level, brotli_level))
+    return {name: len(blob) for name, blob in blobs.items()}
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+class Snapshot:
+    """Read-only mapping of one snapshot file.
+
+    ``raw()`` returns memoryviews into the mapping; nothing is copied until
+    a caller converts a view. The mapping is never closed
+    explicitly, so views handed out earlier stay valid after the reader
+    has moved on to a newer file.
+    """
+
+    __slots__ = ("path", "generation", "digests", "compression", "_map", "_entries", "_base")
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_len = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a ProxBalance snapshot")
+        index = json.loads(self._map[_HEADER.size:_HEADER.size + index_len])
+        self._base = _HEADER.size + index_len
+        self.generation = index["generation"]
+        self.digests = index.get("digests", {})
+        self.compression = index.get("compression", {})
+        self._entries = index["entries"]
+
+    def names(self) -> Iterable[str]:
+        return self._entries.keys()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def raw(self, name: str) -> memoryview:
+        """Zero-copy view of an entry's bytes. Raises KeyError if absent."""
+        offset, length = self._entries[name]
+        start = self._base + offset
+        return memoryview(self._map)[start:start + length]
+
+
+class SnapshotReader:
+    """Per-process handle that remaps the snapshot after each collection."""
+
+    def __init__(self, cache_file: str):
+        self.path = snapshot_path_for(cache_file)
+        self._signature = None
+        self._snapshot: Optional[Snapshot] = None
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[Snapshot]:
+        """The newest snapshot on disk, or None when there is none."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        signature = (st.st_mtime_ns, st.st_ino, st.st_size)
+        with self._lock:
+            if signature != self._signature:
+                try:
+                    self._snapshot = Snapshot(self.path)
+                except (OSError, ValueError, struct.error) as e:
+                    print(f"Warning: Could not map cluster snapshot: {e}", file=sys.stderr)
+                    self._snapshot = None
+                self._signature = signature
+            return self._snapshot
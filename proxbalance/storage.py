@@ -1,52 +1,176 @@
 """
 ProxBalance Storage Compatibility
 
-Provides storage cache building, compatibility checks for migration targets,
-and storage verification utilities used by both the recommendation engine
-and evacuation planning.
+Provides the storage topology index, compatibility checks for migration
+targets, and storage verification utilities used by both the recommendation
+engine and evacuation planning.
+
+The collector records every node's storage list (with shared/enabled/active
+flags) as ``storage_topology`` in the cluster cache. Recommendation and
+evacuation runs build their node -> storage-set maps from it with
+storage_index_from_topology() instead of querying each node's storage.
+
+Each guest record also carries the storage IDs its disks live on
+(``storage_ids``, parsed with DISK_PREFIXES when the collector reads the
+config). StorageCompatibilityMatrix combines the two once per collection
+generation, so "can guest X land on node Y" is a dictionary lookup.
 """
 
 import sys
+import threading
 import traceback
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
 
-from proxbalance.config_manager import DISK_PREFIXES
+from proxbalance.guest_config_cache import get_guest_config_summary
 
 
 # ---------------------------------------------------------------------------
-# Storage cache for recommendation engine
+# Storage topology index (recorded at collection time)
 # ---------------------------------------------------------------------------
 
-def build_storage_cache(nodes: Dict[str, Any], proxmox: Optional[Any]) -> Dict[str, Set[str]]:
+def storage_topology_entry(storage_list: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Storage ID -> flags for one node, from its ``nodes/{node}/storage`` list."""
+    entry: Dict[str, Dict[str, Any]] = {}
+    for storage in storage_list:
+        storage_id = storage.get('storage')
+        if not storage_id:
+            continue
+        entry[storage_id] = {
+            'type': storage.get('type', 'unknown'),
+            'shared': bool(storage.get('shared', 0)),
+            'enabled': bool(storage.get('enabled', 1)),
+            'active': bool(storage.get('active', 0)),
+        }
+    return entry
+
+
+def storage_index_from_topology(storage_topology: Optional[Dict[str, Dict[str, Dict[str, Any]]]],
+                                nodes: Optional[Dict[str, Any]] = None) -> Dict[str, Set[str]]:
     """
-    Build a cache of available storage for all nodes.
+    Map node names to the storage IDs a guest can use there (enabled and active).
 
     Args:
-        nodes: Dictionary of nodes
-        proxmox: ProxmoxAPI client
+        storage_topology: ``storage_topology`` from the cluster cache
+        nodes: Node records; nodes missing from the topology (caches written
+            before it was recorded) use their ``storage`` list, which holds
+            enabled storage only
 
     Returns:
         Dictionary mapping node names to sets of available storage IDs
     """
-    storage_cache: Dict[str, Set[str]] = {}
+    index: Dict[str, Set[str]] = {}
+    for node_name, entry in (storage_topology or {}).items():
+        index[node_name] = {
+            storage_id for storage_id, flags in entry.items()
+            if flags.get('enabled', True) and flags.get('active', False)
+        }
+    for node_name, node in (nodes or {}).items():
+        if node_name not in index and node.get('storage'):
+            index[node_name] = {
+                storage.get('storage') for storage in node['storage']
+                if storage.get('active', False)
+            }
+    return index
 
-    if not proxmox:
-        return storage_cache
 
-    for node_name in nodes:
-        try:
-            storage_list = proxmox.nodes(node_name).storage.get()
-            available_storage: Set[str] = set()
-            for storage in storage_list:
-                if storage.get('enabled', 1) and storage.get('active', 0):
-                    available_storage.add(storage.get('storage'))
-            storage_cache[node_name] = available_storage
-            print(f"Cached {len(available_storage)} storage volumes for node {node_name}", file=sys.stderr)
-        except Exception as e:
-            print(f"Warning: Could not get storage for node {node_name}: {e}", file=sys.stderr)
-            storage_cache[node_name] = set()
+# ---------------------------------------------------------------------------
+# Guest x node storage compatibility
+# ---------------------------------------------------------------------------
+
+class StorageCompatibilityMatrix:
+    """Storage compatibility of every guest with recorded ``storage_ids`` on every indexed node.
+
+    Guests with the same requirement set share one row, so building the
+    matrix costs one set difference per distinct set and node.
+    """
+
+    def __init__(self, guests: Dict[str, Any], storage_index: Dict[str, Set[str]]):
+        self.nodes = sorted(storage_index)
+        # guest key (str vmid) -> required storage IDs
+        self._requirements: Dict[str, FrozenSet[str]] = {}
+        # required storage IDs -> node -> storage IDs missing there
+        self._missing: Dict[FrozenSet[str], Dict[str, FrozenSet[str]]] = {}
+        for key, guest in guests.items():
+            storage_ids = guest.get('storage_ids')
+            if storage_ids is None:
+                continue  # recorded before storage_ids existed; unknown
+            required = frozenset(storage_ids)
+            self._requirements[str(key)] = required
+            if required not in self._missing:
+                self._missing[required] = {
+                    node: frozenset(required - available)
+                    for node, available in storage_index.items()
+                }
+
+    def requirements(self, vmid: Any) -> Optional[List[str]]:
+        """Sorted storage IDs the guest needs, or None when not recorded."""
+        required = self._requirements.get(str(vmid))
+        return sorted(required) if required is not None else None
+
+    def missing(self, vmid: Any, node: str) -> Optional[List[str]]:
+        """Sorted storage IDs the guest needs that ``node`` lacks, or None when unknown."""
+        required = self._requirements.get(str(vmid))
+        if required is None:
+            return None
+        missing = self._missing[required].get(node)
+        return sorted(missing) if missing is not None else None
+
+    def is_compatible(self, vmid: Any, node: str) -> Optional[bool]:
+        """True/False when both the guest's needs and the node's storage are known, else None."""
+        required = self._requirements.get(str(vmid))
+        if required is None:
+            return None
+        missing = self._missing[required].get(node)
+        return None if missing is None else not missing
+
+    def compatible_nodes(self, vmid: Any) -> Optional[List[str]]:
+        """Indexed nodes that have every storage the guest needs, or None when unknown."""
+        required = self._requirements.get(str(vmid))
+        if required is None:
+            return None
+        return [node for node in self.nodes if not self._missing[required][node]]
+
+    def stats(self) -> Dict[str, int]:
+        """Guests, distinct requirement sets and nodes covered."""
+        return {
+            "guests": len(self._requirements),
+            "requirement_sets": len(self._missing),
+            "nodes": len(self.nodes),
+        }
 
-    return storage_cache
+
+# Matrix for the newest cluster cache generation
+_matrix_lock = threading.Lock()
+_matrix_cache: Dict[str, Any] = {"generation": None, "matrix": None}
+
+
+def get_storage_compatibility(cluster_data: Dict[str, Any],
+                              generation: Optional[int] = None) -> StorageCompatibilityMatrix:
+    """
+    StorageCompatibilityMatrix for cluster cache data.
+
+    Args:
+        cluster_data: Cluster cache data with nodes, guests and storage_topology
+        generation: Cache generation the data was read from; the matrix is
+            reused for every call with the same generation. None builds a
+            fresh matrix.
+
+    Returns:
+        StorageCompatibilityMatrix
+    """
+    if generation is not None:
+        with _matrix_lock:
+            if _matrix_cache["generation"] == generation:
+                return _matrix_cache["matrix"]
+    nodes = cluster_data.get('nodes', {})
+    matrix = StorageCompatibilityMatrix(
+        cluster_data.get('guests', {}),
+        storage_index_from_topology(cluster_data.get('storage_topology'), nodes),
+    )
+    if generation is not None:
+        with _matrix_lock:
+            _matrix_cache["generation"], _matrix_cache["matrix"] = generation, matrix
+    return matrix
 
 
 def check_storage_compatibility(guest: Dict[str, Any], src_node_name: str, tgt_node_name: str, proxmox: Optional[Any], storage_cache: Optional[Dict[str, Set[str]]] = None) -> bool:
@@ -67,29 +191,18 @@ def check_storage_compatibility(guest: Dict[str, Any], src_node_name: str, tgt_n
         vmid = guest.get('vmid')
         guest_type = guest.get('type', 'VM')
 
-        # Get guest configuration to extract storage volumes
-        guest_config = None
+        # Get the guest's required storage from the config cache (live API on a miss)
+        config_entry = None
         try:
-            if guest_type == 'VM':
-                guest_config = proxmox.nodes(src_node_name).qemu(vmid).config.get()
-            else:  # CT
-                guest_config = proxmox.nodes(src_node_name).lxc(vmid).config.get()
+            config_entry = get_guest_config_summary(proxmox, src_node_name, vmid, guest_type)
         except Exception as e:
             print(f"Warning: Could not get config for guest {vmid}: {e}", file=sys.stderr)
             return True  # Allow migration if we can't determine storage (avoid blocking valid migrations)
 
-        if not guest_config:
+        if not config_entry:
             return True
 
-        # Extract storage volumes from config
-        storage_volumes: Set[str] = set()
-        for key, value in guest_config.items():
-            # Disk keys like scsi0, ide0, virtio0, mp0, rootfs
-            if key.startswith(DISK_PREFIXES):
-                # Value format is typically "storage:vm-disk-id" or "storage:subvol-id"
-                if isinstance(value, str) and ':' in value:
-                    storage_id = value.split(':')[0]
-                    storage_volumes.add(storage_id)
+        storage_volumes: Set[str] = set(config_entry["parsed"].get("storage_ids", []))
 
         if not storage_volumes:
             return True  # No storage requirements, allow migration
@@ -206,38 +319,24 @@ def verify_storage_availability(proxmox: Any, source_node: str, target_nodes: Li
         guest_storage_info: List[Dict[str, Any]] = []
         for vmid in guest_vmids:
             try:
-                # Try to get guest config (qemu or lxc)
-                guest_config = None
-                guest_type = None
+                # Get guest config (qemu or lxc) from the config cache or the API
                 try:
-                    guest_config = proxmox.nodes(source_node).qemu(vmid).config.get()
-                    guest_type = "qemu"
+                    config_entry = get_guest_config_summary(proxmox, source_node, vmid)
                 except Exception:
-                    try:
-                        guest_config = proxmox.nodes(source_node).lxc(vmid).config.get()
-                        guest_type = "lxc"
-                    except Exception:
-                        guest_storage_info.append({
-                            "vmid": vmid,
-                            "type": "unknown",
-                            "storage_volumes": [],
-                            "compatible_targets": [],
-                            "incompatible_targets": target_nodes,
-                            "error": "Cannot determine guest type"
-                        })
-                        continue
-
-                # Extract storage from config
-                storage_volumes: Set[str] = set()
-
-                # Check all config keys for storage references
-                for key, value in guest_config.items():
-                    # Disk keys like scsi0, ide0, virtio0, mp0, rootfs
-                    if key.startswith(DISK_PREFIXES):
-                        # Value format is typically "storage:vm-disk-id" or "storage:subvol-id"
-                        if isinstance(value, str) and ':' in value:
-                            storage_id = value.split(':')[0]
-                            storage_volumes.add(storage_id)
+                    config_entry = None
+                if not config_entry:
+                    guest_storage_info.append({
+                        "vmid": vmid,
+                        "type": "unknown",
+                        "storage_volumes": [],
+                        "compatible_targets": [],
+                        "incompatible_targets": target_nodes,
+                        "error": "Cannot determine guest type"
+                    })
+                    continue
+                guest_type = config_entry["guest_type"]
+
+                storage_volumes: Set[str] = set(config_entry["parsed"].get("storage_ids", []))
 
                 # Find which targets have all required storage
                 compatible_targets: List[str] = []
@@ -0,0 +1,108 @@
+"""
+ProxBalance Tag Placement Index
+
+Anti-affinity (``exclude_*``) and affinity (``affinity_*``) checks all
+ask the same question: which guests carrying tag T are on node N? The
+scans that answered it walked every guest on a target (or every guest in
+the cluster) for each candidate move. TagIndex keeps tag -> node ->
+members, built once per run. Recommendation generation adds each guest
+to it as the guest is committed to a target. A conflict check is then
+one lookup per tag.
+
+Two builders cover the two notions of placement in use:
+
+- index_node_guests() follows each node's ``guests`` list, as the
+  recommendation target loop always has.
+- index_guests() follows each guest's ``node`` field, as the automigrate
+  clustering check and /api/affinity-groups do.
+"""
+
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+
+class TagIndex:
+    """Guests per tag per node, with member keys so a guest can exclude itself."""
+
+    def __init__(self):
+        # tag -> node -> member key -> times added
+        self._members: Dict[str, Dict[Any, Dict[Hashable, int]]] = {}
+        # tag -> node -> total times added
+        self._counts: Dict[str, Dict[Any, int]] = {}
+        # tag -> member keys, first-added order
+        self._order: Dict[str, Dict[Hashable, None]] = {}
+
+    def add(self, key: Hashable, node: Any, tags: Iterable[str]) -> None:
+        """Record guest ``key`` on ``node`` under each of ``tags`` (duplicates count once)."""
+        for tag in dict.fromkeys(tags):
+            members = self._members.setdefault(tag, {}).setdefault(node, {})
+            members[key] = members.get(key, 0) + 1
+            counts = self._counts.setdefault(tag, {})
+            counts[node] = counts.get(node, 0) + 1
+            self._order.setdefault(tag, {})[key] = None
+
+    def count(self, tag: str, node: Any, exclude: Optional[Hashable] = None) -> int:
+        """Guests with ``tag`` on ``node``, not counting ``exclude``."""
+        total = self._counts.get(tag, {}).get(node, 0)
+        if total and exclude is not None:
+            total -= self._members[tag][node].get(exclude, 0)
+        return total
+
+    def has_any(self, tags: Iterable[str], node: Any, exclude: Optional[Hashable] = None) -> bool:
+        """True if any guest other than ``exclude`` on ``node`` carries one of ``tags``."""
+        return any(self.count(tag, node, exclude) > 0 for tag in tags)
+
+    def node_counts(self, tag: str, exclude: Optional[Hashable] = None) -> Dict[Any, int]:
+        """Guests with ``tag`` per node, not counting ``exclude``; nodes left with none are omitted."""
+        counts = {}
+        for node in self._counts.get(tag, {}):
+            n = self.count(tag, node, exclude)
+            if n:
+                counts[node] = n
+        return counts
+
+    def tags(self) -> List[str]:
+        """Indexed tags in the order they were first seen."""
+        return list(self._order)
+
+    def members(self, tag: str) -> List[Hashable]:
+        """Keys of the guests carrying ``tag``, in the order they were first added."""
+        return list(self._order.get(tag, ()))
+
+
+def guest_tag_list(guest: Dict[str, Any], field: str) -> List[str]:
+    """A parsed tag list (``all_tags``, ``exclude_groups``, ``affinity_groups``) of a guest."""
+    tags = guest.get("tags", {})
+    return tags.get(field, []) if isinstance(tags, dict) else []
+
+
+def index_node_guests(nodes: Dict[str, Any], guests: Dict[Any, Any], field: str = "all_tags") -> TagIndex:
+    """Index guests by the node whose ``guests`` list names them.
+
+    Guest ids in the node lists are matched to ``guests`` keys as string or
+    as-is, and ids with no guest record are skipped.
+    """
+    index = TagIndex()
+    for node_name, node in nodes.items():
+        for vmid in node.get("guests", []):
+            key = str(vmid) if str(vmid) in guests else vmid
+            if key not in guests:
+                continue
+            index.add(key, node_name, guest_tag_list(guests[key], field))
+    return index
+
+
+def index_guests(guests: Dict[Any, Any], tags_of: Callable[[Dict[str, Any]], Iterable[str]],
+                 key_of: Optional[Callable[[Any, Dict[str, Any]], Hashable]] = None) -> TagIndex:
+    """Index guests by their own ``node`` field.
+
+    Args:
+        guests: Guest records keyed by vmid.
+        tags_of: Returns the tags to index for a guest.
+        key_of: Member key for ``(vmid_key, guest)``; defaults to the dict key.
+    """
+    index = TagIndex()
+    for vmid_key, guest in guests.items():
+        tags = tags_of(guest)
+        if tags:
+            index.add(key_of(vmid_key, guest) if key_of else vmid_key, guest.get("node"), tags)
+    return index
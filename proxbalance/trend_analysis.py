@@ -5,10 +5,17 @@ Provides statistical trend analysis for node and guest performance metrics
 using data from the persistent metrics store. Replaces the simple
 "rising/falling/stable" labels with quantified trends, stability scores,
 baseline comparisons, and threshold-crossing projections.
+
+cached_node_trends() and cached_guest_trends() memoize the analysis per
+metrics generation (see metrics_store.get_metrics_generation), so a
+recommendation run and the /api/trends/* routes share one computation per
+entity until the collector writes new samples.
 """
 
 import math
 import statistics
+import threading
+import time
 from typing import Any, Dict, List, Optional, Tuple
 
 from proxbalance.metrics_store import (
@@ -17,6 +24,7 @@ from proxbalance.metrics_store import (
     get_data_quality,
     get_metric_value,
     get_all_node_names,
+    get_metrics_generation,
 )
 
 
@@ -444,6 +452,91 @@ def _detect_peak_hours(samples: List[Dict], field: str) -> List[int]:
     return sorted(peaks)
 
 
+# ---------------------------------------------------------------------------
+# Public API: Memoized analysis
+# ---------------------------------------------------------------------------
+
+# Entries kept before the cache is cleared (one per entity/lookback/thresholds)
+TREND_CACHE_MAX_ENTRIES = 4096
+
+_trend_cache: Dict[Tuple, Dict[str, Any]] = {}
+_trend_cache_generation: Optional[int] = None
+_trend_cache_lock = threading.Lock()
+_trend_cache_counts = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _cached_trends(key: Tuple, compute) -> Dict[str, Any]:
+    global _trend_cache_generation
+    generation = get_metrics_generation()
+    with _trend_cache_lock:
+        if generation != _trend_cache_generation:
+            if _trend_cache:
+                _trend_cache_counts["invalidations"] += 1
+            _trend_cache.clear()
+            _trend_cache_generation = generation
+        cached = _trend_cache.get(key)
+        if cached is not None:
+            _trend_cache_counts["hits"] += 1
+            return cached
+        _trend_cache_counts["misses"] += 1
+
+    # Computed outside the lock; a concurrent miss just computes it twice
+    result = compute()
+    with _trend_cache_lock:
+        if generation == _trend_cache_generation:
+            if len(_trend_cache) >= TREND_CACHE_MAX_ENTRIES:
+                _trend_cache.clear()
+            _trend_cache[key] = result
+    return result
+
+
+def cached_node_trends(
+    node_name: str,
+    lookback_hours: int = 168,
+    cpu_threshold: float = 60.0,
+    mem_threshold: float = 70.0,
+    iowait_threshold: float = 30.0,
+) -> Dict[str, Any]:
+    """analyze_node_trends(), computed once per metrics generation.
+
+    The seasonal baseline depends on the current hour, so entries are
+    also keyed by hour. The returned dict is shared between callers and
+    must not be modified.
+    """
+    hour = int(time.time() // 3600)
+    key = ("node", node_name, lookback_hours, cpu_threshold, mem_threshold, iowait_threshold, hour)
+    return _cached_trends(key, lambda: analyze_node_trends(
+        node_name, lookback_hours, cpu_threshold, mem_threshold, iowait_threshold))
+
+
+def cached_guest_trends(vmid: str, lookback_hours: int = 168) -> Dict[str, Any]:
+    """analyze_guest_trends(), computed once per metrics generation.
+
+    The returned dict is shared between callers and must not be modified.
+    """
+    key = ("guest", str(vmid), lookback_hours)
+    return _cached_trends(key, lambda: analyze_guest_trends(str(vmid), lookback_hours))
+
+
+def invalidate_trend_cache() -> None:
+    """Drop all memoized trend analyses."""
+    with _trend_cache_lock:
+        if _trend_cache:
+            _trend_cache_counts["invalidations"] += 1
+        _trend_cache.clear()
+
+
+def get_trend_cache_stats() -> Dict[str, Any]:
+    """Hit, miss (analysis computed) and invalidation counts of the trend cache."""
+    with _trend_cache_lock:
+        stats = dict(_trend_cache_counts)
+        stats["entries"] = len(_trend_cache)
+        stats["metrics_generation"] = _trend_cache_generation
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else None
+    return stats
+
+
 # ---------------------------------------------------------------------------
 # Public API: Node comparison
 # ---------------------------------------------------------------------------
@@ -453,8 +546,8 @@ def compare_node_stability(node_a: str, node_b: str, lookback_hours: int = 168)
 
     Returns dict indicating which node is more stable and by how much.
     """
-    trend_a = analyze_node_trends(node_a, lookback_hours)
-    trend_b = analyze_node_trends(node_b, lookback_hours)
+    trend_a = cached_node_trends(node_a, lookback_hours)
+    trend_b = cached_node_trends(node_b, lookback_hours)
 
     stab_a = trend_a["overall_stability"]
     stab_b = trend_b["overall_stability"]
@@ -502,7 +595,7 @@ def get_cluster_trend_summary(
 
     node_trends = {}
     for name in node_names:
-        node_trends[name] = analyze_node_trends(
+        node_trends[name] = cached_node_trends(
             name, lookback_hours, cpu_threshold, mem_threshold
         )
 
@@ -182,6 +182,17 @@ export async function fetchNodeTrendDetail(nodeName, lookbackDays = 7) {
   }
 }
 
+export async function fetchNodeRrdSeries(nodeName, timeframe) {
+  try {
+    const response = await fetch(`${API_BASE}/nodes/${nodeName}/rrd/${timeframe}`);
+    const result = await response.json();
+    return result;
+  } catch (err) {
+    console.error('Failed to load node RRD series:', err);
+    return { error: true, message: err.message };
+  }
+}
+
 export async function fetchGuestTrendDetail(vmid, lookbackDays = 7) {
   try {
     const params = new URLSearchParams({ lookback_days: lookbackDays });
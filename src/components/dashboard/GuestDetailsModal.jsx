@@ -456,6 +456,14 @@ export default function GuestDetailsModal({
                   </div>
                 ) : guestMigrationOptions?.options ? (
                   <>
+                    {guestMigrationOptions.storage_requirements?.length > 0 && (
+                      <div className="text-[10px] text-pb-text2 dark:text-gray-400">
+                        Requires storage: <span className="font-mono">{guestMigrationOptions.storage_requirements.join(', ')}</span>
+                        {guestMigrationOptions.compatible_nodes && (
+                          <> &middot; available on {guestMigrationOptions.compatible_nodes.length} node{guestMigrationOptions.compatible_nodes.length === 1 ? '' : 's'}</>
+                        )}
+                      </div>
+                    )}
                     {guestMigrationOptions.options.map((opt) => {
                       const maxScore = Math.max(...guestMigrationOptions.options.filter(o => !o.disqualified).map(o => o.score), 1);
                       const barWidth = opt.disqualified ? 100 : Math.min(100, (opt.score / maxScore) * 100);
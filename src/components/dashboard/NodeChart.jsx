@@ -35,12 +35,30 @@ export default function NodeChart({ nodeName, trendData, chartPeriod, nodeScore,
     return () => observer.disconnect();
   }, []);
 
+  // Timeframes the collector skipped (lazy or not yet cached) are loaded on demand.
+  const [lazySeries, setLazySeries] = useState({});
+
+  useEffect(() => {
+    const sourceTimeframe = SOURCE_TIMEFRAME[chartPeriod] || 'day';
+    if (!nodeName || !trendData || (trendData[sourceTimeframe] || []).length > 0 || lazySeries[sourceTimeframe]) return;
+    let cancelled = false;
+    (async () => {
+      const { fetchNodeRrdSeries } = await import('../../api/client.js');
+      const result = await fetchNodeRrdSeries(nodeName, sourceTimeframe);
+      if (!cancelled && result?.success && result.points?.length) {
+        setLazySeries(prev => ({ ...prev, [sourceTimeframe]: result.points }));
+      }
+    })();
+    return () => { cancelled = true; };
+  }, [nodeName, trendData, chartPeriod]);
+
   useEffect(() => {
     if (!canvasRef.current || !trendData || typeof trendData !== 'object' || typeof Chart === 'undefined') return;
 
     const sourceTimeframe = SOURCE_TIMEFRAME[chartPeriod] || 'day';
     const periodSeconds = PERIOD_SECONDS[chartPeriod] || 24 * 3600;
     let raw = trendData?.[sourceTimeframe] || [];
+    if (raw.length === 0) raw = lazySeries[sourceTimeframe] || [];
     if (raw.length === 0) raw = trendData?.day || [];
     if (raw.length === 0) return;
 
@@ -156,7 +174,7 @@ export default function NodeChart({ nodeName, trendData, chartPeriod, nodeScore,
     }
 
     return () => { if (chartRef.current) { try { chartRef.current.destroy(); } catch (e) {} chartRef.current = null; } };
-  }, [trendData, chartPeriod, nodeScore?.suitability_rating, isDark, migrationHistory, thresholds?.cpu, thresholds?.mem, thresholds?.iowait, showMarkers, showThresholds, showEnvelope]);
+  }, [trendData, lazySeries, chartPeriod, nodeScore?.suitability_rating, isDark, migrationHistory, thresholds?.cpu, thresholds?.mem, thresholds?.iowait, showMarkers, showThresholds, showEnvelope]);
 
   // Synced crosshair: draw/update a vertical line at the time hovered on any sibling
   // chart, without rebuilding the whole chart.
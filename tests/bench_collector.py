@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Collector scale benchmark against the offline Proxmox stand-in.
+
+Runs ProxmoxAPICollector.analyze_cluster (or the full collect_data pipeline,
+which also writes the cluster cache, metrics store and profiles) against
+synthetic clusters served by tests/fake_pve.py and reports wall time, CPU
+time, Proxmox API calls, errors and peak RSS per run. Each scenario runs in
+its own process with a fresh database so peak RSS is not inherited from a
+previous scenario; runs after the first show the steady state (config
+cache, guest carry-forward, RRD cache).
+
+Usage:
+    python3 tests/bench_collector.py                        # default scenarios
+    python3 tests/bench_collector.py --scenario 64x10000 --runs 3
+    python3 tests/bench_collector.py --scenario 8x500 --latency-ms 10 --jitter-ms 5 \\
+        --error-rate 0.01 --node-capacity 4 --mode collect
+    python3 tests/bench_collector.py --json > before.json    # compare runs later
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+DEFAULT_SCENARIOS = ["3x40", "8x500", "32x3000", "64x10000"]
+
+
+def parse_scenario(text):
+    nodes, guests = text.lower().split("x", 1)
+    return int(nodes), int(guests)
+
+
+def run_scenario(args):
+    """Run one scenario in this process and return its results."""
+    workdir = tempfile.mkdtemp(prefix="pb-bench-")
+    os.environ["PROXBALANCE_DB_PATH"] = os.path.join(workdir, "proxbalance.db")
+
+    import contextlib
+    import io
+
+    from proxbalance.cluster_cache import SECTION_META, read_cluster_cache
+    from proxbalance.db import init_db
+    import collector_api
+    from fake_pve import FakeProxmoxAPI, SyntheticCluster
+
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        init_db()
+    nodes, guests = parse_scenario(args.scenario)
+    cluster = SyntheticCluster(nodes=nodes, guests=guests, seed=args.seed)
+    api = FakeProxmoxAPI(
+        cluster, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate, node_capacity=args.node_capacity, seed=args.seed,
+    )
+    config = {
+        "proxmox_host": "fake-pve",
+        "collection_optimization": {
+            "parallel_collection_enabled": args.workers > 1,
+            "max_parallel_workers": args.workers,
+            "max_parallel_workers_per_node": args.workers_per_node,
+            "adaptive_workers_enabled": not args.no_adaptive,
+            "guest_io_mode": args.io_mode,
+        },
+    }
+    if args.mode == "collect":
+        collector_api.CACHE_FILE = os.path.join(workdir, "cluster_cache.json")
+        collector_api.CONFIG_FILE = os.path.join(workdir, "config.json")
+        with open(collector_api.CONFIG_FILE, "w") as f:
+            json.dump(config, f)
+
+    runs = []
+    for _ in range(args.runs):
+        api.reset_counts()
+        log = io.StringIO()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log if args.quiet else sys.stderr):
+            if args.mode == "collect":
+                ok = collector_api.collect_data(
+                    collector_factory=lambda cfg: collector_api.ProxmoxAPICollector(cfg, proxmox=api))
+                perf = {}
+                if ok:
+                    meta = read_cluster_cache(collector_api.CACHE_FILE, (SECTION_META,))
+                    perf = meta.get("performance", {})
+            else:
+                collector = collector_api.ProxmoxAPICollector(config, proxmox=api)
+                perf = collector.analyze_cluster().get("performance", {})
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        counts = api.call_counts()
+        runs.append({
+            "wall_s": round(wall, 3),
+            "cpu_s": round(cpu, 3),
+            "api_calls": sum(c["calls"] for c in counts.values()),
+            "api_errors": sum(c["errors"] for c in counts.values()),
+            "api_peak_in_flight": api.peak_in_flight,
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "worker_limit": perf.get("worker_limit"),
+            "guests_reused": perf.get("guests_reused"),
+            "calls_by_endpoint": counts,
+        })
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    return {"scenario": args.scenario, "nodes": nodes, "guests": guests, "mode": args.mode, "runs": runs}
+
+
+def print_table(results):
+    header = f"{'scenario':>10} {'run':>3} {'wall s':>8} {'cpu s':>8} {'calls':>7} {'errors':>6} {'in-flight':>9} {'workers':>7} {'reused':>6} {'RSS MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        for i, run in enumerate(result["runs"], 1):
+            print(f"{result['scenario']:>10} {i:>3} {run['wall_s']:>8.2f} {run['cpu_s']:>8.2f} "
+                  f"{run['api_calls']:>7} {run['api_errors']:>6} {run['api_peak_in_flight']:>9} "
+                  f"{str(run['worker_limit']):>7} {str(run['guests_reused']):>6} {run['peak_rss_mb']:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append",
+                        help="NODESxGUESTS, repeatable (default: %s)" % ", ".join(DEFAULT_SCENARIOS))
+    parser.add_argument("--runs", type=int, default=2, help="collection runs per scenario (default 2)")
+    parser.add_argument("--mode", choices=("analyze", "collect"), default="analyze",
+                        help="analyze_cluster only, or the full collect_data pipeline")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="mean per-call API latency")
+    parser.add_argument("--jitter-ms", type=float, default=1.0, help="+/- latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of an injected 5xx")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="probability of an injected timeout")
+    parser.add_argument("--node-capacity", type=int, default=None,
+                        help="concurrent calls per node before it answers 503")
+    parser.add_argument("--workers", type=int, default=5, help="max_parallel_workers")
+    parser.add_argument("--workers-per-node", type=int, default=2, help="max_parallel_workers_per_node")
+    parser.add_argument("--no-adaptive", action="store_true", help="disable adaptive worker sizing")
+    parser.add_argument("--io-mode", choices=("rrd", "counters"), default="rrd", help="guest_io_mode")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--verbose", dest="quiet", action="store_false", help="show collector warnings")
+    parser.add_argument("--in-process", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.in_process:
+        args.scenario = args.scenario[0]
+        print(json.dumps(run_scenario(args)))
+        return 0
+
+    # Forward every option except --scenario to the per-scenario processes
+    forwarded, skip = [], False
+    for arg in sys.argv[1:]:
+        if skip:
+            skip = False
+        elif arg == "--scenario":
+            skip = True
+        elif not arg.startswith("--scenario="):
+            forwarded.append(arg)
+
+    results = []
+    for scenario in args.scenario or DEFAULT_SCENARIOS:
+        parse_scenario(scenario)
+        if not args.json:
+            print(f"Running {scenario} ({args.runs} run(s), {args.mode})...", file=sys.stderr)
+        cmd = [sys.executable, os.path.abspath(__file__), "--in-process", "--scenario", scenario] + forwarded
+        out = subprocess.run(cmd, stdout=subprocess.PIPE, check=True, text=True).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark and parity check for the columnar RRD reduction.
+
+Runs the per-point reduction the collector used before proxbalance.rrd_columns
+(kept verbatim below as the reference) and the columnar version on the same
+synthetic node RRD data, asserts the results are numerically identical with
+and without NumPy, and prints per-node CPU time. NumPy is not in
+requirements.txt, so the default install runs the "no-numpy" path.
+
+Usage:
+    python3 tests/bench_rrd_reduction.py [--nodes N] [--repeat R]
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import proxbalance.rrd_columns as rrd_columns
+from proxbalance.rrd_columns import RrdColumns, detect_trend, last, seq_mean, vmax
+
+# Points per timeframe returned by Proxmox (70 for hour..year at default resolution)
+POINTS = {"hour": 70, "day": 70, "week": 70, "month": 70, "year": 70}
+
+
+# ---------------------------------------------------------------------------
+# Reference implementation (per-point, pre-columnar)
+# ---------------------------------------------------------------------------
+
+def _extract_rrd_values(rrd_data, key, scale=100, filter_fn=None):
+    if filter_fn:
+        return [filter_fn(d) for d in rrd_data if filter_fn(d) is not None]
+    return [d[key] * scale for d in rrd_data if key in d and d[key] is not None]
+
+
+def _detect_trend(values, threshold=10):
+    if not values:
+        return "stable"
+    recent_size = max(1, len(values) // 5)
+    recent_avg = sum(values[-recent_size:]) / recent_size
+    older_avg = sum(values[:recent_size]) / recent_size
+    diff = recent_avg - older_avg
+    if diff > threshold:
+        return "rising"
+    elif diff < -threshold:
+        return "falling"
+    return "stable"
+
+
+def _build_trend_series(rrd_points):
+    series = []
+    for point in rrd_points or []:
+        if "time" in point and "cpu" in point and "memused" in point and "memtotal" in point:
+            series.append({
+                "time": point["time"],
+                "cpu": round(point["cpu"] * 100, 2) if point["cpu"] is not None else 0,
+                "mem": round((point["memused"] / point["memtotal"] * 100), 2) if point["memused"] and point["memtotal"] else 0,
+                "iowait": round(point["iowait"] * 100, 2) if "iowait" in point and point["iowait"] is not None else 0
+            })
+    return series
+
+
+def reduce_reference(timeframes):
+    metrics = {}
+    mem_filter = lambda d: (d["memused"] / d["memtotal"] * 100) if "memused" in d and "memtotal" in d and d["memtotal"] > 0 else None
+    rrd_day = timeframes["day"]
+    if rrd_day:
+        cpu = _extract_rrd_values(rrd_day, "cpu")
+        mem = _extract_rrd_values(rrd_day, None, filter_fn=mem_filter)
+        iowait = _extract_rrd_values(rrd_day, "iowait")
+        load = _extract_rrd_values(rrd_day, "loadavg", scale=1)
+        if cpu:
+            metrics["avg_cpu"] = sum(cpu) / len(cpu)
+            metrics["max_cpu"] = max(cpu)
+        if mem:
+            metrics["avg_mem"] = sum(mem) / len(mem)
+            metrics["max_mem"] = max(mem)
+        if iowait:
+            metrics["avg_iowait"] = sum(iowait) / len(iowait)
+            metrics["max_iowait"] = max(iowait)
+            metrics["current_iowait"] = iowait[-1]
+        if load:
+            metrics["avg_load"] = sum(load) / len(load)
+    rrd_week = timeframes["week"]
+    if rrd_week:
+        cpu = _extract_rrd_values(rrd_week, "cpu")
+        mem = _extract_rrd_values(rrd_week, None, filter_fn=mem_filter)
+        iowait = _extract_rrd_values(rrd_week, "iowait")
+        if cpu:
+            metrics["avg_cpu_week"] = sum(cpu) / len(cpu)
+            metrics["max_cpu_week"] = max(cpu)
+            metrics["cpu_trend"] = _detect_trend(cpu)
+        if mem:
+            metrics["avg_mem_week"] = sum(mem) / len(mem)
+            metrics["max_mem_week"] = max(mem)
+            metrics["mem_trend"] = _detect_trend(mem)
+        if iowait:
+            metrics["avg_iowait_week"] = sum(iowait) / len(iowait)
+    trend_data = {name: _build_trend_series(points) for name, points in timeframes.items()}
+    return metrics, trend_data
+
+
+# ---------------------------------------------------------------------------
+# Columnar implementation (mirrors ProxmoxAPICollector._process_single_node)
+# ---------------------------------------------------------------------------
+
+def reduce_columnar(timeframes):
+    metrics = {}
+    columns = {name: RrdColumns(points) for name, points in timeframes.items()}
+    if timeframes["day"]:
+        cols = columns["day"]
+        cpu = cols.values("cpu")
+        mem = cols.mem_percent_values()
+        iowait = cols.values("iowait")
+        load = cols.values("loadavg", scale=1)
+        if len(cpu):
+            metrics["avg_cpu"] = seq_mean(cpu)
+            metrics["max_cpu"] = vmax(cpu)
+        if len(mem):
+            metrics["avg_mem"] = seq_mean(mem)
+            metrics["max_mem"] = vmax(mem)
+        if len(iowait):
+            metrics["avg_iowait"] = seq_mean(iowait)
+            metrics["max_iowait"] = vmax(iowait)
+            metrics["current_iowait"] = last(iowait)
+        if len(load):
+            metrics["avg_load"] = seq_mean(load)
+    if timeframes["week"]:
+        cols = columns["week"]
+        cpu = cols.values("cpu")
+        mem = cols.mem_percent_values()
+        iowait = cols.values("iowait")
+        if len(cpu):
+            metrics["avg_cpu_week"] = seq_mean(cpu)
+            metrics["max_cpu_week"] = vmax(cpu)
+            metrics["cpu_trend"] = detect_trend(cpu)
+        if len(mem):
+            metrics["avg_mem_week"] = seq_mean(mem)
+            metrics["max_mem_week"] = vmax(mem)
+            metrics["mem_trend"] = detect_trend(mem)
+        if len(iowait):
+            metrics["avg_iowait_week"] = seq_mean(iowait)
+    trend_data = {name: cols.trend_series() for name, cols in columns.items()}
+    return metrics, trend_data
+
+
+# ---------------------------------------------------------------------------
+# Synthetic data
+# ---------------------------------------------------------------------------
+
+def make_point(rng, t):
+    memtotal = rng.choice([64, 128, 256, 512]) * 1024 ** 3
+    point = {
+        "time": t,
+        "cpu": rng.random(),
+        "memused": rng.random() * memtotal,
+        "memtotal": memtotal,
+        "iowait": rng.random() * 0.2,
+        "loadavg": rng.random() * 32,
+    }
+    roll = rng.random()
+    if roll < 0.03:
+        # Intervals without samples: Proxmox omits the memory keys
+        del point["memused"], point["memtotal"]
+        for key in ("cpu", "iowait", "loadavg"):
+            point[key] = None
+    elif roll < 0.08:
+        del point[rng.choice(["cpu", "memused", "memtotal", "iowait", "loadavg"])]
+    elif roll < 0.12:
+        # Values on a .5 rounding boundary after scaling to percent
+        point["cpu"] = (rng.randrange(10000) + 0.5) / 10000
+        point["iowait"] = (rng.randrange(1000) + 0.5) / 10000
+    elif roll < 0.14:
+        point["cpu"] = 0
+        point["memused"] = 0
+    return point
+
+
+def make_node(rng):
+    now = 1_700_000_000
+    return {name: [make_point(rng, now - i * 60) for i in range(count)]
+            for name, count in POINTS.items()}
+
+
+def assert_same(expected, actual, path="result"):
+    if isinstance(expected, dict):
+        assert isinstance(actual, dict) and expected.keys() == actual.keys(), \
+            f"{path}: keys differ: {sorted(expected)} != {sorted(actual)}"
+        for key in expected:
+            assert_same(expected[key], actual[key], f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert isinstance(actual, list) and len(expected) == len(actual), f"{path}: length differs"
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            assert_same(e, a, f"{path}[{i}]")
+    elif isinstance(expected, float) or isinstance(actual, float):
+        assert expected == actual or (math.isnan(expected) and math.isnan(actual)), \
+            f"{path}: {expected!r} != {actual!r}"
+    else:
+        assert expected == actual, f"{path}: {expected!r} != {actual!r}"
+
+
+def time_per_node(fn, nodes, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        for timeframes in nodes:
+            fn(timeframes)
+    return (time.process_time() - start) / (repeat * len(nodes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    nodes = [make_node(rng) for _ in range(args.nodes)]
+
+    backends = [("no-numpy", False)]
+    if rrd_columns.np is not None:
+        backends.insert(0, ("numpy", True))
+
+    saved = rrd_columns.HAS_NUMPY
+    try:
+        for name, use_numpy in backends:
+            rrd_columns.HAS_NUMPY = use_numpy
+            for timeframes in nodes:
+                assert_same(reduce_reference(timeframes), reduce_columnar(timeframes))
+            print(f"✓ {name} backend matches the per-point reduction on {len(nodes)} nodes")
+
+        print(f"\nPer-node CPU time ({sum(POINTS.values())} RRD points/node, {args.repeat} repeats):")
+        baseline = time_per_node(reduce_reference, nodes, args.repeat)
+        print(f"  per-point (before): {baseline * 1e6:9.1f} µs")
+        for name, use_numpy in backends:
+            rrd_columns.HAS_NUMPY = use_numpy
+            elapsed = time_per_node(reduce_columnar, nodes, args.repeat)
+            print(f"  {name:<9} (after):  {elapsed * 1e6:9.1f} µs  ({baseline / elapsed:.2f}x)")
+    finally:
+        rrd_columns.HAS_NUMPY = saved
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
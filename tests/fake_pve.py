@@ -0,0 +1,445 @@
+"""
+Offline stand-in for the Proxmox VE API.
+
+SyntheticCluster generates a deterministic cluster (nodes, VMs, CTs,
+storage, HA resources, pools, backup coverage) and FakeProxmoxAPI answers
+the proxmoxer calls the collector makes against it, so ProxmoxAPICollector
+can be exercised without a live cluster:
+
+    cluster = SyntheticCluster(nodes=16, guests=2000, seed=1)
+    api = FakeProxmoxAPI(cluster, latency_ms=8, jitter_ms=4, error_rate=0.01)
+    collector = ProxmoxAPICollector(config, proxmox=api)
+    data = collector.analyze_cluster()
+    print(api.call_counts())
+
+RRD payloads mirror what pveproxy returns: 70 averaged points per timeframe
+with the same fields as real node and guest rrddata. A small pool of series
+is generated once per timeframe and every call returns fresh copies, so the
+collector pays realistic allocation costs without the generator dominating
+the profile.
+
+Latency is simulated with ``time.sleep`` (releasing the GIL like a real
+socket wait). Errors can be injected at random (``error_rate``,
+``timeout_rate``) or from load, when more than ``node_capacity`` calls
+are in flight against one node.
+"""
+
+import math
+import random
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from proxmoxer.core import ResourceException
+
+try:
+    from requests.exceptions import ReadTimeout
+except ImportError:  # requests ships with proxmoxer's https backend
+    ReadTimeout = TimeoutError
+
+# Points pveproxy returns per rrddata timeframe
+RRD_POINTS = 70
+
+# Seconds between points for each timeframe
+RRD_STEP = {"hour": 60, "day": 1200, "week": 8640, "month": 36000, "year": 468000}
+
+# Distinct RRD series generated per timeframe and kind (node/guest)
+RRD_VARIANTS = 32
+
+GIB = 1024 ** 3
+
+
+class SyntheticCluster:
+    """Deterministic synthetic cluster inventory and metrics.
+
+    Args:
+        nodes: Number of nodes (3-64 is the intended range).
+        guests: Total VMs + CTs (up to ~10k).
+        seed: RNG seed; the same arguments always produce the same cluster.
+        vm_ratio: Fraction of guests that are QEMU VMs.
+        running_ratio: Fraction of guests that are running.
+        agent_ratio: Fraction of running VMs with a responding guest agent.
+        ha_ratio: Fraction of guests that are HA managed.
+        offline_nodes: Number of nodes reported offline.
+    """
+
+    def __init__(self, nodes: int = 3, guests: int = 40, seed: int = 0,
+                 vm_ratio: float = 0.6, running_ratio: float = 0.85,
+                 agent_ratio: float = 0.7, ha_ratio: float = 0.1, offline_nodes: int = 0):
+        rng = random.Random(seed)
+        self.seed = seed
+        self.node_names = [f"pve{i + 1:02d}" for i in range(nodes)]
+        self.offline = set(self.node_names[len(self.node_names) - offline_nodes:]) if offline_nodes else set()
+
+        self.nodes: Dict[str, Dict] = {}
+        for name in self.node_names:
+            cores = rng.choice([16, 32, 48, 64, 128])
+            maxmem = rng.choice([128, 256, 384, 512, 768]) * GIB
+            online = name not in self.offline
+            self.nodes[name] = {
+                "type": "node", "id": f"node/{name}", "node": name,
+                "status": "online" if online else "offline",
+                "cpu": round(rng.uniform(0.05, 0.7), 4) if online else 0,
+                "maxcpu": cores,
+                "mem": int(maxmem * rng.uniform(0.2, 0.8)) if online else 0,
+                "maxmem": maxmem,
+                "disk": int(rng.uniform(5, 60) * GIB), "maxdisk": 100 * GIB,
+                "uptime": rng.randrange(3600, 90 * 86400) if online else 0,
+                "level": "",
+            }
+
+        online_nodes = [n for n in self.node_names if n not in self.offline] or self.node_names
+        self.guests: Dict[int, Dict] = {}
+        self.configs: Dict[int, Dict] = {}
+        self.agents: Dict[int, Dict] = {}
+        tag_pool = ["prod", "dev", "db", "web", "exclude_db", "affinity_web", "ignore", "io_exempt"]
+        for i in range(guests):
+            vmid = 100 + i
+            is_vm = rng.random() < vm_ratio
+            node = online_nodes[i % len(online_nodes)] if rng.random() < 0.8 else rng.choice(online_nodes)
+            running = rng.random() < running_ratio
+            cores = rng.choice([1, 2, 2, 4, 4, 8, 16])
+            maxmem = rng.choice([1, 2, 4, 4, 8, 16, 32]) * GIB
+            tags = ";".join(sorted(rng.sample(tag_pool, rng.choice([0, 0, 1, 1, 2]))))
+            guest = {
+                "type": "qemu" if is_vm else "lxc", "id": f"{'qemu' if is_vm else 'lxc'}/{vmid}",
+                "vmid": vmid, "node": node, "name": f"{'vm' if is_vm else 'ct'}-{vmid}",
+                "status": "running" if running else "stopped", "template": 0,
+                "cpu": round(rng.uniform(0.0, 0.9), 4) if running else 0,
+                "maxcpu": cores,
+                "mem": int(maxmem * rng.uniform(0.1, 0.9)) if running else 0,
+                "maxmem": maxmem,
+                "disk": int(rng.uniform(2, 40) * GIB) if not is_vm else 0,
+                "maxdisk": rng.choice([8, 16, 32, 64, 128]) * GIB,
+                "diskread": rng.randrange(10 ** 9, 10 ** 12), "diskwrite": rng.randrange(10 ** 9, 10 ** 12),
+                "netin": rng.randrange(10 ** 8, 10 ** 11), "netout": rng.randrange(10 ** 8, 10 ** 11),
+                "uptime": rng.randrange(60, 30 * 86400) if running else 0,
+            }
+            if tags:
+                guest["tags"] = tags
+            self.guests[vmid] = guest
+            self.configs[vmid] = self._make_config(rng, guest, cores, maxmem, tags)
+            if is_vm and running and rng.random() < agent_ratio:
+                self.agents[vmid] = {
+                    "version": rng.choice(["8.1.3", "8.2.2", "9.0.0"]),
+                    "supported_commands": [{"name": f"guest-cmd-{n}", "enabled": True} for n in range(40)],
+                }
+
+        self.ha_resources = [
+            {"sid": f"{'vm' if g['type'] == 'qemu' else 'ct'}:{vmid}", "state": "started",
+             "group": f"ha-{g['node']}", "max_relocate": 1, "max_restart": 1}
+            for vmid, g in self.guests.items() if rng.random() < ha_ratio
+        ]
+        self.not_backed_up = [{"vmid": vmid, "name": g["name"], "type": g["type"]}
+                              for vmid, g in self.guests.items() if rng.random() < 0.05]
+        pool_count = max(1, guests // 200)
+        self.pools = [
+            {"poolid": f"pool{p}", "members": [
+                {"type": self.guests[vmid]["type"], "vmid": vmid, "id": self.guests[vmid]["id"]}
+                for vmid in list(self.guests)[p::pool_count * 3]
+            ]}
+            for p in range(pool_count)
+        ]
+        self.storage = {name: self._make_storage(rng) for name in self.node_names}
+        self._rrd_templates: Dict[Tuple[str, str], List[List[Dict]]] = {}
+        self._rrd_lock = threading.Lock()
+
+    @staticmethod
+    def _make_config(rng: random.Random, guest: Dict, cores: int, maxmem: int, tags: str) -> Dict:
+        config = {
+            "cores": cores, "memory": maxmem // (1024 ** 2), "name": guest["name"],
+            "digest": f"{rng.getrandbits(160):040x}", "onboot": 1,
+        }
+        if tags:
+            config["tags"] = tags
+        if guest["type"] == "qemu":
+            config.update({
+                "scsi0": f"ceph-pool:vm-{guest['vmid']}-disk-0,size={guest['maxdisk'] // GIB}G",
+                "net0": f"virtio={rng.getrandbits(48):012x},bridge=vmbr0", "ostype": "l26", "agent": "1",
+            })
+            if rng.random() < 0.02:
+                config["scsi1"] = "/dev/disk/by-id/ata-WDC_WD40EFRX-68N32N0_WD-WCC7K0000000,size=3726G"
+        else:
+            config.update({
+                "rootfs": f"local-lvm:vm-{guest['vmid']}-disk-0,size={guest['maxdisk'] // GIB}G",
+                "net0": "name=eth0,bridge=vmbr0,ip=dhcp", "ostype": "debian", "hostname": guest["name"],
+            })
+            if rng.random() < 0.1:
+                config["mp0"] = "/mnt/shared/data,mp=/data,shared=1"
+        return config
+
+    @staticmethod
+    def _make_storage(rng: random.Random) -> List[Dict]:
+        storages = [("local", "dir", "iso,vztmpl,backup", 0), ("local-lvm", "lvmthin", "images,rootdir", 0),
+                    ("ceph-pool", "rbd", "images,rootdir", 1)]
+        out = []
+        for name, kind, content, shared in storages:
+            total = rng.choice([500, 1000, 4000]) * GIB
+            used = int(total * rng.uniform(0.1, 0.85))
+            out.append({"storage": name, "type": kind, "content": content, "shared": shared,
+                        "active": 1, "enabled": 1, "total": total, "used": used, "avail": total - used})
+        return out
+
+    # ------------------------------------------------------------------
+    # RRD payloads
+    # ------------------------------------------------------------------
+
+    def _templates(self, kind: str, timeframe: str) -> List[List[Dict]]:
+        key = (kind, timeframe)
+        templates = self._rrd_templates.get(key)
+        if templates is None:
+            with self._rrd_lock:
+                templates = self._rrd_templates.get(key)
+                if templates is None:
+                    rng = random.Random(f"{self.seed}:{kind}:{timeframe}")
+                    build = self._node_series if kind == "node" else self._guest_series
+                    templates = [build(rng, timeframe) for _ in range(RRD_VARIANTS)]
+                    self._rrd_templates[key] = templates
+        return templates
+
+    @staticmethod
+    def _node_series(rng: random.Random, timeframe: str) -> List[Dict]:
+        step = RRD_STEP[timeframe]
+        base_cpu, base_mem = rng.uniform(0.05, 0.6), rng.uniform(0.2, 0.8)
+        memtotal = rng.choice([128, 256, 512]) * GIB
+        points = []
+        for i in range(RRD_POINTS):
+            phase = math.sin(2 * math.pi * i * step / 86400)
+            cpu = min(1.0, max(0.0, base_cpu + 0.15 * phase + rng.gauss(0, 0.03)))
+            mem = min(0.98, max(0.05, base_mem + 0.05 * phase + rng.gauss(0, 0.01)))
+            points.append({
+                "time": i * step, "cpu": cpu, "maxcpu": 64, "iowait": max(0.0, rng.gauss(0.01, 0.01)),
+                "loadavg": cpu * 64 * rng.uniform(0.8, 1.2), "memused": mem * memtotal, "memtotal": memtotal,
+                "swapused": rng.uniform(0, 2) * GIB, "swaptotal": 8 * GIB,
+                "netin": rng.uniform(1e5, 5e7), "netout": rng.uniform(1e5, 5e7),
+                "rootused": 20 * GIB, "roottotal": 100 * GIB,
+            })
+        # The newest point is often still being aggregated and comes back partial
+        points[-1] = {"time": points[-1]["time"]}
+        return points
+
+    @staticmethod
+    def _guest_series(rng: random.Random, timeframe: str) -> List[Dict]:
+        step = RRD_STEP[timeframe]
+        base_cpu, maxmem = rng.uniform(0.0, 0.5), rng.choice([2, 4, 8, 16]) * GIB
+        points = []
+        for i in range(RRD_POINTS):
+            phase = math.sin(2 * math.pi * i * step / 86400)
+            points.append({
+                "time": i * step, "cpu": min(1.0, max(0.0, base_cpu + 0.1 * phase + rng.gauss(0, 0.05))),
+                "maxcpu": 4, "mem": maxmem * rng.uniform(0.3, 0.8), "maxmem": maxmem,
+                "disk": 0, "maxdisk": 32 * GIB,
+                "diskread": rng.uniform(0, 5e6), "diskwrite": rng.uniform(0, 5e6),
+                "netin": rng.uniform(0, 2e6), "netout": rng.uniform(0, 2e6),
+            })
+        return points
+
+    def rrd(self, kind: str, ident: Any, timeframe: str) -> List[Dict]:
+        """Fresh copy of the RRD series for a node or guest, ending now."""
+        if timeframe not in RRD_STEP:
+            raise ResourceException(400, "Parameter verification failed", f"timeframe: value '{timeframe}' invalid")
+        templates = self._templates(kind, timeframe)
+        series = templates[zlib.crc32(str(ident).encode()) % len(templates)]
+        offset = int(time.time()) // RRD_STEP[timeframe] * RRD_STEP[timeframe] - (RRD_POINTS - 1) * RRD_STEP[timeframe]
+        return [dict(p, time=p["time"] + offset) for p in series]
+
+    # ------------------------------------------------------------------
+    # Inventory
+    # ------------------------------------------------------------------
+
+    def resources(self) -> List[Dict]:
+        return [dict(n) for n in self.nodes.values()] + [dict(g) for g in self.guests.values()]
+
+    def cluster_status(self) -> List[Dict]:
+        status = [{"type": "cluster", "id": "cluster", "name": "synthetic", "nodes": len(self.nodes),
+                   "quorate": 1, "version": 1}]
+        for i, name in enumerate(self.node_names):
+            status.append({"type": "node", "id": f"node/{name}", "name": name, "nodeid": i + 1,
+                           "online": int(name not in self.offline), "ip": f"10.0.0.{i + 1}"})
+        return status
+
+    def guest(self, node: str, kind: str, vmid: Any) -> Dict:
+        guest = self.guests.get(int(vmid))
+        if guest is None or guest["node"] != node or guest["type"] != kind:
+            raise ResourceException(500, "Internal Server Error",
+                                    f"Configuration file 'nodes/{node}/{kind}-server/{vmid}.conf' does not exist")
+        return guest
+
+
+class _Resource:
+    """One proxmoxer-style path segment chain (``api.nodes(n).qemu(id).config``)."""
+
+    __slots__ = ("_api", "_path")
+
+    def __init__(self, api: "FakeProxmoxAPI", path: Tuple[str, ...]):
+        self._api = api
+        self._path = path
+
+    def __getattr__(self, name: str) -> "_Resource":
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Resource(self._api, self._path + (name,))
+
+    def __call__(self, *segments: Any) -> "_Resource":
+        return _Resource(self._api, self._path + tuple(str(s) for s in segments))
+
+    def get(self, **params: Any) -> Any:
+        return self._api._request("GET", self._path, params)
+
+
+class FakeProxmoxAPI:
+    """Drop-in for ``proxmoxer.ProxmoxAPI`` backed by a SyntheticCluster.
+
+    Args:
+        cluster: The cluster to serve.
+        latency_ms: Mean per-call latency.
+        jitter_ms: Uniform +/- jitter added to each call.
+        error_rate: Probability a call fails with ``error_status``.
+        error_status: HTTP status of injected errors.
+        timeout_rate: Probability a call raises a read timeout.
+        node_capacity: Concurrent calls one node answers before returning
+            503 (None = unlimited), modelling a saturated pveproxy.
+        seed: Seed for latency jitter and error injection.
+    """
+
+    def __init__(self, cluster: SyntheticCluster, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503, timeout_rate: float = 0.0,
+                 node_capacity: Optional[int] = None, seed: int = 0):
+        # Not named ``cluster``: attribute access is how API paths are built
+        self.synthetic = cluster
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.node_capacity = node_capacity
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._calls: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._in_flight: Dict[str, int] = {}
+        self.peak_in_flight = 0
+        self._total_in_flight = 0
+        # The collector sizes the keep-alive pool on proxmoxer's session
+        try:
+            import requests
+            self._store = {"session": requests.Session()}
+        except ImportError:
+            self._store = {}
+
+    def __getattr__(self, name: str) -> _Resource:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _Resource(self, (name,))
+
+    def __call__(self, *segments: Any) -> _Resource:
+        return _Resource(self, tuple(str(s) for s in segments))
+
+    # ------------------------------------------------------------------
+    # Accounting
+    # ------------------------------------------------------------------
+
+    def call_counts(self) -> Dict[str, Dict[str, int]]:
+        """Calls and errors per path template (``nodes/{node}/qemu/{vmid}/config``)."""
+        with self._lock:
+            return {k: {"calls": v, "errors": self._errors.get(k, 0)} for k, v in sorted(self._calls.items())}
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self._calls.values())
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self._calls, self._errors = {}, {}
+            self.peak_in_flight = 0
+
+    @staticmethod
+    def _template(path: Tuple[str, ...]) -> str:
+        parts = list(path)
+        if len(parts) >= 2 and parts[0] == "nodes":
+            parts[1] = "{node}"
+            if len(parts) >= 4 and parts[2] in ("qemu", "lxc"):
+                parts[3] = "{vmid}"
+        return "/".join(parts)
+
+    # ------------------------------------------------------------------
+    # Request handling
+    # ------------------------------------------------------------------
+
+    def _request(self, method: str, path: Tuple[str, ...], params: Dict) -> Any:
+        template = self._template(path)
+        node = path[1] if len(path) >= 2 and path[0] == "nodes" else None
+        with self._lock:
+            self._calls[template] = self._calls.get(template, 0) + 1
+            self._total_in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self._total_in_flight)
+            if node:
+                self._in_flight[node] = self._in_flight.get(node, 0) + 1
+            overloaded = bool(node and self.node_capacity and self._in_flight[node] > self.node_capacity)
+            roll = self._rng.random()
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        try:
+            if delay:
+                time.sleep(delay)
+            if overloaded or roll < self.error_rate:
+                raise ResourceException(503 if overloaded else self.error_status, "Service Unavailable",
+                                        "injected error")
+            if roll < self.error_rate + self.timeout_rate:
+                raise ReadTimeout("HTTPSConnectionPool(host='pve', port=8006): Read timed out. (read timeout=5)")
+            return self._route(method, path, params)
+        except Exception:
+            with self._lock:
+                self._errors[template] = self._errors.get(template, 0) + 1
+            raise
+        finally:
+            with self._lock:
+                self._total_in_flight -= 1
+                if node:
+                    self._in_flight[node] -= 1
+
+    def _route(self, method: str, path: Tuple[str, ...], params: Dict) -> Any:
+        c = self.synthetic
+        if method != "GET":
+            raise ResourceException(501, "Not Implemented", f"{method} /{'/'.join(path)}")
+        p = path
+        if p == ("version",):
+            return {"version": "8.2.4", "release": "8.2", "repoid": "faa83925"}
+        if p == ("cluster", "resources"):
+            return c.resources()
+        if p == ("cluster", "ha", "resources"):
+            return [dict(r) for r in c.ha_resources]
+        if p == ("cluster", "ha", "status", "manager_status"):
+            return {"manager_status": {"master_node": c.node_names[0], "node_status": {}}, "quorum": {"quorate": "1"}}
+        if p == ("cluster", "status"):
+            return c.cluster_status()
+        if p == ("cluster", "options"):
+            return {"crs": "ha=static", "keyboard": "en-us"}
+        if p == ("cluster", "backup-info", "not-backed-up"):
+            return [dict(g) for g in c.not_backed_up]
+        if p == ("pools",):
+            return [{"poolid": pool["poolid"], "members": [dict(m) for m in pool["members"]]} for pool in c.pools]
+        if len(p) >= 3 and p[0] == "nodes":
+            node = p[1]
+            if node not in c.nodes:
+                raise ResourceException(595, "Errors during connection establishment", f"no such node '{node}'")
+            if node in c.offline:
+                raise ResourceException(595, "Errors during connection establishment", f"node '{node}' is offline")
+            if p[2:] == ("storage",):
+                return [dict(s) for s in c.storage[node]]
+            if p[2:] == ("rrddata",):
+                return c.rrd("node", node, params.get("timeframe", "hour"))
+            if len(p) >= 5 and p[2] in ("qemu", "lxc"):
+                vmid = int(p[3])
+                c.guest(node, p[2], vmid)
+                rest = p[4:]
+                if rest == ("config",):
+                    return dict(c.configs[vmid])
+                if rest == ("rrddata",):
+                    return c.rrd("guest", vmid, params.get("timeframe", "hour"))
+                if rest == ("agent", "info") and p[2] == "qemu":
+                    agent = c.agents.get(vmid)
+                    if agent is None:
+                        raise ResourceException(500, "Internal Server Error", "QEMU guest agent is not running")
+                    return {"result": agent}
+        raise ResourceException(501, "Not Implemented", f"Method 'GET /{'/'.join(path)}' not implemented")
@@ -0,0 +1,372 @@
+"""
+Tests for the cluster cache read path:
+  Sharded cache — split/merge round-trip, manifest written last, torn reads
+                  retried, legacy single-file fallback
+  CacheManager — generation-keyed reloads, discard
+  Snapshot — PBSNAP1 write/read, compression levels, stale generations ignored
+  ResponseCache — ETags and If-None-Match
+"""
+
+import copy
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+# Ensure project root is on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from proxbalance.cache import CacheManager
+from proxbalance.cluster_cache import (
+    ALL_SECTIONS, CORE_SECTIONS, MANIFEST_NAME, SECTION_META, SECTION_NODES, SECTION_TRENDS,
+    merge_sections, read_cluster_cache, read_manifest, read_sections, shard_dir_for,
+    split_cluster_data, write_cluster_cache,
+)
+from proxbalance.constants import COMPRESS_BR_LEVEL, COMPRESS_LEVEL
+from proxbalance.response_cache import ResponseCache, SnapshotPayload, cached_read_response
+from proxbalance.snapshot import (
+    ENCODINGS, MAGIC, READ_PAYLOADS, Snapshot, SnapshotReader, build_analyze_payload, compress_payload,
+    payload_digest, serialize_payload, snapshot_path_for, write_cluster_snapshot,
+)
+
+passed = 0
+failed = 0
+test_results = []
+
+
+def test(name, condition, detail=""):
+    global passed, failed
+    if condition:
+        passed += 1
+        test_results.append(f"  PASS: {name}")
+    else:
+        failed += 1
+        test_results.append(f"  FAIL: {name} — {detail}")
+
+
+# ---------------------------------------------------------------------------
+# Helpers to build collector output
+# ---------------------------------------------------------------------------
+
+def make_cluster(marker, node_count=3, guests_per_node=4):
+    """Collector output whose every section carries ``marker``."""
+    nodes, guests = {}, {}
+    vmid = 100
+    for n in range(node_count):
+        name = f"pve{n + 1}"
+        node_guests = []
+        for _ in range(guests_per_node):
+            guests[str(vmid)] = {"vmid": vmid, "node": name, "status": "running", "marker": marker}
+            node_guests.append(vmid)
+            vmid += 1
+        nodes[name] = {
+            "name": name, "status": "online", "cpu_percent": 20.0 + n, "guests": node_guests,
+            "marker": marker,
+            "trend_data": {"hour": [{"time": 1700000000 + i * 60, "cpu": 12.5, "mem": 40.0,
+                                     "iowait": 0.5, "marker": marker} for i in range(5)]},
+        }
+    return {
+        "collected_at": f"2026-10-18T00:00:{marker:02d}",
+        "summary": {"total_nodes": node_count, "total_guests": len(guests)},
+        "cluster_health": {"score": 90},
+        "pve_crs": {},
+        "performance": {"marker": marker},
+        "nodes": nodes,
+        "guests": guests,
+    }
+
+
+def markers(data):
+    """Every marker found in a merged cache dict."""
+    found = {data["performance"]["marker"]}
+    for node in data.get("nodes", {}).values():
+        found.add(node["marker"])
+        for point in node.get("trend_data", {}).get("hour", []):
+            found.add(point["marker"])
+    found.update(g["marker"] for g in data.get("guests", {}).values())
+    return found
+
+
+tmpdir = tempfile.mkdtemp(prefix="proxbalance-cache-test-")
+cache_file = os.path.join(tmpdir, "cluster_cache.json")
+shard_dir = shard_dir_for(cache_file)
+
+
+# ====================================================================
+# Sharded cache
+# ====================================================================
+print("=" * 70)
+print("Sharded Cluster Cache: Round-Trip, Versions and Consistent Reads")
+print("=" * 70)
+
+original = make_cluster(1)
+test("Splitting and merging reproduces the monolithic dict",
+     merge_sections(split_cluster_data(copy.deepcopy(original))) == original)
+
+manifest1 = write_cluster_cache(copy.deepcopy(original), cache_file)
+test("A written cache reads back equal to the monolithic dict",
+     read_cluster_cache(cache_file) == json.loads(json.dumps(original)))
+
+core = read_cluster_cache(cache_file, CORE_SECTIONS)
+test("Core sections leave out chart series",
+     all("trend_data" not in node for node in core["nodes"].values()) and core["guests"] == original["guests"])
+test("A meta-only read has no nodes or guests",
+     set(read_cluster_cache(cache_file, (SECTION_META,))) == set(original) - {"nodes", "guests"})
+
+changed = copy.deepcopy(original)
+changed["guests"]["100"]["status"] = "stopped"
+manifest2 = write_cluster_cache(changed, cache_file)
+versions1 = {name: entry["version"] for name, entry in manifest1["sections"].items()}
+versions2 = {name: entry["version"] for name, entry in manifest2["sections"].items()}
+test("Only the changed section gets a new version",
+     manifest2["generation"] == manifest1["generation"] + 1
+     and {n for n in ALL_SECTIONS if versions1[n] != versions2[n]} == {"guests"},
+     f"Got {versions1} -> {versions2}")
+
+try:
+    read_sections(cache_file, ("nodes", "charts"))
+    unknown_rejected = False
+except ValueError:
+    unknown_rejected = True
+test("Unknown section names are rejected", unknown_rejected)
+
+# The manifest is published last: a reader that starts between the section
+# writes and the manifest retries and gets the new generation whole
+published = {}
+
+
+def read_mid_write(generation):
+    on_disk = read_manifest(cache_file)
+    published["manifest_before"] = on_disk["generation"]
+    reader = threading.Thread(target=lambda: published.setdefault("read", read_cluster_cache(cache_file)))
+    reader.start()
+    published["reader"] = reader
+    time.sleep(0.02)
+
+
+write_cluster_cache(make_cluster(3), cache_file, before_publish=read_mid_write)
+published["reader"].join()
+test("Sections are written before the manifest",
+     published["manifest_before"] == manifest2["generation"])
+test("A read torn by a collection is retried against the new manifest",
+     published["read"] is not None and markers(published["read"]) == {3},
+     f"Got {published['read'] and markers(published['read'])}")
+
+# A reader racing a writer never sees sections from two collections
+race = {"reads": 0, "failed": 0, "mixed": []}
+
+
+def writer():
+    # A run of back-to-back collections, with a short gap so readers can finish
+    for marker in range(10, 30):
+        write_cluster_cache(make_cluster(marker), cache_file)
+        time.sleep(0.01)
+
+
+def check_read():
+    data = read_cluster_cache(cache_file)
+    if data is None:
+        race["failed"] += 1
+        return
+    race["reads"] += 1
+    if len(markers(data)) != 1:
+        race["mixed"].append(sorted(markers(data)))
+
+
+writer_thread = threading.Thread(target=writer)
+writer_thread.start()
+while writer_thread.is_alive():
+    check_read()
+writer_thread.join()
+# Once the writer is done a read always succeeds, however slow the machine
+check_read()
+test("A reader racing a writer only sees whole collections",
+     race["reads"] > 0 and not race["mixed"], f"Got {race['reads']} reads, mixed: {race['mixed'][:3]}")
+
+# Legacy single-file cache from before the sharded layout
+legacy_dir = os.path.join(tmpdir, "legacy")
+os.makedirs(legacy_dir)
+legacy_file = os.path.join(legacy_dir, "cluster_cache.json")
+with open(legacy_file, "w") as f:
+    json.dump(original, f)
+legacy_manager = CacheManager(legacy_file)
+test("Without a manifest the legacy file is read",
+     read_cluster_cache(legacy_file) == original and legacy_manager.get() == original)
+test("The legacy file's generation is its mtime in nanoseconds",
+     legacy_manager.generation() == os.stat(legacy_file).st_mtime_ns)
+write_cluster_cache(original, legacy_file)
+test("The first sharded write replaces the legacy file",
+     not os.path.exists(legacy_file)
+     and os.path.exists(os.path.join(shard_dir_for(legacy_file), MANIFEST_NAME))
+     and read_cluster_cache(legacy_file) == original)
+
+
+# ====================================================================
+# CacheManager
+# ====================================================================
+print("\n" + "=" * 70)
+print("CacheManager: Generation-Keyed Reloads")
+print("=" * 70)
+
+manager_dir = os.path.join(tmpdir, "manager")
+os.makedirs(manager_dir)
+manager_file = os.path.join(manager_dir, "cluster_cache.json")
+manager = CacheManager(manager_file)
+test("No cache on disk gives no data and no generation",
+     manager.get() is None and manager.generation() is None)
+
+first = write_cluster_cache(make_cluster(1), manager_file)
+data_a, generation_a = manager.get_with_generation(CORE_SECTIONS)
+data_b, generation_b = manager.get_with_generation(CORE_SECTIONS)
+test("Repeated reads of one generation share one object",
+     data_a is data_b and generation_a == generation_b == first["generation"]
+     and manager.stats()["reloads"] == 1 and manager.stats()["hits"] == 1,
+     f"Got {manager.stats()}")
+
+updated = make_cluster(1)
+updated["guests"]["100"]["status"] = "stopped"
+second = write_cluster_cache(updated, manager_file)
+data_c, generation_c = manager.get_with_generation(CORE_SECTIONS)
+test("A new collection is picked up on the next call",
+     generation_c == second["generation"] == manager.generation()
+     and data_c["guests"]["100"]["status"] == "stopped")
+test("Unchanged sections are reused across generations",
+     data_c["nodes"] is data_a["nodes"] and data_c is not data_a)
+
+manager.get(ALL_SECTIONS)
+manager.discard((SECTION_TRENDS,))
+test("Discarded sections are dropped from memory",
+     SECTION_TRENDS not in manager.stats()["sections"] and SECTION_NODES in manager.stats()["sections"])
+test("A discarded section is read again on demand",
+     manager.get(ALL_SECTIONS)["nodes"]["pve1"]["trend_data"]["hour"][0]["marker"] == 1)
+
+
+# ====================================================================
+# Snapshot
+# ====================================================================
+print("\n" + "=" * 70)
+print("Shared Snapshot: PBSNAP1 Files and Generations")
+print("=" * 70)
+
+snapshot_data = read_cluster_cache(manager_file)
+sizes = write_cluster_snapshot(snapshot_data, manager_file, second["generation"])
+snapshot_path = snapshot_path_for(manager_file)
+with open(snapshot_path, "rb") as f:
+    magic = f.read(len(MAGIC))
+snapshot = Snapshot(snapshot_path)
+analyze_body = serialize_payload(build_analyze_payload(snapshot_data))
+test("The snapshot file starts with the PBSNAP1 magic", magic == MAGIC)
+test("Payloads read back byte-identical with their digests",
+     snapshot.raw("payload:analyze").tobytes() == analyze_body
+     and snapshot.digests["analyze"] == payload_digest(analyze_body)
+     and snapshot.generation == second["generation"])
+test("Every read payload and its encodings are stored",
+     set(snapshot.names()) == {f"payload:{key}{suffix}" for key in READ_PAYLOADS
+                               for suffix in ("",) + tuple(f":{encoding}" for encoding in ENCODINGS)}
+     and set(sizes) == set(snapshot.names()))
+test("Encodings use the app's compression levels and record them",
+     snapshot.raw("payload:analyze:gzip").tobytes() == compress_payload(analyze_body, "gzip", COMPRESS_LEVEL)
+     and snapshot.compression == {encoding: {"br": COMPRESS_BR_LEVEL, "gzip": COMPRESS_LEVEL}[encoding]
+                                  for encoding in ENCODINGS},
+     f"Got {snapshot.compression}")
+
+with open(os.path.join(tmpdir, "not-a-snapshot.bin"), "wb") as f:
+    f.write(b"{}" * 16)
+try:
+    Snapshot(os.path.join(tmpdir, "not-a-snapshot.bin"))
+    bad_magic_rejected = False
+except ValueError:
+    bad_magic_rejected = True
+test("A file without the magic is rejected", bad_magic_rejected)
+
+snapshot_reader = SnapshotReader(manager_file)
+mapped = snapshot_reader.current()
+test("The reader maps a snapshot once per file",
+     mapped is not None and snapshot_reader.current() is mapped)
+
+
+# ====================================================================
+# ResponseCache
+# ====================================================================
+print("\n" + "=" * 70)
+print("ResponseCache: ETags, 304s and Stale Snapshots")
+print("=" * 70)
+
+app = Flask(__name__)
+app.config["cache_manager"] = manager
+app.config["response_cache"] = ResponseCache()
+app.config["snapshot_reader"] = snapshot_reader
+
+
+@app.route("/api/analyze")
+def analyze():
+    return cached_read_response("analyze")
+
+
+client = app.test_client()
+response = client.get("/api/analyze")
+etag = response.headers.get("ETag")
+test("The body matches jsonify's serialization with a strong ETag",
+     response.status_code == 200 and response.get_data() == analyze_body
+     and etag == f'"{payload_digest(analyze_body)}"', f"Got {response.status_code} {etag}")
+
+not_modified = client.get("/api/analyze", headers={"If-None-Match": etag})
+test("A matching If-None-Match returns 304 without a body",
+     not_modified.status_code == 304 and not_modified.get_data() == b"")
+
+gzipped = client.get("/api/analyze", headers={"Accept-Encoding": "gzip"})
+gzip_etag = gzipped.headers.get("ETag")
+test("Encoded variants carry the encoding in the ETag",
+     gzipped.headers.get("Content-Encoding") == "gzip" and gzip_etag == f'"{payload_digest(analyze_body)}:gzip"')
+test("Any encoding's ETag revalidates the body",
+     client.get("/api/analyze", headers={"If-None-Match": gzip_etag}).status_code == 304)
+test("A different ETag gets the full body",
+     client.get("/api/analyze", headers={"If-None-Match": '"0123456789abcdef0123"'}).status_code == 200)
+
+response_cache = app.config["response_cache"]
+test("A snapshot at the current generation serves the payload",
+     isinstance(response_cache.lookup("analyze", manager.generation(), snapshot_reader.current()), SnapshotPayload)
+     and response_cache.stats()["builds"] == 0, f"Got {response_cache.stats()}")
+
+other_levels = ResponseCache(gzip_level=1)
+test("A snapshot compressed at other levels is not served",
+     other_levels.lookup("analyze", manager.generation(), snapshot_reader.current()) is None)
+
+# The collector publishes a new generation but the snapshot write failed:
+# the old snapshot must not be served for it
+third_data = make_cluster(5)
+write_cluster_cache(third_data, manager_file)
+stale_snapshot = snapshot_reader.current()
+fresh = client.get("/api/analyze")
+test("A snapshot from an older generation is ignored",
+     stale_snapshot.generation != manager.generation()
+     and response_cache.lookup("analyze", manager.generation(), stale_snapshot) is not None
+     and fresh.get_data() == serialize_payload(build_analyze_payload(json.loads(json.dumps(third_data))))
+     and response_cache.stats()["builds"] == 1,
+     f"Got {response_cache.stats()}")
+test("The ETag changes with the payload", fresh.headers.get("ETag") != etag)
+
+shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+# ====================================================================
+# Results
+# ====================================================================
+print("\n" + "=" * 70)
+print("RESULTS")
+print("=" * 70)
+for r in test_results:
+    print(r)
+
+print(f"\n{passed} passed, {failed} failed, {passed + failed} total")
+
+if failed > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,182 @@
+"""
+Tests for the collector's run-to-run state:
+  Adaptive concurrency — AIMD worker limit, per-endpoint latency baselines
+  I/O counters — rates from /cluster/resources counter deltas and resets
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+# Ensure project root is on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep collector_state in a scratch database
+_tmpdir = tempfile.mkdtemp(prefix="proxbalance-test-")
+os.environ["PROXBALANCE_DB_PATH"] = os.path.join(_tmpdir, "proxbalance.db")
+
+from proxbalance.db import init_db
+from proxbalance.collector_state import (
+    compute_io_rates,
+    load_guest_io_counters,
+    save_guest_io_counters,
+    set_collector_state,
+)
+from proxbalance.adaptive_workers import (
+    ADAPTIVE_STATE_KEY,
+    BASELINE_MAX_AGE_SECONDS,
+    AdaptiveConcurrency,
+    load_adaptive_concurrency,
+    save_adaptive_concurrency,
+)
+
+init_db()
+
+passed = 0
+failed = 0
+test_results = []
+
+
+def test(name, condition, detail=""):
+    global passed, failed
+    if condition:
+        passed += 1
+        test_results.append(f"  PASS: {name}")
+    else:
+        failed += 1
+        test_results.append(f"  FAIL: {name} — {detail}")
+
+
+class ServerError(Exception):
+    status_code = 500
+
+
+# ====================================================================
+# Adaptive concurrency
+# ====================================================================
+print("=" * 70)
+print("Adaptive Concurrency: Per-Endpoint Baselines and Regime Shifts")
+print("=" * 70)
+
+rng = random.Random(7)
+
+steady = AdaptiveConcurrency(ceiling=8, initial=2)
+for _ in range(200):
+    steady.observe("guest/config", rng.uniform(0.020, 0.025))
+test("Flat latency grows the limit to the ceiling",
+     steady.limit == 8 and steady.decreases == 0, f"Got {steady.summary()}")
+
+steady.observe("guest/config", 0.02, ServerError("500 Internal Server Error"))
+steady.observe("guest/config", 0.02, ServerError("500 Internal Server Error"))
+test("A burst of 5xx errors halves the limit once per window",
+     steady.limit == 4 and steady.decreases == 1, f"Got {steady.summary()}")
+
+exempt = AdaptiveConcurrency(ceiling=8, initial=4)
+exempt.observe("guest/agent/info", 0.01, ServerError("QEMU guest agent is not running"))
+test("Guest agent 500s do not count as overload", exempt.limit == 4 and exempt.overload_errors == 0)
+
+# A cheap first window must not set the bar for slower endpoint classes
+mixed = AdaptiveConcurrency(ceiling=20, initial=5)
+for _ in range(16):
+    mixed.observe("cluster/resources", 0.008)
+for i in range(2000):
+    mixed.observe(("guest/config", "guest/rrddata", "node/rrddata")[i % 3], rng.uniform(0.030, 0.050))
+test("Endpoint classes keep separate baselines",
+     mixed.limit == 20 and mixed.summary()["baseline_p95_ms"]["cluster/resources"] == 8.0,
+     f"Got {mixed.summary()}")
+
+# The same endpoint getting slower for good is re-learned
+shifted = AdaptiveConcurrency(ceiling=20, initial=5)
+for _ in range(16):
+    shifted.observe("node/rrddata", 0.008)
+for _ in range(2000):
+    shifted.observe("node/rrddata", rng.uniform(0.030, 0.050))
+shifted_baseline = shifted.summary()["baseline_p95_ms"]["node/rrddata"]
+test("A latency regime shift raises the baseline", 40 <= shifted_baseline <= 50, f"Got {shifted_baseline}")
+test("The limit keeps growing after a regime shift",
+     shifted.limit == 20 and shifted.increases == 15, f"Got {shifted.summary()}")
+
+faster = AdaptiveConcurrency(ceiling=20, initial=5, baselines={"node/rrddata": 0.050})
+for _ in range(1000):
+    faster.observe("node/rrddata", 0.010)
+faster_baseline = faster.summary()["baseline_p95_ms"]["node/rrddata"]
+test("The baseline also follows latency down", faster_baseline < 11, f"Got {faster_baseline}")
+
+save_adaptive_concurrency(shifted)
+resumed = load_adaptive_concurrency(20)
+test("The limit and baselines carry over to the next run",
+     resumed.limit == 20 and resumed.baselines == {"node/rrddata": shifted_baseline / 1000},
+     f"Got {resumed.summary()}")
+
+set_collector_state(ADAPTIVE_STATE_KEY, {"limit": 6, "baselines_p95_ms": {"node/rrddata": 8.0}, "updated_at": 1000.0})
+stale = load_adaptive_concurrency(20, now=1000.0 + BASELINE_MAX_AGE_SECONDS + 1)
+test("Baselines older than the age limit are learned again",
+     stale.limit == 6 and stale.baselines == {}, f"Got {stale.summary()}")
+
+set_collector_state(ADAPTIVE_STATE_KEY, {"limit": 6, "baseline_p95_ms": 8.0, "updated_at": 1000.0})
+legacy = load_adaptive_concurrency(4, now=1000.0)
+test("A single legacy baseline is dropped and the limit clamped to the ceiling",
+     legacy.limit == 4 and legacy.baselines == {}, f"Got {legacy.summary()}")
+
+
+# ====================================================================
+# I/O counters
+# ====================================================================
+print("\n" + "=" * 70)
+print("Guest I/O Counters: Rates and Counter Resets")
+print("=" * 70)
+
+
+def counter_sample(ts, node="pve1", uptime=3600, diskread=1000, diskwrite=2000, netin=3000, netout=4000):
+    return {"node": node, "ts": ts, "uptime": uptime, "diskread": diskread,
+            "diskwrite": diskwrite, "netin": netin, "netout": netout}
+
+
+baseline_sample = counter_sample(1000.0)
+rates = compute_io_rates(baseline_sample, counter_sample(1060.0, uptime=3660, diskread=7000,
+                                                         diskwrite=2000, netin=9000, netout=4600))
+test("Rates are counter deltas over elapsed seconds",
+     rates == {"disk_read_bps": 100.0, "disk_write_bps": 0.0, "net_in_bps": 100.0, "net_out_bps": 10.0},
+     f"Got {rates}")
+test("No previous sample gives no rate", compute_io_rates(None, baseline_sample) is None)
+test("A guest that moved node gives no rate",
+     compute_io_rates(baseline_sample, counter_sample(1060.0, node="pve2", diskread=5000)) is None)
+test("A restart (uptime went backwards) gives no rate",
+     compute_io_rates(baseline_sample, counter_sample(1060.0, uptime=30, diskread=5000)) is None)
+test("A counter that went backwards gives no rate",
+     compute_io_rates(baseline_sample, counter_sample(1060.0, uptime=3660, netout=10)) is None)
+test("Zero elapsed time gives no rate",
+     compute_io_rates(baseline_sample, counter_sample(1000.0, diskread=5000)) is None)
+test("Negative elapsed time gives no rate",
+     compute_io_rates(baseline_sample, counter_sample(940.0, diskread=5000)) is None)
+test("A missing counter gives no rate",
+     compute_io_rates(baseline_sample, dict(counter_sample(1060.0, uptime=3660), diskwrite=None)) is None)
+test("Missing uptime does not block the rate",
+     compute_io_rates(dict(baseline_sample, uptime=None), counter_sample(1060.0, uptime=None))
+     == {"disk_read_bps": 0.0, "disk_write_bps": 0.0, "net_in_bps": 0.0, "net_out_bps": 0.0})
+
+save_guest_io_counters({"101": baseline_sample, 102: counter_sample(1000.0, node="pve2")})
+save_guest_io_counters({"101": counter_sample(1060.0, uptime=3660)})
+stored = load_guest_io_counters()
+test("Saving replaces the stored snapshot",
+     list(stored) == ["101"] and stored["101"]["ts"] == 1060.0 and stored["101"]["node"] == "pve1",
+     f"Got {stored}")
+
+
+# ====================================================================
+# Results
+# ====================================================================
+print("\n" + "=" * 70)
+print("RESULTS")
+print("=" * 70)
+for r in test_results:
+    print(r)
+
+print(f"\n{passed} passed, {failed} failed, {passed + failed} total")
+
+if failed > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,255 @@
+"""
+Tests for the per-process config cache:
+  Read-only views — load_config() results refuse in-place changes
+  Mutable copies — load_config(mutable=True) is private to the caller
+  Invalidation — save_config/save_penalty_config and edits on disk
+  Call sites — no caller edits a read-only config in place
+"""
+
+import ast
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+
+# Ensure project root is on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from proxbalance.config_manager import (
+    get_config_cache_stats,
+    invalidate_config_cache,
+    load_config,
+    load_penalty_config,
+    save_config,
+    save_penalty_config,
+)
+from proxbalance.scoring import DEFAULT_PENALTY_CONFIG
+
+passed = 0
+failed = 0
+test_results = []
+
+
+def test(name, condition, detail=""):
+    global passed, failed
+    if condition:
+        passed += 1
+        test_results.append(f"  PASS: {name}")
+    else:
+        failed += 1
+        test_results.append(f"  FAIL: {name} — {detail}")
+
+
+def raises_type_error(fn):
+    try:
+        fn()
+    except TypeError:
+        return True
+    return False
+
+
+tmpdir = tempfile.mkdtemp(prefix="proxbalance-config-test-")
+config_file = os.path.join(tmpdir, "config.json")
+base_config = {
+    "proxmox_host": "10.0.0.1",
+    "collection_interval_minutes": 5,
+    "recommendation_thresholds": {"cpu_threshold": 60, "mem_threshold": 70},
+    "penalty_scoring": {"cpu_high_penalty": 25},
+    "cors_origins": ["https://proxbalance.local"],
+}
+with open(config_file, "w") as f:
+    json.dump(base_config, f)
+
+
+# ====================================================================
+# Read-only views
+# ====================================================================
+print("=" * 70)
+print("Config Cache: Read-Only Views")
+print("=" * 70)
+
+config = load_config(config_file)
+test("The cached config matches the file", config == base_config)
+test("Setting a key raises TypeError", raises_type_error(lambda: config.__setitem__("proxmox_host", "x")))
+test("Nested dicts are read-only too",
+     raises_type_error(lambda: config["recommendation_thresholds"].update(cpu_threshold=10)))
+test("Lists are read-only too", raises_type_error(lambda: config["cors_origins"].append("*")))
+test("Deleting, popping and setdefault raise TypeError",
+     raises_type_error(lambda: config.pop("proxmox_host"))
+     and raises_type_error(lambda: config.setdefault("api_key", ""))
+     and raises_type_error(lambda: config.__delitem__("cors_origins")))
+test("A failed edit leaves the cached config unchanged", load_config(config_file) == base_config)
+test("Read-only configs still serialize and pickle as plain types",
+     json.loads(json.dumps(config)) == base_config
+     and type(pickle.loads(pickle.dumps(config))) is dict
+     and type(pickle.loads(pickle.dumps(config))["cors_origins"]) is list)
+test("Repeated loads share one parsed object", load_config(config_file) is config)
+
+
+# ====================================================================
+# Mutable copies
+# ====================================================================
+print("\n" + "=" * 70)
+print("Config Cache: Mutable Copies")
+print("=" * 70)
+
+editable = load_config(config_file, mutable=True)
+editable["proxmox_host"] = "10.0.0.2"
+editable["recommendation_thresholds"]["cpu_threshold"] = 10
+editable["cors_origins"].append("*")
+test("mutable=True returns plain dicts and lists",
+     type(editable) is dict and type(editable["recommendation_thresholds"]) is dict
+     and type(editable["cors_origins"]) is list)
+test("Editing a mutable copy does not touch the cache", load_config(config_file) == base_config)
+test("Each mutable copy is independent",
+     load_config(config_file, mutable=True) == base_config
+     and load_config(config_file, mutable=True) is not load_config(config_file, mutable=True))
+
+missing = load_config(os.path.join(tmpdir, "missing.json"))
+test("A missing file is reported and not cached",
+     missing.get("error") is True and get_config_cache_stats()["entries"] == 1,
+     f"Got {missing}, {get_config_cache_stats()}")
+
+
+# ====================================================================
+# Invalidation
+# ====================================================================
+print("\n" + "=" * 70)
+print("Config Cache: Invalidation and Revalidation")
+print("=" * 70)
+
+stats_before = get_config_cache_stats()
+test("save_config succeeds", save_config(editable, config_file))
+stats_after = get_config_cache_stats()
+reloaded = load_config(config_file)
+test("save_config invalidates the cached config",
+     reloaded["proxmox_host"] == "10.0.0.2" and reloaded is not config
+     and stats_after["invalidations"] == stats_before["invalidations"] + 1,
+     f"Got {stats_before} -> {stats_after}")
+
+penalties = load_penalty_config(config_file=config_file)
+test("Penalty config merges saved values over the defaults",
+     penalties["cpu_high_penalty"] == 25
+     and all(key in penalties for key in DEFAULT_PENALTY_CONFIG))
+test("The merged penalty config is cached and read-only",
+     load_penalty_config(config_file=config_file) is penalties
+     and raises_type_error(lambda: penalties.__setitem__("cpu_high_penalty", 0)))
+
+test("save_penalty_config succeeds", save_penalty_config({"cpu_high_penalty": 5}, config_file))
+test("save_penalty_config invalidates config and penalty caches",
+     load_penalty_config(config_file=config_file)["cpu_high_penalty"] == 5
+     and load_config(config_file)["penalty_scoring"] == {"cpu_high_penalty": 5})
+
+# Hand edits bypass save_config; the file's stat identity gives them away
+current = load_config(config_file)
+edited = load_config(config_file, mutable=True)
+edited["collection_interval_minutes"] = 15
+with open(config_file, "w") as f:
+    json.dump(edited, f)
+test("An edit on disk with a new size is picked up",
+     load_config(config_file)["collection_interval_minutes"] == 15)
+
+same_size = load_config(config_file, mutable=True)
+same_size["collection_interval_minutes"] = 25
+st = os.stat(config_file)
+with open(config_file, "w") as f:
+    json.dump(same_size, f)
+os.utime(config_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+test("A same-size edit is picked up from the mtime",
+     os.stat(config_file).st_size == st.st_size
+     and load_config(config_file)["collection_interval_minutes"] == 25)
+
+with open(config_file, "w") as f:
+    f.write("{not json")
+broken = load_config(config_file)
+test("Invalid JSON on disk is reported", broken.get("error") is True and "Invalid JSON" in broken["message"])
+
+cached = load_config(config_file)
+invalidate_config_cache(config_file)
+test("invalidate_config_cache forces a re-parse", load_config(config_file) is not cached)
+
+
+# ====================================================================
+# Call sites
+# ====================================================================
+print("\n" + "=" * 70)
+print("Config Cache: Call Sites")
+print("=" * 70)
+
+_MUTATING_METHODS = {"update", "setdefault", "pop", "popitem", "clear",
+                     "append", "extend", "insert", "remove", "sort", "reverse"}
+
+
+def _root_name(node):
+    """Variable at the bottom of x[...], x.attr and x.get(...) chains."""
+    while True:
+        if isinstance(node, (ast.Subscript, ast.Attribute)):
+            node = node.value
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "get":
+            node = node.func.value
+        else:
+            break
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def read_only_edits(path):
+    """In-place edits of a load_config()/load_penalty_config() result without mutable=True."""
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    edits = []
+    for func in ast.walk(tree):
+        if not isinstance(func, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        read_only = set()
+        for node in ast.walk(func):
+            if isinstance(node, ast.Assign) and isinstance(node.value, ast.Call):
+                called = node.value.func
+                if getattr(called, "id", getattr(called, "attr", None)) in ("load_config", "load_penalty_config"):
+                    mutable = any(k.arg == "mutable" and getattr(k.value, "value", False) is True
+                                  for k in node.value.keywords)
+                    for target in node.targets:
+                        if isinstance(target, ast.Name):
+                            (read_only.discard if mutable else read_only.add)(target.id)
+        for node in ast.walk(func):
+            targets = []
+            if isinstance(node, ast.Assign):
+                targets = node.targets
+            elif isinstance(node, (ast.AugAssign, ast.Delete)):
+                targets = [node.target] if isinstance(node, ast.AugAssign) else node.targets
+            elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                  and node.func.attr in _MUTATING_METHODS):
+                targets = [node.func]
+            for target in targets:
+                if isinstance(target, (ast.Subscript, ast.Attribute)) and _root_name(target) in read_only:
+                    edits.append(f"{os.path.relpath(path, root)}:{node.lineno} {func.name}")
+    return edits
+
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sources = [os.path.join(root, name) for name in ("app.py", "collector_api.py", "automigrate.py")]
+for dirpath, _dirnames, filenames in os.walk(os.path.join(root, "proxbalance")):
+    sources.extend(os.path.join(dirpath, name) for name in filenames if name.endswith(".py"))
+edits = [edit for path in sources if os.path.exists(path) for edit in read_only_edits(path)]
+test("No caller edits a read-only config in place", not edits, f"Edited at {edits}")
+
+shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+# ====================================================================
+# Results
+# ====================================================================
+print("\n" + "=" * 70)
+print("RESULTS")
+print("=" * 70)
+for r in test_results:
+    print(r)
+
+print(f"\n{passed} passed, {failed} failed, {passed + failed} total")
+
+if failed > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -0,0 +1,209 @@
+"""
+Tests for the history kept in SQLite between collections:
+  Guest behavior — stored classifications match classifying the profile history
+  Trend cache — analyses memoized per metrics generation
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+# Ensure project root is on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the history in a scratch database
+_tmpdir = tempfile.mkdtemp(prefix="proxbalance-test-")
+os.environ["PROXBALANCE_DB_PATH"] = os.path.join(_tmpdir, "proxbalance.db")
+
+from proxbalance.constants import MAX_GUEST_PROFILE_SAMPLES
+from proxbalance.db import get_connection, init_db
+from proxbalance.guest_profiles import (
+    get_guest_profile,
+    load_guest_classifications,
+    refresh_guest_behavior,
+    update_guest_profiles,
+)
+from proxbalance.metrics_store import append_samples, get_metrics_generation
+from proxbalance.trend_analysis import (
+    cached_guest_trends,
+    cached_node_trends,
+    get_trend_cache_stats,
+    invalidate_trend_cache,
+)
+
+init_db()
+
+passed = 0
+failed = 0
+test_results = []
+
+
+def test(name, condition, detail=""):
+    global passed, failed
+    if condition:
+        passed += 1
+        test_results.append(f"  PASS: {name}")
+    else:
+        failed += 1
+        test_results.append(f"  FAIL: {name} — {detail}")
+
+
+# ====================================================================
+# Guest behavior
+# ====================================================================
+print("=" * 70)
+print("Guest Behavior: Stored Classifications")
+print("=" * 70)
+
+BEHAVIOR_FIELDS = ("behavior", "confidence", "cpu_volatility", "peak_multiplier",
+                   "growth_rate_per_day", "data_points")
+
+
+def rrd_summary(avg, p95):
+    return {"cpu": {"min": avg / 2, "max": p95 * 1.1, "avg": avg, "p95": p95, "samples": 60},
+            "mem": {"min": 40, "max": 60, "avg": 50, "p95": 58, "samples": 60}}
+
+
+# vmid -> (node, [(cpu avg, cpu p95) per hourly observation, oldest first])
+histories = {
+    "201": ("pve1", [(20 + (i % 3) * 0.5, 24) for i in range(30)]),      # steady
+    "202": ("pve1", [(10, 30 + i % 4) for i in range(30)]),              # bursty
+    "203": ("pve2", [(10 + i, 12 + i) for i in range(30)]),              # growing
+    "204": ("pve2", [(15, 18) for _ in range(3)]),                       # too few to classify
+    "205": ("pve3", [(80 if i < 60 else 20, 85 if i < 60 else 24)        # more than the cap
+                     for i in range(MAX_GUEST_PROFILE_SAMPLES + 40)]),
+    "206": ("pve3", [(5 + (i % 2) * 30, 36) for i in range(20)]),        # cyclical
+}
+
+now = datetime.now(timezone.utc)
+conn = get_connection()
+with conn:
+    for vmid, (node, samples) in histories.items():
+        conn.executemany(
+            "INSERT INTO guest_profiles (vmid, node, timestamp, cpu_json, mem_json) VALUES (?, ?, ?, ?, ?)",
+            [(vmid, node, (now - timedelta(hours=len(samples) - i)).isoformat(),
+              json.dumps(rrd_summary(*sample)["cpu"]), json.dumps(rrd_summary(*sample)["mem"]))
+             for i, sample in enumerate(samples)],
+        )
+
+# This collection sees 206 on another node, adds 207's first observation
+# and has no CPU stats for 208
+written = update_guest_profiles({
+    **{vmid: (rrd_summary(*samples[-1]), node) for vmid, (node, samples) in histories.items() if vmid != "206"},
+    "206": (rrd_summary(5, 36), "pve1"),
+    "207": (rrd_summary(12, 14), "pve1"),
+    "208": ({"mem": {"avg": 10}}, "pve1"),
+})
+test("Observations without CPU stats are not written", written == 7, f"Got {written}")
+
+
+def classification_mismatches():
+    stored = load_guest_classifications()
+    mismatches = []
+    for vmid in sorted(set(histories) | {"207"}):
+        profile = get_guest_profile(vmid)
+        expected = {"vmid": vmid, "node": profile["node"], **{f: profile[f] for f in BEHAVIOR_FIELDS}}
+        if stored.get(vmid) != expected:
+            mismatches.append((vmid, stored.get(vmid), expected))
+    if set(stored) != set(histories) | {"207"}:
+        mismatches.append(("vmids", sorted(stored)))
+    return mismatches
+
+
+mismatches = classification_mismatches()
+test("Stored classifications match get_guest_profile field by field", not mismatches, f"Mismatches: {mismatches[:2]}")
+classifications = load_guest_classifications()
+test("The seeded histories cover every behavior",
+     {classifications[v]["behavior"] for v in ("201", "202", "203", "204", "206")}
+     == {"steady", "bursty", "growing", "unknown", "cyclical"},
+     f"Got {({v: c['behavior'] for v, c in classifications.items()})}")
+test("Classifications use only the capped window",
+     classifications["205"]["data_points"] == MAX_GUEST_PROFILE_SAMPLES
+     and conn.execute("SELECT COUNT(*) FROM guest_profiles WHERE vmid = '205'").fetchone()[0]
+     == MAX_GUEST_PROFILE_SAMPLES)
+test("A guest that moved is stored on its latest node", classifications["206"]["node"] == "pve1")
+
+with conn:
+    conn.execute("DELETE FROM guest_behavior")
+classified = refresh_guest_behavior()
+test("refresh_guest_behavior reclassifies every guest with a profile",
+     classified == 7 and not classification_mismatches(), f"Classified {classified}")
+test("refresh_guest_behavior can be limited to some guests",
+     refresh_guest_behavior([201, "203"]) == 2)
+
+# A database from before classifications were stored: profiles, no version 2
+with conn:
+    conn.execute("DELETE FROM guest_behavior")
+    conn.execute("DELETE FROM schema_version WHERE version = 2")
+init_db()
+test("init_db backfills classifications for schema version 2",
+     conn.execute("SELECT COUNT(*) FROM schema_version WHERE version = 2").fetchone()[0] == 1
+     and not classification_mismatches())
+
+
+# ====================================================================
+# Trend cache
+# ====================================================================
+print("\n" + "=" * 70)
+print("Trend Cache: One Analysis per Metrics Generation")
+print("=" * 70)
+
+
+def collect(cpu):
+    append_samples(
+        {"pve1": {"cpu": cpu, "memory": 55, "iowait": 2, "load_avg": 1.5, "guest_count": 12, "storage_usage_pct": 40}},
+        {"301": {"node": "pve1", "cpu": cpu / 2, "memory": 30, "disk_read_bps": 1000, "disk_write_bps": 500,
+                 "net_in_bps": 200, "net_out_bps": 100}},
+    )
+
+
+for cpu in (20, 25, 30, 35, 40):
+    collect(cpu)
+
+generation = get_metrics_generation()
+node_trends = cached_node_trends("pve1")
+guest_trends = cached_guest_trends("301")
+stats = get_trend_cache_stats()
+test("First lookups are misses",
+     stats["misses"] == 2 and stats["hits"] == 0 and stats["entries"] == 2
+     and stats["metrics_generation"] == generation, f"Got {stats}")
+test("A repeated lookup is a hit returning the same analysis",
+     cached_node_trends("pve1") is node_trends and cached_guest_trends(301) is guest_trends
+     and get_trend_cache_stats()["hits"] == 2, f"Got {get_trend_cache_stats()}")
+test("Other arguments are cached separately",
+     cached_node_trends("pve1", cpu_threshold=80.0) is not node_trends
+     and get_trend_cache_stats()["misses"] == 3)
+
+collect(45)
+test("append_samples moves the metrics generation", get_metrics_generation() > generation)
+refreshed = cached_node_trends("pve1")
+stats = get_trend_cache_stats()
+test("New samples clear the cache and the next lookup recomputes",
+     refreshed is not node_trends and stats["invalidations"] == 1 and stats["misses"] == 4
+     and stats["entries"] == 1 and stats["metrics_generation"] == get_metrics_generation(), f"Got {stats}")
+
+invalidate_trend_cache()
+stats = get_trend_cache_stats()
+test("invalidate_trend_cache drops every entry",
+     stats["invalidations"] == 2 and stats["entries"] == 0 and stats["hit_rate"] == round(2 / 6, 4),
+     f"Got {stats}")
+
+
+# ====================================================================
+# Results
+# ====================================================================
+print("\n" + "=" * 70)
+print("RESULTS")
+print("=" * 70)
+for r in test_results:
+    print(r)
+
+print(f"\n{passed} passed, {failed} failed, {passed + failed} total")
+
+if failed > 0:
+    sys.exit(1)
+else:
+    print("\nAll tests passed!")
+    sys.exit(0)
@@ -5,11 +5,14 @@ Tests for the scoring improvements:
   Phase 3 — CPU variance-weighted scoring
   Phase 4 — IOWait as migration trigger
   Integration — full generate_recommendations with realistic cluster data
+  Placement solver — annealing over multi-move plans
+  Storage — guest x node compatibility from recorded storage IDs
 """
 
 import sys
 import os
 import json
+import random
 
 # Ensure project root is on the path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -19,9 +22,14 @@ from proxbalance.scoring import (
     calculate_target_node_score,
     calculate_node_health_score,
     predict_post_migration_load,
+    NodeScoringContext,
 )
 from proxbalance.recommendation_analysis import build_structured_reason
-from proxbalance.recommendations import select_guests_to_migrate
+from proxbalance import scoring_matrix
+from proxbalance.recommendations import generate_recommendations, select_guests_to_migrate
+from proxbalance.storage import StorageCompatibilityMatrix, storage_index_from_topology, storage_topology_entry
+from proxbalance.placement_solver import PlacementProblem, solve_placement
+from proxbalance.tag_index import index_node_guests
 
 # ---------------------------------------------------------------------------
 # Helpers to build realistic test data
@@ -649,6 +657,269 @@ test("Convergence suppression overridden by IOWait-stressed nodes",
      "Convergence would still suppress")
 
 
+# ====================================================================
+# Scoring context: node-level terms reused, scores unchanged
+# ====================================================================
+print("\n" + "=" * 70)
+print("Scoring Context: Identical Scores")
+print("=" * 70)
+
+ctx_nodes = [node_ideal, node_moderate, node_stressed, node_danger]
+ctx_pending = {"pve-moderate": [make_guest(998, "pending-vm", mem_max_gb=16.0, cpu_current=40)]}
+ctx = NodeScoringContext(60.0, 70.0, cfg)
+mismatches = []
+for node in ctx_nodes:
+    for adding in (True, False):
+        plain = calculate_target_node_score(node, guest_for_scoring, ctx_pending, 60.0, 70.0,
+                                            penalty_config=cfg, return_details=True, adding=adding)
+        shared = calculate_target_node_score(node, guest_for_scoring, ctx_pending, 60.0, 70.0,
+                                             penalty_config=cfg, return_details=True, adding=adding, context=ctx)
+        if plain != shared:
+            mismatches.append((node["name"], adding))
+    if ctx.health_score(node) != calculate_node_health_score(node, node["metrics"], penalty_config=cfg):
+        mismatches.append((node["name"], "health"))
+
+test("Scores and details with a NodeScoringContext match scoring without one",
+     not mismatches, f"Mismatches: {mismatches}")
+
+# A call with other thresholds must not reuse the context's node terms
+other = calculate_target_node_score(node_stressed, guest_for_scoring, {}, 40.0, 50.0, penalty_config=cfg, context=ctx)
+test("Context is bypassed for different thresholds",
+     other == calculate_target_node_score(node_stressed, guest_for_scoring, {}, 40.0, 50.0, penalty_config=cfg),
+     f"Got: {other}")
+
+
+# ====================================================================
+# Vectorized Target Scoring: Parity With Scalar Scoring
+# ====================================================================
+print("\n" + "=" * 70)
+print("Vectorized Target Scoring: Parity With Scalar Scoring")
+print("=" * 70)
+
+if not scoring_matrix.HAS_NUMPY:
+    test("build_target_score_matrix returns None without NumPy",
+         scoring_matrix.build_target_score_matrix(ctx, {}, {}) is None)
+else:
+    # Mix of loads that cross the predicted-penalty tiers, the memory cap and
+    # overcommit
+    matrix_guests = {}
+    for i in range(40):
+        matrix_guests[str(500 + i)] = make_guest(
+            500 + i, f"mx-{i}", cpu_current=(i * 37) % 100, cpu_cores=1 + i % 8,
+            mem_used_gb=0.5 + (i * 7) % 30, mem_max_gb=1.0 + (i * 11) % 40,
+            disk_read_bps=(i % 5) * 6e7, disk_write_bps=(i % 3) * 4e7)
+    matrix_pending = {
+        "pve-moderate": [matrix_guests["503"], matrix_guests["517"]],
+        "pve-danger": [matrix_guests["529"]],
+    }
+    matrix_nodes = ctx_nodes + [make_node("pve-volatile", cpu_pct=55, mem_pct=88, total_mem_gb=96,
+                                          cpu_cores=24, iowait=12.0, overcommit_ratio=1.6,
+                                          avg_cpu=71, cpu_trend="rising", mem_trend="rising")]
+    profiles = [None, {"behavior": "steady"}, {"behavior": "bursty", "peak_multiplier": 1.1},
+                {"behavior": "bursty", "peak_multiplier": 1.8}, {"behavior": "growing", "growth_rate_per_day": 20}]
+
+    for thresholds in ((60.0, 70.0), (40.0, 50.0)):
+        mx_ctx = NodeScoringContext(thresholds[0], thresholds[1], cfg)
+        # Stability factors normally come from stored trend history; set them
+        # on the shared node terms so the predicted CPU penalty gets scaled
+        # (50 * 0.85 = 42.5 checks round-half-even)
+        mx_ctx.node_terms(matrix_nodes[-1])["cpu_stability_factor"] = 0.85
+        mx_ctx.node_terms(node_danger)["cpu_stability_factor"] = 1.3
+        matrix = scoring_matrix.build_target_score_matrix(mx_ctx, matrix_guests, matrix_pending)
+        mismatches = []
+        for step in range(2):
+            # The last guest has no matrix row and is scored by the scalar engine
+            for i, (key, guest) in enumerate(list(matrix_guests.items()) + [("599", make_guest(599, "mx-new"))]):
+                profile = profiles[i % len(profiles)]
+                for node in matrix_nodes:
+                    scalar = calculate_target_node_score(node, guest, matrix_pending, thresholds[0], thresholds[1],
+                                                         penalty_config=cfg, guest_profile=profile, context=mx_ctx)
+                    vector = matrix.score(key, guest, node, profile)
+                    if scalar != vector:
+                        mismatches.append((thresholds, step, key, node["name"], scalar, vector))
+            # Commit a guest, as the greedy loop does, and compare again
+            matrix_pending.setdefault("pve-ideal", []).append(matrix_guests["511"])
+        test(f"Matrix scores equal scalar scores, thresholds {thresholds}",
+             not mismatches, f"Mismatches: {mismatches[:3]}")
+        matrix_pending["pve-ideal"].pop()
+
+    built = matrix.columns_built
+    matrix.score("500", matrix_guests["500"], node_ideal)
+    matrix.score("501", matrix_guests["501"], node_ideal)
+    test("Only the committed target's column is rebuilt", matrix.columns_built == built,
+         f"Rebuilt {matrix.columns_built - built} columns")
+
+
+# ====================================================================
+# Incremental Scoring: Context and Columns Carried Into the Next Run
+# ====================================================================
+print("\n" + "=" * 70)
+print("Incremental Scoring: Context and Columns Carried Into the Next Run")
+print("=" * 70)
+
+current = ctx.current_score(node_stressed, guest_for_scoring)
+test("Current-node score matches scoring with adding=False",
+     current == calculate_target_node_score(node_stressed, guest_for_scoring, {}, 60.0, 70.0, penalty_config=cfg,
+                                            return_details=True, adding=False)
+     and ctx.current_score(node_stressed, guest_for_scoring) is current)
+
+# An automigrate batch: each step adds the last migration to the pending
+# guests; incremental regeneration must give the same result as a full one
+rng = random.Random(5)
+batch_nodes, batch_guests = {}, {}
+for i in range(6):
+    batch_nodes[f"pve{i}"] = make_node(f"pve{i}", cpu_pct=rng.uniform(20, 95), mem_pct=rng.uniform(30, 95),
+                                       total_mem_gb=rng.choice([64, 128, 256]), iowait=rng.uniform(0, 35),
+                                       overcommit_ratio=rng.uniform(0.5, 1.8))
+for g in range(300):
+    node_name = f"pve{rng.randrange(6)}"
+    batch_guests[str(100 + g)] = make_guest(100 + g, f"vm{100 + g}", cpu_current=rng.uniform(0, 90),
+                                            mem_used_gb=rng.uniform(0.5, 12), mem_max_gb=rng.uniform(1, 16),
+                                            cpu_cores=rng.choice([1, 2, 4, 8]), disk_read_bps=rng.uniform(0, 2e8),
+                                            node=node_name)
+    batch_nodes[node_name]["guests"].append(100 + g)
+
+batch_steps, pending = [], {}
+for _ in range(4):
+    moved = batch_guests[rng.choice(sorted(batch_guests))]
+    target = rng.choice(sorted(batch_nodes))
+    pending.setdefault(target, []).append(moved)
+    batch_steps.append((json.dumps(pending), [moved["node"], target]))
+
+
+def batch_run(pending_json, changed_nodes=None):
+    # Each request parses its own pending guests, as the API does
+    pending_guests = json.loads(pending_json) if pending_json else None
+    result = generate_recommendations(batch_nodes, batch_guests, 60.0, 70.0, 30.0,
+                                      initial_pending_guests=pending_guests, changed_nodes=changed_nodes)
+    return result.pop("incremental"), result
+
+
+full_results = [batch_run(step_pending)[1] for step_pending, _changed in batch_steps]
+batch_run(None)
+incremental_runs = [batch_run(step_pending, changed) for step_pending, changed in batch_steps]
+test("Incremental regeneration with pending guests equals a full run",
+     [result for _report, result in incremental_runs] == full_results
+     and any(result["recommendations"] for result in full_results))
+test("Incremental runs reuse the previous run's scoring work",
+     all(report["mode"] == "incremental" and report["work_avoided_pct"] > 0 for report, _result in incremental_runs),
+     f"Got {[report for report, _result in incremental_runs]}")
+
+if scoring_matrix.HAS_NUMPY:
+    # Next run: pending guests arrive as fresh records (from JSON) and one
+    # more guest is pending on pve-moderate
+    next_pending = {node: [dict(g) for g in guests] for node, guests in matrix_pending.items() if guests}
+    next_pending["pve-moderate"].append(dict(matrix_guests["539"]))
+    mx_ctx.begin_run()
+    matrix.begin_run(next_pending)
+    mismatches = []
+    for key, guest in matrix_guests.items():
+        for node in matrix_nodes:
+            scalar = calculate_target_node_score(node, guest, next_pending, 40.0, 50.0,
+                                                 penalty_config=cfg, context=mx_ctx)
+            if scalar != matrix.score(key, guest, node):
+                mismatches.append((key, node["name"]))
+    test("Carried-over matrix scores equal scalar scores", not mismatches, f"Mismatches: {mismatches[:3]}")
+    test("Columns with unchanged pending load are reused",
+         matrix.columns_reused == 4 and matrix.columns_built == 1,
+         f"Reused {matrix.columns_reused}, built {matrix.columns_built}")
+
+
+# ====================================================================
+# Placement Solver: Feasible Plans, Never Worse Than the Start
+# ====================================================================
+print("\n" + "=" * 70)
+print("Placement Solver: Feasible Plans, Never Worse Than the Start")
+print("=" * 70)
+
+solver_nodes = {n["name"]: dict(n, guests=[]) for n in (node_ideal, node_moderate, node_danger)}
+solver_nodes["pve-ideal"]["guests"] = [880]
+solver_guests = {"880": make_guest(880, "db-a", node="pve-ideal")}
+solver_guests["880"]["tags"] = {"exclude_groups": ["exclude_db"], "all_tags": ["exclude_db"]}
+solver_ctx = NodeScoringContext(60.0, 70.0, cfg)
+solver_candidates = []
+for i in range(8):
+    guest = make_guest(870 + i, f"busy-{i}", cpu_current=60 + i * 4, cpu_cores=4 + i % 3,
+                       mem_used_gb=6 + i, mem_max_gb=8 + i, node="pve-danger")
+    if i == 0:
+        guest["tags"] = {"exclude_groups": ["exclude_db"], "all_tags": ["exclude_db"]}
+    solver_candidates.append({
+        "key": str(870 + i), "guest": guest, "source": "pve-danger", "guest_profile": None,
+        "current_score": solver_ctx.current_score(solver_nodes["pve-danger"], guest)[0],
+        "targets": ["pve-ideal", "pve-moderate"],
+    })
+solver_problem = PlacementProblem(solver_nodes, solver_candidates, {}, index_node_guests(solver_nodes, solver_guests),
+                                  solver_ctx, 15)
+ticks = iter(range(10 ** 6))
+
+
+def replay_plan(moves):
+    """Objective of a plan, or None if a move fails the greedy loop's gates."""
+    pending, objective = {}, 0.0
+    for i, target, score, _earlier in moves:
+        candidate = solver_candidates[i]
+        expected = calculate_target_node_score(solver_nodes[target], candidate["guest"], pending, 60.0, 70.0,
+                                               penalty_config=cfg)
+        if expected != score or candidate["current_score"] - score < 15:
+            return None
+        if i == 0 and target == "pve-ideal":
+            return None  # anti-affinity with db-a
+        objective += score - candidate["current_score"]
+        pending.setdefault(target, []).append(candidate["guest"])
+    return objective
+
+
+solution = solve_placement(solver_problem, [], time_budget_ms=10 ** 9, max_iterations=3000,
+                           clock=lambda: next(ticks) / 1000.0)
+test("Solver finds moves from an empty plan", solution["moves"] and solution["objective"] < 0,
+     f"Got {solution['objective']}")
+test("Every planned move passes the greedy gates and the objective adds up",
+     replay_plan(solution["moves"]) is not None and abs(replay_plan(solution["moves"]) - solution["objective"]) < 1e-9)
+test("Objective curve only improves",
+     all(b["objective"] <= a["objective"] for a, b in zip(solution["curve"], solution["curve"][1:])))
+
+start_plan = [(i, target) for i, target, _score, _earlier in solution["moves"]]
+limited = solve_placement(solver_problem, start_plan, max_moves=2, time_budget_ms=10 ** 9, max_iterations=1000,
+                          clock=lambda: next(ticks) / 1000.0)
+test("max_moves trims the starting plan and bounds the search",
+     len(limited["moves"]) <= 2 and replay_plan(limited["moves"]) is not None, f"Got {len(limited['moves'])} moves")
+test("The result is never worse than the starting plan",
+     limited["objective"] <= limited["initial_objective"])
+
+
+# ====================================================================
+# Storage Compatibility Matrix
+# ====================================================================
+print("\n" + "=" * 70)
+print("Storage Compatibility Matrix")
+print("=" * 70)
+
+storage_topology = {
+    "pve1": storage_topology_entry([{"storage": "local-lvm", "active": 1}, {"storage": "ceph", "active": 1, "shared": 1}]),
+    "pve2": storage_topology_entry([{"storage": "local-lvm", "active": 1}, {"storage": "ceph", "active": 0, "shared": 1}]),
+    "pve3": storage_topology_entry([{"storage": "local-lvm", "active": 1}, {"storage": "ceph", "enabled": 0, "active": 1}]),
+}
+storage_nodes = {"pve4": {"storage": [{"storage": "ceph", "active": True}]}}
+storage_guests = {"700": dict(make_guest(700, "on-ceph"), storage_ids=["ceph", "local-lvm"]),
+                  "701": dict(make_guest(701, "local-only"), storage_ids=["local-lvm"]),
+                  "702": dict(make_guest(702, "no-disks"), storage_ids=[]),
+                  "703": make_guest(703, "not-recorded")}
+storage_matrix = StorageCompatibilityMatrix(storage_guests, storage_index_from_topology(storage_topology, storage_nodes))
+
+test("Inactive and disabled storage is unavailable",
+     storage_matrix.compatible_nodes(700) == ["pve1"], f"Got {storage_matrix.compatible_nodes(700)}")
+test("Missing storage is reported per node",
+     storage_matrix.missing("700", "pve2") == ["ceph"] and storage_matrix.missing("700", "pve4") == ["local-lvm"])
+test("Node storage lists fill in nodes absent from the topology",
+     storage_matrix.is_compatible(701, "pve4") is False and storage_matrix.is_compatible(701, "pve3") is True)
+test("A guest without disks fits every node",
+     storage_matrix.compatible_nodes(702) == ["pve1", "pve2", "pve3", "pve4"])
+test("Guests and nodes without recorded storage are unknown",
+     storage_matrix.is_compatible(703, "pve1") is None and storage_matrix.is_compatible(700, "pve9") is None)
+test("Guests with the same storage share one requirement set",
+     storage_matrix.stats()["requirement_sets"] == 3, f"Got {storage_matrix.stats()}")
+
+
 # ====================================================================
 # Results
 # ====================================================================